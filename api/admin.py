@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+from api.models import Snapshot
+from api.tasks import refresh_snapshot
+
+
+class SnapshotAdmin(admin.ModelAdmin):
+    list_display = ["__str__", "generated_at", "content_hash"]
+    readonly_fields = ["kind", "param", "file", "content_type", "content_hash", "generated_at"]
+    actions = ["refresh"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Regenerate selected snapshots now")
+    def refresh(self, request, queryset):
+        for snapshot in queryset:
+            refresh_snapshot.delay(snapshot.kind, snapshot.param)
+        self.message_user(request, "Regeneration of %d snapshot(s) has been queued." % queryset.count())
+
+
+admin.site.register(Snapshot, SnapshotAdmin)
@@ -0,0 +1,106 @@
+"""
+HTTP caching for the read-only API.
+
+All API responses are validated against a single data generation token held in the cache, which is
+discarded by the signal handlers in api.signals whenever a change is committed to any of the records
+the API exposes. The ETag and Last-Modified of a response are derived from the current token, so a
+conditional request for unchanged data is answered with 304 Not Modified before the view runs any
+queries, and the heavy adhoc exports can be stored whole in the cache, keyed on the token, until the
+next change.
+"""
+
+import datetime
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+
+GENERATION_KEY = "api:data-generation"
+
+
+def get_generation():
+    """Return a (token, timestamp) pair identifying the current state of the API data"""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = (uuid.uuid4().hex, timezone.now())
+        if not cache.add(GENERATION_KEY, generation, timeout=None):
+            generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def expire_generation():
+    cache.delete(GENERATION_KEY)
+
+
+def api_cache(store=False, daily=False):
+    """
+    Decorator for API views, to answer conditional GET requests from the data generation token and
+    mark responses as cacheable for API_CACHE_MAX_AGE seconds.
+
+    store=True additionally keeps the full response in the cache until the data changes, for views
+    whose output depends on nothing but the URL. daily=True is for views whose output also depends on
+    the current date.
+    """
+
+    def get_etag(request, *args, **kwargs):
+        token, timestamp = get_generation()
+        # responses served from snapshots (see api.snapshots) differ by Accept-Encoding
+        key = "%s:%s:%s" % (token, request.headers.get("Accept", ""), request.headers.get("Accept-Encoding", ""))
+        if daily:
+            key += ":" + datetime.date.today().isoformat()
+        return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+    def get_last_modified(request, *args, **kwargs):
+        token, timestamp = get_generation()
+        if daily:
+            timestamp = max(timestamp, datetime.datetime.combine(datetime.date.today(), datetime.time()))
+        return timestamp
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def stored_view(request, *args, **kwargs):
+            token, timestamp = get_generation()
+            url_hash = hashlib.md5((request.get_full_path() + ":" + request.headers.get("Accept", "")).encode("utf-8"))
+            key = "api-response:%s:%s" % (token, url_hash.hexdigest())
+
+            stored = cache.get(key)
+            if stored is not None:
+                content, content_type = stored
+                return HttpResponse(content, content_type=content_type)
+
+            response = view_func(request, *args, **kwargs)
+            # snapshot responses are already stored, and change independently of the data generation
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.has_header("Content-Encoding")
+                and not response.has_header("X-Snapshot-Generated")
+            ):
+                cache.set(key, (response.content, response["Content-Type"]), settings.API_RESPONSE_CACHE_TIMEOUT)
+            return response
+
+        conditional_view = condition(etag_func=get_etag, last_modified_func=get_last_modified)(
+            stored_view if store else view_func
+        )
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_func(request, *args, **kwargs)
+
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                patch_cache_control(response, public=True, max_age=settings.API_CACHE_MAX_AGE)
+                patch_vary_headers(response, ["Accept", "Accept-Encoding"])
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,281 @@
+"""
+Bulk export of the catalogue (productions, releasers, parties and BBSes) as gzipped NDJSON or CSV,
+for consumers that mirror the whole database rather than crawling the paginated API.
+
+Records are read through a server-side cursor in id order and serialised by hand from values_list
+rows. The related records for each batch of EXPORT_BATCH_SIZE rows are fetched with one query per
+relation, so memory use stays constant however large the table grows.
+"""
+
+import csv
+import io
+import json
+import zlib
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+from taggit.models import TaggedItem
+
+from bbs.models import BBS
+from common.utils.fuzzy_date import FuzzyDate
+from demoscene.models import Membership, Nick, NickVariant, Releaser
+from parties.models import Party
+from platforms.models import Platform
+from productions.models import Production, ProductionType
+
+
+EXPORT_BATCH_SIZE = 2000
+FORMATS = ["ndjson", "csv"]
+
+
+def iter_batches(queryset, fields):
+    """Yield lists of up to EXPORT_BATCH_SIZE values_list rows from the queryset, in id order"""
+    rows = queryset.order_by("id").values_list(*fields).iterator(chunk_size=EXPORT_BATCH_SIZE)
+    while True:
+        batch = list(islice(rows, EXPORT_BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def group_rows(queryset, key_field, fields):
+    """Return a dict mapping each value of key_field to the list of (fields) rows for it in the queryset"""
+    grouped = {}
+    for key, *values in queryset.values_list(key_field, *fields):
+        grouped.setdefault(key, []).append(values)
+    return grouped
+
+
+def get_tags(model, ids):
+    return group_rows(
+        TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(model), object_id__in=ids).order_by(
+            "tag__name"
+        ),
+        "object_id",
+        ["tag__name"],
+    )
+
+
+def format_date(date, precision):
+    return FuzzyDate(date, precision).numeric_format() if date and precision else None
+
+
+def demozoo_url(url_name, id):
+    return settings.BASE_URL + reverse(url_name, args=[str(id)])
+
+
+NICK_FIELDS = [
+    "nick__name",
+    "nick__abbreviation",
+    "nick__releaser_id",
+    "nick__releaser__name",
+    "nick__releaser__is_group",
+]
+
+
+def nick_record(name, abbreviation, releaser_id, releaser_name, is_group):
+    return {
+        "name": name,
+        "abbreviation": abbreviation,
+        "releaser": {"id": releaser_id, "name": releaser_name, "is_group": is_group},
+    }
+
+
+def export_productions():
+    platform_names = dict(Platform.objects.values_list("id", "name"))
+    type_names = dict(ProductionType.objects.values_list("id", "name"))
+    url_names = {"music": "music", "graphics": "graphic"}
+
+    fields = ["id", "title", "supertype", "release_date_date", "release_date_precision"]
+    for batch in iter_batches(Production.objects.all(), fields):
+        ids = [row[0] for row in batch]
+        platform_ids = group_rows(
+            Production.platforms.through.objects.filter(production_id__in=ids).order_by("platform_id"),
+            "production_id",
+            ["platform_id"],
+        )
+        type_ids = group_rows(
+            Production.types.through.objects.filter(production_id__in=ids).order_by("productiontype_id"),
+            "production_id",
+            ["productiontype_id"],
+        )
+        author_nicks = group_rows(
+            Production.author_nicks.through.objects.filter(production_id__in=ids).order_by("id"),
+            "production_id",
+            NICK_FIELDS,
+        )
+        affiliation_nicks = group_rows(
+            Production.author_affiliation_nicks.through.objects.filter(production_id__in=ids).order_by("id"),
+            "production_id",
+            NICK_FIELDS,
+        )
+        tags = get_tags(Production, ids)
+
+        for id, title, supertype, release_date_date, release_date_precision in batch:
+            yield {
+                "id": id,
+                "demozoo_url": demozoo_url(url_names.get(supertype, "production"), id),
+                "title": title,
+                "supertype": supertype,
+                "release_date": format_date(release_date_date, release_date_precision),
+                "platforms": [
+                    {"id": platform_id, "name": platform_names.get(platform_id)}
+                    for (platform_id,) in platform_ids.get(id, [])
+                ],
+                "types": [{"id": type_id, "name": type_names.get(type_id)} for (type_id,) in type_ids.get(id, [])],
+                "author_nicks": [nick_record(*row) for row in author_nicks.get(id, [])],
+                "author_affiliation_nicks": [nick_record(*row) for row in affiliation_nicks.get(id, [])],
+                "tags": [name for (name,) in tags.get(id, [])],
+            }
+
+
+def export_releasers():
+    for batch in iter_batches(Releaser.objects.all(), ["id", "name", "is_group"]):
+        ids = [row[0] for row in batch]
+        nicks = group_rows(
+            Nick.objects.filter(releaser_id__in=ids).order_by("id"), "releaser_id", ["id", "name", "abbreviation"]
+        )
+        variants = group_rows(
+            NickVariant.objects.filter(nick__releaser_id__in=ids).order_by("name"), "nick_id", ["name"]
+        )
+        memberships = group_rows(
+            Membership.objects.filter(member_id__in=ids).order_by("id"),
+            "member_id",
+            ["group_id", "group__name", "is_current"],
+        )
+
+        for id, name, is_group in batch:
+            yield {
+                "id": id,
+                "demozoo_url": demozoo_url("group" if is_group else "scener", id),
+                "name": name,
+                "is_group": is_group,
+                "nicks": [
+                    {
+                        "name": nick_name,
+                        "abbreviation": abbreviation,
+                        "is_primary_nick": nick_name == name,
+                        "variants": [variant_name for (variant_name,) in variants.get(nick_id, [])],
+                    }
+                    for nick_id, nick_name, abbreviation in nicks.get(id, [])
+                ],
+                "member_of": [
+                    {"group": {"id": group_id, "name": group_name}, "is_current": is_current}
+                    for group_id, group_name, is_current in memberships.get(id, [])
+                ],
+            }
+
+
+def export_parties():
+    fields = [
+        "id",
+        "name",
+        "tagline",
+        "party_series_id",
+        "party_series__name",
+        "start_date_date",
+        "start_date_precision",
+        "end_date_date",
+        "end_date_precision",
+        "location",
+        "is_online",
+        "country_code",
+        "latitude",
+        "longitude",
+        "website",
+    ]
+    for batch in iter_batches(Party.objects.all(), fields):
+        for row in batch:
+            party = dict(zip(fields, row))
+            yield {
+                "id": party["id"],
+                "demozoo_url": demozoo_url("party", party["id"]),
+                "name": party["name"],
+                "tagline": party["tagline"],
+                "party_series": {"id": party["party_series_id"], "name": party["party_series__name"]},
+                "start_date": format_date(party["start_date_date"], party["start_date_precision"]),
+                "end_date": format_date(party["end_date_date"], party["end_date_precision"]),
+                "location": party["location"],
+                "is_online": party["is_online"],
+                "country_code": party["country_code"],
+                "latitude": party["latitude"],
+                "longitude": party["longitude"],
+                "website": party["website"],
+            }
+
+
+def export_bbses():
+    fields = ["id", "name", "location", "country_code", "latitude", "longitude"]
+    for batch in iter_batches(BBS.objects.all(), fields):
+        tags = get_tags(BBS, [row[0] for row in batch])
+        for id, name, location, country_code, latitude, longitude in batch:
+            yield {
+                "id": id,
+                "demozoo_url": demozoo_url("bbs", id),
+                "name": name,
+                "location": location,
+                "country_code": country_code,
+                "latitude": latitude,
+                "longitude": longitude,
+                "tags": [tag_name for (tag_name,) in tags.get(id, [])],
+            }
+
+
+EXPORTERS = {
+    "productions": export_productions,
+    "releasers": export_releasers,
+    "parties": export_parties,
+    "bbses": export_bbses,
+}
+
+
+def export_filename(kind, format):
+    return "demozoo-%s.%s.gz" % (kind, format)
+
+
+def csv_value(value):
+    """Flatten a record value into a single CSV cell; nested records are represented by their names"""
+    if isinstance(value, list):
+        return "; ".join(csv_value(item) for item in value)
+    elif isinstance(value, dict):
+        return value["name"]
+    elif value is None:
+        return ""
+    else:
+        return str(value)
+
+
+def generate_lines(kind, format):
+    records = EXPORTERS[kind]()
+    if format == "ndjson":
+        for record in records:
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+    else:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for i, record in enumerate(records):
+            if i == 0:
+                writer.writerow(record.keys())
+            writer.writerow([csv_value(value) for value in record.values()])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+
+def generate_export(kind, format, digest=None):
+    """
+    Yield the gzip-compressed export of the given kind ('productions', 'releasers' etc) and format. If a
+    hashlib digest is given, it is updated with the uncompressed content
+    """
+    # wbits=31 gives a gzip header and trailer rather than a bare zlib stream
+    compressor = zlib.compressobj(wbits=31)
+    for line in generate_lines(kind, format):
+        line = line.encode("utf-8")
+        if digest is not None:
+            digest.update(line)
+        data = compressor.compress(line)
+        if data:
+            yield data
+    yield compressor.flush()
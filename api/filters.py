@@ -1,11 +1,10 @@
-from django.db.models import Q
 from django_filters import rest_framework as filters
 
 from bbs.models import BBS
 from demoscene.models import Releaser
 from parties.models import Party, PartySeries
 from platforms.models import Platform
-from productions.models import Production, ProductionLink, ProductionType
+from productions.models import Production, ProductionLink, ProductionType, ReleaserProduction
 
 
 class PlatformFilter(filters.FilterSet):
@@ -42,7 +41,11 @@ class ProductionFilter(filters.FilterSet):
     link_url = filters.CharFilter(method="filter_link_url", label="Link URL")
 
     def filter_author(self, queryset, name, value):
-        return queryset.filter(Q(author_nicks__releaser_id=value) | Q(author_affiliation_nicks__releaser_id=value))
+        return queryset.filter(
+            id__in=ReleaserProduction.objects.filter(releaser_id=value, role__in=["author", "affiliation"]).values(
+                "production_id"
+            )
+        )
 
     def filter_competition_placing_min(self, queryset, name, value):
         return queryset.filter(competition_placings__position__lte=value, competition_placings__ranking__gt="")
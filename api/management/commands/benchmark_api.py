@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+
+from productions.models import ReleaserProduction
+
+
+class Command(BaseCommand):
+    """
+    Time requests to the API production listings, with the listing records built by the nested
+    serializers and by api.fast_serializers, and report the requests per second for each
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20, help="Number of requests to time for each URL")
+        parser.add_argument(
+            "--releaser", type=int, help="Releaser ID to list productions for (default: the one with the most)"
+        )
+
+    def handle(self, *args, **kwargs):
+        releaser_id = kwargs["releaser"]
+        if releaser_id is None:
+            busiest = (
+                ReleaserProduction.objects.filter(role="author")
+                .values("releaser_id")
+                .annotate(production_count=Count("id"))
+                .order_by("-production_count")
+                .first()
+            )
+            releaser_id = busiest["releaser_id"] if busiest else 1
+
+        urls = ["/api/v1/productions/", "/api/v1/releasers/%d/productions/" % releaser_id]
+        for url in urls:
+            before = self.requests_per_second(url, kwargs["requests"], fast=False)
+            after = self.requests_per_second(url, kwargs["requests"], fast=True)
+            print("%s: %.1f req/s before, %.1f req/s after (%.1fx)" % (url, before, after, after / before))
+
+    def requests_per_second(self, url, request_count, fast):
+        # the test client talks to the application directly, under its own host name
+        with override_settings(API_FAST_LISTINGS=fast, ALLOWED_HOSTS=["testserver"]):
+            client = Client()
+            client.get(url)  # warm up
+            start_time = time.perf_counter()
+            for i in range(request_count):
+                client.get(url)
+            return request_count / (time.perf_counter() - start_time)
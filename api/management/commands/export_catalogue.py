@@ -0,0 +1,39 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.export import EXPORTERS, FORMATS, export_filename, generate_export
+from api.snapshots import generate_export_snapshot
+
+
+class Command(BaseCommand):
+    help = "Write gzipped bulk exports of productions, releasers, parties and BBSes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("kinds", nargs="*", help="Kinds of record to export (default: all of %s)" % list(EXPORTERS))
+        parser.add_argument("--format", choices=FORMATS, default="ndjson")
+        parser.add_argument("--output-dir", default=".", help="Directory to write the export files to")
+        parser.add_argument(
+            "--snapshot",
+            action="store_true",
+            help="Store the exports as snapshots to be served at /api/export/, instead of writing them to files",
+        )
+
+    def handle(self, *args, **kwargs):
+        kinds = kwargs["kinds"] or list(EXPORTERS)
+        for kind in kinds:
+            if kind not in EXPORTERS:
+                raise CommandError("Unknown export: %s" % kind)
+
+        if kwargs["snapshot"]:
+            for kind in kinds:
+                snapshot = generate_export_snapshot(kind, kwargs["format"])
+                print("Stored %s" % snapshot.file.name)
+            return
+
+        for kind in kinds:
+            path = os.path.join(kwargs["output_dir"], export_filename(kind, kwargs["format"]))
+            with open(path, "wb") as f:
+                for data in generate_export(kind, kwargs["format"]):
+                    f.write(data)
+            print("Wrote %s" % path)
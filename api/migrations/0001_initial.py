@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('object_type', models.CharField(max_length=32)),
+                ('object_id', models.IntegerField()),
+                ('action', models.CharField(choices=[('update', 'Update'), ('delete', 'Delete')], max_length=16)),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['object_type', 'id'], name='api_change_object__f09d54_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Snapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=64)),
+                ('param', models.CharField(blank=True, max_length=64)),
+                ('file', models.FileField(max_length=255, upload_to='api_snapshots')),
+                ('content_type', models.CharField(max_length=255)),
+                ('content_hash', models.CharField(help_text='SHA-256 of the uncompressed content', max_length=64)),
+                ('generated_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['kind', 'param'],
+                'unique_together': {('kind', 'param')},
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+from django.db import models
+
+
+# Models whose changes are recorded in the change log, keyed by model label, with the names they
+# are given in the change feed
+CHANGE_LOG_TYPES = {
+    "productions.production": "production",
+    "demoscene.releaser": "releaser",
+    "parties.party": "party",
+    "parties.partyseries": "party_series",
+    "bbs.bbs": "bbs",
+}
+
+# Models that form part of the API representation of the models above; changes to these are
+# recorded as updates to the records they belong to
+CHANGE_LOG_RELATED_MODELS = {
+    "productions.credit",
+    "productions.screenshot",
+    "productions.productionlink",
+    "productions.soundtracklink",
+    "productions.packmember",
+    "demoscene.nick",
+    "demoscene.nickvariant",
+    "demoscene.membership",
+    "demoscene.releaserexternallink",
+    "parties.competition",
+    "parties.competitionplacing",
+    "parties.partyexternallink",
+    "bbs.operator",
+    "bbs.affiliation",
+}
+
+
+class Change(models.Model):
+    """
+    Append-only log of changes to the records exposed through the API, for mirrors to sync from
+    incrementally (see api.signals). The id is the cursor passed to /api/v1/changes/.
+    """
+
+    ACTION_CHOICES = [
+        ("update", "Update"),
+        ("delete", "Delete"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    object_type = models.CharField(max_length=32)
+    object_id = models.IntegerField()
+    action = models.CharField(max_length=16, choices=ACTION_CHOICES)
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return "%s %s %d" % (self.action, self.object_type, self.object_id)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["object_type", "id"]),
+        ]
+
+
+class Snapshot(models.Model):
+    """
+    A stored, gzip-compressed copy of the output of one of the adhoc API exports, regenerated on a
+    schedule and served in place of running the export on every request (see api.snapshots)
+    """
+
+    kind = models.CharField(max_length=64)
+    param = models.CharField(max_length=64, blank=True)
+    file = models.FileField(upload_to="api_snapshots", max_length=255)
+    content_type = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64, help_text="SHA-256 of the uncompressed content")
+    generated_at = models.DateTimeField()
+
+    def __str__(self):
+        return "%s:%s" % (self.kind, self.param) if self.param else self.kind
+
+    class Meta:
+        ordering = ["kind", "param"]
+        unique_together = [("kind", "param")]
@@ -0,0 +1,61 @@
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from common.utils.pagination import KeysetPaginator
+
+
+class KeysetPageNumberPagination(PageNumberPagination):
+    """
+    Page number pagination where the next and previous links also carry a cursor, so that
+    following them locates the page by its ordering keys rather than by offset (see
+    common.utils.pagination.KeysetPaginator). Responses to cursor requests give an estimated
+    count for large results; the exact count is available from the first page.
+    """
+
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        try:
+            paginator = KeysetPaginator(queryset, page_size, estimate_count=bool(cursor))
+        except ValueError:
+            # ordering is not suitable for keyset pagination
+            return super().paginate_queryset(queryset, request, view=view)
+
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number, cursor=cursor)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            # The browsable API should display pagination controls.
+            self.display_page_controls = True
+
+        return list(self.page)
+
+    def get_next_link(self):
+        url = super().get_next_link()
+        if url is None:
+            return None
+        cursor = getattr(self.page, "next_cursor", None)
+        if cursor:
+            return replace_query_param(url, self.cursor_query_param, cursor)
+        return remove_query_param(url, self.cursor_query_param)
+
+    def get_previous_link(self):
+        url = super().get_previous_link()
+        if url is None:
+            return None
+        cursor = getattr(self.page, "previous_cursor", None)
+        if cursor:
+            return replace_query_param(url, self.cursor_query_param, cursor)
+        return remove_query_param(url, self.cursor_query_param)
@@ -1,6 +1,8 @@
 from django.conf import settings
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 
+from api.models import Change
 from bbs.models import BBS, Affiliation, Operator
 from demoscene.models import Membership, Nick, Releaser, ReleaserExternalLink
 from parties.models import Competition, CompetitionPlacing, Party, PartyExternalLink, PartySeries
@@ -422,3 +424,21 @@ class BBSSerializer(OutputFieldsMixin, serializers.HyperlinkedModelSerializer):
             "affiliations",
             "tags",
         ]
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    # names under which the change log types are registered on the API router, where they differ
+    ROUTE_NAMES = {"party_series": "partyseries"}
+
+    cursor = serializers.IntegerField(source="id", read_only=True)
+    type = serializers.CharField(source="object_type", read_only=True)
+    id = serializers.IntegerField(source="object_id", read_only=True)
+    url = serializers.SerializerMethodField(read_only=True)
+
+    def get_url(self, change):
+        route_name = self.ROUTE_NAMES.get(change.object_type, change.object_type)
+        return reverse("%s-detail" % route_name, args=[change.object_id], request=self.context.get("request"))
+
+    class Meta:
+        model = Change
+        fields = ["cursor", "type", "id", "action", "timestamp", "url"]
@@ -0,0 +1,155 @@
+from django.db import transaction
+from django.db.models import ForeignKey
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from api.caching import expire_generation
+from api.models import CHANGE_LOG_RELATED_MODELS, CHANGE_LOG_TYPES, Change
+from common.signals import bulk_saved, foreign_key_changed
+from common.utils.fragment_cache import bulk_dependents
+from platforms.models import Platform
+from productions.models import ProductionType
+
+
+# Record changes to the records exposed through the API in the change log (api.models.Change).
+# The affected records are worked out at the time of the change, while related records still exist,
+# and written once the transaction commits, so that a rolled-back edit leaves no trace and entries
+# become visible in (very nearly) id order. Committing a change also expires the API data generation
+# (see api.caching), so that cached API responses are recomputed.
+
+
+def is_tracked(model):
+    label = model._meta.label_lower
+    return label in CHANGE_LOG_TYPES or label in CHANGE_LOG_RELATED_MODELS
+
+
+def own_and_parent_objects(instance):
+    """
+    Return (object type, id) pairs for the instance itself, if it is one of the logged types, and the
+    logged records that it has a foreign key to
+    """
+    objects = set()
+    label = instance._meta.label_lower
+    if label in CHANGE_LOG_TYPES and instance.pk is not None:
+        objects.add((CHANGE_LOG_TYPES[label], instance.pk))
+    for field in instance._meta.concrete_fields:
+        if isinstance(field, ForeignKey):
+            related_label = field.related_model._meta.label_lower
+            value = getattr(instance, field.attname)
+            if related_label in CHANGE_LOG_TYPES and value is not None:
+                objects.add((CHANGE_LOG_TYPES[related_label], value))
+    return objects
+
+
+def changed_objects(instance):
+    """
+    Return (object type, id) pairs for the logged records whose API representation may be affected by
+    a change to the instance: itself and the records it belongs to, plus anything else that displays it
+    (as given by its fragment_cache_dependents method)
+    """
+    objects = own_and_parent_objects(instance)
+    if hasattr(instance, "fragment_cache_dependents"):
+        for model_label, pks in instance.fragment_cache_dependents():
+            if model_label in CHANGE_LOG_TYPES:
+                objects.update((CHANGE_LOG_TYPES[model_label], pk) for pk in pks if pk is not None)
+    return objects
+
+
+def record_on_commit(objects, action="update"):
+    if not objects:
+        return
+
+    def record():
+        Change.objects.bulk_create(
+            [
+                Change(object_type=object_type, object_id=object_id, action=action)
+                for object_type, object_id in sorted(objects)
+            ]
+        )
+        expire_generation()
+
+    transaction.on_commit(record)
+
+
+def on_foreign_key_changed(sender, instance, old_instance, **kwargs):
+    # if an object is being moved to a different parent, the old parent has changed too
+    record_on_commit(own_and_parent_objects(old_instance) - own_and_parent_objects(instance))
+
+
+for model_label in sorted(set(CHANGE_LOG_TYPES) | CHANGE_LOG_RELATED_MODELS):
+    foreign_key_changed.connect(on_foreign_key_changed, sender=model_label)
+
+
+@receiver(post_save)
+def on_save(sender, instance, raw=False, **kwargs):
+    if raw or not is_tracked(sender):
+        return
+    record_on_commit(changed_objects(instance))
+
+
+@receiver(bulk_saved)
+def on_bulk_saved(sender, objects, **kwargs):
+    if not is_tracked(sender):
+        return
+    changed = set()
+    for obj in objects:
+        changed |= own_and_parent_objects(obj)
+    if hasattr(sender, "fragment_cache_dependents"):
+        for model_label, pks in bulk_dependents(sender, objects):
+            if model_label in CHANGE_LOG_TYPES:
+                changed.update((CHANGE_LOG_TYPES[model_label], pk) for pk in pks if pk is not None)
+    record_on_commit(changed)
+
+
+@receiver(pre_delete)
+def on_pre_delete(sender, instance, **kwargs):
+    if not is_tracked(sender):
+        return
+    label = sender._meta.label_lower
+    objects = changed_objects(instance)
+    if label in CHANGE_LOG_TYPES:
+        objects.discard((CHANGE_LOG_TYPES[label], instance.pk))
+    record_on_commit(objects)
+
+
+@receiver(post_delete)
+def on_delete(sender, instance, **kwargs):
+    label = sender._meta.label_lower
+    if label in CHANGE_LOG_TYPES:
+        record_on_commit({(CHANGE_LOG_TYPES[label], instance.pk)}, action="delete")
+
+
+@receiver(post_save, sender=Platform)
+@receiver(post_delete, sender=Platform)
+@receiver(post_save, sender=ProductionType)
+@receiver(post_delete, sender=ProductionType)
+def on_lookup_table_changed(sender, **kwargs):
+    # platforms and production types are not in the change log, but appear in API responses
+    transaction.on_commit(expire_generation)
+
+
+def get_related_pks(sender, instance, model, reverse):
+    """Return the pks of the objects of type model related to instance through the m2m table sender"""
+    for field in (model if reverse else type(instance))._meta.many_to_many:
+        if field.remote_field.through is sender:
+            accessor_name = field.remote_field.get_accessor_name() if reverse else field.name
+            return set(getattr(instance, accessor_name).values_list("pk", flat=True))
+    return set()
+
+
+@receiver(m2m_changed)
+def on_m2m_changed(sender, instance, action, model, pk_set, reverse, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    objects = set()
+    if is_tracked(type(instance)):
+        objects |= own_and_parent_objects(instance)
+    if is_tracked(model):
+        if action == "pre_clear":
+            # pk_set is not given for clear(), so find out what is about to be removed
+            pk_set = get_related_pks(sender, instance, model, reverse)
+        if pk_set:
+            for obj in model._default_manager.filter(pk__in=pk_set):
+                objects |= own_and_parent_objects(obj)
+    record_on_commit(objects)
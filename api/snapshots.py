@@ -0,0 +1,209 @@
+"""
+Precomputed snapshots of the heavy adhoc API exports.
+
+The exports listed in SNAPSHOT_KINDS are run on a schedule by api.tasks.refresh_snapshots, and their
+output is written to storage as a gzip file named after its content hash, with a Snapshot record
+pointing to it. The views serve the stored file when there is one, falling back on running the
+export directly for parameters that have not been snapshotted.
+
+The bulk catalogue exports (see api.export) are too slow to run within a request at all, so they are
+only ever served from snapshots, regenerated daily by api.tasks.refresh_export_snapshots.
+"""
+
+import datetime
+import gzip
+import hashlib
+import re
+import tempfile
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.utils.module_loading import import_string
+
+from api.caching import expire_generation
+from api.export import EXPORTERS, FORMATS, export_filename, generate_export
+from api.models import Snapshot
+from api.utils import get_default_month
+
+
+accepts_gzip = re.compile(r"\bgzip\b")
+
+
+def current_and_previous_year():
+    year = datetime.date.today().year
+    return [str(year - 1), str(year)]
+
+
+def default_month():
+    return [get_default_month().strftime("%Y-%m")]
+
+
+# The exports that are snapshotted, keyed by kind: the function that generates the content (taking the
+# parameter as its argument, if the kind has one), the content type to serve it as, and a function
+# returning the parameters to generate snapshots for on each scheduled refresh
+SNAPSHOT_KINDS = {
+    "pouet-credits": ("api.views.adhoc.pouet.generate_credits", "text/javascript", None),
+    "pouet-prod-ids": ("api.views.adhoc.pouet.generate_prod_demozoo_ids", "text/javascript", None),
+    "pouet-group-ids": ("api.views.adhoc.pouet.generate_group_demozoo_ids", "text/javascript", None),
+    "pouet-party-ids": ("api.views.adhoc.pouet.generate_party_demozoo_ids", "text/javascript", None),
+    "zxdemo-prod-ids": ("api.views.adhoc.zxdemo.generate_prod_demozoo_ids", "text/javascript", None),
+    "zxdemo-group-ids": ("api.views.adhoc.zxdemo.generate_group_demozoo_ids", "text/javascript", None),
+    "zxdemo-party-ids": ("api.views.adhoc.zxdemo.generate_party_demozoo_ids", "text/javascript", None),
+    "scenesat-monthly": ("api.views.adhoc.scenesat.generate_monthly", "text/plain;charset=utf-8", default_month),
+    "meteoriks-candidates": (
+        "api.views.adhoc.meteoriks.generate_candidates",
+        "text/plain;charset=utf-8",
+        current_and_previous_year,
+    ),
+}
+
+
+def scheduled_snapshots():
+    """Return the (kind, param) pairs that should currently have snapshots"""
+    return [
+        (kind, param)
+        for kind, (generator, content_type, get_params) in SNAPSHOT_KINDS.items()
+        for param in (get_params() if get_params else [""])
+    ]
+
+
+def export_snapshot_kind(kind):
+    """Return the Snapshot kind under which the bulk export of the given kind is stored, by format"""
+    return "export-%s" % kind
+
+
+def scheduled_export_snapshots():
+    return [(export_snapshot_kind(kind), format) for kind in EXPORTERS for format in FORMATS]
+
+
+def generate_snapshot(kind, param=""):
+    """Run the export of the given kind (with the given parameter, if any) and store its output"""
+    generator, content_type, get_params = SNAPSHOT_KINDS[kind]
+    generate = import_string(generator)
+    content = generate(param) if param else generate()
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    content_hash = hashlib.sha256(content).hexdigest()
+    # with mtime=0 the compressed file depends on nothing but the content
+    return store_snapshot(
+        kind, param, content_type, content_hash, "", lambda: ContentFile(gzip.compress(content, mtime=0))
+    )
+
+
+def generate_export_snapshot(kind, format):
+    """Run the bulk export of the given kind and format (see api.export) and store its output"""
+    digest = hashlib.sha256()
+    # the export can be far larger than we want to hold in memory
+    with tempfile.TemporaryFile() as f:
+        for data in generate_export(kind, format, digest=digest):
+            f.write(data)
+        f.seek(0)
+        return store_snapshot(
+            export_snapshot_kind(kind), format, "application/gzip", digest.hexdigest(), ".%s" % format, lambda: File(f)
+        )
+
+
+def regenerate_snapshot(kind, param=""):
+    """Regenerate the snapshot with the given kind and parameter, whether of an adhoc or a bulk export"""
+    for export_kind in EXPORTERS:
+        if kind == export_snapshot_kind(export_kind):
+            return generate_export_snapshot(export_kind, param)
+    return generate_snapshot(kind, param)
+
+
+def store_snapshot(kind, param, content_type, content_hash, extension, get_file):
+    """
+    Record content with the given hash as the snapshot of the given kind and parameter, writing the
+    gzip-compressed file returned by get_file() to storage unless the stored content is the same
+    """
+    snapshot, created = Snapshot.objects.get_or_create(
+        kind=kind, param=param, defaults={"content_type": content_type, "generated_at": timezone.now()}
+    )
+    snapshot.generated_at = timezone.now()
+    if snapshot.content_hash == content_hash and snapshot.file:
+        snapshot.save(update_fields=["generated_at"])
+        return snapshot
+
+    old_filename = snapshot.file.name
+    snapshot.content_type = content_type
+    snapshot.content_hash = content_hash
+    filename = "%s%s.%s.gz" % (str(snapshot).replace(":", "-"), extension, content_hash[:16])
+    snapshot.file.save(filename, get_file(), save=False)
+    snapshot.save()
+    if old_filename:
+        snapshot.file.storage.delete(old_filename)
+    # responses validated against the data generation token may have been served from the old file
+    expire_generation()
+    return snapshot
+
+
+def delete_snapshot(snapshot):
+    if snapshot.file:
+        snapshot.file.delete(save=False)
+    snapshot.delete()
+
+
+def refresh_snapshots():
+    """Regenerate all scheduled snapshots, and delete any that are no longer scheduled"""
+    scheduled = scheduled_snapshots()
+    for kind, param in scheduled:
+        generate_snapshot(kind, param)
+    # the bulk exports are refreshed separately, by refresh_export_snapshots
+    keep = set(scheduled) | set(scheduled_export_snapshots())
+    for snapshot in Snapshot.objects.all():
+        if (snapshot.kind, snapshot.param) not in keep:
+            delete_snapshot(snapshot)
+
+
+def refresh_export_snapshots():
+    for kind in EXPORTERS:
+        for format in FORMATS:
+            generate_export_snapshot(kind, format)
+
+
+def snapshot_response(request, kind, param=""):
+    """
+    Return a response serving the stored snapshot of the given kind and parameter, compressed if the
+    client accepts gzip; or None if there is no such snapshot
+    """
+    snapshot = Snapshot.objects.filter(kind=kind, param=param).first()
+    if snapshot is None or not snapshot.file:
+        return None
+    try:
+        with snapshot.file.open("rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if accepts_gzip.search(request.headers.get("Accept-Encoding", "")):
+        response = HttpResponse(data, content_type=snapshot.content_type)
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(gzip.decompress(data), content_type=snapshot.content_type)
+    patch_vary_headers(response, ["Accept-Encoding"])
+    response["X-Snapshot-Generated"] = http_date(snapshot.generated_at.timestamp())
+    return response
+
+
+def export_snapshot_response(kind, format):
+    """
+    Return a response serving the stored bulk export of the given kind and format as a gzip file
+    download; or None if it has not been generated
+    """
+    snapshot = Snapshot.objects.filter(kind=export_snapshot_kind(kind), param=format).first()
+    if snapshot is None or not snapshot.file:
+        return None
+    try:
+        f = snapshot.file.open("rb")
+    except OSError:
+        return None
+
+    response = FileResponse(
+        f, content_type="application/gzip", as_attachment=True, filename=export_filename(kind, format)
+    )
+    response["X-Snapshot-Generated"] = http_date(snapshot.generated_at.timestamp())
+    return response
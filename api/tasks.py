@@ -0,0 +1,18 @@
+from celery import shared_task
+
+from api import snapshots
+
+
+@shared_task(ignore_result=True)
+def refresh_snapshots():
+    snapshots.refresh_snapshots()
+
+
+@shared_task(ignore_result=True)
+def refresh_snapshot(kind, param=""):
+    snapshots.regenerate_snapshot(kind, param)
+
+
+@shared_task(ignore_result=True)
+def refresh_export_snapshots():
+    snapshots.refresh_export_snapshots()
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from platforms.models import Platform
+from productions.models import Production
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class TestApiCaching(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_conditional_get(self):
+        response = self.client.get("/api/v1/productions/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=60", response["Cache-Control"])
+        self.assertIn("Accept", response["Vary"])
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/v1/productions/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get("/api/v1/productions/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_data(self):
+        etag = self.client.get("/api/v1/productions/")["ETag"]
+
+        pondlife = Production.objects.get(title="Pondlife")
+        with self.captureOnCommitCallbacks(execute=True):
+            pondlife.title = "Pondlife 2"
+            pondlife.save()
+
+        response = self.client.get("/api/v1/productions/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIn("Pondlife 2", response.content.decode())
+
+    def test_etag_changes_with_platforms(self):
+        etag = self.client.get("/api/v1/platforms/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Platform.objects.create(name="Dragon 32")
+        response = self.client.get("/api/v1/platforms/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Dragon 32", response.content.decode())
+
+    def test_etag_depends_on_accept_header(self):
+        json_etag = self.client.get("/api/v1/releasers/", HTTP_ACCEPT="application/json")["ETag"]
+        html_etag = self.client.get("/api/v1/releasers/", HTTP_ACCEPT="text/html")["ETag"]
+        self.assertNotEqual(json_etag, html_etag)
+
+    def test_stored_response(self):
+        pondlife = Production.objects.get(title="Pondlife")
+        pondlife.links.create(link_class="PouetProduction", parameter="2611")
+
+        response = self.client.get("/api/adhoc/pouet/prod-demozoo-ids-by-pouet-id/")
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            stored_response = self.client.get("/api/adhoc/pouet/prod-demozoo-ids-by-pouet-id/")
+        self.assertEqual(stored_response.content, response.content)
+        self.assertEqual(stored_response["Content-Type"], response["Content-Type"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pondlife.links.create(link_class="PouetProduction", parameter="12345")
+        response = self.client.get("/api/adhoc/pouet/prod-demozoo-ids-by-pouet-id/")
+        self.assertIn(b"12345", response.content)
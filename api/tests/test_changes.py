@@ -0,0 +1,114 @@
+import json
+
+from django.test import TestCase
+
+from api.models import Change
+from demoscene.models import Nick, Releaser
+from parties.models import Party
+from platforms.models import Platform
+from productions.models import Production
+
+
+class TestChangeLog(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def changes(self):
+        return set(Change.objects.values_list("action", "object_type", "object_id"))
+
+    def test_save(self):
+        pondlife = Production.objects.get(title="Pondlife")
+        with self.captureOnCommitCallbacks(execute=True):
+            pondlife.title = "Pondlife 2"
+            pondlife.save()
+        self.assertIn(("update", "production", pondlife.id), self.changes())
+
+    def test_rolled_back_changes_are_not_recorded(self):
+        pondlife = Production.objects.get(title="Pondlife")
+        pondlife.title = "Pondlife 2"
+        pondlife.save()
+        self.assertFalse(Change.objects.exists())
+
+    def test_m2m_changes(self):
+        pondlife = Production.objects.get(title="Pondlife")
+        with self.captureOnCommitCallbacks(execute=True):
+            pondlife.tags.add("fish")
+        self.assertEqual(self.changes(), {("update", "production", pondlife.id)})
+
+        Change.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            pondlife.platforms.add(Platform.objects.get(name="Commodore 64"))
+        self.assertEqual(self.changes(), {("update", "production", pondlife.id)})
+
+        Change.objects.all().delete()
+        hooy = Releaser.objects.get(name="Hooy-Program")
+        with self.captureOnCommitCallbacks(execute=True):
+            pondlife.author_nicks.clear()
+        self.assertIn(("update", "releaser", hooy.id), self.changes())
+
+    def test_related_changes(self):
+        gasman = Releaser.objects.get(name="Gasman")
+        with self.captureOnCommitCallbacks(execute=True):
+            Nick.objects.get(name="Shingebis").variants.create(name="Shingebees")
+        self.assertEqual(self.changes(), {("update", "releaser", gasman.id)})
+
+        # moving a nick to another releaser changes both of them
+        Change.objects.all().delete()
+        yerzmyey = Releaser.objects.get(name="Yerzmyey")
+        with self.captureOnCommitCallbacks(execute=True):
+            nick = Nick.objects.get(name="Shingebis")
+            nick.releaser = yerzmyey
+            nick.save()
+        self.assertIn(("update", "releaser", gasman.id), self.changes())
+        self.assertIn(("update", "releaser", yerzmyey.id), self.changes())
+
+    def test_delete(self):
+        party = Party.objects.get(name="Forever 2e3")
+        party_id = party.id
+        with self.captureOnCommitCallbacks(execute=True):
+            party.delete()
+        last_change = Change.objects.filter(object_type="party", object_id=party_id).last()
+        self.assertEqual(last_change.action, "delete")
+
+
+class TestChangeFeed(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def setUp(self):
+        self.pondlife = Production.objects.get(title="Pondlife")
+        self.gasman = Releaser.objects.get(name="Gasman")
+        Change.objects.create(object_type="production", object_id=self.pondlife.id, action="update")
+        Change.objects.create(object_type="releaser", object_id=self.gasman.id, action="update")
+        Change.objects.create(object_type="production", object_id=self.pondlife.id, action="delete")
+
+    def test_get_changes(self):
+        response = self.client.get("/api/v1/changes/")
+        self.assertEqual(response.status_code, 200)
+        response_data = json.loads(response.content)
+        self.assertEqual(
+            [(change["action"], change["type"], change["id"]) for change in response_data["results"]],
+            [
+                ("update", "production", self.pondlife.id),
+                ("update", "releaser", self.gasman.id),
+                ("delete", "production", self.pondlife.id),
+            ],
+        )
+        self.assertTrue(response_data["results"][1]["url"].endswith("/api/v1/releasers/%d/" % self.gasman.id))
+        self.assertIsNone(response_data["next"])
+
+        # nothing new after the last cursor
+        response = self.client.get("/api/v1/changes/", {"after": response_data["cursor"]})
+        response_data = json.loads(response.content)
+        self.assertEqual(response_data["results"], [])
+
+    def test_get_changes_after_cursor(self):
+        first_change = Change.objects.first()
+        response = self.client.get("/api/v1/changes/", {"after": first_change.id, "type": "production"})
+        response_data = json.loads(response.content)
+        self.assertEqual([change["action"] for change in response_data["results"]], ["delete"])
+        self.assertEqual(response_data["cursor"], Change.objects.last().id)
+
+    def test_invalid_parameters(self):
+        response = self.client.get("/api/v1/changes/", {"after": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/v1/changes/", {"type": "user"})
+        self.assertEqual(response.status_code, 400)
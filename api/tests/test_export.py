@@ -0,0 +1,95 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import captured_stdout
+
+from api.models import Snapshot
+from api.snapshots import delete_snapshot, generate_export_snapshot
+from parties.models import Party
+from productions.models import Production
+
+
+class TestExport(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def tearDown(self):
+        for snapshot in Snapshot.objects.all():
+            delete_snapshot(snapshot)
+
+    def get_export(self, kind, format):
+        generate_export_snapshot(kind, format)
+        response = self.client.get("/api/export/%s.%s.gz" % (kind, format))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        return gzip.decompress(b"".join(response.streaming_content)).decode("utf-8")
+
+    def test_productions_ndjson(self):
+        Production.objects.get(title="Pondlife").tags.add("fish")
+        records = [json.loads(line) for line in self.get_export("productions", "ndjson").splitlines()]
+        self.assertEqual(len(records), Production.objects.count())
+        self.assertEqual([record["id"] for record in records], sorted(record["id"] for record in records))
+
+        pondlife = [record for record in records if record["title"] == "Pondlife"][0]
+        self.assertIn("Hooy-Program", [nick["name"] for nick in pondlife["author_nicks"]])
+        self.assertIn("ZX Spectrum", [platform["name"] for platform in pondlife["platforms"]])
+        self.assertEqual(pondlife["tags"], ["fish"])
+        self.assertTrue(pondlife["demozoo_url"].endswith("/productions/%d/" % pondlife["id"]))
+
+    def test_releasers_ndjson(self):
+        records = [json.loads(line) for line in self.get_export("releasers", "ndjson").splitlines()]
+        gasman = [record for record in records if record["name"] == "Gasman"][0]
+        self.assertIn("Shingebis", [nick["name"] for nick in gasman["nicks"]])
+        self.assertIn("Hooy-Program", [membership["group"]["name"] for membership in gasman["member_of"]])
+
+    def test_parties_csv(self):
+        rows = list(csv.reader(io.StringIO(self.get_export("parties", "csv"))))
+        self.assertEqual(rows[0][:3], ["id", "demozoo_url", "name"])
+        self.assertIn("Forever 2e3", [row[2] for row in rows[1:]])
+
+    def test_bbses_csv(self):
+        rows = list(csv.reader(io.StringIO(self.get_export("bbses", "csv"))))
+        self.assertIn("StarPort", [row[2] for row in rows[1:]])
+
+    def test_served_from_snapshot(self):
+        response = self.client.get("/api/export/parties.csv.gz")
+        self.assertEqual(response.status_code, 404)
+
+        generate_export_snapshot("parties", "csv")
+        Party.objects.filter(name="Forever 2e3").update(name="Forever 2e3 Deluxe")
+        response = self.client.get("/api/export/parties.csv.gz")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("X-Snapshot-Generated", response)
+        self.assertNotIn("Forever 2e3 Deluxe", gzip.decompress(b"".join(response.streaming_content)).decode("utf-8"))
+
+        # regenerating changed content replaces the file
+        filename = Snapshot.objects.get(kind="export-parties", param="csv").file.name
+        snapshot = generate_export_snapshot("parties", "csv")
+        self.assertNotEqual(snapshot.file.name, filename)
+        self.assertIn("Forever 2e3 Deluxe", self.get_export("parties", "csv"))
+
+    def test_unknown_export(self):
+        response = self.client.get("/api/export/users.ndjson.gz")
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get("/api/export/productions.xml.gz")
+        self.assertEqual(response.status_code, 404)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            with captured_stdout():
+                call_command("export_catalogue", "productions", "releasers", "--output-dir", output_dir)
+            self.assertEqual(
+                sorted(os.listdir(output_dir)), ["demozoo-productions.ndjson.gz", "demozoo-releasers.ndjson.gz"]
+            )
+            with gzip.open(os.path.join(output_dir, "demozoo-productions.ndjson.gz"), "rt") as f:
+                self.assertEqual(len(f.readlines()), Production.objects.count())
+
+    def test_command_snapshot(self):
+        with captured_stdout():
+            call_command("export_catalogue", "bbses", "--format", "csv", "--snapshot")
+        self.assertTrue(Snapshot.objects.filter(kind="export-bbses", param="csv").exists())
@@ -0,0 +1,55 @@
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import captured_stdout
+
+from demoscene.models import Releaser
+from productions.models import Production, ProductionType
+
+
+class TestFastSerializers(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def setUp(self):
+        pondlife = Production.objects.get(title="Pondlife")
+        pondlife.tags.add("fish")
+        pondlife.types.add(ProductionType.objects.get(name="Game"))
+        Production.objects.create(title="Untitled", supertype="music")
+
+    def assertSameResponse(self, url):
+        with override_settings(API_FAST_LISTINGS=False):
+            slow_response = self.client.get(url)
+        with override_settings(API_FAST_LISTINGS=True):
+            fast_response = self.client.get(url)
+        self.assertEqual(slow_response.status_code, 200)
+        self.assertEqual(fast_response.content, slow_response.content)
+
+    def test_production_listing(self):
+        self.assertSameResponse("/api/v1/productions/")
+        self.assertSameResponse("/api/v1/productions/?ordering=-release_date_date&supertype=production")
+        self.assertSameResponse("/api/v1/productions.json")
+
+    def test_releaser_listing(self):
+        self.assertSameResponse("/api/v1/releasers/")
+        self.assertSameResponse("/api/v1/releasers/?is_group=true")
+
+    def test_releaser_productions(self):
+        gasman = Releaser.objects.get(name="Gasman")
+        hooy = Releaser.objects.get(name="Hooy-Program")
+        self.assertSameResponse("/api/v1/releasers/%d/productions/" % gasman.id)
+        self.assertSameResponse("/api/v1/releasers/%d/productions/" % hooy.id)
+        self.assertSameResponse("/api/v1/releasers/%d/member_productions/" % hooy.id)
+
+    def test_fewer_queries(self):
+        with self.assertNumQueries(7):
+            # count, page, then one each for author nicks, affiliation nicks, platforms, types and tags
+            self.client.get("/api/v1/productions/")
+
+
+class TestBenchmarkApi(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def test_run(self):
+        with captured_stdout() as stdout:
+            call_command("benchmark_api", "--requests", "1")
+        self.assertIn("/api/v1/productions/: ", stdout.getvalue())
+        self.assertIn("req/s before", stdout.getvalue())
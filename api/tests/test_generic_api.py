@@ -57,6 +57,21 @@ class TestProductions(TestCase):
         pondlife = [result for result in response_data["results"] if result["title"] == "Pondlife"][0]
         self.assertIn("Hooy-Program", [nick["name"] for nick in pondlife["author_nicks"]])
 
+    def test_follow_next_link(self):
+        for i in range(120):
+            Production.objects.create(title="Production %d" % i, supertype="production")
+
+        response_data = json.loads(self.client.get("/api/v1/productions/").content)
+        self.assertIn("cursor=", response_data["next"])
+        first_page_ids = [result["id"] for result in response_data["results"]]
+
+        response_data = json.loads(self.client.get(response_data["next"]).content)
+        second_page_ids = [result["id"] for result in response_data["results"]]
+        self.assertEqual(len(first_page_ids) + len(second_page_ids), Production.objects.count())
+        self.assertFalse(set(first_page_ids) & set(second_page_ids))
+        self.assertIsNone(response_data["next"])
+        self.assertIn("cursor=", response_data["previous"])
+
     def test_filter_by_author(self):
         response = self.client.get("/api/v1/productions/?author=4")
         self.assertEqual(response.status_code, 200)
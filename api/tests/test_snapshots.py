@@ -0,0 +1,127 @@
+import gzip
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from api import tasks
+from api.models import Snapshot
+from api.snapshots import delete_snapshot, generate_export_snapshot, generate_snapshot, refresh_snapshots
+from parties.models import Party
+from productions.models import Production, ProductionLink
+
+
+class TestSnapshots(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def setUp(self):
+        pondlife = Production.objects.get(title="Pondlife")
+        ProductionLink.objects.create(
+            production=pondlife, link_class="PouetProduction", parameter="2611", is_download_link=False
+        )
+
+    def tearDown(self):
+        for snapshot in Snapshot.objects.all():
+            delete_snapshot(snapshot)
+
+    def test_generate(self):
+        snapshot = generate_snapshot("pouet-prod-ids")
+        self.assertEqual(str(snapshot), "pouet-prod-ids")
+        self.assertEqual(snapshot.content_type, "text/javascript")
+        with snapshot.file.open("rb") as f:
+            data = json.loads(gzip.decompress(f.read()))
+        self.assertEqual(data, [{"pouet_id": 2611, "demozoo_id": 4}])
+
+        # regenerating unchanged content keeps the same file
+        filename = snapshot.file.name
+        snapshot = generate_snapshot("pouet-prod-ids")
+        self.assertEqual(snapshot.file.name, filename)
+
+        ProductionLink.objects.create(
+            production_id=4, link_class="PouetProduction", parameter="2612", is_download_link=False
+        )
+        snapshot = generate_snapshot("pouet-prod-ids")
+        self.assertNotEqual(snapshot.file.name, filename)
+        self.assertFalse(snapshot.file.storage.exists(filename))
+        self.assertEqual(Snapshot.objects.count(), 1)
+
+    def test_serve(self):
+        generate_snapshot("pouet-prod-ids")
+        # the snapshot is served even after the data has changed, until it is regenerated
+        ProductionLink.objects.filter(link_class="PouetProduction").delete()
+
+        response = self.client.get("/api/adhoc/pouet/prod-demozoo-ids-by-pouet-id/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("X-Snapshot-Generated", response)
+        self.assertEqual(json.loads(gzip.decompress(response.content)), [{"pouet_id": 2611, "demozoo_id": 4}])
+
+        response = self.client.get("/api/adhoc/pouet/prod-demozoo-ids-by-pouet-id/")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(json.loads(response.content), [{"pouet_id": 2611, "demozoo_id": 4}])
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_regenerating_changes_etag(self):
+        cache.clear()
+        generate_snapshot("pouet-prod-ids")
+        response = self.client.get("/api/adhoc/pouet/prod-demozoo-ids-by-pouet-id/")
+        etag = response["ETag"]
+
+        ProductionLink.objects.create(
+            production_id=4, link_class="PouetProduction", parameter="2612", is_download_link=False
+        )
+        generate_snapshot("pouet-prod-ids")
+        response = self.client.get("/api/adhoc/pouet/prod-demozoo-ids-by-pouet-id/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(json.loads(response.content)), 2)
+
+    def test_serve_with_param(self):
+        generate_snapshot("scenesat-monthly", "2000-01")
+        response = self.client.get("/api/adhoc/scenesat/monthly-releases/?month=2000-01")
+        self.assertIn("X-Snapshot-Generated", response)
+        self.assertIn(b"Demozoo URL", response.content)
+
+        response = self.client.get("/api/adhoc/scenesat/monthly-releases/?month=2000-02")
+        self.assertNotIn("X-Snapshot-Generated", response)
+
+    def test_refresh(self):
+        generate_snapshot("scenesat-monthly", "2000-01")
+        refresh_snapshots()
+        self.assertTrue(Snapshot.objects.filter(kind="pouet-credits").exists())
+        self.assertTrue(Snapshot.objects.filter(kind="meteoriks-candidates").exists())
+        self.assertFalse(Snapshot.objects.filter(kind="scenesat-monthly", param="2000-01").exists())
+
+    @patch("api.admin.refresh_snapshot")
+    def test_admin_refresh_action(self, refresh_snapshot):
+        snapshot = generate_snapshot("scenesat-monthly", "2000-01")
+        User.objects.create_superuser(username="admin", email="admin@example.com", password="password")
+        self.client.login(username="admin", password="password")
+
+        response = self.client.post(
+            "/admin/api/snapshot/", {"action": "refresh", "_selected_action": [snapshot.id]}, follow=True
+        )
+        self.assertEqual(response.status_code, 200)
+        refresh_snapshot.delay.assert_called_once_with("scenesat-monthly", "2000-01")
+
+    @patch("api.admin.refresh_snapshot")
+    def test_admin_refresh_action_on_export(self, refresh_snapshot):
+        snapshot = generate_export_snapshot("parties", "csv")
+        User.objects.create_superuser(username="admin", email="admin@example.com", password="password")
+        self.client.login(username="admin", password="password")
+
+        response = self.client.post(
+            "/admin/api/snapshot/", {"action": "refresh", "_selected_action": [snapshot.id]}, follow=True
+        )
+        self.assertEqual(response.status_code, 200)
+        refresh_snapshot.delay.assert_called_once_with("export-parties", "csv")
+
+        # run the queued task
+        Party.objects.filter(name="Forever 2e3").update(name="Forever 2e3 Deluxe")
+        tasks.refresh_snapshot(*refresh_snapshot.delay.call_args[0])
+        refreshed = Snapshot.objects.get(id=snapshot.id)
+        self.assertNotEqual(refreshed.content_hash, snapshot.content_hash)
+        with refreshed.file.open("rb") as f:
+            self.assertIn("Forever 2e3 Deluxe", gzip.decompress(f.read()).decode("utf-8"))
@@ -1,7 +1,7 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from api.views import generic
+from api.views import export, generic
 from api.views.adhoc import eq, group_abbreviations, klubi, meteoriks, pouet, scenesat, zxdemo
 
 
@@ -13,6 +13,7 @@ router.register("platforms", generic.PlatformViewSet)
 router.register("party_series", generic.PartySeriesViewSet)
 router.register("parties", generic.PartyViewSet)
 router.register("bbses", generic.BBSViewSet)
+router.register("changes", generic.ChangeViewSet)
 
 
 urlpatterns = [
@@ -28,5 +29,6 @@ urlpatterns = [
     path("adhoc/eq/demos/", eq.demos, {}),
     path("adhoc/group-abbreviations/", group_abbreviations.group_abbreviations, {}),
     path("adhoc/meteoriks/candidates/<int:year>/", meteoriks.candidates, {}),
+    path("export/<slug:kind>.<slug:format>.gz", export.export, {}),
     path("v1/", include(router.urls)),
 ]
@@ -2,11 +2,13 @@ import csv
 
 from django.http import HttpResponse
 
+from api.caching import api_cache
 from demoscene.models import Releaser
 from platforms.models import Platform
 from productions.models import Production
 
 
+@api_cache(store=True)
 def demos(request):
     # ZX Spectrum productions (non graphics/music) with download links
     # and author nationalities
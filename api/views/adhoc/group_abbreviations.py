@@ -2,9 +2,11 @@ import csv
 
 from django.http import HttpResponse
 
+from api.caching import api_cache
 from demoscene.models import Nick
 
 
+@api_cache(store=True)
 def group_abbreviations(request):
     nicks = (
         Nick.objects.filter(releaser__is_group=True)
@@ -2,10 +2,12 @@ import csv
 
 from django.http import HttpResponse
 
+from api.caching import api_cache
 from api.utils import get_month_parameter
 from productions.models import Production
 
 
+@api_cache(daily=True)
 def demoshow(request):
     # Get a list of prods released in the given calendar month
     # (default: the calendar month just gone)
@@ -1,10 +1,12 @@
 import csv
+import io
 
 from django.contrib.humanize.templatetags.humanize import ordinal as original_ordinal
 from django.core.exceptions import PermissionDenied
 from django.db.models import Q
 from django.http import HttpResponse
 
+from api.snapshots import snapshot_response
 from pouet.models import Production as PouetProduction
 from productions.models import Production, ProductionType
 
@@ -200,10 +202,8 @@ DZ_LIMBO_PLATFORM_NAMES = [
 ]
 
 
-def candidates(request, year):
-    if not request.user.is_staff:
-        raise PermissionDenied
-
+def generate_candidates(year):
+    year = int(year)
     exe_graphics = ProductionType.objects.get(internal_name="exe-graphics")
 
     prods = (
@@ -232,8 +232,8 @@ def candidates(request, year):
     )
     pouet_prods_by_id = {prod.pouet_id: prod for prod in pouet_prods}
 
-    response = HttpResponse(content_type="text/plain;charset=utf-8")
-    csvfile = csv.writer(response)
+    output = io.StringIO()
+    csvfile = csv.writer(output)
     csvfile.writerow(
         [
             "category",
@@ -593,4 +593,14 @@ def candidates(request, year):
     for pouet_prod in pouet_prods_by_id.values():
         write_row(None, pouet_prod)
 
+    return output.getvalue()
+
+
+def candidates(request, year):
+    if not request.user.is_staff:
+        raise PermissionDenied
+
+    response = snapshot_response(request, "meteoriks-candidates", str(year))
+    if response is None:
+        response = HttpResponse(generate_candidates(year), content_type="text/plain;charset=utf-8")
     return response
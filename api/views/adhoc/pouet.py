@@ -3,12 +3,14 @@ from itertools import groupby
 
 from django.http import HttpResponse
 
+from api.caching import api_cache
+from api.snapshots import snapshot_response
 from demoscene.models import ReleaserExternalLink
 from parties.models import PartyExternalLink
 from productions.models import Credit, ProductionLink
 
 
-def credits(request):
+def generate_credits():
     # Retrieve productions with Pouet IDs with credits for releasers who have Pouet user IDs
     credits = Credit.objects.raw("""
         SELECT
@@ -45,25 +47,57 @@ def credits(request):
         for ((prod_id, user_id), creds) in groupby(credits, lambda c: (c.pouet_prod_id, c.pouet_user_id))
     ]
 
-    return HttpResponse(json.dumps(credits_json), content_type="text/javascript")
+    return json.dumps(credits_json)
 
 
-def prod_demozoo_ids_by_pouet_id(request):
+@api_cache(store=True)
+def credits(request):
+    response = snapshot_response(request, "pouet-credits")
+    if response is None:
+        response = HttpResponse(generate_credits(), content_type="text/javascript")
+    return response
+
+
+def generate_prod_demozoo_ids():
     links = ProductionLink.objects.filter(link_class="PouetProduction")
     links_json = [{"pouet_id": int(link.parameter), "demozoo_id": link.production_id} for link in links]
-    return HttpResponse(json.dumps(links_json), content_type="text/javascript")
+    return json.dumps(links_json)
 
 
-def group_demozoo_ids_by_pouet_id(request):
+@api_cache(store=True)
+def prod_demozoo_ids_by_pouet_id(request):
+    response = snapshot_response(request, "pouet-prod-ids")
+    if response is None:
+        response = HttpResponse(generate_prod_demozoo_ids(), content_type="text/javascript")
+    return response
+
+
+def generate_group_demozoo_ids():
     links = ReleaserExternalLink.objects.filter(link_class="PouetGroup")
     links_json = [{"pouet_id": int(link.parameter), "demozoo_id": link.releaser_id} for link in links]
-    return HttpResponse(json.dumps(links_json), content_type="text/javascript")
+    return json.dumps(links_json)
 
 
-def party_demozoo_ids_by_pouet_id(request):
+@api_cache(store=True)
+def group_demozoo_ids_by_pouet_id(request):
+    response = snapshot_response(request, "pouet-group-ids")
+    if response is None:
+        response = HttpResponse(generate_group_demozoo_ids(), content_type="text/javascript")
+    return response
+
+
+def generate_party_demozoo_ids():
     links = PartyExternalLink.objects.filter(link_class="PouetParty")
     links_json = []
     for link in links:
         party_id, year = link.parameter.split("/")
         links_json.append({"pouet_id": int(party_id), "year": int(year), "demozoo_id": link.party_id})
-    return HttpResponse(json.dumps(links_json), content_type="text/javascript")
+    return json.dumps(links_json)
+
+
+@api_cache(store=True)
+def party_demozoo_ids_by_pouet_id(request):
+    response = snapshot_response(request, "pouet-party-ids")
+    if response is None:
+        response = HttpResponse(generate_party_demozoo_ids(), content_type="text/javascript")
+    return response
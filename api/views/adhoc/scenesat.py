@@ -1,16 +1,19 @@
 import csv
+import datetime
+import io
 
 from django.http import HttpResponse
 
-from api.utils import get_month_parameter
+from api.caching import api_cache
+from api.snapshots import snapshot_response
+from api.utils import get_month_dates, get_month_parameter
 from productions.models import Production
 
 
-def monthly(request):
-    # Get a list of music released in the given calendar month
-    # (default: the calendar month just gone)
+def generate_monthly(month):
+    # Get a list of music released in the given calendar month, as YYYY-MM
 
-    (start_date, end_date) = get_month_parameter(request)
+    (start_date, end_date) = get_month_dates(datetime.datetime.strptime(month, "%Y-%m").date())
 
     prods = (
         Production.objects.filter(
@@ -28,8 +31,8 @@ def monthly(request):
         .order_by("release_date_date")
     )
 
-    response = HttpResponse(content_type="text/plain;charset=utf-8")
-    csvfile = csv.writer(response)
+    output = io.StringIO()
+    csvfile = csv.writer(output)
     csvfile.writerow(["Demozoo URL", "Title", "By", "Release date", "Type", "Platform", "Download URL"])
     for prod in prods:
         platforms = sorted(prod.platforms.all(), key=lambda p: p.name)
@@ -46,4 +49,17 @@ def monthly(request):
             ]
         )
 
+    return output.getvalue()
+
+
+@api_cache(daily=True)
+def monthly(request):
+    # Serve the music list for the calendar month given as ?month=YYYY-MM
+    # (default: the calendar month just gone)
+    (start_date, end_date) = get_month_parameter(request)
+    month = start_date.strftime("%Y-%m")
+
+    response = snapshot_response(request, "scenesat-monthly", month)
+    if response is None:
+        response = HttpResponse(generate_monthly(month), content_type="text/plain;charset=utf-8")
     return response
@@ -2,24 +2,50 @@ import json
 
 from django.http import HttpResponse
 
+from api.caching import api_cache
+from api.snapshots import snapshot_response
 from demoscene.models import ReleaserExternalLink
 from parties.models import PartyExternalLink
 from productions.models import ProductionLink
 
 
-def prod_demozoo_ids_by_zxdemo_id(request):
+def generate_prod_demozoo_ids():
     links = ProductionLink.objects.filter(link_class="ZxdemoItem")
     links_json = [{"zxdemo_id": int(link.parameter), "demozoo_id": link.production_id} for link in links]
-    return HttpResponse(json.dumps(links_json), content_type="text/javascript")
+    return json.dumps(links_json)
 
 
-def group_demozoo_ids_by_zxdemo_id(request):
+@api_cache(store=True)
+def prod_demozoo_ids_by_zxdemo_id(request):
+    response = snapshot_response(request, "zxdemo-prod-ids")
+    if response is None:
+        response = HttpResponse(generate_prod_demozoo_ids(), content_type="text/javascript")
+    return response
+
+
+def generate_group_demozoo_ids():
     links = ReleaserExternalLink.objects.filter(link_class="ZxdemoAuthor")
     links_json = [{"zxdemo_id": int(link.parameter), "demozoo_id": link.releaser_id} for link in links]
-    return HttpResponse(json.dumps(links_json), content_type="text/javascript")
+    return json.dumps(links_json)
 
 
-def party_demozoo_ids_by_zxdemo_id(request):
+@api_cache(store=True)
+def group_demozoo_ids_by_zxdemo_id(request):
+    response = snapshot_response(request, "zxdemo-group-ids")
+    if response is None:
+        response = HttpResponse(generate_group_demozoo_ids(), content_type="text/javascript")
+    return response
+
+
+def generate_party_demozoo_ids():
     links = PartyExternalLink.objects.filter(link_class="ZxdemoParty")
     links_json = [{"zxdemo_id": int(link.parameter), "demozoo_id": link.party_id} for link in links]
-    return HttpResponse(json.dumps(links_json), content_type="text/javascript")
+    return json.dumps(links_json)
+
+
+@api_cache(store=True)
+def party_demozoo_ids_by_zxdemo_id(request):
+    response = snapshot_response(request, "zxdemo-party-ids")
+    if response is None:
+        response = HttpResponse(generate_party_demozoo_ids(), content_type="text/javascript")
+    return response
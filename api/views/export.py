@@ -0,0 +1,15 @@
+from django.http import Http404
+
+from api.export import EXPORTERS, FORMATS
+from api.snapshots import export_snapshot_response
+
+
+def export(request, kind, format):
+    if kind not in EXPORTERS or format not in FORMATS:
+        raise Http404("No such export")
+
+    # the exports are generated offline by api.tasks.refresh_export_snapshots
+    response = export_snapshot_response(kind, format)
+    if response is None:
+        raise Http404("This export has not been generated yet")
+    return response
@@ -1,10 +1,19 @@
+import datetime
+
+from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.utils.functional import cached_property
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-from api import filters, serializers
+from api import fast_serializers, filters, serializers
+from api.caching import api_cache
+from api.models import CHANGE_LOG_TYPES, Change
 from bbs.models import BBS
 from demoscene.models import Releaser
 from parties.models import Party, PartySeries
@@ -12,6 +21,7 @@ from platforms.models import Platform
 from productions.models import Production, ProductionType
 
 
+@method_decorator(api_cache(), name="dispatch")
 class ListDetailModelViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Extension to ReadOnlyModelViewSet to allow us to have different field lists for
@@ -20,6 +30,11 @@ class ListDetailModelViewSet(viewsets.ReadOnlyModelViewSet):
 
     listing_fields = None
 
+    # a function from api.fast_serializers to build listing records with, in place of the serializer,
+    # and the model fields that it needs
+    fast_listing_serializer = None
+    fast_listing_model_fields = None
+
     @cached_property
     def output_fields(self):
         fields_param = self.request.GET.get("fields")
@@ -35,7 +50,20 @@ class ListDetailModelViewSet(viewsets.ReadOnlyModelViewSet):
             kwargs["fields"] = self.output_fields
         return super().get_serializer(*args, **kwargs)
 
+    def list(self, request, *args, **kwargs):
+        if not (settings.API_FAST_LISTINGS and self.fast_listing_serializer and "fields" not in request.GET):
+            return super().list(request, *args, **kwargs)
+
+        queryset = (
+            self.filter_queryset(self.get_queryset()).prefetch_related(None).only(*self.fast_listing_model_fields)
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.fast_listing_serializer(page, request, self.format_kwarg))
+        return Response(self.fast_listing_serializer(queryset, request, self.format_kwarg))
+
 
+@method_decorator(api_cache(), name="dispatch")
 class PlatformViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Platform.objects.all()
     serializer_class = serializers.PlatformSerializer
@@ -43,6 +71,7 @@ class PlatformViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ["id", "name"]
 
 
+@method_decorator(api_cache(), name="dispatch")
 class ProductionTypeViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = ProductionType.objects.all()
     serializer_class = serializers.ProductionTypeSerializer
@@ -58,6 +87,8 @@ class ProductionViewSet(ListDetailModelViewSet):
     filterset_class = filters.ProductionFilter
     ordering_fields = ["id", "sortable_title", "release_date_date", "supertype"]
     listing_fields = serializers.PRODUCTION_LISTING_FIELDS
+    fast_listing_serializer = staticmethod(fast_serializers.serialize_production_listings)
+    fast_listing_model_fields = fast_serializers.PRODUCTION_LISTING_MODEL_FIELDS
 
 
 class ReleaserViewSet(ListDetailModelViewSet):
@@ -67,34 +98,26 @@ class ReleaserViewSet(ListDetailModelViewSet):
     lookup_value_regex = r"\d+"
     ordering_fields = ["id", "name"]
     listing_fields = ["url", "id", "name", "is_group"]
+    fast_listing_serializer = staticmethod(fast_serializers.serialize_releaser_listings)
+    fast_listing_model_fields = fast_serializers.RELEASER_LISTING_MODEL_FIELDS
 
     @action(detail=True)
     def productions(self, request, pk):
         releaser = get_object_or_404(Releaser, pk=pk)
-        queryset = (
-            releaser.productions()
-            .order_by("-release_date_date")
-            .prefetch_related(
-                "platforms", "types", "author_nicks__releaser", "author_affiliation_nicks__releaser", "tags"
-            )
-        )
-        serializer = serializers.ProductionSerializer(
-            queryset,
-            many=True,
-            context={"request": request},
-            fields=serializers.PRODUCTION_LISTING_FIELDS,
-        )
-        return Response(serializer.data)
+        return self.production_listing_response(request, releaser.productions().order_by("-release_date_date"))
 
     @action(detail=True)
     def member_productions(self, request, pk):
         releaser = get_object_or_404(Releaser, pk=pk)
-        queryset = (
-            releaser.member_productions()
-            .order_by("-release_date_date")
-            .prefetch_related(
-                "platforms", "types", "author_nicks__releaser", "author_affiliation_nicks__releaser", "tags"
-            )
+        return self.production_listing_response(request, releaser.member_productions().order_by("-release_date_date"))
+
+    def production_listing_response(self, request, queryset):
+        if settings.API_FAST_LISTINGS:
+            queryset = queryset.only(*fast_serializers.PRODUCTION_LISTING_MODEL_FIELDS)
+            return Response(fast_serializers.serialize_production_listings(queryset, request))
+
+        queryset = queryset.prefetch_related(
+            "platforms", "types", "author_nicks__releaser", "author_affiliation_nicks__releaser", "tags"
         )
         serializer = serializers.ProductionSerializer(
             queryset, many=True, context={"request": request}, fields=serializers.PRODUCTION_LISTING_FIELDS
@@ -140,3 +163,46 @@ class BBSViewSet(ListDetailModelViewSet):
         "longitude",
         "tags",
     ]
+
+
+class ChangeViewSet(viewsets.GenericViewSet):
+    """
+    Log of changes to productions, releasers, parties, party series and BBSes, including deletions,
+    oldest first. Pass the cursor of the last change seen as `after` to fetch the changes since then,
+    and `type` to only return changes to one kind of record.
+    """
+
+    queryset = Change.objects.all()
+    serializer_class = serializers.ChangeSerializer
+    filter_backends = []
+    page_size = 1000
+
+    def list(self, request):
+        try:
+            after = int(request.query_params.get("after", 0))
+        except ValueError:
+            raise ValidationError({"after": "Must be a cursor value from a previous response"})
+
+        # hold back the most recent changes, until any that were committed concurrently with them are visible
+        changes = Change.objects.filter(
+            id__gt=after, timestamp__lte=timezone.now() - datetime.timedelta(seconds=settings.CHANGE_FEED_DELAY)
+        )
+        object_type = request.query_params.get("type")
+        if object_type:
+            if object_type not in CHANGE_LOG_TYPES.values():
+                raise ValidationError({"type": "Must be one of: %s" % ", ".join(CHANGE_LOG_TYPES.values())})
+            changes = changes.filter(object_type=object_type)
+
+        changes = list(changes.order_by("id")[: self.page_size + 1])
+        has_more = len(changes) > self.page_size
+        changes = changes[: self.page_size]
+        cursor = changes[-1].id if changes else after
+
+        serializer = self.get_serializer(changes, many=True)
+        return Response(
+            {
+                "cursor": cursor,
+                "next": replace_query_param(request.build_absolute_uri(), "after", cursor) if has_more else None,
+                "results": serializer.data,
+            }
+        )
@@ -289,6 +289,9 @@ class Nomination(models.Model):
     category = models.ForeignKey(Category, related_name="nominations", on_delete=models.CASCADE)
     status = models.CharField(max_length=32, choices=STATUSES, default="nominee")
 
+    def fragment_cache_dependents(self):
+        return [("productions.production", [self.production_id])]
+
     class Meta:
         unique_together = [
             ("production", "category"),
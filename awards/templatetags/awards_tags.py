@@ -1,7 +1,6 @@
 from django import template
 from django.conf import settings
 
-from productions.models import Screenshot
 from productions.templatetags.production_tags import production_listing
 
 
@@ -12,15 +11,12 @@ register = template.Library()
 def recommended_production_listing(
     recommendations, show_screenshots=False, show_prod_types=False, mark_excludable=False
 ):
-    if show_screenshots:
-        screenshots = Screenshot.select_for_production_ids(
-            [recommendation.production.id for recommendation in recommendations]
-        )
-    else:
-        screenshots = {}  # pragma: no cover
-
     rows = [
-        (recommendation, recommendation.production, screenshots.get(recommendation.production.id))
+        (
+            recommendation,
+            recommendation.production,
+            recommendation.production.representative_thumbnail if show_screenshots else None,
+        )
         for recommendation in recommendations
     ]
     return {
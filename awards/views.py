@@ -16,7 +16,7 @@ from common.utils.pagination import PaginationControls
 from common.views import writeable_site_required
 from demoscene.shortcuts import get_page
 from productions.carousel import Carousel
-from productions.models import Production, Screenshot
+from productions.models import Production
 from productions.panels import DownloadsPanel
 
 
@@ -64,13 +64,10 @@ def show(request, event_slug):
         )
         .order_by("category__position", "category__name", "category__id", "-status", "production__title")
     )
-    production_ids = {nom.production_id for nom in nominations}
-    screenshots = Screenshot.select_for_production_ids(production_ids)
-
     nominations_by_category = []
     for category, category_nominations in itertools.groupby(nominations, lambda r: r.category):
         status_groups = [
-            (status, [(nom.production, screenshots.get(nom.production.id)) for nom in noms])
+            (status, [(nom.production, nom.production.representative_thumbnail) for nom in noms])
             for status, noms in itertools.groupby(category_nominations, lambda r: r.status)
         ]
         nominations_by_category.append((category, status_groups))
@@ -354,9 +351,7 @@ def screening_review(request, event_slug):
 
     decision_page = get_page(decisions, request.GET.get("page", "1"))
 
-    screenshots = Screenshot.select_for_production_ids([decision.production_id for decision in decision_page])
-
-    rows = [(decision, decision.production, screenshots.get(decision.production_id)) for decision in decision_page]
+    rows = [(decision, decision.production, decision.production.representative_thumbnail) for decision in decision_page]
 
     return render(
         request,
@@ -109,6 +109,13 @@ class BBS(URLMixin, LocationMixin, Commentable):
             "C": self.asciified_location + " " + self.plaintext_notes,
         }
 
+    def fragment_cache_dependents(self):
+        # BBS names appear on the pages of bbstros and affiliated groups
+        return [
+            ("productions.production", self.bbstros.values_list("id", flat=True)),
+            ("demoscene.releaser", self.affiliations.values_list("group_id", flat=True)),
+        ]
+
     class Meta:
         ordering = ["name"]
         verbose_name_plural = "BBSes"
@@ -182,6 +189,9 @@ class Affiliation(models.Model):
         else:
             return "%s affiliated with %s" % (self.group.name, self.bbs.name)
 
+    def fragment_cache_dependents(self):
+        return [("demoscene.releaser", [self.group_id])]
+
 
 class TextAd(TextFile):
     bbs = models.ForeignKey(BBS, related_name="text_ads", on_delete=models.CASCADE)
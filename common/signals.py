@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import ForeignKey
+from django.db.models.signals import ModelSignal, m2m_changed, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from common.utils.fragment_cache import bulk_dependents, dependent_generation_keys, expire_generations, generation_key
+
+
+# Expire the cached page fragments (see common.utils.fragment_cache) that display an object whenever it changes.
+# Dependents are worked out at the time of the change, while related records still exist, and expired
+# once the transaction commits so that a concurrent request cannot cache the old state under a new generation.
+
+
+# Sent before an existing object is saved with a different value for one of its foreign keys, with the
+# object as currently stored in the database as old_instance. Connect receivers with a sender, so that
+# the stored object is only looked up for the models that something is listening for.
+foreign_key_changed = ModelSignal(use_caching=True)
+
+
+# Sent by code that writes records with bulk_create, which does not send the model signals, once the batch
+# has been written: sender is the model (the through model, for a many-to-many relation) and objects is the
+# list of new records. Receivers do the work of their post_save / m2m_changed handlers for the whole batch.
+bulk_saved = ModelSignal(use_caching=True)
+
+
+def is_tracked(model):
+    return settings.FRAGMENT_CACHE_ENABLED and hasattr(model, "fragment_cache_dependents")
+
+
+def expire_on_commit(keys):
+    if keys:
+        transaction.on_commit(lambda: expire_generations(keys))
+
+
+@receiver(pre_save)
+def on_pre_save(sender, instance, raw=False, **kwargs):
+    # look up the stored object once for all the foreign_key_changed receivers
+    if raw or instance.pk is None or not (is_tracked(sender) or foreign_key_changed.has_listeners(sender)):
+        return
+    old_instance = sender._default_manager.filter(pk=instance.pk).first()
+    if old_instance is None:
+        return
+    if any(
+        getattr(old_instance, field.attname) != getattr(instance, field.attname)
+        for field in sender._meta.concrete_fields
+        if isinstance(field, ForeignKey)
+    ):
+        if is_tracked(sender):
+            # the pages that showed the object under its old parent are stale too
+            expire_on_commit(dependent_generation_keys(old_instance))
+        foreign_key_changed.send(sender=sender, instance=instance, old_instance=old_instance)
+
+
+@receiver(post_save)
+@receiver(pre_delete)
+def on_save_or_delete(sender, instance, raw=False, **kwargs):
+    if raw or not is_tracked(sender):
+        return
+    expire_on_commit(dependent_generation_keys(instance))
+
+
+@receiver(bulk_saved)
+def on_bulk_saved(sender, objects, **kwargs):
+    if not is_tracked(sender):
+        return
+    expire_on_commit(
+        {
+            generation_key(model_label, pk)
+            for model_label, pks in bulk_dependents(sender, objects)
+            for pk in pks
+            if pk is not None
+        }
+    )
+
+
+@receiver(m2m_changed)
+def on_m2m_changed(sender, instance, action, model, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    keys = set()
+    if is_tracked(type(instance)):
+        keys |= dependent_generation_keys(instance)
+    if pk_set and is_tracked(model):
+        # the instance's dependents cover the objects now related to it; objects that have just been
+        # removed are no longer reachable from it, so expire their own pages (and, for nicks, the
+        # pages of the releasers they belong to) without working out everything that displays them
+        model_label = model._meta.label_lower
+        keys |= {generation_key(model_label, pk) for pk in pk_set}
+        if model_label == "demoscene.nick":
+            releaser_ids = model._default_manager.filter(pk__in=pk_set).values_list("releaser_id", flat=True)
+            keys |= {generation_key("demoscene.releaser", pk) for pk in releaser_ids}
+    expire_on_commit(keys)
@@ -0,0 +1,42 @@
+from django import template
+from django.conf import settings
+
+from common.utils.fragment_cache import get_cached_fragment
+
+
+register = template.Library()
+
+
+@register.tag(name="fragmentcache")
+def do_fragmentcache(parser, token):
+    """
+    {% fragmentcache "name" obj %} ... {% endfragmentcache %}
+
+    Cache the enclosed template output against the model instance obj, until obj or something
+    that it displays is changed. Only applied for anonymous users viewing the page without
+    query parameters; everyone else gets the enclosed template rendered as normal.
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError("%r tag requires a fragment name and an object" % bits[0])
+    nodelist = parser.parse(("endfragmentcache",))
+    parser.delete_first_token()
+    return FragmentCacheNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, obj):
+        self.nodelist = nodelist
+        self.name = name
+        self.obj = obj
+
+    def render(self, context):
+        request = context.get("request")
+        if not settings.FRAGMENT_CACHE_ENABLED or request is None or request.user.is_authenticated or request.GET:
+            return self.nodelist.render(context)
+
+        return get_cached_fragment(
+            self.name.resolve(context),
+            self.obj.resolve(context),
+            lambda: self.nodelist.render(context),
+        )
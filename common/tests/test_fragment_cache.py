@@ -0,0 +1,96 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from demoscene.models import Nick, Releaser
+from parties.models import Party
+from productions.models import Production
+
+
+@override_settings(
+    FRAGMENT_CACHE_ENABLED=True,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class TestFragmentCache(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def setUp(self):
+        cache.clear()
+        self.pondlife = Production.objects.get(title="Pondlife")
+
+    def test_production_page_is_served_from_cache(self):
+        url = "/productions/%d/" % self.pondlife.id
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        # queryset updates do not send signals, so the cached fragments are left alone
+        Production.objects.filter(id=self.pondlife.id).update(notes="Changed behind the back of the cache")
+        response = self.client.get(url)
+        self.assertNotContains(response, "Changed behind the back of the cache")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pondlife.notes = "Changed properly"
+            self.pondlife.save()
+        response = self.client.get(url)
+        self.assertContains(response, "Changed properly")
+
+    def test_bypass_cache_for_logged_in_users(self):
+        url = "/productions/%d/" % self.pondlife.id
+        self.client.get(url)
+        Production.objects.filter(id=self.pondlife.id).update(notes="Changed behind the back of the cache")
+
+        User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        response = self.client.get(url)
+        self.assertContains(response, "Changed behind the back of the cache")
+
+    def test_bypass_cache_for_query_parameters(self):
+        url = "/productions/%d/" % self.pondlife.id
+        self.client.get(url)
+        Production.objects.filter(id=self.pondlife.id).update(notes="Changed behind the back of the cache")
+
+        response = self.client.get(url, {"editing": "credits"})
+        self.assertContains(response, "Changed behind the back of the cache")
+
+    def test_production_change_expires_party_page(self):
+        party = Party.objects.get(name="Forever 2e3")
+        url = "/parties/%d/" % party.id
+        self.assertContains(self.client.get(url), "Madrielle")
+
+        madrielle = Production.objects.get(title="Madrielle")
+        with self.captureOnCommitCallbacks(execute=True):
+            madrielle.title = "Madrielle Deluxe"
+            madrielle.save()
+        self.assertContains(self.client.get(url), "Madrielle Deluxe")
+
+    def test_nick_change_expires_group_page(self):
+        raww_arse = Releaser.objects.get(name="Raww Arse")
+        url = "/groups/%d/" % raww_arse.id
+        self.assertContains(self.client.get(url), "Gasman")
+
+        nick = Nick.objects.get(name="Gasman")
+        with self.captureOnCommitCallbacks(execute=True):
+            nick.name = "Gasman Deluxe"
+            nick.save()
+        self.assertContains(self.client.get(url), "Gasman Deluxe")
+
+    def test_membership_move_expires_old_group_page(self):
+        raww_arse = Releaser.objects.get(name="Raww Arse")
+        hooy_program = Releaser.objects.get(name="Hooy-Program")
+        url = "/groups/%d/" % raww_arse.id
+        self.assertContains(self.client.get(url), "LaesQ")
+
+        membership = raww_arse.member_memberships.get(member__name="LaesQ")
+        with self.captureOnCommitCallbacks(execute=True):
+            membership.group = hooy_program
+            membership.save()
+        self.assertNotContains(self.client.get(url), "LaesQ")
+
+    def test_removing_author_expires_group_page(self):
+        hooy_program = Releaser.objects.get(name="Hooy-Program")
+        url = "/groups/%d/" % hooy_program.id
+        self.assertContains(self.client.get(url), "Pondlife")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pondlife.author_nicks.remove(hooy_program.primary_nick)
+        self.assertNotContains(self.client.get(url), "Pondlife")
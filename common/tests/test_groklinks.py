@@ -4,7 +4,16 @@ from django.core.exceptions import ImproperlyConfigured
 from django.test import TestCase
 
 from bbs.models import BBS, BBSExternalLink
-from common.utils.groklinks import Site, UrlPattern, grok_link_by_types
+from common.utils.groklinks import (
+    PRODUCTION_LINK_TYPES,
+    BaseUrl,
+    LinkTypeIndex,
+    PouetProduction,
+    Site,
+    UrlPattern,
+    grok_link_by_types,
+    grok_link_by_types_linear,
+)
 from demoscene.models import Releaser, ReleaserExternalLink
 from parties.models import Party, PartyExternalLink
 from productions.models import Production, ProductionLink
@@ -299,6 +308,58 @@ class TestLinkRecognition(TestCase):
         self.assertIsInstance(link, ExampleLink)
         self.assertEqual(link.param, "foo-bar")
 
+    def test_path_prefix(self):
+        class ExampleLink(UrlPattern):
+            site = Site("Example", url="https://example.com/")
+            pattern = "/users/<slug>/"
+
+        class ExampleQueryLink(UrlPattern):
+            site = Site("Example", url="https://example.com/")
+            pattern = "/Index.php?thing=<slug>"
+
+        self.assertEqual(ExampleLink.path_prefix, "/users/")
+        self.assertEqual(ExampleQueryLink.path_prefix, "/index.php")
+
+    def test_link_type_index(self):
+        class ExampleLink(UrlPattern):
+            site = Site("Example", url="https://example.com/")
+            pattern = "/users/<slug>/"
+
+        class OtherExampleLink(UrlPattern):
+            site = Site("Other example", url="https://example.net/")
+            pattern = "/users/<slug>/"
+
+        index = LinkTypeIndex([ExampleLink, OtherExampleLink, BaseUrl])
+        self.assertEqual(
+            index.candidates_for_url(urlparse("https://example.com/USERS/gasman/")), [ExampleLink, BaseUrl]
+        )
+        self.assertEqual(index.candidates_for_url(urlparse("https://example.com/groups/hooy-program/")), [BaseUrl])
+        self.assertEqual(index.candidates_for_url(urlparse("https://example.org/users/gasman/")), [BaseUrl])
+
+        link = index.grok("https://www.example.net/users/gasman/")
+        self.assertIsInstance(link, OtherExampleLink)
+        self.assertEqual(link.param, "gasman")
+
+    def test_indexed_matches_linear(self):
+        for urlstring in [
+            "https://www.pouet.net/prod.php?which=13121",
+            "https://www.POUET.net/prod.php?which=13121",
+            "https://www.pouet.net/groups.php?which=1234",
+            "https://files.scene.org/view/demos/groups/hooy-program/pondlife.zip",
+            "https://www.youtube.com/watch?v=ldoVS0idTBw",
+            "https://en.wikipedia.org/wiki/Demoscene",
+            "https://demozoo.org/productions/1/",
+            "mailto:gasman@example.com",
+        ]:
+            indexed_link = grok_link_by_types(urlstring, PRODUCTION_LINK_TYPES)
+            linear_link = grok_link_by_types_linear(urlstring, PRODUCTION_LINK_TYPES)
+            self.assertIs(type(indexed_link), type(linear_link))
+            self.assertEqual(getattr(indexed_link, "param", None), getattr(linear_link, "param", None))
+
+        self.assertIsInstance(
+            grok_link_by_types("https://www.pouet.net/prod.php?which=13121", PRODUCTION_LINK_TYPES), PouetProduction
+        )
+
     def test_bad_pattern(self):
         with self.assertRaises(ImproperlyConfigured):
 
@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+
+from common.utils.pagination import KeysetPaginator
+from demoscene.models import Nick
+from productions.models import Production
+
+
+class TestKeysetPaginator(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def assertCursorPagesMatchOffsetPages(self, queryset, per_page):
+        paginator = KeysetPaginator(queryset, per_page)
+        offset_pages = [list(paginator.page(number)) for number in paginator.page_range]
+
+        # walk forwards through the cursors...
+        page = paginator.page(1)
+        cursor_pages = [list(page)]
+        while page.has_next():
+            page = paginator.page(page.next_page_number(), cursor=page.next_cursor)
+            cursor_pages.append(list(page))
+        self.assertEqual(cursor_pages, offset_pages)
+
+        # ...and back again
+        cursor_pages = [list(page)]
+        while page.has_previous():
+            page = paginator.page(page.previous_page_number(), cursor=page.previous_cursor)
+            cursor_pages.insert(0, list(page))
+        self.assertEqual(cursor_pages, offset_pages)
+
+    def test_ordering_with_nulls(self):
+        Production.objects.filter(title="Madrielle").update(release_date_date=None)
+        self.assertCursorPagesMatchOffsetPages(Production.objects.order_by("-release_date_date", "title"), 2)
+        self.assertCursorPagesMatchOffsetPages(Production.objects.order_by("release_date_date", "-title"), 3)
+
+    def test_ordering_by_annotation(self):
+        from django.db.models.functions import Lower
+
+        queryset = Nick.objects.annotate(lower_name=Lower("name")).order_by("lower_name")
+        self.assertCursorPagesMatchOffsetPages(queryset, 3)
+
+    def test_ordering_with_row_values(self):
+        Production.objects.filter(title="Madrielle").update(sortable_title=None)
+        self.assertCursorPagesMatchOffsetPages(Production.objects.order_by("sortable_title"), 2)
+        self.assertCursorPagesMatchOffsetPages(Production.objects.order_by("-sortable_title"), 2)
+        self.assertCursorPagesMatchOffsetPages(Production.objects.order_by("supertype", "sortable_title"), 3)
+
+    def test_keyset_filter_uses_index(self):
+        # the fixture is far too small for an index to be worth using otherwise
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+        for ordering in [("sortable_title",), ("sortable_title", "-id")]:
+            paginator = KeysetPaginator(Production.objects.order_by(*ordering), 2)
+            direction, values = paginator.decode_cursor(paginator.page(1).next_cursor)
+            queryset = paginator.object_list.filter(paginator.get_keyset_filter(direction, values))
+            self.assertIn("Index Cond", queryset.explain())
+
+    def walk_cursors(self, paginator):
+        page = paginator.page(1)
+        rows = list(page)
+        while page.has_next():
+            page = paginator.page(page.next_page_number(), cursor=page.next_cursor)
+            self.assertTrue(page.object_list)
+            rows.extend(page)
+        return rows
+
+    def test_cursors_are_not_bounded_by_estimated_count(self):
+        queryset = Production.objects.order_by("title")
+        expected = list(queryset)
+
+        # an underestimate must not cut the walk short...
+        with patch("common.utils.pagination.estimated_count", return_value=2):
+            self.assertEqual(self.walk_cursors(KeysetPaginator(queryset, 2, estimate_count=True)), expected)
+
+        # ...and an overestimate must not leave a trailing empty page
+        with patch("common.utils.pagination.estimated_count", return_value=1000):
+            self.assertEqual(self.walk_cursors(KeysetPaginator(queryset, 2, estimate_count=True)), expected)
+
+    def test_pk_is_added_as_tie_breaker(self):
+        paginator = KeysetPaginator(Production.objects.order_by("-supertype"), 10)
+        self.assertEqual(paginator.ordering, [("supertype", True), ("id", True)])
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(Production.objects.order_by("title"), 2)
+        self.assertEqual(list(paginator.page(2, cursor="bogus")), list(paginator.page(2)))
+
+    def test_unsupported_ordering(self):
+        with self.assertRaises(ValueError):
+            KeysetPaginator(Production.objects.order_by("platforms__name"), 10)
@@ -0,0 +1,78 @@
+"""
+Versioned caching of rendered page fragments.
+
+Every object that a cached fragment is built around has a generation token, held in the cache
+with no expiry, and fragments are cached under a key that includes the current token. Changing
+the object (or anything that it displays) discards the token - see common.signals - so that the
+next request picks a fresh one and all previously cached fragments for that object become
+unreachable, and eventually expire.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def generation_key(model_label, pk):
+    return "fragment-generation:%s:%s" % (model_label, pk)
+
+
+def get_generation(obj):
+    """Return the current generation token for the given model instance, creating one if necessary"""
+    key = generation_key(obj._meta.label_lower, obj.pk)
+    generation = cache.get(key)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add(key, generation, timeout=None):
+            # someone else got there first
+            generation = cache.get(key, generation)
+    return generation
+
+
+def dependent_generation_keys(obj):
+    """
+    Return the generation keys to discard when the given model instance is changed, as
+    determined by its fragment_cache_dependents method - an iterable of (model label, ids) pairs
+    """
+    return {
+        generation_key(model_label, pk)
+        for model_label, pks in obj.fragment_cache_dependents()
+        for pk in pks
+        if pk is not None
+    }
+
+
+def bulk_dependents(model, objs):
+    """
+    Return (model label, ids) pairs for the cached page fragments that display any of the given instances
+    of model - by way of its bulk_fragment_cache_dependents method if it has one, rather than asking each
+    instance in turn
+    """
+    if hasattr(model, "bulk_fragment_cache_dependents"):
+        return model.bulk_fragment_cache_dependents(objs)
+    return [dependent for obj in objs for dependent in obj.fragment_cache_dependents()]
+
+
+def expire_generations(keys):
+    if keys:
+        cache.delete_many(list(keys))
+
+
+def get_cached_fragment(name, obj, render):
+    """
+    Return the fragment with the given name for the model instance obj from the cache; if it is
+    not there, call render() to build it and store the result
+    """
+    key = "fragment:%s:%s:%s:%s:%s" % (
+        name,
+        obj._meta.label_lower,
+        obj.pk,
+        get_generation(obj),
+        "rw" if settings.SITE_IS_WRITEABLE else "ro",
+    )
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html, settings.FRAGMENT_CACHE_TIMEOUT)
+    return html
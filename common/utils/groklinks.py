@@ -1,4 +1,5 @@
 # coding=utf-8
+import functools
 import json
 import re
 import urllib
@@ -164,6 +165,10 @@ class AbstractBaseUrl:
 
     link_label = None
 
+    # lowercased prefix that the path of any URL recognised by this class must start with;
+    # used by LinkTypeIndex to rule out link types without running their tests
+    path_prefix = ""
+
     def get_embed_data(self):
         return None
 
@@ -331,6 +336,7 @@ class UrlPatternConstructor(type):
                 dct["tests"] = [
                     query_path_match(url.path, varname, numeric=numeric, othervars=othervars),
                 ]
+                dct["path_prefix"] = url.path.lower()
             else:
                 pattern_re = re.escape(url.path.rstrip("/"))
                 pattern_re = pattern_re.replace(r"\<int\>", r"(\d+)").replace(r"<int>", r"(\d+)")
@@ -339,6 +345,7 @@ class UrlPatternConstructor(type):
                 dct["tests"] = [
                     path_regex_match(pattern_re),
                 ]
+                dct["path_prefix"] = url.path.rstrip("/").split("<", 1)[0].lower()
 
             pattern_as_format = re.sub(r"<\w+>", "%s", pattern)
             dct["canonical_format"] = dct["site"].base_url + pattern_as_format
@@ -2348,11 +2355,77 @@ ARCHIVED_LINK_TYPES = [
 ]
 
 
+class LinkTypeIndex:
+    """
+    A lookup table of link types keyed by hostname, so that a URL only needs to be tested
+    against the link types whose site accepts that hostname (plus those that accept any
+    hostname, such as BaseUrl). Candidates are returned in their original order of
+    precedence, so the result is the same as testing every link type in turn.
+    """
+
+    def __init__(self, link_types):
+        self.link_types = link_types
+
+        # link types that do not restrict the hostname need to be considered for every URL
+        self.wildcard_link_types = [
+            (link_type, link_type.path_prefix)
+            for link_type in link_types
+            if link_type.site.allowed_hostnames is None
+        ]
+
+        hostnames = set()
+        for link_type in link_types:
+            if link_type.site.allowed_hostnames is not None:
+                hostnames.update(link_type.site.allowed_hostnames)
+
+        self.link_types_by_hostname = {}
+        for hostname in hostnames:
+            self.link_types_by_hostname[hostname] = [
+                (link_type, link_type.path_prefix)
+                for link_type in link_types
+                if link_type.site.allowed_hostnames is None or hostname in link_type.site.allowed_hostnames
+            ]
+
+    def candidates_for_url(self, url):
+        """
+        Return the link types that could possibly match the parsed URL 'url', in order of precedence
+        """
+        path = url.path.lower()
+        return [
+            link_type
+            for link_type, path_prefix in self.link_types_by_hostname.get(url.hostname, self.wildcard_link_types)
+            if path.startswith(path_prefix)
+        ]
+
+    def grok(self, urlstring):
+        url = urllib.parse.urlparse(urlstring)
+        for link_type in self.candidates_for_url(url):
+            link = link_type.match(urlstring, url)
+            if link:
+                return link
+
+
+@functools.lru_cache(maxsize=None)
+def get_link_type_index(link_types):
+    """
+    Return a (cached) LinkTypeIndex for the given tuple of link types
+    """
+    return LinkTypeIndex(link_types)
+
+
 def grok_link_by_types(urlstring, link_types):
     """
     Try to turn urlstring into a link object by matching it against each of the link types in
     the link_type list. If none of them match, return None.
     """
+    return get_link_type_index(tuple(link_types)).grok(urlstring)
+
+
+def grok_link_by_types_linear(urlstring, link_types):
+    """
+    Equivalent to grok_link_by_types, but tests urlstring against every link type in turn
+    without consulting the index. Used as a reference implementation for benchmarking.
+    """
     url = urllib.parse.urlparse(urlstring)
     for link_type in link_types:
         link = link_type.match(urlstring, url)
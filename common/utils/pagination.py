@@ -1,4 +1,14 @@
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connection
+from django.db.models import BooleanField, Expression, F, Q, Value
+from django.db.models.expressions import OrderBy
 from django.http import QueryDict
+from django.utils.functional import cached_property
 from laces.components import Component
 
 
@@ -27,9 +37,11 @@ class PaginationControls(Component):
         self.base_url = base_url
         self.query_dict = query_dict or QueryDict("")
 
-    def get_page_url(self, page_num):
+    def get_page_url(self, page_num, cursor=None):
         new_query_dict = self.query_dict.copy()
         new_query_dict.setlist("page", [page_num])
+        if cursor:
+            new_query_dict.setlist("cursor", [cursor])
         return "%s?%s" % (self.base_url, new_query_dict.urlencode())
 
     def get_context_data(self, parent_context=None):
@@ -37,7 +49,9 @@ class PaginationControls(Component):
         if self.page.has_previous():
             links.append(
                 PageLink(
-                    url=self.get_page_url(self.page.previous_page_number()),
+                    url=self.get_page_url(
+                        self.page.previous_page_number(), getattr(self.page, "previous_cursor", None)
+                    ),
                     label="«",
                     title="Previous page",
                 )
@@ -64,7 +78,7 @@ class PaginationControls(Component):
         if self.page.has_next():
             links.append(
                 PageLink(
-                    url=self.get_page_url(self.page.next_page_number()),
+                    url=self.get_page_url(self.page.next_page_number(), getattr(self.page, "next_cursor", None)),
                     label="»",
                     title="Next page",
                 )
@@ -73,3 +87,297 @@ class PaginationControls(Component):
         return {
             "links": links,
         }
+
+
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def estimated_count(queryset):
+    """
+    Return the number of rows in the queryset. On PostgreSQL, large results are counted from the
+    planner's row estimate rather than with a COUNT(*) over every row; an exact count is only
+    performed when the estimate is below ESTIMATED_COUNT_THRESHOLD
+    """
+    queryset = queryset.order_by()
+    if connection.vendor == "postgresql":
+        plan = json.loads(queryset.explain(format="json"))
+        estimate = plan[0]["Plan"]["Plan Rows"]
+        if estimate >= ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+    return queryset.count()
+
+
+class RowValueComparison(Expression):
+    """
+    A row value comparison, (a, b, c) < (x, y, z), which the database can answer with a single range
+    scan of an index on (a, b, c)
+    """
+
+    output_field = BooleanField()
+    conditional = True
+
+    def __init__(self, lhs, operator, rhs):
+        super().__init__()
+        self.lhs = list(lhs)
+        self.operator = operator
+        self.rhs = list(rhs)
+
+    def get_source_expressions(self):
+        return self.lhs + self.rhs
+
+    def set_source_expressions(self, exprs):
+        self.lhs, self.rhs = exprs[: len(self.lhs)], exprs[len(self.lhs) :]
+
+    def as_sql(self, compiler, connection):
+        sqls, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sqls.append(sql)
+            params.extend(expression_params)
+        return "(%s) %s (%s)" % (
+            ", ".join(sqls[: len(self.lhs)]),
+            self.operator,
+            ", ".join(sqls[len(self.lhs) :]),
+        ), params
+
+
+class KeysetPage(Page):
+    def __init__(self, object_list, number, paginator, is_last=None, is_first=None):
+        # evaluate up front, as the cursors need the first and last rows
+        super().__init__(list(object_list), number, paginator)
+        # for pages located by cursor, whether there are rows beyond this page is known from the query,
+        # which is more reliable than comparing the page number against an estimated count
+        self.is_last = is_last
+        self.is_first = is_first
+
+    def has_next(self):
+        if self.is_last is None:
+            return super().has_next()
+        return not self.is_last
+
+    def has_previous(self):
+        if self.is_first is None:
+            return super().has_previous()
+        return not self.is_first
+
+    def next_page_number(self):
+        if self.is_last is None:
+            return super().next_page_number()
+        return self.number + 1
+
+    def previous_page_number(self):
+        if self.is_first is None:
+            return super().previous_page_number()
+        return self.number - 1
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self.object_list:
+            return self.paginator.encode_cursor("next", self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous() and self.object_list:
+            return self.paginator.encode_cursor("previous", self.object_list[0])
+
+
+class KeysetPaginator(Paginator):
+    """
+    A Paginator that can also fetch the page adjacent to a known row, by filtering on the ordering
+    keys of that row (keyset pagination) rather than skipping over all the preceding rows with OFFSET.
+    Pages expose next_cursor / previous_cursor tokens to pass back to page() for this purpose; page
+    numbers without a cursor are fetched by offset as usual.
+
+    The queryset must be ordered by plain fields or annotations, optionally ending in the primary key;
+    if it does not end in the primary key, it is added as a tie-breaker. Nulls are ordered as the
+    largest values, as PostgreSQL does by default.
+
+    If estimate_count is true, the total number of rows is taken from the planner's estimate where
+    it is large (see estimated_count). The estimate is then only for display: pages are not bounded
+    by it, and find out whether there are more rows by fetching one extra.
+    """
+
+    def __init__(self, object_list, per_page, estimate_count=False, **kwargs):
+        self.ordering = self.get_ordering(object_list)
+        object_list = object_list.order_by(
+            *[
+                F(name).desc(nulls_first=True) if descending else F(name).asc(nulls_last=True)
+                for name, descending in self.ordering
+            ]
+        )
+        self.estimate_count = estimate_count
+        super().__init__(object_list, per_page, **kwargs)
+
+    @staticmethod
+    def get_ordering(queryset):
+        ordering = []
+        for item in queryset.query.order_by or queryset.model._meta.ordering:
+            if isinstance(item, str):
+                descending = item.startswith("-")
+                name = item.lstrip("-")
+            elif isinstance(item, OrderBy) and isinstance(item.expression, F):
+                descending = item.descending
+                name = item.expression.name
+            else:
+                raise ValueError("Cannot use %r as a keyset pagination ordering" % item)
+            if name == "pk":
+                name = queryset.model._meta.pk.name
+            elif "__" in name:
+                raise ValueError("Cannot use %r as a keyset pagination ordering" % item)
+            ordering.append((name, descending))
+
+        pk_name = queryset.model._meta.pk.name
+        if not ordering or ordering[-1][0] != pk_name:
+            ordering.append((pk_name, ordering[-1][1] if ordering else False))
+        return ordering
+
+    @cached_property
+    def count(self):
+        if self.estimate_count:
+            return estimated_count(self.object_list)
+        return super().count
+
+    def _get_page(self, *args, **kwargs):
+        return KeysetPage(*args, **kwargs)
+
+    def encode_cursor(self, direction, obj):
+        values = []
+        for name, descending in self.ordering:
+            value = getattr(obj, name)
+            if isinstance(value, datetime.datetime):
+                value = {"datetime": value.isoformat()}
+            elif isinstance(value, datetime.date):
+                value = {"date": value.isoformat()}
+            values.append(value)
+        # padding is dropped, to keep the cursor free of characters that need escaping in URLs
+        return urlsafe_b64encode(json.dumps([direction, values]).encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        """Return a (direction, values) tuple for the given cursor, or None if it is not valid"""
+        try:
+            direction, values = json.loads(urlsafe_b64decode(cursor.encode() + b"=" * (-len(cursor) % 4)))
+            if direction not in ("next", "previous") or len(values) != len(self.ordering):
+                return None
+            for i, value in enumerate(values):
+                if isinstance(value, dict):
+                    if "datetime" in value:
+                        values[i] = datetime.datetime.fromisoformat(value["datetime"])
+                    else:
+                        values[i] = datetime.date.fromisoformat(value["date"])
+                elif not (value is None or isinstance(value, (str, int, float, bool))):
+                    return None
+        except (ValueError, TypeError, KeyError):
+            return None
+        return direction, values
+
+    def is_nullable(self, name):
+        try:
+            return self.object_list.model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            # an annotation
+            return True
+
+    def get_keyset_filter(self, direction, values):
+        """
+        Return a Q object matching the rows that come after (or, for direction='previous', before)
+        the row with the given ordering values
+        """
+        looking_for_smaller = [descending == (direction == "next") for name, descending in self.ordering]
+        if (
+            len(set(looking_for_smaller)) == 1
+            and None not in values
+            and (looking_for_smaller[0] or not any(self.is_nullable(name) for name, descending in self.ordering[1:]))
+        ):
+            # all keys run the same way, so the rows can be located with a row value comparison, which the
+            # database can match directly against an index on the ordering keys. A null compares as
+            # unknown, which leaves the row out: right for rows with smaller values, as nulls count as the
+            # largest, but rows with larger values must take in any nulls in the leading key separately
+            # (and cannot be found this way if the other keys are nullable)
+            q = Q(
+                RowValueComparison(
+                    [F(name) for name, descending in self.ordering],
+                    "<" if looking_for_smaller[0] else ">",
+                    [Value(value) for value in values],
+                )
+            )
+            name = self.ordering[0][0]
+            if not looking_for_smaller[0] and self.is_nullable(name):
+                q |= Q(**{"%s__isnull" % name: True})
+            return q
+
+        # otherwise, build the equivalent chain of (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+        q = Q(pk__in=[])
+        equal_q = Q()
+        for (name, descending), value in zip(self.ordering, values):
+            if descending == (direction == "next"):
+                # looking for smaller values; nulls count as the largest
+                if value is None:
+                    beyond_q = Q(**{"%s__isnull" % name: False})
+                else:
+                    beyond_q = Q(**{"%s__lt" % name: value})
+            else:
+                # looking for larger values
+                if value is None:
+                    beyond_q = Q(pk__in=[])
+                else:
+                    beyond_q = Q(**{"%s__gt" % name: value}) | Q(**{"%s__isnull" % name: True})
+
+            q |= equal_q & beyond_q
+            if value is None:
+                equal_q &= Q(**{"%s__isnull" % name: True})
+            else:
+                equal_q &= Q(**{name: value})
+
+        # the OR chain is not something the planner can use as an index bound, so repeat the condition
+        # on the leading key on its own
+        (name, descending), value = self.ordering[0], values[0]
+        if value is not None:
+            if looking_for_smaller[0]:
+                q &= Q(**{"%s__lte" % name: value})
+            elif self.is_nullable(name):
+                q &= Q(**{"%s__gte" % name: value}) | Q(**{"%s__isnull" % name: True})
+            else:
+                q &= Q(**{"%s__gte" % name: value})
+        return q
+
+    def page(self, number, cursor=None):
+        """
+        Return the page with the given number. If a cursor from the preceding or following page is
+        given, the rows are located from that instead of by offset
+        """
+        decoded_cursor = cursor and self.decode_cursor(cursor)
+        if not decoded_cursor and not self.estimate_count:
+            return super().page(self.validate_number(number))
+
+        # the page number is not checked against num_pages, which may be an underestimate
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+
+        if not decoded_cursor:
+            bottom = (number - 1) * self.per_page
+            object_list = list(self.object_list[bottom : bottom + self.per_page + 1])
+            if not object_list and number > 1:
+                raise EmptyPage("That page contains no results")
+            has_more = len(object_list) > self.per_page
+            return self._get_page(
+                object_list[: self.per_page], number, self, is_last=not has_more, is_first=number == 1
+            )
+
+        direction, values = decoded_cursor
+        queryset = self.object_list.filter(self.get_keyset_filter(direction, values))
+        if direction == "next":
+            object_list = list(queryset[: self.per_page + 1])
+            has_more = len(object_list) > self.per_page
+            object_list = object_list[: self.per_page]
+            # the cursor row itself comes before this page
+            return self._get_page(object_list, number, self, is_last=not has_more, is_first=False)
+        else:
+            object_list = list(queryset.reverse()[: self.per_page + 1])
+            has_more = len(object_list) > self.per_page
+            object_list = object_list[: self.per_page]
+            object_list.reverse()
+            return self._get_page(object_list, number, self, is_last=False, is_first=not has_more)
@@ -0,0 +1,367 @@
+"""
+In-memory index of nick variants for autocompletion.
+
+Each worker process holds every nick variant name in a sorted list, along with the group flag and
+memberships of the releasers they belong to, so that prefix lookups on each keystroke can be answered
+by bisection without a database query. Results are ranked exactly as the SQL version of
+NickVariant.autocompletion_search ranks them: by score (memberships of the requested groups, or
+members with the requested names), then exact matches, then primary nick variants, then name.
+
+Edits are applied per releaser: the signal handlers in demoscene.models call mark_releasers_changed,
+which reloads those releasers in this process once the transaction commits, and records their ids
+under a sequence number in the cache so that other processes can pick up the same change on their
+next lookup. A process that falls too far behind (because the change records have expired) reloads
+the index in full.
+"""
+
+import bisect
+import heapq
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.db.models.functions import Lower
+
+
+SEQUENCE_KEY = "nick-autocomplete:sequence"
+CHANGE_KEY = "nick-autocomplete:change:%d"
+CHANGE_TIMEOUT = 86400
+
+
+class Entry:
+    __slots__ = ("key", "name", "variant_id", "nick_id", "releaser_id", "is_primary")
+
+    def __init__(self, name, variant_id, nick_id, releaser_id, is_primary):
+        self.key = (name.lower(), name, variant_id)
+        self.name = name
+        self.variant_id = variant_id
+        self.nick_id = nick_id
+        self.releaser_id = releaser_id
+        self.is_primary = is_primary
+
+
+class Match:
+    __slots__ = ("variant_id", "nick_id", "name", "score")
+
+    def __init__(self, entry, score):
+        self.variant_id = entry.variant_id
+        self.nick_id = entry.nick_id
+        self.name = entry.name
+        self.score = score
+
+
+class NickIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+
+    def load(self):
+        from demoscene.models import Membership, NickVariant
+
+        with self.lock:
+            # take the sequence number first, so that changes made during the load are replayed afterwards
+            self.sequence = cache.get(SEQUENCE_KEY) or 0
+            self.keys = []
+            self.entries = []
+            self.entries_by_releaser = {}
+            self.lower_names_by_releaser = {}
+            self.releaser_is_group = {}
+            self.group_ids_by_member = {}
+            self.member_ids_by_group = {}
+
+            rows = NickVariant.objects.values_list(
+                "id", "name", "nick_id", "nick__name", "nick__releaser_id", "nick__releaser__is_group"
+            )
+            entries = []
+            for variant_id, name, nick_id, nick_name, releaser_id, is_group in rows.iterator():
+                entry = Entry(name, variant_id, nick_id, releaser_id, name == nick_name)
+                entries.append(entry)
+                self.entries_by_releaser.setdefault(releaser_id, []).append(entry)
+                self.lower_names_by_releaser.setdefault(releaser_id, []).append(entry.key[0])
+                self.releaser_is_group[releaser_id] = is_group
+            entries.sort(key=lambda entry: entry.key)
+            self.entries = entries
+            self.keys = [entry.key for entry in entries]
+
+            for member_id, group_id in Membership.objects.values_list("member_id", "group_id").iterator():
+                self.group_ids_by_member.setdefault(member_id, []).append(group_id)
+                self.member_ids_by_group.setdefault(group_id, []).append(member_id)
+
+            self.loaded = True
+
+    def reset(self):
+        with self.lock:
+            self.loaded = False
+
+    def remove_entry(self, entry):
+        i = bisect.bisect_left(self.keys, entry.key)
+        # a nick that has moved to another releaser may have been re-added under the same key
+        if i < len(self.keys) and self.entries[i] is entry:
+            del self.keys[i]
+            del self.entries[i]
+
+    def remove_releasers(self, releaser_ids):
+        for releaser_id in releaser_ids:
+            for entry in self.entries_by_releaser.pop(releaser_id, []):
+                self.remove_entry(entry)
+            self.lower_names_by_releaser.pop(releaser_id, None)
+            self.releaser_is_group.pop(releaser_id, None)
+            for group_id in self.group_ids_by_member.pop(releaser_id, []):
+                member_ids = self.member_ids_by_group.get(group_id, [])
+                while releaser_id in member_ids:
+                    member_ids.remove(releaser_id)
+
+    def refresh_releasers(self, releaser_ids):
+        """Reload the nick variants and group memberships of the given releasers from the database"""
+        from demoscene.models import Membership, NickVariant
+
+        releaser_ids = set(releaser_ids)
+        if not releaser_ids:
+            return
+
+        rows = list(
+            NickVariant.objects.filter(nick__releaser_id__in=releaser_ids).values_list(
+                "id", "name", "nick_id", "nick__name", "nick__releaser_id", "nick__releaser__is_group"
+            )
+        )
+        memberships = list(Membership.objects.filter(member_id__in=releaser_ids).values_list("member_id", "group_id"))
+
+        with self.lock:
+            if not self.loaded:
+                return
+            self.remove_releasers(releaser_ids)
+            for variant_id, name, nick_id, nick_name, releaser_id, is_group in rows:
+                entry = Entry(name, variant_id, nick_id, releaser_id, name == nick_name)
+                i = bisect.bisect_left(self.keys, entry.key)
+                if i < len(self.keys) and self.keys[i] == entry.key:
+                    # still listed under the releaser that the nick has moved from
+                    self.remove_entry(self.entries[i])
+                self.keys.insert(i, entry.key)
+                self.entries.insert(i, entry)
+                self.entries_by_releaser.setdefault(releaser_id, []).append(entry)
+                self.lower_names_by_releaser.setdefault(releaser_id, []).append(entry.key[0])
+                self.releaser_is_group[releaser_id] = is_group
+            for member_id, group_id in memberships:
+                self.group_ids_by_member.setdefault(member_id, []).append(group_id)
+                self.member_ids_by_group.setdefault(group_id, []).append(member_id)
+
+    def catch_up(self):
+        """Apply any changes that other processes have recorded since this index was last brought up to date"""
+        if not self.loaded:
+            self.load()
+            return
+
+        sequence = cache.get(SEQUENCE_KEY)
+        if sequence is None or sequence == self.sequence:
+            return
+        elif sequence < self.sequence:
+            # the sequence has been restarted, so we can't tell what we've missed
+            self.load()
+            return
+
+        changes = cache.get_many([CHANGE_KEY % n for n in range(self.sequence + 1, sequence + 1)])
+        if len(changes) < sequence - self.sequence:
+            # some change records have expired; start again
+            self.load()
+            return
+
+        self.refresh_releasers(set().union(*changes.values()))
+        self.sequence = sequence
+
+    def score_function(self, group_ids=(), group_names=(), member_names=()):
+        if group_ids:
+            group_ids = set(int(group_id) for group_id in group_ids)
+            return lambda releaser_id: sum(
+                1 for group_id in self.group_ids_by_member.get(releaser_id, []) if group_id in group_ids
+            )
+        elif group_names:
+            group_names = set(name.lower() for name in group_names)
+            return lambda releaser_id: sum(
+                1
+                for group_id in self.group_ids_by_member.get(releaser_id, [])
+                for name in self.lower_names_by_releaser.get(group_id, [])
+                if name in group_names
+            )
+        elif member_names:
+            member_names = set(name.lower() for name in member_names)
+            return lambda releaser_id: sum(
+                1
+                for member_id in self.member_ids_by_group.get(releaser_id, [])
+                for name in self.lower_names_by_releaser.get(member_id, [])
+                if name in member_names
+            )
+        else:
+            return lambda releaser_id: 0
+
+    def search(
+        self,
+        query,
+        exact=False,
+        limit=None,
+        groups_only=False,
+        sceners_only=False,
+        group_ids=(),
+        group_names=(),
+        member_names=(),
+    ):
+        """
+        Return a list of Match objects for the nick variants beginning with (or, if exact is true,
+        equal to) the query, case-insensitively, in ranked order
+        """
+        if not query:
+            return []
+
+        with self.lock:
+            self.catch_up()
+
+            lower_query = query.lower()
+            score = self.score_function(group_ids, group_names, member_names)
+            candidates = []
+            for i in range(bisect.bisect_left(self.keys, (lower_query,)), len(self.keys)):
+                entry = self.entries[i]
+                is_exact_match = entry.key[0] == lower_query
+                if not is_exact_match and (exact or not entry.key[0].startswith(lower_query)):
+                    break
+                if groups_only or sceners_only:
+                    if self.releaser_is_group.get(entry.releaser_id) != groups_only:
+                        continue
+                # keys are in name order, so i breaks ties on name
+                candidates.append(((-score(entry.releaser_id), not is_exact_match, not entry.is_primary, i), entry))
+
+        if limit:
+            ranked = heapq.nsmallest(limit, candidates)
+        else:
+            ranked = sorted(candidates)
+        return [Match(entry, -rank[0]) for rank, entry in ranked]
+
+
+nick_index = NickIndex()
+
+
+def is_enabled():
+    return settings.NICK_AUTOCOMPLETE_INDEX_ENABLED
+
+
+def mark_releasers_changed(releaser_ids):
+    """
+    Reload the given releasers in the nick index once the current transaction commits, here and
+    (on their next lookup) in other processes
+    """
+    releaser_ids = {releaser_id for releaser_id in releaser_ids if releaser_id is not None}
+    if not releaser_ids or not is_enabled():
+        return
+
+    def publish():
+        nick_index.refresh_releasers(releaser_ids)
+        cache.add(SEQUENCE_KEY, 0, timeout=None)
+        try:
+            sequence = cache.incr(SEQUENCE_KEY)
+        except ValueError:
+            # sequence key has been evicted; other processes will carry on with what they have
+            return
+        cache.set(CHANGE_KEY % sequence, releaser_ids, CHANGE_TIMEOUT)
+
+    transaction.on_commit(publish)
+
+
+class NameIndex(NickIndex):
+    """
+    A NickIndex holding just the nick variants with the given names (matched case-insensitively) and the
+    memberships of their releasers, for resolving a batch of names - such as all the bylines in a results
+    file - in two queries. Searches are ranked as in the full index, provided that any group_names or
+    member_names passed to search are among the loaded names.
+    """
+
+    def __init__(self, names):
+        super().__init__()
+        self.names = {name.lower() for name in names if name}
+        self.nick_variants = None
+
+    def load(self):
+        from demoscene.models import Membership, NickVariant
+
+        with self.lock:
+            self.entries = []
+            self.entries_by_releaser = {}
+            self.lower_names_by_releaser = {}
+            self.releaser_is_group = {}
+            self.group_ids_by_member = {}
+            self.member_ids_by_group = {}
+
+            rows = (
+                NickVariant.objects.annotate(lower_name=Lower("name"))
+                .filter(lower_name__in=self.names)
+                .values_list("id", "name", "nick_id", "nick__name", "nick__releaser_id", "nick__releaser__is_group")
+            )
+            for variant_id, name, nick_id, nick_name, releaser_id, is_group in rows:
+                entry = Entry(name, variant_id, nick_id, releaser_id, name == nick_name)
+                self.entries.append(entry)
+                self.entries_by_releaser.setdefault(releaser_id, []).append(entry)
+                self.lower_names_by_releaser.setdefault(releaser_id, []).append(entry.key[0])
+                self.releaser_is_group[releaser_id] = is_group
+            self.entries.sort(key=lambda entry: entry.key)
+            self.keys = [entry.key for entry in self.entries]
+
+            releaser_ids = list(self.entries_by_releaser)
+            memberships = Membership.objects.filter(
+                Q(member_id__in=releaser_ids) | Q(group_id__in=releaser_ids)
+            ).values_list("member_id", "group_id")
+            for member_id, group_id in memberships:
+                self.group_ids_by_member.setdefault(member_id, []).append(group_id)
+                self.member_ids_by_group.setdefault(group_id, []).append(member_id)
+
+            self.loaded = True
+
+    def get_nick_variants(self):
+        """
+        Return a dict of the loaded NickVariant records by id, with their nicks, releasers and the releasers'
+        group memberships, as needed to present them as NickSearch suggestions; fetched on first use
+        """
+        from demoscene.models import Membership, NickVariant
+
+        with self.lock:
+            self.catch_up()
+            if self.nick_variants is None:
+                self.nick_variants = (
+                    NickVariant.objects.select_related("nick", "nick__releaser")
+                    .prefetch_related(
+                        Prefetch(
+                            "nick__releaser__group_memberships",
+                            queryset=Membership.objects.select_related("group")
+                            .prefetch_related("group__nicks")
+                            .order_by("group__name"),
+                        )
+                    )
+                    .in_bulk([entry.variant_id for entry in self.entries])
+                )
+        return self.nick_variants
+
+    def catch_up(self):
+        # the index only lives as long as the batch it was loaded for
+        if not self.loaded:
+            self.load()
+
+    def has_name(self, name, groups_only=False):
+        """Return whether any nick variant (of a group, if groups_only is true) has the given name"""
+        with self.lock:
+            self.catch_up()
+            lower_name = name.lower()
+            for i in range(bisect.bisect_left(self.keys, (lower_name,)), len(self.keys)):
+                entry = self.entries[i]
+                if entry.key[0] != lower_name:
+                    break
+                if not groups_only or self.releaser_is_group.get(entry.releaser_id):
+                    return True
+        return False
+
+    def select(self, name, **kwargs):
+        """
+        Return the id of the nick that an exact search for the name would select (as NickSearch does:
+        the only match, or the one that scores strictly higher than the rest), or None if there is none
+        """
+        matches = self.search(name, exact=True, limit=2, **kwargs)
+        if len(matches) == 1 or (len(matches) == 2 and matches[0].score > matches[1].score):
+            return matches[0].nick_id
+        return None
@@ -69,6 +69,7 @@ class NickSearch:
         group_ids=[],
         group_names=[],
         member_names=[],
+        nick_index=None,
     ):
         self.search_term = search_term
 
@@ -80,6 +81,7 @@ class NickSearch:
             group_ids=group_ids,
             group_names=group_names,
             member_names=member_names,
+            nick_index=nick_index,
         )
 
         self.suggestions = []
@@ -131,9 +133,9 @@ class NickSearch:
             self.selection = selection
         else:
             # if there is a definite best-scoring nickvariant, select it
-            if nick_variants.count() == 0:
+            if len(nick_variants) == 0:
                 self.selection = None
-            elif nick_variants.count() == 1 or nick_variants[0].score > nick_variants[1].score:
+            elif len(nick_variants) == 1 or nick_variants[0].score > nick_variants[1].score:
                 self.selection = NickSelection(self.suggestions[0]["id"], self.suggestions[0]["nameWithDifferentiator"])
             else:
                 self.selection = None
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:07
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demoscene', '0001_squashed_0021_edit_index_together'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='nick',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('id'), name='nick_lower_name'),
+        ),
+    ]
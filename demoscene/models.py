@@ -1,3 +1,4 @@
+import copy
 import datetime
 import hashlib
 import re
@@ -11,6 +12,10 @@ from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.indexes import GinIndex
 from django.contrib.postgres.search import SearchVectorField
 from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Lower
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
@@ -19,6 +24,7 @@ from unidecode import unidecode
 from common.models import LocationMixin, Lockable, PrefetchSnoopingMixin, URLMixin
 from common.utils import groklinks
 from common.utils.text import generate_search_title, strip_markup
+from demoscene import autocomplete as nick_autocomplete
 
 
 DATE_PRECISION_CHOICES = [
@@ -105,27 +111,15 @@ class Releaser(URLMixin, LocationMixin, PrefetchSnoopingMixin, Lockable):
     def productions(self):
         from productions.models import Production
 
-        return Production.objects.filter(author_nicks__in=list(self.nicks.all()))
+        return Production.objects.filter(releaser_roles__releaser=self, releaser_roles__role="author")
 
     def member_productions(self):
         # Member productions are those which list this group in the 'affiliations' portion of the byline,
         # OR the author is a SUBGROUP of this group (regardless of whether this parent group is named as an
-        # affiliation).
+        # affiliation). These are precomputed in the ReleaserProduction table.
         from productions.models import Production
 
-        subgroup_nick_ids = list(
-            Nick.objects.filter(releaser__is_group=True, releaser__group_memberships__group=self).values_list(
-                "id", flat=True
-            )
-        )
-        subgroup_prod_ids = set(
-            Production.objects.filter(author_nicks__in=subgroup_nick_ids).values_list("id", flat=True)
-        )
-        affiliation_prod_ids = set(
-            Production.objects.filter(author_affiliation_nicks__in=list(self.nicks.all())).values_list("id", flat=True)
-        )
-
-        return Production.objects.filter(id__in=(subgroup_prod_ids | affiliation_prod_ids))
+        return Production.objects.filter(releaser_roles__releaser=self, releaser_roles__role="member")
 
     def credits(self):
         from productions.models import Credit
@@ -142,6 +136,11 @@ class Releaser(URLMixin, LocationMixin, PrefetchSnoopingMixin, Lockable):
         )
 
     def groups(self):
+        if self.has_prefetched("group_memberships"):
+            # sort in Python to avoid another SQL query
+            return sorted(
+                (membership.group for membership in self.group_memberships.all()), key=lambda group: group.name
+            )
         return [
             membership.group for membership in self.group_memberships.select_related("group").order_by("group__name")
         ]
@@ -278,6 +277,14 @@ class Releaser(URLMixin, LocationMixin, PrefetchSnoopingMixin, Lockable):
             "C": self.asciified_location + " " + self.plaintext_notes,
         }
 
+    def fragment_cache_dependents(self):
+        memberships = Membership.objects.filter(Q(member_id=self.id) | Q(group_id=self.id))
+        return [
+            ("demoscene.releaser", [self.id]),
+            ("demoscene.releaser", [id for ids in memberships.values_list("member_id", "group_id") for id in ids]),
+            ("parties.party", self.parties_organised.values_list("party_id", flat=True)),
+        ]
+
     class Meta:
         ordering = ["name"]
         indexes = [
@@ -436,9 +443,31 @@ class Nick(PrefetchSnoopingMixin, models.Model):
     def is_primary_nick(self):
         return self.releaser.name == self.name
 
+    def fragment_cache_dependents(self):
+        from productions.models import Production, production_fragment_dependents
+
+        # nicks appear in the bylines and credits of productions, wherever those are listed
+        production_ids = (
+            Production.objects.filter(Q(author_nicks=self) | Q(author_affiliation_nicks=self) | Q(credits__nick=self))
+            .values_list("id", flat=True)
+            .distinct()
+        )
+        return (
+            self.releaser.fragment_cache_dependents()
+            + production_fragment_dependents(list(production_ids))
+            + [
+                ("parties.party", self.tournament_entries.values_list("phase__tournament__party_id", flat=True)),
+                ("parties.party", self.tournament_staff.values_list("phase__tournament__party_id", flat=True)),
+            ]
+        )
+
     class Meta:
         unique_together = ("releaser", "name")
         ordering = ["name"]
+        indexes = [
+            # keyset pagination of the scener and group listings
+            models.Index(Lower("name"), F("id"), name="nick_lower_name"),
+        ]
 
 
 class NickVariant(models.Model):
@@ -456,6 +485,9 @@ class NickVariant(models.Model):
     def __str__(self):
         return self.name
 
+    def fragment_cache_dependents(self):
+        return [("demoscene.releaser", [self.nick.releaser_id])]
+
     @staticmethod
     def autocomplete(initial_query, **kwargs):
         # look for possible autocompletions; choose the top-ranked one and use that as the query
@@ -464,13 +496,19 @@ class NickVariant(models.Model):
         # name. e.g.: "Andromeda " will match both "Andromeda Software Development" and "Andromeda",
         # but "Far " will only match "Far", not "Farbrausch"
 
-        exact_matches = NickVariant.autocompletion_search(initial_query.strip(), exact=True, limit=1, **kwargs)
+        if nick_autocomplete.is_enabled():
+            # answer from the in-memory index, without touching the database
+            search = nick_autocomplete.nick_index.search
+        else:
+            search = NickVariant.autocompletion_search
+
+        exact_matches = search(initial_query.strip(), exact=True, limit=1, **kwargs)
         if exact_matches:
             return ""  # if an exact match exists, there's nothing to autocomplete
 
         # look for prefixes instead
         lstripped_query = initial_query.lstrip()
-        autocompletions = NickVariant.autocompletion_search(lstripped_query, limit=1, **kwargs)
+        autocompletions = search(lstripped_query, limit=1, **kwargs)
         try:
             result = autocompletions[0].name
             # return just the suffix to add; the caller will append this to the original query,
@@ -490,8 +528,59 @@ class NickVariant(models.Model):
         group_ids = kwargs.get("group_ids", [])
         group_names = [name.lower() for name in kwargs.get("group_names", [])]
         member_names = [name.lower() for name in kwargs.get("member_names", [])]
-
-        if query:
+        # a demoscene.autocomplete.NameIndex to search instead of the database or the global index
+        nick_index = kwargs.get("nick_index")
+
+        if query and nick_index is not None:
+            # rank the matches in the given index, and take the records it has already loaded
+            matches = nick_index.search(
+                query,
+                exact=exact,
+                limit=limit,
+                groups_only=groups_only,
+                sceners_only=sceners_only,
+                group_ids=group_ids,
+                group_names=group_names,
+                member_names=member_names,
+            )
+            loaded_nick_variants = nick_index.get_nick_variants()
+            nick_variants = []
+            for match in matches:
+                nick_variant = copy.copy(loaded_nick_variants[match.variant_id])
+                nick_variant.score = match.score
+                nick_variants.append(nick_variant)
+        elif query and nick_autocomplete.is_enabled():
+            # rank the matches in the in-memory index, then fetch just those records
+            matches = nick_autocomplete.nick_index.search(
+                query,
+                exact=exact,
+                limit=limit,
+                groups_only=groups_only,
+                sceners_only=sceners_only,
+                group_ids=group_ids,
+                group_names=group_names,
+                member_names=member_names,
+            )
+            nick_variants_by_id = (
+                NickVariant.objects.select_related("nick", "nick__releaser")
+                .only(
+                    "id",
+                    "name",
+                    "nick__id",
+                    "nick__name",
+                    "nick__differentiator",
+                    "nick__releaser__is_group",
+                    "nick__releaser__country_code",
+                )
+                .in_bulk([match.variant_id for match in matches])
+            )
+            nick_variants = []
+            for match in matches:
+                nick_variant = nick_variants_by_id.get(match.variant_id)
+                if nick_variant is not None:
+                    nick_variant.score = match.score
+                    nick_variants.append(nick_variant)
+        elif query:
             if exact:
                 nick_variants = NickVariant.objects.filter(name__iexact=query)
             else:
@@ -619,6 +708,9 @@ class Membership(models.Model):
     def __str__(self):
         return "%s / %s" % (self.member.name, self.group.name)
 
+    def fragment_cache_dependents(self):
+        return [("demoscene.releaser", [self.member_id, self.group_id])]
+
 
 class AccountProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -699,6 +791,9 @@ class ReleaserExternalLink(ExternalLink):
     def subject(self):
         return self.releaser.name
 
+    def fragment_cache_dependents(self):
+        return [("demoscene.releaser", [self.releaser_id])]
+
     class Meta:
         unique_together = (("link_class", "parameter", "releaser"),)
         ordering = ["link_class"]
@@ -744,6 +839,18 @@ class Edit(models.Model):
         )
         return edits
 
+    def fragment_cache_dependents(self):
+        # edits are shown in the 'last edited by' line of their subjects
+        dependents = []
+        for content_type_id, object_id in [
+            (self.focus_content_type_id, self.focus_object_id),
+            (self.focus2_content_type_id, self.focus2_object_id),
+        ]:
+            if content_type_id is not None:
+                content_type = ContentType.objects.get_for_id(content_type_id)
+                dependents.append(("%s.%s" % (content_type.app_label, content_type.model), [object_id]))
+        return dependents
+
     class Meta:
         indexes = [
             models.Index(fields=["focus_content_type", "focus_object_id"]),
@@ -877,3 +984,54 @@ class TextFile(models.Model):
 
     class Meta:
         abstract = True
+
+
+# Keep the in-memory nick autocompletion index (see demoscene.autocomplete) up to date
+
+
+@receiver(pre_save, sender=Nick)
+@receiver(pre_save, sender=Membership)
+def remember_previous_autocomplete_releasers(sender, instance, **kwargs):
+    instance._previous_autocomplete_releaser_ids = []
+    if instance.pk is None or not nick_autocomplete.is_enabled():
+        return
+    if sender is Nick:
+        instance._previous_autocomplete_releaser_ids = list(
+            Nick.objects.filter(id=instance.pk).values_list("releaser_id", flat=True)
+        )
+    else:
+        instance._previous_autocomplete_releaser_ids = list(
+            Membership.objects.filter(id=instance.pk).values_list("member_id", flat=True)
+        )
+
+
+@receiver(post_save, sender=Releaser)
+@receiver(post_delete, sender=Releaser)
+def update_nick_autocomplete_on_releaser_change(sender, instance, **kwargs):
+    nick_autocomplete.mark_releasers_changed([instance.id])
+
+
+@receiver(post_save, sender=Nick)
+@receiver(post_delete, sender=Nick)
+def update_nick_autocomplete_on_nick_change(sender, instance, **kwargs):
+    nick_autocomplete.mark_releasers_changed(
+        [instance.releaser_id] + getattr(instance, "_previous_autocomplete_releaser_ids", [])
+    )
+
+
+@receiver(post_save, sender=NickVariant)
+@receiver(post_delete, sender=NickVariant)
+def update_nick_autocomplete_on_nick_variant_change(sender, instance, **kwargs):
+    if nick_autocomplete.is_enabled():
+        # if the nick itself is being deleted, its own handler takes care of this
+        nick_autocomplete.mark_releasers_changed(
+            Nick.objects.filter(id=instance.nick_id).values_list("releaser_id", flat=True)
+        )
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def update_nick_autocomplete_on_membership_change(sender, instance, **kwargs):
+    nick_autocomplete.mark_releasers_changed(
+        [instance.member_id] + getattr(instance, "_previous_autocomplete_releaser_ids", [])
+    )
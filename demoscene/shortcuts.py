@@ -1,5 +1,7 @@
 from django.core.paginator import EmptyPage, InvalidPage, Paginator
 
+from common.utils.pagination import KeysetPaginator
+
 
 def get_page(queryset, page_number, **kwargs):
     count = kwargs.get("count", 50)
@@ -17,3 +19,30 @@ def get_page(queryset, page_number, **kwargs):
         return paginator.page(page)
     except (EmptyPage, InvalidPage):
         return paginator.page(paginator.num_pages)
+
+
+def get_keyset_page(queryset, page_number, cursor=None, **kwargs):
+    """
+    As get_page, but for large listings: the total is estimated where it is large, and if the cursor
+    of an adjacent page is passed, the page is located from that rather than by offset. The queryset
+    must be ordered in a way that KeysetPaginator understands
+    """
+    count = kwargs.get("count", 50)
+
+    paginator = KeysetPaginator(queryset, count, estimate_count=True)
+
+    # Make sure page request is an int. If not, deliver first page.
+    try:
+        page = int(page_number)
+    except ValueError:
+        page = 1
+
+    # If page request (9999) is out of range, deliver last page of results - going by the estimate,
+    # which may itself be past the end.
+    try:
+        return paginator.page(page, cursor=cursor)
+    except (EmptyPage, InvalidPage):
+        try:
+            return paginator.page(paginator.num_pages)
+        except (EmptyPage, InvalidPage):
+            return paginator.page(1)
@@ -5,7 +5,6 @@ from django import template
 from django.urls import reverse
 
 from demoscene.models import Nick
-from productions.models import Screenshot
 from tournaments.models import Entry as TournamentEntry
 
 
@@ -81,13 +80,10 @@ def combined_releases(context, releaser, include_tournaments=False):
 
     credits_with_prods = credits_by_production_nick + [(prod, None, None) for prod in productions]
 
-    # get final list of production IDs
-    production_ids = [production.id for production, _, _ in credits_with_prods]
-    # fetch screenshots for those prods
-    screenshot_map = Screenshot.select_for_production_ids(production_ids)
     # produce final credits structure for productions
     credits = [
-        ProductionCredit(prod, nick, credits, screenshot_map.get(prod.id)) for prod, nick, credits in credits_with_prods
+        ProductionCredit(prod, nick, credits, prod.representative_thumbnail)
+        for prod, nick, credits in credits_with_prods
     ]
 
     if include_tournaments:
@@ -0,0 +1,70 @@
+from django.test import TestCase, override_settings
+
+from demoscene.autocomplete import nick_index
+from demoscene.fields.nick_search import NickSearch
+from demoscene.models import Membership, Nick, NickVariant, Releaser
+
+
+@override_settings(NICK_AUTOCOMPLETE_INDEX_ENABLED=True)
+class TestNickIndex(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def setUp(self):
+        nick_index.reset()
+
+    def tearDown(self):
+        nick_index.reset()
+
+    def test_autocomplete(self):
+        nick_index.load()
+        with self.assertNumQueries(0):
+            self.assertEqual(NickVariant.autocomplete("Gasm"), "an")
+            self.assertEqual(NickVariant.autocomplete("gasman"), "")
+            self.assertEqual(NickVariant.autocomplete("Far "), "")
+            self.assertEqual(NickVariant.autocomplete("Future "), "Crew")
+            self.assertEqual(NickVariant.autocomplete("Raw", sceners_only=True), "")
+
+    def test_ranking(self):
+        # primary nick variants come before other exact matches
+        self.assertEqual([match.nick_id for match in nick_index.search("ra", exact=True)], [8, 3])
+        self.assertEqual([match.name for match in nick_index.search("ra")], ["Ra", "RA", "Raww Arse"])
+
+        # ...but members of the requested groups come first
+        matches = nick_index.search("ra", member_names=["Gasman"])
+        self.assertEqual([(match.name, match.score) for match in matches], [("RA", 1), ("Raww Arse", 1), ("Ra", 0)])
+
+        matches = nick_index.search("gasman", group_ids=["4"])
+        self.assertEqual([(match.name, match.score) for match in matches], [("Gasman", 1)])
+
+    def test_nick_search(self):
+        nick_search = NickSearch("ra", groups_only=True, member_names=["Gasman"])
+        self.assertEqual(nick_search.suggestions[0]["id"], 3)
+        self.assertEqual(nick_search.suggestions[0]["alias"], "RA")
+        self.assertEqual(nick_search.selection.id, 3)
+
+    def test_incremental_update(self):
+        nick_index.load()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Releaser.objects.create(name="Gasparin", is_group=False)
+        self.assertEqual([match.name for match in nick_index.search("gas")], ["Gasman", "Gasparin"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            nick = Nick.objects.get(name="Shingebis")
+            nick.releaser = Releaser.objects.get(name="Yerzmyey")
+            nick.save()
+        (match,) = nick_index.search("shingebis")
+        self.assertEqual(match.nick_id, nick.id)
+        self.assertEqual(nick_index.entries_by_releaser[1][0].name, "Gasman")
+        self.assertEqual(len(nick_index.entries_by_releaser[5]), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Membership.objects.create(
+                member=Releaser.objects.get(name="Ra"), group=Releaser.objects.get(name="Raww Arse")
+            )
+        matches = nick_index.search("ra", group_names=["raww arse"], sceners_only=True)
+        self.assertEqual([(match.name, match.score) for match in matches], [("Ra", 1)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Releaser.objects.get(name="Ra").delete()
+        self.assertEqual([match.name for match in nick_index.search("ra")], ["RA", "Raww Arse"])
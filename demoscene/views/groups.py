@@ -7,20 +7,20 @@ from django.db.models.functions import Concat, Lower
 from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
 
 from common.utils.pagination import PaginationControls
 from common.views import AjaxConfirmationView, EditingFormView, EditingView
 from demoscene.forms.releaser import CreateGroupForm, GroupMembershipForm, GroupSubgroupForm
 from demoscene.models import Edit, Membership, Nick, Releaser
-from demoscene.shortcuts import get_page
+from demoscene.shortcuts import get_keyset_page
 
 
 def index(request):
-    nick_page = get_page(
-        Nick.objects.filter(releaser__is_group=True)
-        .extra(select={"lower_name": "lower(demoscene_nick.name)"})
-        .order_by("lower_name"),
+    nick_page = get_keyset_page(
+        Nick.objects.filter(releaser__is_group=True).annotate(lower_name=Lower("name")).order_by("lower_name"),
         request.GET.get("page", "1"),
+        request.GET.get("cursor"),
     )
 
     return render(
@@ -38,8 +38,14 @@ def show(request, group_id):
     if not group.is_group:
         return HttpResponseRedirect(group.get_absolute_url())
 
-    external_links = group.active_external_links.select_related("releaser").defer("releaser__notes")
-    external_links = sorted(external_links, key=lambda obj: obj.sort_key)
+    # external links and member productions are evaluated lazily, so that they cost nothing when the
+    # template serves them from the fragment cache
+    external_links = SimpleLazyObject(
+        lambda: sorted(
+            group.active_external_links.select_related("releaser").defer("releaser__notes"),
+            key=lambda obj: obj.sort_key,
+        )
+    )
     parties_organised = (
         group.parties_organised.select_related("party").defer("party__notes").order_by("-party__start_date_date")
     )
@@ -52,6 +58,14 @@ def show(request, group_id):
         )
     )
 
+    def get_member_productions():
+        return (
+            group.member_productions()
+            .prefetch_related("author_nicks__releaser", "author_affiliation_nicks__releaser", "platforms", "types")
+            .defer("notes", "author_nicks__releaser__notes", "author_affiliation_nicks__releaser__notes")
+            .order_by("-release_date_date", "release_date_precision", "-sortable_title")
+        )
+
     prompt_to_edit = settings.SITE_IS_WRITEABLE and (request.user.is_staff or not group.locked)
     can_edit = prompt_to_edit and request.user.is_authenticated
 
@@ -84,12 +98,7 @@ def show(request, group_id):
             ),
             "parties_organised": parties_organised,
             "bbs_affiliations": bbs_affiliations,
-            "member_productions": (
-                group.member_productions()
-                .prefetch_related("author_nicks__releaser", "author_affiliation_nicks__releaser", "platforms", "types")
-                .defer("notes", "author_nicks__releaser__notes", "author_affiliation_nicks__releaser__notes")
-                .order_by("-release_date_date", "release_date_precision", "-sortable_title")
-            ),
+            "member_productions": SimpleLazyObject(get_member_productions),
             "external_links": external_links,
             "prompt_to_edit": prompt_to_edit,
             "can_edit": can_edit,
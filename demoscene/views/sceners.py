@@ -16,15 +16,14 @@ from demoscene.forms.releaser import (
     ScenerMembershipForm,
 )
 from demoscene.models import Edit, Membership, Nick, Releaser
-from demoscene.shortcuts import get_page
+from demoscene.shortcuts import get_keyset_page
 
 
 def index(request):
-    nick_page = get_page(
-        Nick.objects.filter(releaser__is_group=False)
-        .extra(select={"lower_name": "lower(demoscene_nick.name)"})
-        .order_by("lower_name"),
+    nick_page = get_keyset_page(
+        Nick.objects.filter(releaser__is_group=False).annotate(lower_name=Lower("name")).order_by("lower_name"),
         request.GET.get("page", "1"),
+        request.GET.get("cursor"),
     )
 
     return render(
@@ -138,6 +138,7 @@ INSTALLED_APPS = [
     "awards",
     "bbs",
     "tournaments",
+    "api",
     "django.contrib.contenttypes",
     "django.contrib.auth",
     "django.contrib.sessions",
@@ -220,6 +221,46 @@ COMPRESS_PRECOMPILERS = (
 
 REDIS_URL = "redis://localhost:6379/0"
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "demozoo",
+    },
+}
+
+# Cache rendered fragments of production, group and party pages for anonymous users (see
+# common.utils.fragment_cache). Fragments are invalidated on edit; the timeout is a backstop
+# for changes that do not go through model signals, such as bulk updates
+FRAGMENT_CACHE_ENABLED = True
+FRAGMENT_CACHE_TIMEOUT = 7 * 86400
+
+# Answer nick autocompletion queries from an in-memory index held by each process (see
+# demoscene.autocomplete), rather than querying the database on every keystroke
+NICK_AUTOCOMPLETE_INDEX_ENABLED = True
+
+# Number of seconds that entries in the API change log (see api.models.Change) are held back from the
+# change feed, so that concurrently committed entries have all become visible by the time a client
+# reads past them
+CHANGE_FEED_DELAY = 5
+
+# Build the records for production and releaser listings in the API with the functions in
+# api.fast_serializers, rather than the nested serializers in api.serializers
+API_FAST_LISTINGS = True
+
+# Allow shared caches to serve API responses for up to API_CACHE_MAX_AGE seconds without revalidating,
+# and keep stored adhoc API responses (see api.caching) for at most API_RESPONSE_CACHE_TIMEOUT seconds
+API_CACHE_MAX_AGE = 60
+API_RESPONSE_CACHE_TIMEOUT = 86400
+
+# Results imports (see parties.importing) with more entries than this are run as a Celery task
+# rather than within the request
+COMPETITION_IMPORT_BACKGROUND_THRESHOLD = 250
+
+# If set (as a timedelta), the screenshot shown for a production in listings steps through all of its
+# screenshots, changing once per period; otherwise one is picked at random and kept
+SCREENSHOT_ROTATION_PERIOD = None
+
 # Celery settings
 BROKER_URL = REDIS_URL
 CELERY_ROUTES = {
@@ -231,6 +272,11 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_ACCEPT_CONTENT = ["pickle", "json"]
 
 
+# If true, update search documents immediately after each save; if false, add them to a queue
+# to be processed in batches by the search.tasks.process_search_index_queue task
+SEARCH_INDEX_SYNCHRONOUS = False
+
+
 CELERYBEAT_SCHEDULE = {
     "fetch-new-sceneorg-files": {
         "task": "sceneorg.tasks.fetch_new_sceneorg_files",
@@ -243,6 +289,31 @@ CELERYBEAT_SCHEDULE = {
         "schedule": timedelta(days=1),
         "args": (),
     },
+    "process-search-index-queue": {
+        "task": "search.tasks.process_search_index_queue",
+        "schedule": timedelta(seconds=15),
+        "args": (),
+    },
+    "refresh-api-snapshots": {
+        "task": "api.tasks.refresh_snapshots",
+        "schedule": timedelta(hours=1),
+        "args": (),
+    },
+    "refresh-api-export-snapshots": {
+        "task": "api.tasks.refresh_export_snapshots",
+        "schedule": timedelta(days=1),
+        "args": (),
+    },
+    "refresh-maintenance-reports": {
+        "task": "maintenance.tasks.refresh_all_reports",
+        "schedule": timedelta(days=1),
+        "args": (),
+    },
+    "rotate-representative-screenshots": {
+        "task": "productions.tasks.rotate_representative_screenshots",
+        "schedule": timedelta(hours=1),
+        "args": (),
+    },
     # "automatch-janeway-authors": {
     #     "task": "janeway.tasks.automatch_all_authors",
     #     "schedule": timedelta(days=1),
@@ -265,7 +336,7 @@ REST_FRAMEWORK = {
         "rest_framework.renderers.BrowsableAPIRenderer",
         "rest_framework_jsonp.renderers.JSONPRenderer",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.KeysetPageNumberPagination",
     "PAGE_SIZE": 100,
 }
 
@@ -9,6 +9,8 @@ BASE_URL = "http://localhost:8000"
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+SEARCH_INDEX_SYNCHRONOUS = True
+
 INSTALLED_APPS = list(INSTALLED_APPS) + ["django_extensions"]  # noqa
 
 DEBUG_TOOLBAR_ENABLED = os.getenv("DEBUG_TOOLBAR_ENABLED", "1") != "0"
@@ -22,6 +22,12 @@ AWS_BOTO_CALLING_FORMAT = "VHostCallingFormat"
 
 BROKER_URL = "redis://localhost:6379/1"
 
+# keep the cache and the keys used directly through REDIS_URL (such as the search index queue) apart from
+# those of the live site on the same Redis server
+REDIS_URL = "redis://localhost:6379/3"
+CACHES["default"]["LOCATION"] = REDIS_URL  # noqa
+CACHES["default"]["KEY_PREFIX"] = "demozoo-staging"  # noqa
+
 ALLOWED_HOSTS = ["localhost", "staging.demozoo.org", "staging.zxdemo.org"]
 
 BASE_URL = "https://staging.demozoo.org"
@@ -20,6 +20,17 @@ MEDIA_ROOT = os.path.join(FILEROOT, "test_media")
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/2")
 
+SEARCH_INDEX_SYNCHRONOUS = True
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    },
+}
+FRAGMENT_CACHE_ENABLED = False
+NICK_AUTOCOMPLETE_INDEX_ENABLED = False
+CHANGE_FEED_DELAY = 0
+
 AWS_ACCESS_KEY_ID = "AWS_K3Y"
 AWS_SECRET_ACCESS_KEY = "AWS_S3CR3T"
 
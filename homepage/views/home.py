@@ -6,7 +6,7 @@ from comments.models import Comment
 from forums.models import Topic
 from homepage.models import Banner, NewsStory
 from parties.models import Party
-from productions.models import Production, Screenshot
+from productions.models import Production
 
 
 def home(request):
@@ -34,13 +34,16 @@ def home(request):
             "release_date_date",
             "release_date_precision",
             "supertype",
+            "representative_screenshot",
+            "representative_thumbnail_url",
+            "representative_thumbnail_width",
+            "representative_thumbnail_height",
         )
         .prefetch_related("author_nicks", "author_affiliation_nicks", "platforms", "types")
         .order_by("-release_date_date", "-created_at")[:5]
     )
-    latest_releases_screenshots = Screenshot.select_for_production_ids([prod.id for prod in latest_releases])
     latest_releases_and_screenshots = [
-        (production, latest_releases_screenshots.get(production.id)) for production in latest_releases
+        (production, production.representative_thumbnail) for production in latest_releases
     ]
 
     one_year_ago = datetime.datetime.now() - datetime.timedelta(365)
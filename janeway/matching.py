@@ -8,7 +8,8 @@ from janeway.importing import import_release
 from janeway.models import AuthorMatchInfo
 from janeway.models import Release as JanewayRelease
 from platforms.models import Platform
-from productions.models import Production, ProductionLink, ProductionType
+from productions.links import create_production_links
+from productions.models import Production, ProductionLink, ProductionType, ReleaserProduction
 
 
 def get_dz_releaser_ids_matching_by_name_and_type(janeway_author):
@@ -52,7 +53,7 @@ def get_production_match_data(releaser):
         )
     ]
 
-    q_match_by_author = Q(author_nicks__releaser=releaser) | Q(author_affiliation_nicks__releaser=releaser)
+    q_match_by_author = Q(releaser_roles__releaser=releaser, releaser_roles__role__in=["author", "affiliation"])
     q_match_amiga_platform = Q(platforms__in=amiga_platform_ids)
     q_match_platformless_tracked_music = Q(platforms__isnull=True, types=tracked_music_prodtype)
 
@@ -119,43 +120,58 @@ def get_production_match_data(releaser):
     return unmatched_demozoo_prods, unmatched_janeway_releases, matched_prods
 
 
-def automatch_productions(releaser):
-    unmatched_demozoo_prods, unmatched_janeway_prods, matched_prods = get_production_match_data(releaser)
+def get_release_match_key(title, supertype):
+    """Return the normalised (title, supertype) pair to match a Janeway release on"""
+    if supertype == "music":
+        title = strip_music_extensions(title)
+    return (generate_search_title(title), supertype)
 
-    matched_production_count = len(matched_prods)
-    unmatched_demozoo_production_count = len(unmatched_demozoo_prods)
-    unmatched_janeway_production_count = len(unmatched_janeway_prods)
 
-    # mapping of lowercased prod title to a pair of lists of demozoo IDs and pouet IDs of
+def match_by_title(demozoo_prods, janeway_releases):
+    """
+    Given lists of (id, (normalised title, supertype)) for unmatched Demozoo prods and Janeway releases,
+    return a list of (demozoo ID, janeway ID) pairs for the keys that occur exactly once on each side
+    """
+    # mapping of (normalised prod title, supertype) to a pair of lists of demozoo IDs and janeway IDs of
     # prods with that name
     prods_by_name_and_supertype = defaultdict(lambda: ([], []))
 
-    for id, title, url, supertype in unmatched_demozoo_prods:
-        prods_by_name_and_supertype[(generate_search_title(title), supertype)][0].append(id)
+    for id, key in demozoo_prods:
+        prods_by_name_and_supertype[key][0].append(id)
 
-    for id, title, url, supertype in unmatched_janeway_prods:
-        if supertype == "music":
-            title = strip_music_extensions(title)
-        prods_by_name_and_supertype[(generate_search_title(title), supertype)][1].append(id)
+    for id, key in janeway_releases:
+        prods_by_name_and_supertype[key][1].append(id)
 
-    just_matched_janeway_ids = set()
+    return [
+        (demozoo_ids[0], janeway_ids[0])
+        for demozoo_ids, janeway_ids in prods_by_name_and_supertype.values()
+        if len(demozoo_ids) == 1 and len(janeway_ids) == 1
+    ]
 
-    for (title, supertype), (demozoo_ids, janeway_ids) in prods_by_name_and_supertype.items():
-        if len(demozoo_ids) == 1 and len(janeway_ids) == 1:
-            ProductionLink.objects.create(
-                production_id=demozoo_ids[0],
-                link_class="KestraBitworldRelease",
-                parameter=janeway_ids[0],
-                is_download_link=False,
-                source="janeway-automatch",
-            )
-            just_matched_janeway_ids.add(janeway_ids[0])
-            matched_production_count += 1
-            unmatched_demozoo_production_count -= 1
-            unmatched_janeway_production_count -= 1
+
+def automatch_productions(releaser):
+    unmatched_demozoo_prods, unmatched_janeway_prods, matched_prods = get_production_match_data(releaser)
+
+    matches = match_by_title(
+        [(id, (generate_search_title(title), supertype)) for id, title, url, supertype in unmatched_demozoo_prods],
+        [(id, get_release_match_key(title, supertype)) for id, title, url, supertype in unmatched_janeway_prods],
+    )
+    for demozoo_id, janeway_id in matches:
+        ProductionLink.objects.create(
+            production_id=demozoo_id,
+            link_class="KestraBitworldRelease",
+            parameter=janeway_id,
+            is_download_link=False,
+            source="janeway-automatch",
+        )
+
+    matched_production_count = len(matched_prods) + len(matches)
+    unmatched_demozoo_production_count = len(unmatched_demozoo_prods) - len(matches)
+    unmatched_janeway_production_count = len(unmatched_janeway_prods) - len(matches)
 
     if unmatched_demozoo_production_count == 0:
         # all matchable prods are accounted for, so let's go on and import the remaining ones from janeway
+        just_matched_janeway_ids = {janeway_id for demozoo_id, janeway_id in matches}
         for id, title, url, supertype in unmatched_janeway_prods:
             if id in just_matched_janeway_ids:
                 continue
@@ -172,3 +188,149 @@ def automatch_productions(releaser):
             "unmatched_janeway_production_count": unmatched_janeway_production_count,
         },
     )
+
+
+def automatch_all_productions():
+    """
+    Run automatch_productions for every releaser with a Janeway author link, in a single pass.
+
+    Rather than querying each releaser's prods in turn, the candidate prods for all releasers are loaded
+    up front into in-memory maps - Demozoo prods by releaser (from ReleaserProduction), Janeway releases by
+    author, and existing Janeway links by Demozoo ID and Janeway ID - and the new links are written with
+    bulk_create. Releasers are processed in ID order, and links made for one releaser are counted as
+    existing ones for the next, so the outcome is the same as running automatch_productions on each.
+
+    Returns a dict mapping releaser ID to a (matched, unmatched Demozoo, unmatched Janeway) tuple of
+    production counts, which are also saved as AuthorMatchInfo records.
+    """
+    amiga_platform_ids = list(Platform.objects.filter(name__startswith="Amiga").values_list("id", flat=True))
+    tracked_music_prodtype = ProductionType.objects.get(internal_name="tracked-music")
+
+    janeway_author_links = ReleaserExternalLink.objects.filter(link_class="KestraBitworldAuthor")
+    janeway_author_ids_by_releaser_id = defaultdict(set)
+    for releaser_id, parameter in janeway_author_links.values_list("releaser_id", "parameter"):
+        janeway_author_ids_by_releaser_id[releaser_id].add(int(parameter))
+
+    # Demozoo prods as a mapping of ID to (normalised title, supertype), by releaser ID
+    demozoo_prods_by_releaser_id = defaultdict(dict)
+    for releaser_id, production_id, search_title, supertype in (
+        ReleaserProduction.objects.filter(
+            Q(production__platforms__in=amiga_platform_ids)
+            | Q(production__platforms__isnull=True, production__types=tracked_music_prodtype),
+            releaser_id__in=janeway_author_links.values("releaser_id"),
+            role__in=["author", "affiliation"],
+        )
+        .values_list("releaser_id", "production_id", "production__search_title", "production__supertype")
+        .distinct()
+    ):
+        demozoo_prods_by_releaser_id[releaser_id][production_id] = (search_title, supertype)
+
+    # (normalised title, supertype) of Janeway releases by ID, and Janeway release IDs by author ID
+    release_keys = {
+        janeway_id: get_release_match_key(title, supertype)
+        for janeway_id, title, supertype in JanewayRelease.objects.values_list("janeway_id", "title", "supertype")
+    }
+    release_ids_by_author_id = defaultdict(set)
+    for author_id, janeway_id in JanewayRelease.author_names.through.objects.values_list(
+        "name__author__janeway_id", "release__janeway_id"
+    ):
+        release_ids_by_author_id[author_id].add(janeway_id)
+
+    # existing links, as sets of link IDs by Demozoo ID and Janeway ID
+    link_ids_by_production_id = defaultdict(set)
+    link_ids_by_janeway_id = defaultdict(set)
+    for link_id, production_id, parameter in ProductionLink.objects.filter(
+        link_class="KestraBitworldRelease"
+    ).values_list("id", "production_id", "parameter"):
+        link_ids_by_production_id[production_id].add(link_id)
+        link_ids_by_janeway_id[parameter].add(link_id)
+
+    new_links = []
+    match_counts = {}
+    for releaser_id in sorted(janeway_author_ids_by_releaser_id):
+        demozoo_prods = demozoo_prods_by_releaser_id[releaser_id]
+        janeway_ids = set()
+        for author_id in janeway_author_ids_by_releaser_id[releaser_id]:
+            janeway_ids.update(release_ids_by_author_id.get(author_id, ()))
+
+        matched_link_ids = set()
+        for production_id in demozoo_prods:
+            matched_link_ids.update(link_ids_by_production_id.get(production_id, ()))
+        for janeway_id in janeway_ids:
+            matched_link_ids.update(link_ids_by_janeway_id.get(str(janeway_id), ()))
+
+        unmatched_demozoo_prods = [
+            (production_id, key)
+            for production_id, key in demozoo_prods.items()
+            if not link_ids_by_production_id.get(production_id)
+        ]
+        unmatched_janeway_ids = [
+            janeway_id for janeway_id in janeway_ids if not link_ids_by_janeway_id.get(str(janeway_id))
+        ]
+
+        matches = match_by_title(
+            unmatched_demozoo_prods, [(janeway_id, release_keys[janeway_id]) for janeway_id in unmatched_janeway_ids]
+        )
+        for demozoo_id, janeway_id in matches:
+            new_links.append(
+                ProductionLink(
+                    production_id=demozoo_id,
+                    link_class="KestraBitworldRelease",
+                    parameter=str(janeway_id),
+                    is_download_link=False,
+                    source="janeway-automatch",
+                )
+            )
+            # new links have no ID yet, so are identified by the IDs they link
+            link_id = ("new", demozoo_id, janeway_id)
+            link_ids_by_production_id[demozoo_id].add(link_id)
+            link_ids_by_janeway_id[str(janeway_id)].add(link_id)
+
+        matched_production_count = len(matched_link_ids) + len(matches)
+        unmatched_demozoo_production_count = len(unmatched_demozoo_prods) - len(matches)
+        unmatched_janeway_production_count = len(unmatched_janeway_ids) - len(matches)
+
+        if unmatched_demozoo_production_count == 0:
+            just_matched_janeway_ids = {janeway_id for demozoo_id, janeway_id in matches}
+            releases_to_import = [
+                janeway_id for janeway_id in unmatched_janeway_ids if janeway_id not in just_matched_janeway_ids
+            ]
+            if releases_to_import:
+                # importing a pack looks up its contents by their links, so write the pending ones first
+                create_production_links(new_links)
+                new_links = []
+                for release in JanewayRelease.objects.filter(janeway_id__in=releases_to_import).order_by("title"):
+                    import_release(release)
+                    link_ids_by_janeway_id[str(release.janeway_id)].add(("imported", release.janeway_id))
+                matched_production_count += len(releases_to_import)
+                unmatched_janeway_production_count -= len(releases_to_import)
+
+        match_counts[releaser_id] = (
+            matched_production_count,
+            unmatched_demozoo_production_count,
+            unmatched_janeway_production_count,
+        )
+
+    create_production_links(new_links)
+
+    AuthorMatchInfo.objects.bulk_create(
+        [
+            AuthorMatchInfo(
+                releaser_id=releaser_id,
+                matched_production_count=matched,
+                unmatched_demozoo_production_count=unmatched_demozoo,
+                unmatched_janeway_production_count=unmatched_janeway,
+            )
+            for releaser_id, (matched, unmatched_demozoo, unmatched_janeway) in match_counts.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["releaser"],
+        update_fields=[
+            "matched_production_count",
+            "unmatched_demozoo_production_count",
+            "unmatched_janeway_production_count",
+        ],
+    )
+
+    return match_counts
@@ -1,21 +1,16 @@
 from celery import shared_task
 
-from demoscene.models import Releaser, ReleaserExternalLink
-from janeway.matching import automatch_productions
+from demoscene.models import Releaser
+from janeway.matching import automatch_all_productions, automatch_productions
 from mirror.actions import fetch_origin_url
 from productions.models import Screenshot
 from screenshots.models import PILConvertibleImage
-from screenshots.tasks import upload_original, upload_standard, upload_thumb
+from screenshots.tasks import upload_screenshot_versions
 
 
 @shared_task(ignore_result=True)
 def automatch_all_authors():
-    for releaser_id in (
-        ReleaserExternalLink.objects.filter(link_class="KestraBitworldAuthor")
-        .distinct()
-        .values_list("releaser_id", flat=True)
-    ):
-        automatch_author.delay(releaser_id)
+    automatch_all_productions()
 
 
 @shared_task(rate_limit="6/m", ignore_result=True)
@@ -33,9 +28,5 @@ def import_screenshot(production_id, janeway_id, url, suffix):
     screenshot = Screenshot(
         production_id=production_id, data_source="janeway", janeway_id=janeway_id, janeway_suffix=suffix
     )
-    upload_standard(img, screenshot, basename)
-    upload_thumb(img, screenshot, basename)
-    # leave upload_original until last to prevent things screwing up if the storage
-    # closes the original file handle
-    upload_original(img, screenshot, basename)
+    upload_screenshot_versions(img, screenshot, basename)
     screenshot.save()
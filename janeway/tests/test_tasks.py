@@ -3,6 +3,7 @@ from unittest.mock import patch
 from django.test import TestCase
 
 from demoscene.models import Releaser
+from janeway.models import AuthorMatchInfo
 from janeway.tasks import automatch_all_authors, automatch_author, import_screenshot
 from platforms.models import Platform
 from productions.models import Production
@@ -11,15 +12,23 @@ from productions.models import Production
 class TestTasks(TestCase):
     fixtures = ["tests/janeway.json"]
 
-    @patch("janeway.tasks.automatch_author")
-    def test_automatch_all_authors(self, automatch_author):
+    def test_automatch_all_authors(self):
         spb = Releaser.objects.create(name="Spaceballs", is_group=True)
         spb.external_links.create(link_class="KestraBitworldAuthor", parameter="123")
+        sota = Production.objects.create(title="State Of The Art", supertype="production")
+        sota.platforms.add(Platform.objects.get(name="Amiga OCS/ECS"))
+        sota.author_nicks.add(spb.primary_nick)
 
         automatch_all_authors()
-        self.assertEqual(automatch_author.delay.call_count, 1)
-        (releaser_id,) = automatch_author.delay.call_args.args
-        self.assertEqual(releaser_id, spb.id)
+        self.assertTrue(
+            sota.links.filter(link_class="KestraBitworldRelease", parameter="345", source="janeway-automatch").exists()
+        )
+        # with all Demozoo prods matched, the remaining releases are imported
+        nkotbb = Production.objects.get(title="New kids on the boot block")
+        self.assertEqual(nkotbb.data_source, "janeway")
+        match_info = AuthorMatchInfo.objects.get(releaser=spb)
+        self.assertEqual(match_info.unmatched_demozoo_production_count, 0)
+        self.assertEqual(match_info.unmatched_janeway_production_count, 0)
 
     def test_automatch_author(self):
         spb = Releaser.objects.create(name="Spaceballs", is_group=True)
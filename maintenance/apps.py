@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class MaintenanceConfig(AppConfig):
+    name = "maintenance"
+
+    def ready(self):
+        # import signal handlers
+        from maintenance import signals  # noqa
@@ -1,8 +1,12 @@
 import redis
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from django.db.models import Case, CharField, Count, F, Func, Q, When
+from django.utils import timezone
 
 from common.utils import groklinks
+from demoscene.models import Releaser
 from maintenance.models import Exclusion
 from pouet.matching import get_pouetable_prod_types
 from productions.models import Production, ProductionLink
@@ -330,3 +334,397 @@ class TrackedMusicWithoutPlayableLinksReport(RandomisedProductionsReport):
             .exclude(tags__name__in=["lost", "corrupted-file"])
             .values_list("id", flat=True)
         )
+
+
+# Reports whose results are materialised in the cache, keyed by name
+MATERIALISED_REPORTS = {}
+
+# Minimum time between background refreshes of a materialised report, in seconds
+REFRESH_INTERVAL = 300
+
+
+class MaterialisedReport(object):
+    """
+    A report whose results are computed by a slow refresh query and stored in the cache, so that
+    page views only have to read them back.
+
+    Subclasses give a name, the labels of the models (including m2m through models) that the
+    refresh query reads in source_models, and a get_rows method returning the results as a list of
+    tuples whose first item is the id of the reported record. Changes to the source models mark the
+    stored results as stale (see maintenance.signals); the next page view then queues a background
+    refresh, and is served the stale results in the meantime - less the rows for any records that have
+    been edited since the results were computed (going by the updated_at timestamp of record_model, the
+    model that the first item of each row is the id of), so that a record does not linger in the report
+    after it has been fixed. Exclusions are applied when the results are read, so that excluding a
+    record does not require a refresh.
+    """
+
+    name = None
+    source_models = []
+    record_model = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        MATERIALISED_REPORTS[cls.name] = cls
+
+    @classmethod
+    def get_rows(cls):
+        raise NotImplementedError  # pragma: no cover
+
+    @classmethod
+    def results_key(cls):
+        return "demozoo:maintenance_report:%s" % cls.name
+
+    @classmethod
+    def stale_key(cls):
+        return "demozoo:maintenance_report:%s:stale" % cls.name
+
+    @classmethod
+    def refresh(cls):
+        """Run the refresh query and store the results"""
+        cache.delete(cls.stale_key())
+        results = {"rows": cls.get_rows(), "refreshed_at": timezone.now()}
+        cache.set(cls.results_key(), results, None)
+        return results
+
+    @classmethod
+    def mark_stale(cls):
+        cache.set(cls.stale_key(), True, None)
+
+    @classmethod
+    def get_results(cls, exclusion_names=()):
+        """
+        Return the stored rows, without those for records excluded under any of exclusion_names, and
+        the time they were computed at. The results are computed now if there are none stored yet
+        """
+        results = cache.get(cls.results_key())
+        is_stale = False
+        if results is None:
+            results = cls.refresh()
+        elif cache.get(cls.stale_key()):
+            is_stale = True
+            if cache.add(cls.results_key() + ":refreshing", True, REFRESH_INTERVAL):
+                from maintenance.tasks import refresh_report
+
+                refresh_report.delay(cls.name)
+
+        rows = results["rows"]
+        if is_stale and cls.record_model is not None and rows:
+            edited_ids = set(
+                cls.record_model.objects.filter(
+                    id__in={row[0] for row in rows}, updated_at__gt=results["refreshed_at"]
+                ).values_list("id", flat=True)
+            )
+            rows = [row for row in rows if row[0] not in edited_ids]
+        if exclusion_names:
+            excluded_ids = set(
+                Exclusion.objects.filter(report_name__in=exclusion_names).values_list("record_id", flat=True)
+            )
+            rows = [row for row in rows if row[0] not in excluded_ids]
+        return (rows, results["refreshed_at"])
+
+
+def fetch_rows(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+class ProductionsWithSameNamedCredits(MaterialisedReport):
+    name = "prods_with_same_named_credits"
+    record_model = Production
+    source_models = ["productions.production", "productions.credit", "demoscene.nick"]
+
+    @classmethod
+    def get_rows(cls):
+        return fetch_rows("""
+            SELECT DISTINCT productions_production.id
+            FROM productions_production
+            INNER JOIN productions_credit ON (productions_production.id = productions_credit.production_id)
+            INNER JOIN demoscene_nick ON (productions_credit.nick_id = demoscene_nick.id)
+            INNER JOIN demoscene_nick AS other_nick ON (
+                demoscene_nick.name = other_nick.name AND demoscene_nick.id <> other_nick.id
+            )
+            INNER JOIN productions_credit AS other_credit ON (
+                other_nick.id = other_credit.nick_id AND other_credit.production_id = productions_production.id
+            )
+        """)
+
+
+class SameNamedProductionsBySameReleaser(MaterialisedReport):
+    name = "same_named_prods_by_same_releaser"
+    record_model = Production
+    source_models = ["productions.production", "productions.production_author_nicks", "demoscene.nick"]
+
+    @classmethod
+    def get_rows(cls):
+        return fetch_rows("""
+            SELECT productions_production.id
+            FROM productions_production
+            WHERE productions_production.id IN (
+                SELECT productions_production.id
+                FROM productions_production
+                INNER JOIN productions_production_author_nicks ON (
+                    productions_production.id = productions_production_author_nicks.production_id
+                )
+                INNER JOIN demoscene_nick ON (productions_production_author_nicks.nick_id = demoscene_nick.id)
+                INNER JOIN demoscene_nick AS other_nick ON (demoscene_nick.releaser_id = other_nick.releaser_id)
+                INNER JOIN productions_production_author_nicks AS other_authorship ON (
+                    other_nick.id = other_authorship.nick_id
+                )
+                INNER JOIN productions_production AS other_production ON (
+                    other_authorship.production_id = other_production.id
+                )
+                WHERE
+                    productions_production.title <> '?'
+                    AND productions_production.id <> other_production.id
+                    AND LOWER(productions_production.title) = LOWER(other_production.title)
+            )
+            ORDER BY productions_production.sortable_title
+        """)
+
+
+class SameNamedProductionsWithoutSpecialChars(MaterialisedReport):
+    name = "same_named_prods_without_special_chars"
+    record_model = Production
+    source_models = ["productions.production", "productions.production_author_nicks", "demoscene.nick"]
+
+    @classmethod
+    def get_rows(cls):
+        return fetch_rows("""
+            SELECT productions_production.id
+            FROM productions_production
+            WHERE productions_production.id IN (
+                SELECT productions_production.id
+                FROM productions_production
+                INNER JOIN productions_production_author_nicks ON (
+                    productions_production.id = productions_production_author_nicks.production_id
+                )
+                INNER JOIN demoscene_nick ON (productions_production_author_nicks.nick_id = demoscene_nick.id)
+                INNER JOIN demoscene_nick AS other_nick ON (demoscene_nick.releaser_id = other_nick.releaser_id)
+                INNER JOIN productions_production_author_nicks AS other_authorship ON (
+                    other_nick.id = other_authorship.nick_id
+                )
+                INNER JOIN productions_production AS other_production ON (
+                    other_authorship.production_id = other_production.id
+                )
+                WHERE
+                    productions_production.title <> '?'
+                    AND productions_production.id <> other_production.id
+                    AND LOWER(REGEXP_REPLACE(productions_production.title, E'\\\\W', '', 'g'))
+                        = LOWER(REGEXP_REPLACE(other_production.title, E'\\\\W', '', 'g'))
+            )
+            ORDER BY productions_production.sortable_title
+        """)
+
+
+class DuplicateProductionExternalLinks(MaterialisedReport):
+    name = "duplicate_production_external_links"
+    record_model = Production
+    source_models = ["productions.productionlink"]
+
+    @classmethod
+    def get_rows(cls):
+        # (production id, link class, parameter)
+        return fetch_rows("""
+            SELECT
+                productions_productionlink.production_id,
+                productions_productionlink.link_class,
+                productions_productionlink.parameter
+            FROM productions_productionlink INNER JOIN (
+                SELECT productions_productionlink.link_class, productions_productionlink.parameter
+                FROM productions_productionlink
+                WHERE productions_productionlink.is_download_link = 'f'
+                GROUP BY productions_productionlink.link_class, productions_productionlink.parameter
+                HAVING COUNT(*) > 1
+            ) AS dupes
+            ON (
+                productions_productionlink.link_class = dupes.link_class
+                AND productions_productionlink.parameter = dupes.parameter
+                AND productions_productionlink.is_download_link = 'f'
+            )
+            ORDER BY productions_productionlink.link_class, productions_productionlink.parameter
+        """)
+
+
+class DuplicateReleaserExternalLinks(MaterialisedReport):
+    name = "duplicate_releaser_external_links"
+    record_model = Releaser
+    source_models = ["demoscene.releaserexternallink"]
+
+    @classmethod
+    def get_rows(cls):
+        # (releaser id, link class, parameter)
+        return fetch_rows("""
+            SELECT
+                demoscene_releaserexternallink.releaser_id,
+                demoscene_releaserexternallink.link_class,
+                demoscene_releaserexternallink.parameter
+            FROM demoscene_releaserexternallink INNER JOIN (
+                SELECT demoscene_releaserexternallink.link_class, demoscene_releaserexternallink.parameter
+                FROM demoscene_releaserexternallink
+                GROUP BY demoscene_releaserexternallink.link_class, demoscene_releaserexternallink.parameter
+                HAVING COUNT(*) > 1
+            ) AS dupes
+            ON (
+                demoscene_releaserexternallink.link_class = dupes.link_class
+                AND demoscene_releaserexternallink.parameter = dupes.parameter
+            )
+            ORDER BY demoscene_releaserexternallink.link_class, demoscene_releaserexternallink.parameter
+        """)
+
+
+class MatchingRealNames(MaterialisedReport):
+    name = "matching_real_names"
+    record_model = Releaser
+    source_models = ["demoscene.releaser"]
+
+    @classmethod
+    def get_rows(cls):
+        return fetch_rows("""
+            SELECT demoscene_releaser.id
+            FROM demoscene_releaser
+            WHERE EXISTS (
+                SELECT 1 FROM demoscene_releaser AS other_releaser
+                WHERE demoscene_releaser.first_name <> ''
+                AND demoscene_releaser.surname <> ''
+                AND demoscene_releaser.first_name = other_releaser.first_name
+                AND demoscene_releaser.surname = other_releaser.surname
+                AND demoscene_releaser.id <> other_releaser.id
+            )
+            ORDER BY demoscene_releaser.first_name, demoscene_releaser.surname, demoscene_releaser.name
+        """)
+
+
+class MatchingSurnames(MaterialisedReport):
+    name = "matching_surnames"
+    record_model = Releaser
+    source_models = ["demoscene.releaser"]
+
+    @classmethod
+    def get_rows(cls):
+        return fetch_rows("""
+            SELECT demoscene_releaser.id
+            FROM demoscene_releaser
+            WHERE EXISTS (
+                SELECT 1 FROM demoscene_releaser AS other_releaser
+                WHERE demoscene_releaser.surname <> ''
+                AND demoscene_releaser.surname = other_releaser.surname
+                AND demoscene_releaser.id <> other_releaser.id
+            )
+            ORDER BY demoscene_releaser.surname, demoscene_releaser.first_name, demoscene_releaser.name
+        """)
+
+
+class ImpliedMemberships(MaterialisedReport):
+    name = "implied_memberships"
+    record_model = Releaser
+    source_models = [
+        "productions.production",
+        "productions.production_author_nicks",
+        "productions.production_author_affiliation_nicks",
+        "demoscene.nick",
+        "demoscene.releaser",
+        "demoscene.membership",
+    ]
+
+    @classmethod
+    def get_rows(cls):
+        # (member id, member is_group, member name, group id, group name,
+        # production id, production supertype, production title)
+        return fetch_rows("""
+            SELECT
+                member.id, member.is_group, member.name,
+                grp.id, grp.name,
+                productions_production.id, productions_production.supertype, productions_production.title
+            FROM
+                productions_production
+                INNER JOIN productions_production_author_nicks ON (
+                    productions_production.id = productions_production_author_nicks.production_id
+                )
+                INNER JOIN demoscene_nick AS author_nick ON (
+                    productions_production_author_nicks.nick_id = author_nick.id
+                )
+                INNER JOIN demoscene_releaser AS member ON (author_nick.releaser_id = member.id)
+                INNER JOIN productions_production_author_affiliation_nicks ON (
+                    productions_production.id = productions_production_author_affiliation_nicks.production_id
+                )
+                INNER JOIN demoscene_nick AS group_nick ON (
+                    productions_production_author_affiliation_nicks.nick_id = group_nick.id
+                )
+                INNER JOIN demoscene_releaser AS grp ON (group_nick.releaser_id = grp.id)
+                LEFT JOIN demoscene_membership ON (
+                    member.id = demoscene_membership.member_id
+                    AND grp.id = demoscene_membership.group_id)
+            WHERE
+                demoscene_membership.id IS NULL
+            ORDER BY
+                grp.name, grp.id, member.name, member.id, productions_production.title
+        """)
+
+
+class EmptyReleasers(MaterialisedReport):
+    name = "empty_releasers"
+    record_model = Releaser
+    source_models = [
+        "demoscene.releaser",
+        "demoscene.nick",
+        "demoscene.membership",
+        "demoscene.releaserexternallink",
+        "productions.production_author_nicks",
+        "productions.production_author_affiliation_nicks",
+        "productions.credit",
+        "parties.organiser",
+        "bbs.operator",
+        "bbs.affiliation",
+    ]
+
+    @classmethod
+    def get_rows(cls):
+        return fetch_rows("""
+            SELECT id
+            FROM demoscene_releaser
+            WHERE
+            notes = ''
+            AND id NOT IN ( -- must belong to no groups
+                SELECT DISTINCT member_id FROM demoscene_membership
+            )
+            AND id NOT IN ( -- must have no members
+                SELECT DISTINCT group_id FROM demoscene_membership
+            )
+            AND id NOT IN ( -- must have no releases as author
+                SELECT DISTINCT demoscene_nick.releaser_id
+                FROM demoscene_nick
+                INNER JOIN productions_production_author_nicks ON (
+                    demoscene_nick.id = productions_production_author_nicks.nick_id
+                )
+            )
+            AND id NOT IN ( -- must have no releases as author affiliation
+                SELECT DISTINCT demoscene_nick.releaser_id
+                FROM demoscene_nick
+                INNER JOIN productions_production_author_affiliation_nicks ON (
+                    demoscene_nick.id = productions_production_author_affiliation_nicks.nick_id
+                )
+            )
+            AND id NOT IN ( -- must have no credits
+                SELECT DISTINCT demoscene_nick.releaser_id
+                FROM demoscene_nick
+                INNER JOIN productions_credit ON (demoscene_nick.id = productions_credit.nick_id)
+            )
+            AND id NOT IN ( -- must not be orga of any party
+                SELECT DISTINCT releaser_id FROM parties_organiser
+            )
+            AND id NOT IN ( -- must not be staff of any bbs
+                SELECT DISTINCT releaser_id FROM bbs_operator
+            )
+            AND id NOT IN ( -- must not have any BBS affiliations
+                SELECT DISTINCT group_id FROM bbs_affiliation
+            )
+            AND id NOT IN ( -- must not have any external links that aren't BaseUrl
+                SELECT DISTINCT releaser_id
+                FROM demoscene_releaserexternallink
+                WHERE link_class <> 'BaseUrl'
+            )
+            AND id NOT IN (SELECT releaser_id FROM demoscene_nick where differentiator <> '')
+            ORDER BY LOWER(name)
+        """)
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from common.signals import bulk_saved
+from maintenance.reports import MATERIALISED_REPORTS
+
+
+def mark_reports_stale(sender):
+    # for m2m_changed, sender is the through model, which is how m2m tables appear in source_models
+    label = sender._meta.label_lower
+    for report in MATERIALISED_REPORTS.values():
+        if label in report.source_models:
+            transaction.on_commit(report.mark_stale)
+
+
+@receiver(post_save)
+def on_save(sender, raw=False, **kwargs):
+    if not raw:
+        mark_reports_stale(sender)
+
+
+@receiver(post_delete)
+def on_delete(sender, **kwargs):
+    mark_reports_stale(sender)
+
+
+@receiver(bulk_saved)
+def on_bulk_saved(sender, **kwargs):
+    mark_reports_stale(sender)
+
+
+@receiver(m2m_changed)
+def on_m2m_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        mark_reports_stale(sender)
@@ -0,0 +1,14 @@
+from celery import shared_task
+
+from maintenance.reports import MATERIALISED_REPORTS
+
+
+@shared_task(ignore_result=True)
+def refresh_report(name):
+    MATERIALISED_REPORTS[name].refresh()
+
+
+@shared_task(ignore_result=True)
+def refresh_all_reports():
+    for report in MATERIALISED_REPORTS.values():
+        report.refresh()
@@ -0,0 +1,68 @@
+import datetime
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from demoscene.models import Releaser
+from maintenance.models import Exclusion
+from maintenance.reports import MatchingSurnames
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class TestMaterialisedReports(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def setUp(self):
+        cache.clear()
+        Releaser.objects.filter(name="Gasman").update(first_name="Matt", surname="Westcott")
+        self.yerzmyey = Releaser.objects.get(name="Yerzmyey")
+        Releaser.objects.filter(id=self.yerzmyey.id).update(first_name="Jerzy", surname="Westcott")
+
+    def test_results_are_stored(self):
+        rows, refreshed_at = MatchingSurnames.get_results()
+        self.assertEqual(len(rows), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(MatchingSurnames.get_results()[0], rows)
+
+    def test_exclusions_are_applied_on_read(self):
+        MatchingSurnames.get_results()
+        Exclusion.objects.create(report_name="matching_surnames", record_id=self.yerzmyey.id)
+        rows, refreshed_at = MatchingSurnames.get_results(exclusion_names=["matching_surnames"])
+        self.assertNotIn((self.yerzmyey.id,), rows)
+        self.assertEqual(len(rows), 1)
+
+    @patch("maintenance.tasks.refresh_report")
+    def test_changes_queue_refresh(self, refresh_report):
+        rows, refreshed_at = MatchingSurnames.get_results()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.yerzmyey.surname = "Smith"
+            self.yerzmyey.save()
+
+        # the stale results are served while the refresh is queued, but only queued once
+        self.assertEqual(MatchingSurnames.get_results()[0], rows)
+        MatchingSurnames.get_results()
+        refresh_report.delay.assert_called_once_with("matching_surnames")
+
+        MatchingSurnames.refresh()
+        self.assertEqual(MatchingSurnames.get_results()[0], [])
+
+    @patch("maintenance.tasks.refresh_report")
+    def test_edited_records_are_dropped_from_stale_results(self, refresh_report):
+        MatchingSurnames.get_results()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.yerzmyey.surname = "Smith"
+            self.yerzmyey.updated_at = datetime.datetime.now()
+            self.yerzmyey.save()
+
+        rows, refreshed_at = MatchingSurnames.get_results()
+        self.assertNotIn((self.yerzmyey.id,), rows)
+        self.assertEqual(len(rows), 1)
+
+    def test_unrelated_changes_do_not_mark_stale(self):
+        MatchingSurnames.get_results()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.yerzmyey.nicks.first().variants.create(name="Yerz")
+        self.assertIsNone(cache.get(MatchingSurnames.stale_key()))
@@ -1,10 +1,10 @@
+import copy
 from io import StringIO
 
 from ansipants import ANSIDecoder
 from django.contrib.contenttypes.models import ContentType
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db import connection
-from django.db.models import F, Q
+from django.db.models import Q
 from django.db.models.functions import Lower
 from django.http import HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404, redirect, render
@@ -76,6 +76,12 @@ class Report(TemplateView):
         return context
 
 
+def in_id_order(queryset, ids):
+    """Return the objects of queryset with the given ids, in the order that the ids are given in"""
+    objects = queryset.in_bulk(ids)
+    return [objects[id] for id in ids if id in objects]
+
+
 class FilterableProductionReport(Report):
     template_name = "maintenance/filtered_production_report.html"
     limit = 100
@@ -537,25 +543,15 @@ class ProdsWithSameNamedCredits(StaffOnlyMixin, Report):
     title = "Productions with identically-named sceners in the credits"
     template_name = "maintenance/production_report.html"
     name = "prods_with_same_named_credits"
+    report_class = reports_module.ProductionsWithSameNamedCredits
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        productions = Production.objects.raw(
-            """
-            SELECT DISTINCT productions_production.*
-            FROM productions_production
-            INNER JOIN productions_credit ON (productions_production.id = productions_credit.production_id)
-            INNER JOIN demoscene_nick ON (productions_credit.nick_id = demoscene_nick.id)
-            INNER JOIN demoscene_nick AS other_nick ON (
-                demoscene_nick.name = other_nick.name AND demoscene_nick.id <> other_nick.id
-            )
-            INNER JOIN productions_credit AS other_credit ON (
-                other_nick.id = other_credit.nick_id AND other_credit.production_id = productions_production.id
-            )
-            AND productions_production.id NOT IN (SELECT record_id FROM maintenance_exclusion WHERE report_name = %s)
-        """,
-            [self.exclusion_name],
+        rows, refreshed_at = self.report_class.get_results(exclusion_names=[self.exclusion_name])
+        productions = in_id_order(
+            Production.objects.prefetch_related("author_nicks__releaser", "author_affiliation_nicks__releaser"),
+            [production_id for (production_id,) in rows],
         )
 
         context.update(
@@ -571,36 +567,18 @@ class SameNamedProdsBySameReleaser(StaffOnlyMixin, Report):
     title = "Identically-named productions by the same releaser"
     template_name = "maintenance/production_report.html"
     name = "same_named_prods_by_same_releaser"
+    report_class = reports_module.SameNamedProductionsBySameReleaser
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        productions = Production.objects.raw("""
-            SELECT DISTINCT productions_production.*
-            FROM productions_production
-            INNER JOIN productions_production_author_nicks ON (
-                productions_production.id = productions_production_author_nicks.production_id
-            )
-            INNER JOIN demoscene_nick ON (productions_production_author_nicks.nick_id = demoscene_nick.id)
-            INNER JOIN demoscene_nick AS other_nick ON (demoscene_nick.releaser_id = other_nick.releaser_id)
-            INNER JOIN productions_production_author_nicks AS other_authorship ON (
-                other_nick.id = other_authorship.nick_id
-            )
-            INNER JOIN productions_production AS other_production ON (
-                other_authorship.production_id = other_production.id
-            )
-            WHERE
-                productions_production.title <> '?'
-                AND productions_production.id <> other_production.id
-                AND LOWER(productions_production.title) = LOWER(other_production.title)
-                AND productions_production.id NOT IN (
-                    SELECT record_id FROM maintenance_exclusion
-                    WHERE report_name IN (
-                        'same_named_prods_by_same_releaser', 'same_named_prods_without_special_chars'
-                    )
-                )
-            ORDER BY productions_production.sortable_title
-        """)
+        rows, refreshed_at = self.report_class.get_results(
+            exclusion_names=["same_named_prods_by_same_releaser", "same_named_prods_without_special_chars"]
+        )
+        productions = in_id_order(
+            Production.objects.prefetch_related("author_nicks__releaser", "author_affiliation_nicks__releaser"),
+            [production_id for (production_id,) in rows],
+        )
 
         context.update(
             {
@@ -615,37 +593,18 @@ class SameNamedProdsWithoutSpecialChars(StaffOnlyMixin, Report):
     title = "Identically-named productions by the same releaser, ignoring special chars"
     template_name = "maintenance/production_report.html"
     name = "same_named_prods_without_special_chars"
+    report_class = reports_module.SameNamedProductionsWithoutSpecialChars
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        productions = Production.objects.raw("""
-            SELECT DISTINCT productions_production.*
-            FROM productions_production
-            INNER JOIN productions_production_author_nicks ON (
-                productions_production.id = productions_production_author_nicks.production_id
-            )
-            INNER JOIN demoscene_nick ON (productions_production_author_nicks.nick_id = demoscene_nick.id)
-            INNER JOIN demoscene_nick AS other_nick ON (demoscene_nick.releaser_id = other_nick.releaser_id)
-            INNER JOIN productions_production_author_nicks AS other_authorship ON (
-                other_nick.id = other_authorship.nick_id
-            )
-            INNER JOIN productions_production AS other_production ON (
-                other_authorship.production_id = other_production.id
-            )
-            WHERE
-                productions_production.title <> '?'
-                AND productions_production.id <> other_production.id
-                AND LOWER(REGEXP_REPLACE(productions_production.title, E'\\\\W', '', 'g'))
-                    = LOWER(REGEXP_REPLACE(other_production.title, E'\\\\W', '', 'g'))
-                AND productions_production.id NOT IN (
-                    SELECT record_id FROM maintenance_exclusion
-                    WHERE report_name IN (
-                        'same_named_prods_by_same_releaser', 'same_named_prods_without_special_chars'
-                    )
-                )
-            ORDER BY productions_production.sortable_title
-        """)
+        rows, refreshed_at = self.report_class.get_results(
+            exclusion_names=["same_named_prods_by_same_releaser", "same_named_prods_without_special_chars"]
+        )
+        productions = in_id_order(
+            Production.objects.prefetch_related("author_nicks__releaser", "author_affiliation_nicks__releaser"),
+            [production_id for (production_id,) in rows],
+        )
 
         context.update(
             {
@@ -660,47 +619,23 @@ class DuplicateProductionExternalLinks(StaffOnlyMixin, Report):
     title = "Duplicate production external links"
     template_name = "maintenance/duplicate_production_external_links.html"
     name = "duplicate_production_external_links"
+    report_class = reports_module.DuplicateProductionExternalLinks
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        link_ids = [
-            r.id
-            for r in ProductionLink.objects.raw("""
-            SELECT
-                productions_productionlink.id,
-                productions_productionlink.link_class,
-                productions_productionlink.parameter
-            FROM productions_productionlink INNER JOIN (
-                SELECT productions_productionlink.link_class, productions_productionlink.parameter
-                FROM productions_productionlink
-                WHERE productions_productionlink.is_download_link = 'f'
-                GROUP BY productions_productionlink.link_class, productions_productionlink.parameter
-                HAVING COUNT(*) > 1
-                ORDER BY productions_productionlink.link_class, productions_productionlink.parameter
-            ) AS dupes
-            ON (
-                productions_productionlink.link_class = dupes.link_class
-                AND productions_productionlink.parameter = dupes.parameter
-                AND productions_productionlink.is_download_link = 'f'
-            )
-        """)
-        ]
+        rows, refreshed_at = self.report_class.get_results()
+        productions = Production.objects.prefetch_related(
+            "author_nicks__releaser", "author_affiliation_nicks__releaser"
+        ).in_bulk([production_id for (production_id, link_class, parameter) in rows])
 
-        duplicate_prods = (
-            Production.objects.filter(links__id__in=link_ids)
-            .annotate(
-                duplicate_link_class=F("links__link_class"),
-                duplicate_link_parameter=F("links__parameter"),
-            )
-            .order_by("duplicate_link_class", "duplicate_link_parameter")
-            .prefetch_related(
-                "author_nicks",
-                "author_affiliation_nicks",
-                "author_nicks__releaser",
-                "author_affiliation_nicks__releaser",
-            )
-        )
+        duplicate_prods = []
+        for production_id, link_class, parameter in rows:
+            if production_id in productions:
+                production = copy.copy(productions[production_id])
+                production.duplicate_link_class = link_class
+                production.duplicate_link_parameter = parameter
+                duplicate_prods.append(production)
 
         context.update(
             {
@@ -714,35 +649,21 @@ class DuplicateReleaserExternalLinks(StaffOnlyMixin, Report):
     title = "Duplicate releaser external links"
     template_name = "maintenance/duplicate_releaser_external_links.html"
     name = "duplicate_releaser_external_links"
+    report_class = reports_module.DuplicateReleaserExternalLinks
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        link_ids = [
-            r.id
-            for r in ReleaserExternalLink.objects.raw("""
-            SELECT demoscene_releaserexternallink.* FROM demoscene_releaserexternallink INNER JOIN (
-                SELECT demoscene_releaserexternallink.link_class, demoscene_releaserexternallink.parameter
-                FROM demoscene_releaserexternallink
-                GROUP BY demoscene_releaserexternallink.link_class, demoscene_releaserexternallink.parameter
-                HAVING COUNT(*) > 1
-                ORDER BY demoscene_releaserexternallink.link_class, demoscene_releaserexternallink.parameter
-            ) AS dupes
-            ON (
-                demoscene_releaserexternallink.link_class = dupes.link_class
-                AND demoscene_releaserexternallink.parameter = dupes.parameter
-            )
-        """)
-        ]
+        rows, refreshed_at = self.report_class.get_results()
+        releasers = Releaser.objects.in_bulk([releaser_id for (releaser_id, link_class, parameter) in rows])
 
-        duplicate_releasers = (
-            Releaser.objects.filter(external_links__id__in=link_ids)
-            .annotate(
-                duplicate_link_class=F("external_links__link_class"),
-                duplicate_link_parameter=F("external_links__parameter"),
-            )
-            .order_by("duplicate_link_class", "duplicate_link_parameter")
-        )
+        duplicate_releasers = []
+        for releaser_id, link_class, parameter in rows:
+            if releaser_id in releasers:
+                releaser = copy.copy(releasers[releaser_id])
+                releaser.duplicate_link_class = link_class
+                releaser.duplicate_link_parameter = parameter
+                duplicate_releasers.append(releaser)
 
         context.update(
             {
@@ -790,21 +711,13 @@ class MatchingRealNames(StaffOnlyMixin, Report):
     title = "Sceners with matching real names"
     template_name = "maintenance/matching_real_names.html"
     name = "matching_real_names"
+    report_class = reports_module.MatchingRealNames
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        releasers = Releaser.objects.raw("""
-            SELECT DISTINCT demoscene_releaser.*
-            FROM demoscene_releaser
-            INNER JOIN demoscene_releaser AS other_releaser ON (
-                demoscene_releaser.first_name <> ''
-                AND demoscene_releaser.surname <> ''
-                AND demoscene_releaser.first_name = other_releaser.first_name
-                AND demoscene_releaser.surname = other_releaser.surname
-                AND demoscene_releaser.id <> other_releaser.id)
-            ORDER BY demoscene_releaser.first_name, demoscene_releaser.surname, demoscene_releaser.name
-        """)
+        rows, refreshed_at = self.report_class.get_results()
+        releasers = in_id_order(Releaser.objects.all(), [releaser_id for (releaser_id,) in rows])
         context.update(
             {
                 "releasers": releasers,
@@ -817,19 +730,13 @@ class MatchingSurnames(StaffOnlyMixin, Report):
     title = "Sceners with matching surnames"
     template_name = "maintenance/matching_surnames.html"
     name = "matching_surnames"
+    report_class = reports_module.MatchingSurnames
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        releasers = Releaser.objects.raw("""
-            SELECT DISTINCT demoscene_releaser.*
-            FROM demoscene_releaser
-            INNER JOIN demoscene_releaser AS other_releaser ON (
-                demoscene_releaser.surname <> ''
-                AND demoscene_releaser.surname = other_releaser.surname
-                AND demoscene_releaser.id <> other_releaser.id)
-            ORDER BY demoscene_releaser.surname, demoscene_releaser.first_name, demoscene_releaser.name
-        """)
+        rows, refreshed_at = self.report_class.get_results()
+        releasers = in_id_order(Releaser.objects.all(), [releaser_id for (releaser_id,) in rows])
         context.update(
             {
                 "releasers": releasers,
@@ -842,40 +749,12 @@ class ImpliedMemberships(StaffOnlyMixin, Report):
     title = "Group memberships found in production bylines, but missing from the member list"
     template_name = "maintenance/implied_memberships.html"
     name = "implied_memberships"
+    report_class = reports_module.ImpliedMemberships
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        cursor = connection.cursor()
-        cursor.execute("""
-            SELECT
-                member.id, member.is_group, member.name,
-                grp.id, grp.name,
-                productions_production.id, productions_production.supertype, productions_production.title
-            FROM
-                productions_production
-                INNER JOIN productions_production_author_nicks ON (
-                    productions_production.id = productions_production_author_nicks.production_id
-                )
-                INNER JOIN demoscene_nick AS author_nick ON (
-                    productions_production_author_nicks.nick_id = author_nick.id
-                )
-                INNER JOIN demoscene_releaser AS member ON (author_nick.releaser_id = member.id)
-                INNER JOIN productions_production_author_affiliation_nicks ON (
-                    productions_production.id = productions_production_author_affiliation_nicks.production_id
-                )
-                INNER JOIN demoscene_nick AS group_nick ON (
-                    productions_production_author_affiliation_nicks.nick_id = group_nick.id
-                )
-                INNER JOIN demoscene_releaser AS grp ON (group_nick.releaser_id = grp.id)
-                LEFT JOIN demoscene_membership ON (
-                    member.id = demoscene_membership.member_id
-                    AND grp.id = demoscene_membership.group_id)
-            WHERE
-                demoscene_membership.id IS NULL
-            ORDER BY
-                grp.name, grp.id, member.name, member.id, productions_production.title
-        """)
+        rows, refreshed_at = self.report_class.get_results()
         records = [
             {
                 "membership": (member_id, group_id),
@@ -897,7 +776,7 @@ class ImpliedMemberships(StaffOnlyMixin, Report):
                 production_id,
                 production_supertype,
                 production_title,
-            ) in cursor.fetchall()
+            ) in rows
         ]
         context.update(
             {
@@ -1089,59 +968,14 @@ class EmptyReleasers(StaffOnlyMixin, Report):
     title = "Empty releaser records"
     template_name = "maintenance/releaser_report.html"
     name = "empty_releasers"
+    report_class = reports_module.EmptyReleasers
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        releasers = Releaser.objects.raw(
-            """
-            SELECT id, is_group, name
-            FROM demoscene_releaser
-            WHERE
-            notes = ''
-            AND id NOT IN ( -- must belong to no groups
-                SELECT DISTINCT member_id FROM demoscene_membership
-            )
-            AND id NOT IN ( -- must have no members
-                SELECT DISTINCT group_id FROM demoscene_membership
-            )
-            AND id NOT IN ( -- must have no releases as author
-                SELECT DISTINCT demoscene_nick.releaser_id
-                FROM demoscene_nick
-                INNER JOIN productions_production_author_nicks ON (
-                    demoscene_nick.id = productions_production_author_nicks.nick_id
-                )
-            )
-            AND id NOT IN ( -- must have no releases as author affiliation
-                SELECT DISTINCT demoscene_nick.releaser_id
-                FROM demoscene_nick
-                INNER JOIN productions_production_author_affiliation_nicks ON (
-                    demoscene_nick.id = productions_production_author_affiliation_nicks.nick_id
-                )
-            )
-            AND id NOT IN ( -- must have no credits
-                SELECT DISTINCT demoscene_nick.releaser_id
-                FROM demoscene_nick
-                INNER JOIN productions_credit ON (demoscene_nick.id = productions_credit.nick_id)
-            )
-            AND id NOT IN ( -- must not be orga of any party
-                SELECT DISTINCT releaser_id FROM parties_organiser
-            )
-            AND id NOT IN ( -- must not be staff of any bbs
-                SELECT DISTINCT releaser_id FROM bbs_operator
-            )
-            AND id NOT IN ( -- must not have any BBS affiliations
-                SELECT DISTINCT group_id FROM bbs_affiliation
-            )
-            AND id NOT IN ( -- must not have any external links that aren't BaseUrl
-                SELECT DISTINCT releaser_id
-                FROM demoscene_releaserexternallink
-                WHERE link_class <> 'BaseUrl'
-            )
-            AND id NOT IN (SELECT releaser_id FROM demoscene_nick where differentiator <> '')
-            AND id NOT IN (SELECT record_id FROM maintenance_exclusion WHERE report_name = %s)
-            ORDER BY LOWER(name)
-        """,
-            [self.exclusion_name],
+
+        rows, refreshed_at = self.report_class.get_results(exclusion_names=[self.exclusion_name])
+        releasers = in_id_order(
+            Releaser.objects.only("id", "is_group", "name"), [releaser_id for (releaser_id,) in rows]
         )
 
         context.update(
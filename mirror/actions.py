@@ -1,7 +1,10 @@
 import datetime
 import errno
+import hashlib
+import io
 import os
 import re
+import tempfile
 import urllib
 
 import boto3
@@ -17,6 +20,14 @@ from screenshots.processing import select_screenshot_file
 max_size = 10485760
 mirror_bucket_name = "mirror.demozoo.org"
 
+# origin downloads larger than this are spooled to disk rather than held in memory
+spool_max_size = 1048576
+# number of bytes to read from an origin URL at a time
+read_chunk_size = 65536
+# read buffer size for files read from S3 with ranged requests; reads larger than this are fetched
+# with a single request of the requested size
+s3_read_buffer_size = 65536
+
 upload_dir = os.path.join(settings.FILEROOT, "media", "mirror")
 try:  # create upload_dir if not already present
     os.makedirs(upload_dir)
@@ -44,14 +55,25 @@ def fetch_origin_url(url):
 
     resolved_url = f.geturl()
 
-    file_content = f.read(max_size + 1)
+    # spool the response to a temporary file, computing hashes as we go
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_max_size)
+    sha1 = hashlib.sha1()
+    md5 = hashlib.md5()
+    file_size = 0
+    while chunk := f.read(read_chunk_size):
+        file_size += len(chunk)
+        if file_size > max_size:
+            f.close()
+            spool.close()
+            raise FileTooBig("File exceeded the size limit of %d bytes" % max_size)
+        spool.write(chunk)
+        sha1.update(chunk)
+        md5.update(chunk)
     f.close()
-    if len(file_content) > max_size:
-        raise FileTooBig("File exceeded the size limit of %d bytes" % max_size)
 
     remote_filename = urllib.parse.urlparse(resolved_url).path.split("/")[-1]
 
-    return DownloadBlob(remote_filename, file_content)
+    return DownloadBlob(remote_filename, file=spool, sha1=sha1.hexdigest(), md5=md5.hexdigest(), file_size=file_size)
 
 
 def clean_filename(filename):
@@ -67,6 +89,68 @@ def open_bucket():
     return s3.Bucket(mirror_bucket_name)
 
 
+class S3ObjectFile(io.RawIOBase):
+    """
+    A read-only, seekable file object for an S3 object, which fetches only the byte ranges that are
+    actually read. Wrap in io.BufferedReader (as open_s3_file does) to avoid a request per small read
+    """
+
+    def __init__(self, s3_object):
+        self.s3_object = s3_object
+        self.size = s3_object.content_length
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError("invalid whence (%r)" % whence)
+
+        if position < 0:
+            raise ValueError("negative seek position %d" % position)
+        self.position = position
+        return position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            end = self.size
+        else:
+            end = min(self.size, self.position + size)
+        if self.position >= end:
+            return b""
+
+        response = self.s3_object.get(Range="bytes=%d-%d" % (self.position, end - 1))
+        data = response["Body"].read()
+        self.position += len(data)
+        return data
+
+    def readall(self):
+        return self.read()
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def open_s3_file(key):
+    """Open the object with the given key in the mirror bucket as a file object backed by ranged requests"""
+    return io.BufferedReader(S3ObjectFile(open_bucket().Object(key)), buffer_size=s3_read_buffer_size)
+
+
 def fetch_link(link):
     # Fetch our mirrored copy of the given link if available;
     # if not, mirror and return the original file
@@ -115,7 +199,7 @@ def fetch_link(link):
                 blob.sha1[0:2] + "/" + blob.sha1[2:4] + "/" + blob.sha1[4:16] + "/" + clean_filename(blob.filename)
             )
             bucket = open_bucket()
-            bucket.put_object(Key=key_name, Body=blob.file_content)
+            bucket.put_object(Key=key_name, Body=blob.as_file())
             download.mirror_s3_key = key_name
 
         download.save()
@@ -123,65 +207,76 @@ def fetch_link(link):
         if link.is_zip_file():
             # catalogue the zipfile contents if we don't have them already
             if not ArchiveMember.objects.filter(archive_sha1=blob.sha1).exists():
-                z = blob.as_zipfile()
-                for info in z.infolist():
-                    # The Incredible Disaster of Platform Specific Implementations of Zip:
-                    # https://gist.github.com/jnalley/cec21bca2d865758bc5e23654df28bd5
-                    #
-                    # Historically, zip files did not specify what character encoding the filename is using;
-                    # there is supposedly a flag to indicate 'yo this is utf-8' but it's unclear how widely
-                    # used/recognised it is, and you can bet that scene.org has some weird shit on it.
-                    # So, we consider the filename to be an arbitrary byte string.
-                    #
-                    # Since the database wants to store unicode strings, we decode the byte string as
-                    # iso-8859-1 to obtain one, and encode it as iso-8859-1 again on the way out of the
-                    # database. iso-8859-1 is chosen because it gives a well-defined result for any
-                    # arbitrary byte string, and doesn't unnecessarily mangle pure ASCII filenames.
-                    #
-                    # So, how do we get a byte string from the result of ZipFile.infolist?
-                    # Python 2 gives us a unicode string if the mythical utf-8 flag is set,
-                    # and a byte string otherwise. Our old python-2-only code called
-                    # filename.decode('iso-8859-1'), which would have failed on a unicode string containing
-                    # non-ascii characters, so we can assume that anything that made it as far as the
-                    # database originated either as pure ascii or a bytestring. Either way, calling
-                    # database_value.encode('iso-8859-1') would give a bytestring that python 2's zipfile
-                    # library can accept (i.e. it compares equal to the filename it originally gave us).
-                    #
-                    # Python 3 ALWAYS gives us a unicode string: decoded as utf-8 if the mythical flag is
-                    # set, or decoded as cp437 if not. We don't need to know which of these outcomes
-                    # happened; we just need to ensure that
-                    # 1) the transformation from unicode string to byte string is reversible, and
-                    # 2) the byte string representation matches the one that python 2 would have given us
-                    # for the same filename.
-                    #
-                    # The latter condition is satisfied by filename.encode('cp437'), which makes the
-                    # reverse tranformation bytestring.decode('cp437'). Therefore our final algorithm is:
-                    #
-                    # zipfile to database:
-                    # if filename is a unicode string (i.e. we are on py3 or the mythical flag is set):
-                    #     filename = filename.encode('cp437')  # filename is now a bytestring
-                    # return filename.decode('iso-8859-1')
-                    #
-                    # database to zipfile:
-                    # bytestring = database_value.encode('iso-8859-1')
-                    # if we are on py2:
-                    #     return bytestring
-                    # else:
-                    #     return bytestring.decode('cp437')
-                    #
-
-                    filename = info.filename
-                    if isinstance(filename, str):  # pragma: no cover
-                        filename = filename.encode("cp437")
-                    filename = filename.decode("iso-8859-1")
-
-                    ArchiveMember.objects.get_or_create(
-                        filename=filename, file_size=info.file_size, archive_sha1=blob.sha1
-                    )
+                catalogue_archive(blob.sha1, blob.as_zipfile())
 
         return blob
 
 
+def catalogue_archive(sha1, z):
+    """
+    Create ArchiveMember records for the contents of the ZipFile z, whose SHA1 is sha1, in a single
+    query. Returns the number of members found
+    """
+    archive_members = {}
+    for info in z.infolist():
+        # The Incredible Disaster of Platform Specific Implementations of Zip:
+        # https://gist.github.com/jnalley/cec21bca2d865758bc5e23654df28bd5
+        #
+        # Historically, zip files did not specify what character encoding the filename is using;
+        # there is supposedly a flag to indicate 'yo this is utf-8' but it's unclear how widely
+        # used/recognised it is, and you can bet that scene.org has some weird shit on it.
+        # So, we consider the filename to be an arbitrary byte string.
+        #
+        # Since the database wants to store unicode strings, we decode the byte string as
+        # iso-8859-1 to obtain one, and encode it as iso-8859-1 again on the way out of the
+        # database. iso-8859-1 is chosen because it gives a well-defined result for any
+        # arbitrary byte string, and doesn't unnecessarily mangle pure ASCII filenames.
+        #
+        # So, how do we get a byte string from the result of ZipFile.infolist?
+        # Python 2 gives us a unicode string if the mythical utf-8 flag is set,
+        # and a byte string otherwise. Our old python-2-only code called
+        # filename.decode('iso-8859-1'), which would have failed on a unicode string containing
+        # non-ascii characters, so we can assume that anything that made it as far as the
+        # database originated either as pure ascii or a bytestring. Either way, calling
+        # database_value.encode('iso-8859-1') would give a bytestring that python 2's zipfile
+        # library can accept (i.e. it compares equal to the filename it originally gave us).
+        #
+        # Python 3 ALWAYS gives us a unicode string: decoded as utf-8 if the mythical flag is
+        # set, or decoded as cp437 if not. We don't need to know which of these outcomes
+        # happened; we just need to ensure that
+        # 1) the transformation from unicode string to byte string is reversible, and
+        # 2) the byte string representation matches the one that python 2 would have given us
+        # for the same filename.
+        #
+        # The latter condition is satisfied by filename.encode('cp437'), which makes the
+        # reverse tranformation bytestring.decode('cp437'). Therefore our final algorithm is:
+        #
+        # zipfile to database:
+        # if filename is a unicode string (i.e. we are on py3 or the mythical flag is set):
+        #     filename = filename.encode('cp437')  # filename is now a bytestring
+        # return filename.decode('iso-8859-1')
+        #
+        # database to zipfile:
+        # bytestring = database_value.encode('iso-8859-1')
+        # if we are on py2:
+        #     return bytestring
+        # else:
+        #     return bytestring.decode('cp437')
+        #
+
+        filename = info.filename
+        if isinstance(filename, str):  # pragma: no cover
+            filename = filename.encode("cp437")
+        filename = filename.decode("iso-8859-1")
+
+        archive_members[(filename, info.file_size)] = ArchiveMember(
+            filename=filename, file_size=info.file_size, archive_sha1=sha1
+        )
+
+    ArchiveMember.objects.bulk_create(archive_members.values(), ignore_conflicts=True)
+    return len(archive_members)
+
+
 def unpack_db_zip_filename(filename):
     bytestring = filename.encode("iso-8859-1")
     return bytestring.decode("cp437")
@@ -0,0 +1,73 @@
+import multiprocessing
+import zipfile
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Exists, OuterRef
+
+from mirror.actions import catalogue_archive
+from mirror.models import ArchiveMember, Download
+
+
+def catalogue_download(download_id):
+    """
+    Fetch the central directory of the mirrored zip file for the given Download and create
+    ArchiveMember records for it. Returns a (mirror_s3_key, member_count, error) tuple; errors in
+    fetching or reading the file (such as a missing S3 object) are returned rather than raised, so
+    that they do not abort the whole run
+    """
+    download = Download.objects.get(id=download_id)
+    try:
+        blob = download.fetch_from_s3()
+        with blob.as_zipfile() as z:
+            member_count = catalogue_archive(download.sha1, z)
+    except (zipfile.BadZipFile, BotoCoreError, ClientError, OSError) as ex:
+        return download.mirror_s3_key, 0, ex
+
+    return download.mirror_s3_key, member_count, None
+
+
+class Command(BaseCommand):
+    help = "Create ArchiveMember records for mirrored zip files that have not been catalogued"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Number of worker processes to fetch archives with")
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+
+        # one Download per uncatalogued sha1 is enough, as ArchiveMember records are keyed by sha1
+        download_ids_by_sha1 = {}
+        for download_id, sha1 in (
+            Download.objects.exclude(mirror_s3_key="")
+            .exclude(sha1="")
+            .filter(mirror_s3_key__iendswith=".zip")
+            .exclude(Exists(ArchiveMember.objects.filter(archive_sha1=OuterRef("sha1"))))
+            .order_by("id")
+            .values_list("id", "sha1")
+        ):
+            download_ids_by_sha1.setdefault(sha1, download_id)
+        download_ids = list(download_ids_by_sha1.values())
+
+        if workers <= 1:
+            results = map(catalogue_download, download_ids)
+        else:
+            # worker processes must not share the parent's database connection
+            connections.close_all()
+            pool = multiprocessing.Pool(workers)
+            results = pool.imap_unordered(catalogue_download, download_ids)
+
+        archive_count = 0
+        for mirror_s3_key, member_count, error in results:
+            if error:
+                print("%s: could not read zip file: %s" % (mirror_s3_key, error))
+            else:
+                archive_count += 1
+                print("%s: catalogued %d members" % (mirror_s3_key, member_count))
+
+        if workers > 1:
+            pool.close()
+            pool.join()
+
+        print("done. %d archives catalogued" % archive_count)
@@ -24,13 +24,21 @@ class Download(ExternalLink):
         return ArchiveMember.objects.filter(archive_sha1=self.sha1)
 
     def fetch_from_s3(self):
-        from mirror.actions import open_bucket
+        """
+        Return a DownloadBlob for the mirrored copy of this download. Data is fetched from S3 with
+        ranged requests as it is read, so that (for example) extracting one member of a zip file
+        only transfers the zip's central directory and that member
+        """
+        from mirror.actions import open_s3_file
 
-        bucket = open_bucket()
-        f = BytesIO()
-        bucket.download_fileobj(self.mirror_s3_key, f)
         filename = self.mirror_s3_key.split("/")[-1]
-        return DownloadBlob(filename, f.getvalue())
+        return DownloadBlob(
+            filename,
+            file=open_s3_file(self.mirror_s3_key),
+            sha1=(self.sha1 or None),
+            md5=(self.md5 or None),
+            file_size=self.file_size,
+        )
 
 
 class ArchiveMember(models.Model):
@@ -70,25 +78,60 @@ class ArchiveMember(models.Model):
         ]
 
 
+# number of bytes to read at a time when computing hashes
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
 class DownloadBlob(object):
-    def __init__(self, filename, file_content):
+    """
+    A downloaded file, backed either by a bytestring (file_content) or a seekable file object (file).
+    sha1, md5 and file_size are computed from the content on demand unless they are passed in.
+    """
+
+    def __init__(self, filename, file_content=None, file=None, sha1=None, md5=None, file_size=None):
         self.filename = filename
-        self.file_content = file_content
+        if file is None:
+            file = BytesIO(file_content)
+            self.file_content = file_content
+        self.file = file
+
+        if sha1 is not None:
+            self.sha1 = sha1
+        if md5 is not None:
+            self.md5 = md5
+        if file_size is not None:
+            self.file_size = file_size
+
+    def _hexdigest(self, hash):
+        f = self.as_file()
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            hash.update(chunk)
+        return hash.hexdigest()
+
+    @cached_property
+    def file_content(self):
+        return self.as_file().read()
 
     @cached_property
     def md5(self):
-        return hashlib.md5(self.file_content).hexdigest()
+        return self._hexdigest(hashlib.md5())
 
     @cached_property
     def sha1(self):
-        return hashlib.sha1(self.file_content).hexdigest()
+        return self._hexdigest(hashlib.sha1())
 
     @cached_property
     def file_size(self):
-        return len(self.file_content)
+        return self.file.seek(0, 2)
+
+    def as_file(self):
+        """Return the underlying file object, rewound to the start. This must not be closed by the caller"""
+        self.file.seek(0)
+        return self.file
 
     def as_io_buffer(self):
         return BytesIO(self.file_content)
 
     def as_zipfile(self):
-        return zipfile.ZipFile(self.as_io_buffer(), "r")
+        # ZipFile seeks to the parts of the file it needs, and does not close a file object passed to it
+        return zipfile.ZipFile(self.file, "r")
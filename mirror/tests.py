@@ -1,13 +1,34 @@
 import datetime
+import io
+import os
+import zipfile
 from unittest.mock import patch
 
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.management import call_command
 from django.test import TestCase
+from django.test.utils import captured_stdout
 
-from mirror.actions import FileTooBig, fetch_link
+from mirror.actions import FileTooBig, S3ObjectFile, fetch_link
 from mirror.models import ArchiveMember, Download
 from productions.models import Production
 
 
+class FakeS3Object:
+    """Stand-in for a boto3 S3 Object resource that supports ranged GET requests"""
+
+    def __init__(self, content):
+        self.content = content
+        self.content_length = len(content)
+        self.requested_ranges = []
+
+    def get(self, Range):
+        start, end = Range.removeprefix("bytes=").split("-")
+        self.requested_ranges.append((int(start), int(end)))
+        return {"Body": io.BytesIO(self.content[int(start) : int(end) + 1])}
+
+
 class TestActions(TestCase):
     fixtures = ["tests/gasman.json"]
 
@@ -52,14 +73,11 @@ class TestActions(TestCase):
         session = Session.return_value
         s3 = session.resource.return_value
         bucket = s3.Bucket.return_value
-
-        def download_fileobj(filename, f):
-            f.write(b"hello from pondlife.txt")
-
-        bucket.download_fileobj = download_fileobj
+        bucket.Object.return_value = FakeS3Object(b"hello from pondlife.txt")
 
         download_blob = fetch_link(link)
         Session.assert_called_once_with(aws_access_key_id="AWS_K3Y", aws_secret_access_key="AWS_S3CR3T")
+        bucket.Object.assert_called_once_with("1/2/pondlife.123.txt")
         self.assertEqual(download_blob.filename, "pondlife.123.txt")
         self.assertEqual(download_blob.md5, "ebceeba7ff0d18701e1952cd3865ef22")
         self.assertEqual(download_blob.sha1, "31a1dd3aa79730732bf32f4c8f1e3e4f9ca1aa50")
@@ -97,9 +115,10 @@ class TestActions(TestCase):
         bucket = s3.Bucket.return_value
 
         download_blob = fetch_link(link)
-        bucket.put_object.assert_called_once_with(
-            Key="8d/f5/211e169bdda5/pondlife2.txt", Body=b"hello from pondlife2.txt"
-        )
+        bucket.put_object.assert_called_once()
+        put_object_kwargs = bucket.put_object.call_args.kwargs
+        self.assertEqual(put_object_kwargs["Key"], "8d/f5/211e169bdda5/pondlife2.txt")
+        self.assertEqual(download_blob.as_file().read(), b"hello from pondlife2.txt")
 
         Session.assert_called_once()
         self.assertEqual(download_blob.filename, "pondlife2.txt")
@@ -126,6 +145,31 @@ class TestActions(TestCase):
         self.assertEqual(archive_members.first().filename, "16Kb-RUBBER.txt")
 
 
+class TestS3ObjectFile(TestCase):
+    def test_read_and_seek(self):
+        f = S3ObjectFile(FakeS3Object(b"hello from pondlife.txt"))
+        self.assertEqual(f.read(5), b"hello")
+        self.assertEqual(f.seek(-3, io.SEEK_END), 20)
+        self.assertEqual(f.read(), b"txt")
+        self.assertEqual(f.read(), b"")
+        f.seek(6)
+        self.assertEqual(f.read(4), b"from")
+        self.assertEqual(f.tell(), 10)
+
+    def test_read_zip_member(self):
+        with open(os.path.join(settings.FILEROOT, "mirror", "test_media", "rubber.zip"), "rb") as f:
+            s3_object = FakeS3Object(f.read())
+
+        z = zipfile.ZipFile(io.BufferedReader(S3ObjectFile(s3_object), buffer_size=1024), "r")
+        self.assertTrue(z.read("16Kb-RUBBER.txt").startswith(b'Title: "RUBBER FOREVER'))
+        z.close()
+
+        # only the central directory at the end of the file and the (small) member at the start
+        # should have been fetched, not the 11K of compressed data for rubber.png
+        bytes_fetched = sum(end - start + 1 for start, end in s3_object.requested_ranges)
+        self.assertLess(bytes_fetched, 2048)
+
+
 class TestModels(TestCase):
     def test_archive_member(self):
         am1 = ArchiveMember.objects.create(archive_sha1="12341234", filename="picture.GIF", file_size=1234)
@@ -134,3 +178,83 @@ class TestModels(TestCase):
         self.assertEqual(str(am2), "readme")
         self.assertEqual(am1.file_extension, "gif")
         self.assertEqual(am2.file_extension, None)
+
+
+class TestCatalogueArchives(TestCase):
+    @patch("boto3.Session")
+    def test_run(self, Session):
+        Download.objects.create(
+            link_class="BaseUrl",
+            parameter="http://example.com/rubber.zip",
+            downloaded_at=datetime.datetime(2020, 1, 1, 12, 0, 0),
+            mirror_s3_key="ab/cd/ef/rubber.zip",
+            sha1="abcdef",
+        )
+        Download.objects.create(
+            link_class="BaseUrl",
+            parameter="http://example.com/pondlife.txt",
+            downloaded_at=datetime.datetime(2020, 1, 1, 12, 0, 0),
+            mirror_s3_key="12/34/56/pondlife.txt",
+            sha1="123456",
+        )
+        # already catalogued
+        Download.objects.create(
+            link_class="BaseUrl",
+            parameter="http://example.com/zxwister.zip",
+            downloaded_at=datetime.datetime(2020, 1, 1, 12, 0, 0),
+            mirror_s3_key="65/43/21/zxwister.zip",
+            sha1="654321",
+        )
+        ArchiveMember.objects.create(archive_sha1="654321", filename="zxwister.scr", file_size=6912)
+
+        with open(os.path.join(settings.FILEROOT, "mirror", "test_media", "rubber.zip"), "rb") as f:
+            s3_object = FakeS3Object(f.read())
+        bucket = Session.return_value.resource.return_value.Bucket.return_value
+        bucket.Object.return_value = s3_object
+
+        with captured_stdout() as stdout:
+            call_command("catalogue_archives")
+
+        bucket.Object.assert_called_once_with("ab/cd/ef/rubber.zip")
+        self.assertEqual(
+            list(ArchiveMember.objects.filter(archive_sha1="abcdef").values_list("filename", flat=True)),
+            ["16Kb-RUBBER.txt", "rubber.png"],
+        )
+        self.assertIn("done. 1 archives catalogued", stdout.getvalue())
+
+    @patch("boto3.Session")
+    def test_missing_object(self, Session):
+        Download.objects.create(
+            link_class="BaseUrl",
+            parameter="http://example.com/missing.zip",
+            downloaded_at=datetime.datetime(2020, 1, 1, 12, 0, 0),
+            mirror_s3_key="98/76/54/missing.zip",
+            sha1="987654",
+        )
+        Download.objects.create(
+            link_class="BaseUrl",
+            parameter="http://example.com/rubber.zip",
+            downloaded_at=datetime.datetime(2020, 1, 1, 12, 0, 0),
+            mirror_s3_key="ab/cd/ef/rubber.zip",
+            sha1="abcdef",
+        )
+
+        with open(os.path.join(settings.FILEROOT, "mirror", "test_media", "rubber.zip"), "rb") as f:
+            s3_object = FakeS3Object(f.read())
+        missing_object = FakeS3Object(b"")
+
+        def get_missing(Range):
+            raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not found"}}, "GetObject")
+
+        missing_object.content_length = 1000
+        missing_object.get = get_missing
+        bucket = Session.return_value.resource.return_value.Bucket.return_value
+        bucket.Object.side_effect = lambda key: missing_object if key == "98/76/54/missing.zip" else s3_object
+
+        with captured_stdout() as stdout:
+            call_command("catalogue_archives")
+
+        self.assertIn("98/76/54/missing.zip: could not read zip file", stdout.getvalue())
+        self.assertFalse(ArchiveMember.objects.filter(archive_sha1="987654").exists())
+        self.assertTrue(ArchiveMember.objects.filter(archive_sha1="abcdef").exists())
+        self.assertIn("done. 1 archives catalogued", stdout.getvalue())
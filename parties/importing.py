@@ -0,0 +1,158 @@
+"""
+Bulk import of competition results.
+
+Results files for large competitions can run to dozens of entries, each of which becomes a new
+production with a competition placing. Rather than building them one at a time through the model
+layer (with a separate nick lookup for every name in every byline), import_results resolves all
+the bylines in one batch (see productions.fields.byline_search.resolve_bylines) and writes the
+records with bulk_create.
+
+bulk_create does not send model signals, so the new records are announced with
+common.signals.bulk_saved instead, for the handlers to deal with the whole batch at once.
+"""
+
+import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+from common.signals import bulk_saved
+from common.utils.text import generate_search_title, generate_sort_key
+from demoscene.models import Edit
+from parties.models import CompetitionPlacing
+from productions.fields.byline_search import resolve_bylines
+from productions.models import Production
+
+
+PROGRESS_KEY = "parties:results-import:%s"
+PROGRESS_TIMEOUT = 86400
+
+
+def import_results(competition, rows, user):
+    """
+    Add a production and placing to the competition for each (ranking, title, byline, score) row in
+    rows, as returned by the parsers in parties.result_parser, skipping rows with no title. Returns
+    the list of new placings.
+    """
+    rows = [row for row in rows if row[1]]
+    if not rows:
+        return []
+
+    resolved_bylines = resolve_bylines(byline for ranking, title, byline, score in rows if byline)
+    supertype = competition.production_type.supertype if competition.production_type else "production"
+    now = datetime.datetime.now()
+
+    with transaction.atomic():
+        current_highest_position = CompetitionPlacing.objects.filter(competition=competition).aggregate(
+            Max("position")
+        )["position__max"]
+        next_position = (current_highest_position or 0) + 1
+
+        productions = []
+        for ranking, title, byline, score in rows:
+            production = Production(
+                release_date=competition.shown_date,
+                updated_at=now,
+                has_bonafide_edits=False,
+                title=title,
+                supertype=supertype,
+            )
+            # as performed by Production.save
+            production.title = production.title.strip()
+            production.search_title = generate_search_title(production.title)
+            production.sortable_title = generate_sort_key(production.title)
+            if byline and resolved_bylines[byline] is None:
+                production.unparsed_byline = byline
+            productions.append(production)
+        productions = Production.objects.bulk_create(productions)
+
+        platform_links = []
+        if competition.platform_id:
+            platform_links = Production.platforms.through.objects.bulk_create(
+                [
+                    Production.platforms.through(production_id=production.id, platform_id=competition.platform_id)
+                    for production in productions
+                ]
+            )
+        type_links = []
+        if competition.production_type_id:
+            type_links = Production.types.through.objects.bulk_create(
+                [
+                    Production.types.through(
+                        production_id=production.id, productiontype_id=competition.production_type_id
+                    )
+                    for production in productions
+                ]
+            )
+
+        author_nicks = []
+        affiliation_nicks = []
+        for production, (ranking, title, byline, score) in zip(productions, rows):
+            if byline and resolved_bylines[byline] is not None:
+                author_nick_ids, affiliation_nick_ids = resolved_bylines[byline]
+                author_nicks.extend(
+                    Production.author_nicks.through(production_id=production.id, nick_id=nick_id)
+                    for nick_id in author_nick_ids
+                )
+                affiliation_nicks.extend(
+                    Production.author_affiliation_nicks.through(production_id=production.id, nick_id=nick_id)
+                    for nick_id in affiliation_nick_ids
+                )
+        Production.author_nicks.through.objects.bulk_create(author_nicks, ignore_conflicts=True)
+        Production.author_affiliation_nicks.through.objects.bulk_create(affiliation_nicks, ignore_conflicts=True)
+
+        placings = CompetitionPlacing.objects.bulk_create(
+            [
+                CompetitionPlacing(
+                    production=production,
+                    competition=competition,
+                    ranking=ranking,
+                    position=next_position + i,
+                    score=score,
+                )
+                for i, (production, (ranking, title, byline, score)) in enumerate(zip(productions, rows))
+            ]
+        )
+
+        Edit.objects.bulk_create(
+            [
+                Edit(
+                    action_type="add_competition_placing",
+                    focus=competition,
+                    focus2=production,
+                    description=(
+                        "Added competition placing for %s in %s competition" % (production.title, competition)
+                    ),
+                    user=user,
+                )
+                for production in productions
+            ]
+        )
+
+        # productions go last, so that the handlers working out what displays them see their bylines and placings
+        for model, objects in [
+            (Production.platforms.through, platform_links),
+            (Production.types.through, type_links),
+            (Production.author_nicks.through, author_nicks),
+            (Production.author_affiliation_nicks.through, affiliation_nicks),
+            (CompetitionPlacing, placings),
+            (Production, productions),
+        ]:
+            if objects:
+                bulk_saved.send(sender=model, objects=objects)
+
+    return placings
+
+
+def set_progress(job_id, **progress):
+    cache.set(PROGRESS_KEY % job_id, progress, PROGRESS_TIMEOUT)
+
+
+def get_progress(job_id):
+    """
+    Return the progress of a background import (see parties.tasks.import_competition_results) as a dict
+    of competitions_done, competitions_total, placings_imported, finished and failed; or None if the job is
+    not known
+    """
+    return cache.get(PROGRESS_KEY % job_id)
@@ -16,7 +16,7 @@ from common.utils import groklinks
 from common.utils.files import random_path
 from common.utils.fuzzy_date import FuzzyDate
 from common.utils.text import generate_search_title, strip_markup
-from demoscene.models import DATE_PRECISION_CHOICES, ExternalLink, Releaser, TextFile
+from demoscene.models import DATE_PRECISION_CHOICES, ExternalLink, Nick, Releaser, TextFile
 from productions.models import Production, Screenshot
 
 
@@ -46,6 +46,9 @@ class PartySeries(URLMixin, models.Model):
     def active_external_links(self):
         return self.external_links.exclude(link_class__in=groklinks.ARCHIVED_LINK_TYPES)
 
+    def fragment_cache_dependents(self):
+        return [("parties.party", self.parties.values_list("id", flat=True))]
+
     class Meta:
         verbose_name_plural = "Party series"
         ordering = ("name",)
@@ -272,10 +275,28 @@ class Party(URLMixin, LocationMixin, Commentable):
             "C": self.asciified_location + " " + self.plaintext_notes,
         }
 
+    def fragment_cache_dependents(self):
+        # the party name appears on the pages of its releases, entries and organisers,
+        # and on the pages of the other parties in the series
+        production_ids = set(self.releases.values_list("id", flat=True))
+        production_ids.update(self.invitations.values_list("id", flat=True))
+        production_ids.update(
+            CompetitionPlacing.objects.filter(competition__party=self).values_list("production_id", flat=True)
+        )
+        return [
+            ("parties.party", [self.id]),
+            ("parties.party", Party.objects.filter(party_series_id=self.party_series_id).values_list("id", flat=True)),
+            ("productions.production", production_ids),
+            ("demoscene.releaser", self.organisers.values_list("releaser_id", flat=True)),
+        ]
+
     def get_competitions_with_prefetched_results(self, include_tags=False):
+        # fetch each placing with its production and representative screenshot, and each byline nick with its
+        # releaser, in single queries, so that the number of queries is the same however many results there are
+        nicks = Nick.objects.select_related("releaser").defer("releaser__notes")
         production_prefetch_fields = [
-            "production__author_nicks__releaser",
-            "production__author_affiliation_nicks__releaser",
+            Prefetch("production__author_nicks", queryset=nicks),
+            Prefetch("production__author_affiliation_nicks", queryset=nicks),
             "production__platforms",
             "production__types",
         ]
@@ -287,12 +308,9 @@ class Party(URLMixin, LocationMixin, Commentable):
                 "placings",
                 queryset=(
                     CompetitionPlacing.objects.order_by("position", "production_id")
+                    .select_related("production")
                     .prefetch_related(*production_prefetch_fields)
-                    .defer(
-                        "production__notes",
-                        "production__author_nicks__releaser__notes",
-                        "production__author_affiliation_nicks__releaser__notes",
-                    )
+                    .defer("production__notes")
                 ),
             )
         ).order_by("name", "id")
@@ -313,6 +331,9 @@ class Organiser(models.Model):
     def __str__(self):
         return "%s - %s at %s" % (self.releaser.name, self.role, self.party.name)
 
+    def fragment_cache_dependents(self):
+        return [("parties.party", [self.party_id]), ("demoscene.releaser", [self.releaser_id])]
+
 
 class PartyExternalLink(ExternalLink):
     party = models.ForeignKey(Party, related_name="external_links", on_delete=models.CASCADE)
@@ -322,6 +343,9 @@ class PartyExternalLink(ExternalLink):
     def subject(self):
         return self.party.name
 
+    def fragment_cache_dependents(self):
+        return [("parties.party", [self.party_id])]
+
     class Meta:
         unique_together = (("link_class", "parameter", "party"),)
         ordering = ["link_class"]
@@ -378,6 +402,12 @@ class Competition(URLMixin, models.Model):
     def get_absolute_url(self):
         return reverse("competition", args=[str(self.id)])
 
+    def fragment_cache_dependents(self):
+        return [
+            ("parties.party", [self.party_id]),
+            ("productions.production", self.placings.values_list("production_id", flat=True)),
+        ]
+
     class Meta:
         ordering = ("party__name", "name")
 
@@ -393,6 +423,10 @@ class CompetitionPlacing(models.Model):
 
     @property
     def json_data(self):
+        return self.get_json_data()
+
+    def get_json_data(self, nick_index=None):
+        # nick_index is passed on to BylineSearch, for building the data for many placings at once
         if self.production.is_stable_for_competitions():
             return {
                 "id": self.id,
@@ -409,7 +443,7 @@ class CompetitionPlacing(models.Model):
                 },
             }
         else:
-            byline_search = self.production.byline_search()
+            byline_search = self.production.byline_search(nick_index=nick_index)
             return {
                 "id": self.id,
                 "ranking": self.ranking,
@@ -436,7 +470,16 @@ class CompetitionPlacing(models.Model):
         except Production.DoesNotExist:  # pragma: no cover
             return "(CompetitionPlacing)"
 
+    def fragment_cache_dependents(self):
+        return [
+            ("parties.party", [self.competition.party_id]),
+            ("productions.production", [self.production_id]),
+        ]
+
 
 class ResultsFile(TextFile):
     party = models.ForeignKey(Party, related_name="results_files", on_delete=models.CASCADE)
     file = models.FileField(storage=FileSystemStorage(), upload_to="results", blank=True)
+
+    def fragment_cache_dependents(self):
+        return [("parties.party", [self.party_id])]
@@ -0,0 +1,50 @@
+from celery import shared_task
+from django.contrib.auth.models import User
+
+from parties.importing import import_results, set_progress
+from parties.models import Competition
+
+
+@shared_task(ignore_result=True)
+def import_competition_results(job_id, imports, user_id):
+    """
+    Import results into one or more competitions in the background, for imports too large to complete
+    within a request. imports is a list of (competition id, rows) pairs, where rows are as returned by
+    the parsers in parties.result_parser. Progress is recorded under the job id - see
+    parties.importing.get_progress.
+    """
+    competitions_done = 0
+    placings_imported = 0
+    set_progress(
+        job_id,
+        competitions_done=0,
+        competitions_total=len(imports),
+        placings_imported=0,
+        finished=False,
+        failed=False,
+    )
+    try:
+        user = User.objects.get(id=user_id)
+        for competition_id, rows in imports:
+            competition = Competition.objects.select_related("platform", "production_type").get(id=competition_id)
+            placings_imported += len(import_results(competition, rows, user))
+            competitions_done += 1
+            set_progress(
+                job_id,
+                competitions_done=competitions_done,
+                competitions_total=len(imports),
+                placings_imported=placings_imported,
+                finished=(competitions_done == len(imports)),
+                failed=False,
+            )
+    except Exception:
+        # leave the progress page showing the failure, rather than waiting forever
+        set_progress(
+            job_id,
+            competitions_done=competitions_done,
+            competitions_total=len(imports),
+            placings_imported=placings_imported,
+            finished=True,
+            failed=True,
+        )
+        raise
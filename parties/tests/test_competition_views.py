@@ -1,6 +1,9 @@
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
+from parties.importing import import_results
 from parties.models import Competition, Party
 from platforms.models import Platform
 from productions.models import Production, ProductionType
@@ -38,6 +41,23 @@ class TestEditCompetition(TestCase):
         response = self.client.get("/competitions/%d/edit/" % self.competition.id)
         self.assertEqual(response.status_code, 200)
 
+    def test_query_count_is_independent_of_size(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get("/competitions/%d/edit/" % self.competition.id)
+            self.assertEqual(response.status_code, 200)
+            return len(context.captured_queries)
+
+        user = User.objects.get(username="testuser")
+        import_results(
+            self.competition, [("1", "Artifice", "Gasman / Hooy-Program", ""), ("2", "Mathricks", "3SC", "")], user
+        )
+        small = count_queries()
+        import_results(
+            self.competition, [(str(i), "Prod %d" % i, "Yerzmyey + Gasman / Hooy-Program", "") for i in range(10)], user
+        )
+        self.assertEqual(count_queries(), small)
+
     def test_post(self):
         response = self.client.post(
             "/competitions/%d/edit/" % self.competition.id,
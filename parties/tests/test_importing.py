@@ -0,0 +1,212 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Change
+from demoscene.models import Edit, Nick, Releaser
+from parties.importing import get_progress, import_results
+from parties.models import Competition
+from parties.tasks import import_competition_results
+from platforms.models import Platform
+from productions.fields.byline_search import BylineSearch, get_nick_index, resolve_bylines
+from productions.models import ProductionType, ReleaserProduction
+from search.models import SearchPrefix
+
+
+class TestResolveBylines(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def test_matches_byline_search(self):
+        bylines = ["Gasman", "Gasman / Hooy-Program", "Gasman + Yerzmyey / Hooy-Program", "Papa Smurf", "Ra"]
+        resolved = resolve_bylines(bylines)
+        for byline in bylines:
+            byline_search = BylineSearch(byline)
+            if all(byline_search.author_nick_selections) and all(byline_search.affiliation_nick_selections):
+                expected = (
+                    [int(selection.id) for selection in byline_search.author_nick_selections],
+                    [int(selection.id) for selection in byline_search.affiliation_nick_selections],
+                )
+            else:
+                expected = None
+            self.assertEqual(resolved[byline], expected, byline)
+
+    def test_resolved_names(self):
+        resolved = resolve_bylines(["Gasman+Yerzmyey / Hooy-Program"])
+        gasman = Nick.objects.get(name="Gasman")
+        yerzmyey = Nick.objects.get(name="Yerzmyey")
+        hooy_program = Nick.objects.get(name="Hooy-Program")
+        self.assertEqual(resolved["Gasman+Yerzmyey / Hooy-Program"], ([gasman.id, yerzmyey.id], [hooy_program.id]))
+
+    def test_byline_search_with_nick_index(self):
+        bylines = ["Gasman", "Gasman + Yerzmyey", "Ra", "Papa Smurf"]
+        nick_index = get_nick_index(bylines)
+        for byline in bylines:
+            byline_search = BylineSearch(byline)
+            indexed_byline_search = BylineSearch(byline, nick_index=nick_index)
+            self.assertEqual(indexed_byline_search.author_matches_data, byline_search.author_matches_data)
+            self.assertEqual(indexed_byline_search.author_nick_selections, byline_search.author_nick_selections)
+
+    def test_query_count(self):
+        with self.assertNumQueries(2):
+            resolve_bylines(["Gasman / Hooy-Program", "Yerzmyey", "Papa Smurf", "Raww Arse"])
+
+
+class TestImportResults(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="testsuperuser", email="testsuperuser@example.com", password="12345"
+        )
+        self.competition = Competition.objects.get(party__name="Forever 2e3", name="ZX 1K Intro")
+        self.competition.placings.all().delete()
+        self.competition.platform = Platform.objects.get(name="ZX Spectrum")
+        self.competition.production_type = ProductionType.objects.get(name="1K Intro")
+        self.competition.save()
+
+    def test_import(self):
+        placings = import_results(
+            self.competition,
+            [("1", " Artifice ", "Gasman / Hooy-Program", "108"), ("2", "Madrielle", "SerzhSoft", "96")],
+            self.user,
+        )
+        self.assertEqual(len(placings), 2)
+
+        artifice = placings[0].production
+        artifice.refresh_from_db()
+        self.assertEqual(artifice.title, "Artifice")
+        self.assertEqual(artifice.sortable_title, "artifice")
+        self.assertEqual(artifice.supertype, "production")
+        self.assertEqual(artifice.byline_string, "Gasman / Hooy-Program")
+        self.assertIsNone(artifice.unparsed_byline)
+        self.assertEqual(artifice.platforms.get().name, "ZX Spectrum")
+        self.assertEqual(artifice.types.get().name, "1K Intro")
+        self.assertEqual(str(artifice.release_date), str(self.competition.shown_date))
+        self.assertTrue(
+            ReleaserProduction.objects.filter(
+                releaser=Releaser.objects.get(name="Gasman"), production=artifice, role="author"
+            ).exists()
+        )
+
+        madrielle = placings[1].production
+        madrielle.refresh_from_db()
+        self.assertEqual(madrielle.unparsed_byline, "SerzhSoft")
+        self.assertEqual(madrielle.author_nicks.count(), 0)
+
+        self.assertEqual([placing.position for placing in self.competition.placings.order_by("position")], [1, 2])
+        self.assertEqual(Edit.objects.filter(action_type="add_competition_placing").count(), 2)
+
+        # placings are appended after existing ones
+        placings = import_results(self.competition, [("3", "Mathricks", "3SC", "77")], self.user)
+        self.assertEqual(placings[0].position, 3)
+
+    def test_bulk_saved_handlers(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            placings = import_results(self.competition, [("1", "Artifice", "Gasman / Hooy-Program", "108")], self.user)
+        artifice = placings[0].production
+        gasman = Releaser.objects.get(name="Gasman")
+
+        changes = set(Change.objects.values_list("object_type", "object_id"))
+        self.assertIn(("production", artifice.id), changes)
+        self.assertIn(("releaser", gasman.id), changes)
+        self.assertIn(("party", self.competition.party_id), changes)
+        self.assertTrue(SearchPrefix.objects.filter(object_type="production", object_id=artifice.id).exists())
+
+    def test_query_count_is_independent_of_size(self):
+        def count_queries(rows):
+            with CaptureQueriesContext(connection) as context:
+                import_results(self.competition, rows, self.user)
+            return len(context.captured_queries)
+
+        # look up the content types for edits ahead of time
+        count_queries([("1", "Prod", "Gasman / Hooy-Program", "")])
+        small = count_queries([(str(i), "Prod %d" % i, "Gasman / Hooy-Program", "") for i in range(2)])
+        large = count_queries([(str(i), "Prod %d" % i, "Gasman / Hooy-Program", "") for i in range(20)])
+        self.assertEqual(small, large)
+
+    def test_skips_rows_without_title(self):
+        self.assertEqual(import_results(self.competition, [("1", "", "Gasman", "")], self.user), [])
+        self.assertEqual(self.competition.placings.count(), 0)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class TestBackgroundImport(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser(
+            username="testsuperuser", email="testsuperuser@example.com", password="12345"
+        )
+        self.competition = Competition.objects.get(party__name="Forever 2e3", name="ZX 1K Intro")
+        self.competition.placings.all().delete()
+
+    def test_task(self):
+        import_competition_results(
+            "abc123",
+            [(self.competition.id, [["1", "Artifice", "Gasman", "108"], ["2", "Madrielle", "", ""]])],
+            self.user.id,
+        )
+        self.assertEqual(self.competition.placings.count(), 2)
+        self.assertEqual(
+            get_progress("abc123"),
+            {
+                "competitions_done": 1,
+                "competitions_total": 1,
+                "placings_imported": 2,
+                "finished": True,
+                "failed": False,
+            },
+        )
+
+        self.client.login(username="testsuperuser", password="12345")
+        response = self.client.get("/competitions/import_progress/abc123/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["placings_imported"], 2)
+        response = self.client.get("/competitions/import_progress/xyz/")
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(COMPETITION_IMPORT_BACKGROUND_THRESHOLD=2)
+    @patch("parties.views.competitions.import_competition_results")
+    def test_large_import_runs_in_background(self, import_competition_results):
+        self.client.login(username="testsuperuser", password="12345")
+        response = self.client.post(
+            "/competitions/%d/import_text/" % self.competition.id,
+            {
+                "format": "tsv",
+                "results": "1\tArtifice\tSerzhSoft\t108\n2\tMadrielle\tGasman\t96\n3\tMathricks\t3SC\t77\n",
+            },
+        )
+        self.assertEqual(self.competition.placings.count(), 0)
+        self.assertTrue(import_competition_results.delay.called)
+        job_id, imports, user_id = import_competition_results.delay.call_args[0]
+        self.assertEqual(imports[0][0], self.competition.id)
+        self.assertEqual(len(imports[0][1]), 3)
+        self.assertEqual(user_id, self.user.id)
+
+        status_url = "/competitions/%d/import_status/%s/" % (self.competition.id, job_id)
+        self.assertRedirects(response, status_url)
+        response = self.client.get(status_url)
+        self.assertContains(response, "/competitions/import_progress/%s/" % job_id)
+        self.assertContains(response, "Importing results in the background")
+
+    def test_failed_task(self):
+        with self.assertRaises(Competition.DoesNotExist):
+            import_competition_results(
+                "abc123",
+                [(self.competition.id, [["1", "Artifice", "Gasman", "108"]]), (0, [["1", "Madrielle", "", ""]])],
+                self.user.id,
+            )
+        progress = get_progress("abc123")
+        self.assertTrue(progress["finished"])
+        self.assertTrue(progress["failed"])
+        self.assertEqual(progress["placings_imported"], 1)
+
+        self.client.login(username="testsuperuser", password="12345")
+        response = self.client.get("/competitions/%d/import_status/abc123/" % self.competition.id)
+        self.assertContains(response, "The import failed")
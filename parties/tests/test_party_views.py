@@ -79,6 +79,32 @@ class TestShowParty(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Gasman&#x27;s Shader Showdown entry on Shadertoy")
 
+    def test_query_count(self):
+        party = Party.objects.get(name="Forever 2e3")
+        gasman = Releaser.objects.get(name="Gasman").primary_nick
+        hooy_program = Releaser.objects.get(name="Hooy-Program").primary_nick
+        for i in range(30):
+            competition = party.competitions.create(name="Compo %d" % i)
+            for j in range(3):
+                production = Production.objects.create(title="Entry %d-%d" % (i, j), supertype="production")
+                production.author_nicks.add(gasman)
+                production.author_affiliation_nicks.add(hooy_program)
+                production.screenshots.create(
+                    original_url="http://example.com/%d-%d.png" % (i, j),
+                    thumbnail_url="http://example.com/%d-%d.thumb.png" % (i, j),
+                    thumbnail_width=130,
+                    thumbnail_height=100,
+                )
+                competition.placings.create(production=production, ranking=str(j + 1), position=j + 1)
+
+        # warm up the content type cache
+        self.client.get("/parties/%d/" % party.id)
+        with self.assertNumQueries(24):
+            response = self.client.get("/parties/%d/" % party.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Compo 29")
+        self.assertContains(response, "http://example.com/29-2.thumb.png")
+
     def test_organisers_panel(self):
         party = Party.objects.get(name="Revision 2011")
         response = self.client.get("/parties/%d/" % party.id)
@@ -81,6 +81,18 @@ urlpatterns = [
     path(
         "competitions/<int:competition_id>/import_text/", competition_views.import_text, {}, "competition_import_text"
     ),
+    path(
+        "competitions/<int:competition_id>/import_status/<str:job_id>/",
+        competition_views.import_status,
+        {},
+        "competition_import_status",
+    ),
+    path(
+        "competitions/import_progress/<str:job_id>/",
+        competition_views.import_progress,
+        {},
+        "competition_import_progress",
+    ),
     path(
         "competitions/<int:competition_id>/delete/",
         competition_views.DeleteCompetitionView.as_view(),
@@ -1,18 +1,22 @@
-import datetime
 import json
+import uuid
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Max
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
 from common.views import AjaxConfirmationView, writeable_site_required
 from demoscene.models import Edit
 from parties import result_parser
 from parties.forms import CompetitionForm
-from parties.models import Competition, CompetitionPlacing
+from parties.importing import get_progress, import_results, set_progress
+from parties.models import Competition
+from parties.tasks import import_competition_results
 from platforms.models import Platform
-from productions.models import Production, ProductionType, Screenshot
+from productions.fields.byline_search import get_nick_index
+from productions.models import ProductionType
 
 
 def show(request, competition_id):
@@ -20,6 +24,7 @@ def show(request, competition_id):
 
     placings = (
         competition.placings.order_by("position", "production__id")
+        .select_related("production")
         .prefetch_related("production__author_nicks__releaser", "production__author_affiliation_nicks__releaser")
         .defer(
             "production__notes",
@@ -27,9 +32,7 @@ def show(request, competition_id):
             "production__author_affiliation_nicks__releaser__notes",
         )
     )
-    entry_production_ids = [placing.production_id for placing in placings]
-    screenshot_map = Screenshot.select_for_production_ids(entry_production_ids)
-    placings = [(placing, screenshot_map.get(placing.production_id)) for placing in placings]
+    placings = [(placing, placing.production.representative_thumbnail) for placing in placings]
 
     return render(
         request,
@@ -74,9 +77,8 @@ def edit(request, competition_id):
             },
         )
 
-    competition_placings = [
-        placing.json_data
-        for placing in competition.results().prefetch_related(
+    placings = list(
+        competition.results().prefetch_related(
             "production",
             "production__author_nicks",
             "production__author_affiliation_nicks",
@@ -84,7 +86,12 @@ def edit(request, competition_id):
             "production__types",
             "production__competition_placings",
         )
-    ]
+    )
+    # look up the names in the bylines that need resolving all at once
+    nick_index = get_nick_index(
+        placing.production.byline_string for placing in placings if not placing.production.is_stable_for_competitions()
+    )
+    competition_placings = [placing.get_json_data(nick_index=nick_index) for placing in placings]
 
     competition_placings_json = json.dumps(competition_placings)
 
@@ -127,11 +134,6 @@ def import_text(request, competition_id):
     competition = get_object_or_404(Competition, id=competition_id)
 
     if request.POST:
-        current_highest_position = CompetitionPlacing.objects.filter(competition=competition).aggregate(
-            Max("position")
-        )["position__max"]
-        next_position = (current_highest_position or 0) + 1
-
         format = request.POST["format"]
         if format == "tsv":
             rows = result_parser.tsv(request.POST["results"])
@@ -144,47 +146,17 @@ def import_text(request, competition_id):
         else:
             return redirect("competition_edit", competition_id)
 
-        for placing, title, byline, score in rows:
-            if not title:
-                continue
-
-            production = Production(
-                release_date=competition.shown_date,
-                updated_at=datetime.datetime.now(),
-                has_bonafide_edits=False,
-                title=title,
-            )
-            production.save()  # assign an ID so that associations work
-
-            if competition.platform:
-                production.platforms.set([competition.platform])
-
-            if competition.production_type:
-                production.types.set([competition.production_type])
-
-            if byline:
-                production.byline_string = byline
-
-            production.supertype = production.inferred_supertype
-            production.save()
-
-            placing = CompetitionPlacing(
-                production=production,
-                competition=competition,
-                ranking=placing,
-                position=next_position,
-                score=score,
-            )
-            next_position += 1
-            placing.save()
-
-            Edit.objects.create(
-                action_type="add_competition_placing",
-                focus=competition,
-                focus2=production,
-                description=("Added competition placing for %s in %s competition" % (production.title, competition)),
-                user=request.user,
+        rows = [row for row in rows if row[1]]
+        if len(rows) > settings.COMPETITION_IMPORT_BACKGROUND_THRESHOLD:
+            job_id = uuid.uuid4().hex
+            # record the job as queued, so that the progress page has something to show until it starts
+            set_progress(
+                job_id, competitions_done=0, competitions_total=1, placings_imported=0, finished=False, failed=False
             )
+            import_competition_results.delay(job_id, [(competition.id, rows)], request.user.id)
+            return redirect("competition_import_status", competition_id, job_id)
+        else:
+            import_results(competition, rows, request.user)
 
         return redirect("competition_edit", competition_id)
     else:
@@ -197,6 +169,38 @@ def import_text(request, competition_id):
         )
 
 
+@login_required
+def import_status(request, competition_id, job_id):
+    if not request.user.is_staff:
+        return redirect("competition_edit", competition_id)
+
+    competition = get_object_or_404(Competition, id=competition_id)
+    progress = get_progress(job_id)
+    if progress is None:
+        raise Http404
+
+    return render(
+        request,
+        "competitions/import_status.html",
+        {
+            "competition": competition,
+            "job_id": job_id,
+            "progress": progress,
+        },
+    )
+
+
+@login_required
+def import_progress(request, job_id):
+    # polled for the progress of a background results import
+    if not request.user.is_staff:
+        raise Http404
+    progress = get_progress(job_id)
+    if progress is None:
+        raise Http404
+    return HttpResponse(json.dumps(progress), content_type="text/javascript")
+
+
 class DeleteCompetitionView(AjaxConfirmationView):
     html_title = "Deleting %s"
     message = "Are you sure you want to delete the %s competition?"
@@ -6,11 +6,13 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
+from django.db.models import Prefetch
 from django.db.models.functions import Lower
 from django.http import HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 from django.utils.html import format_html
 from django.utils.http import urlencode
 from django.views import View
@@ -19,7 +21,7 @@ from comments.forms import CommentForm
 from comments.models import Comment
 from common.utils.ajax import request_is_ajax
 from common.views import AjaxConfirmationView, EditingView, UpdateFormView, writeable_site_required
-from demoscene.models import Edit
+from demoscene.models import Edit, Nick
 from parties.forms import (
     CompetitionForm,
     EditPartyForm,
@@ -43,7 +45,6 @@ from parties.models import (
     PartySeriesExternalLink,
     ResultsFile,
 )
-from productions.models import Screenshot
 
 
 def by_name(request):
@@ -80,33 +81,56 @@ def by_date(request, year=None):
     )
 
 
-def show(request, party_id):
-    party = get_object_or_404(Party, id=party_id)
+def get_party_page_data(party):
+    """
+    Return the records shown on the party page, fetched with a fixed number of queries however large the
+    party is. Everything is evaluated lazily, so that it costs nothing when the template serves it from the
+    fragment cache.
+    """
 
-    competitions = party.get_competitions_with_prefetched_results()
-    competitions_with_placings = [(competition, competition.placings.all()) for competition in competitions]
-    entry_production_ids = [placing.production_id for _, placings in competitions_with_placings for placing in placings]
-    screenshot_map = Screenshot.select_for_production_ids(entry_production_ids)
-    competitions_with_placings_and_screenshots = [
-        (competition, [(placing, screenshot_map.get(placing.production_id)) for placing in placings])
-        for competition, placings in competitions_with_placings
+    def get_competitions_with_placings_and_screenshots():
+        return [
+            (
+                competition,
+                [(placing, placing.production.representative_thumbnail) for placing in competition.placings.all()],
+            )
+            for competition in party.get_competitions_with_prefetched_results()
+        ]
+
+    nicks = Nick.objects.select_related("releaser")
+    production_prefetch_fields = [
+        Prefetch("author_nicks", queryset=nicks),
+        Prefetch("author_affiliation_nicks", queryset=nicks),
+        "platforms",
+        "types",
     ]
 
-    invitations = party.invitations.order_by("release_date_date").prefetch_related(
-        "author_nicks__releaser", "author_affiliation_nicks__releaser", "platforms", "types"
-    )
-
-    releases = party.releases.prefetch_related(
-        "author_nicks__releaser", "author_affiliation_nicks__releaser", "platforms", "types"
-    )
-
-    organisers = party.organisers.select_related("releaser").order_by("-releaser__is_group", Lower("releaser__name"))
+    return {
+        "competitions_with_placings_and_screenshots": SimpleLazyObject(get_competitions_with_placings_and_screenshots),
+        "tournaments": party.tournaments.order_by("name").prefetch_related(
+            "external_links",
+            "phases__external_links",
+            "phases__entries__external_links",
+            Prefetch("phases__entries__nick", queryset=nicks),
+            Prefetch("phases__staff__nick", queryset=nicks),
+        ),
+        "results_files": party.results_files.all(),
+        "invitations": party.invitations.order_by("release_date_date").prefetch_related(*production_prefetch_fields),
+        "releases": party.releases.prefetch_related(*production_prefetch_fields),
+        "organisers": party.organisers.select_related("releaser").order_by(
+            "-releaser__is_group", Lower("releaser__name")
+        ),
+        "parties_in_series": SimpleLazyObject(
+            lambda: list(party.party_series.parties.order_by("start_date_date", "name").select_related("party_series"))
+        ),
+        "external_links": SimpleLazyObject(
+            lambda: sorted(party.active_external_links.select_related("party"), key=lambda obj: obj.sort_key)
+        ),
+    }
 
-    external_links = sorted(party.active_external_links.select_related("party"), key=lambda obj: obj.sort_key)
 
-    tournaments = party.tournaments.order_by("name").prefetch_related(
-        "phases__entries__nick__releaser", "phases__staff__nick__releaser"
-    )
+def show(request, party_id):
+    party = get_object_or_404(Party.objects.select_related("party_series"), id=party_id)
 
     if request.user.is_authenticated:
         comment = Comment(commentable=party, user=request.user)
@@ -119,17 +143,8 @@ def show(request, party_id):
         "parties/show.html",
         {
             "party": party,
-            "competitions_with_placings_and_screenshots": competitions_with_placings_and_screenshots,
-            "tournaments": tournaments,
-            "results_files": party.results_files.all(),
-            "invitations": invitations,
-            "releases": releases,
-            "organisers": organisers,
+            **get_party_page_data(party),
             "editing_organisers": (request.GET.get("editing") == "organisers"),
-            "parties_in_series": (
-                party.party_series.parties.order_by("start_date_date", "name").select_related("party_series")
-            ),
-            "external_links": external_links,
             "comment_form": comment_form,
             "prompt_to_edit": settings.SITE_IS_WRITEABLE,
             "can_edit": settings.SITE_IS_WRITEABLE and request.user.is_authenticated,
@@ -1,222 +1,514 @@
 import datetime
 import gzip
+import io
 import json
+import re
 import time
+from collections import defaultdict
+from contextlib import nullcontext
 
 import requests
 from django.core.management.base import BaseCommand
-
-from demoscene.models import Releaser
-from pouet.matching import automatch_productions, get_pouetable_prod_types
-from pouet.models import CompetitionType, Group, GroupMatchInfo, Party, Platform, Production, ProductionType
+from django.db import transaction
+
+from pouet.matching import automatch_all_productions
+from pouet.models import (
+    CompetitionPlacing,
+    CompetitionType,
+    DownloadLink,
+    Group,
+    GroupMatchInfo,
+    Party,
+    Platform,
+    Production,
+    ProductionType,
+)
+
+
+BATCH_SIZE = 1000
+
+# number of characters of decoded JSON to read from the dump at a time
+READ_SIZE = 64 * 1024
+
+PRODUCTION_UPDATE_FIELDS = [
+    "name",
+    "download_url",
+    "vote_up_count",
+    "vote_pig_count",
+    "vote_down_count",
+    "cdc_count",
+    "popularity",
+    "release_date_date",
+    "release_date_precision",
+    "last_seen_at",
+]
+
+WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(text_file, key, read_size=READ_SIZE):
+    """
+    Incrementally parse a JSON document of the form {..., "key": [item, item, ...], ...},
+    yielding each item of the named array in turn. Only one item (plus at most read_size
+    characters of lookahead) is held in memory at a time.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+
+    def read_more():
+        nonlocal buffer, eof
+        chunk = text_file.read(read_size)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
+
+    # find the opening bracket of the array
+    start_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    while True:
+        match = start_pattern.search(buffer)
+        if match:
+            buffer = buffer[match.end() :]
+            break
+        if eof:
+            raise ValueError("Array %r not found in JSON document" % key)
+        read_more()
+
+    pos = 0
+    while True:
+        # skip whitespace and separators between items
+        while True:
+            while pos < len(buffer) and buffer[pos] in WHITESPACE + ",":
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer = ""
+            pos = 0
+            read_more()
+
+        if pos >= len(buffer):
+            raise ValueError("Unexpected end of JSON document inside array %r" % key)
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # item is incomplete - discard the consumed part of the buffer and read further
+            buffer = buffer[pos:]
+            pos = 0
+            read_more()
+            continue
+
+        yield item
+        pos = end
+
+
+def iter_batches(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Profiler:
+    """
+    Accumulates elapsed time and row counts for each stage of the import
+    """
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.row_counts = defaultdict(int)
+        self.stages = []
+
+    def record(self, stage, duration, row_count):
+        if stage not in self.durations:
+            self.stages.append(stage)
+        self.durations[stage] += duration
+        self.row_counts[stage] += row_count
+
+    def stage(self, stage, row_count):
+        return ProfilerStage(self, stage, row_count)
+
+    def timed_iter(self, stage, items):
+        """Wrap an iterator so that the time spent producing each item is recorded against the given stage"""
+        items = iter(items)
+        while True:
+            start = time.monotonic()
+            try:
+                item = next(items)
+            except StopIteration:
+                self.record(stage, time.monotonic() - start, 0)
+                return
+            self.record(stage, time.monotonic() - start, 1)
+            yield item
+
+    def report(self):
+        lines = []
+        for stage in self.stages:
+            duration = self.durations[stage]
+            row_count = self.row_counts[stage]
+            rate = (row_count / duration) if duration else 0
+            lines.append("%s: %d rows in %.2fs (%.0f rows/s)" % (stage, row_count, duration, rate))
+        return lines
+
+
+class ProfilerStage:
+    def __init__(self, profiler, stage, row_count):
+        self.profiler = profiler
+        self.stage = stage
+        self.row_count = row_count
+
+    def __enter__(self):
+        self.start = time.monotonic()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.stage, time.monotonic() - self.start, self.row_count)
+
+
+def parse_release_date(release_date):
+    if not release_date:
+        return None, ""
+    y, m, d = release_date.split("-")
+    if m == "00":
+        return datetime.date(int(y), 1, 1), "y"
+    else:
+        return datetime.date(int(y), int(m), 1), "m"
+
+
+def parse_ranking(ranking):
+    try:
+        return int(ranking)
+    except TypeError:
+        return None
+
+
+def resolve_lookups(model, key_field, cache, wanted):
+    """
+    Given a dict of key => field defaults for a lookup model (Platform, Party etc), ensure that
+    a record exists for each key, and populate `cache` with a key => database ID mapping
+    """
+    missing = {key: defaults for key, defaults in wanted.items() if key not in cache}
+    if not missing:
+        return
+    model.objects.bulk_create(
+        [model(**{key_field: key}, **defaults) for key, defaults in missing.items()],
+        ignore_conflicts=True,
+    )
+    cache.update(model.objects.filter(**{"%s__in" % key_field: missing.keys()}).values_list(key_field, "id"))
+
+
+def sync_relations(model, production_ids, key_fields, wanted_keys):
+    """
+    Bring the rows of `model` belonging to the given production IDs into line with `wanted_keys`,
+    a set of tuples of (production_id, *key_fields). Rows that are already present are left
+    alone, unwanted rows are deleted and missing rows are created.
+    """
+    fields = ("production_id",) + tuple(key_fields)
+    unwanted_ids = []
+    existing_keys = set()
+    for row in model.objects.filter(production_id__in=production_ids).values_list("id", *fields):
+        key = row[1:]
+        if key in wanted_keys and key not in existing_keys:
+            existing_keys.add(key)
+        else:
+            unwanted_ids.append(row[0])
+
+    if unwanted_ids:
+        model.objects.filter(id__in=unwanted_ids).delete()
+    model.objects.bulk_create(
+        [model(**dict(zip(fields, key))) for key in wanted_keys - existing_keys], batch_size=BATCH_SIZE
+    )
 
 
 class Command(BaseCommand):
     help = "Import latest Pouet data dump from data.pouet.net"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE, help="Number of records to write to the database at once"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Run the import but roll back all changes afterwards, and skip automatching",
+        )
+        parser.add_argument(
+            "--profile", action="store_true", help="Report the processing rate of each stage of the import"
+        )
+
+    def fetch_dump(self, name):
+        url = "https://data.pouet.net/dumps/%s/pouetdatadump-%s-%s.json.gz" % (self.monthstamp, name, self.datestamp)
+        r = requests.get(url, stream=True)
+        return io.TextIOWrapper(gzip.GzipFile(fileobj=r.raw), encoding="utf-8")
+
     def handle(self, *args, **kwargs):
         verbose = kwargs["verbosity"] >= 1
+        self.batch_size = kwargs["batch_size"]
+        dry_run = kwargs["dry_run"]
+        self.profiler = Profiler()
+        self.now = datetime.datetime.now()
 
         # Dumps are published every Wednesday morning, so find out when last Wednesday was
         today = datetime.date.today()
         days_since_wednesday = (today.weekday() - 2) % 7
         wednesday = today - datetime.timedelta(days=days_since_wednesday)
-        datestamp = wednesday.strftime("%Y%m%d")
-        monthstamp = wednesday.strftime("%Y%m")
+        self.datestamp = wednesday.strftime("%Y%m%d")
+        self.monthstamp = wednesday.strftime("%Y%m")
+
+        # each batch is committed as it is written, except on a dry run where everything is rolled back at the end
+        with transaction.atomic() if dry_run else nullcontext():
+            if verbose:
+                print("importing groups...")
+            groups_imported, groups_created = self.import_groups(verbose)
+            if verbose:
+                print("done. %d groups imported, of which %d newly created" % (groups_imported, groups_created))
+
+            if verbose:
+                print("importing prods...")
+            prods_imported, prods_created = self.import_prods(verbose)
+            if verbose:
+                print("done. %d prods imported, of which %d newly created" % (prods_imported, prods_created))
+
+            if dry_run:
+                transaction.set_rollback(True)
+
+        if kwargs["profile"]:
+            for line in self.profiler.report():
+                print(line)
+
+        if dry_run:
+            if verbose:
+                print("dry run - all changes rolled back")
+            return
 
+        # garbage-collect productions / groups that haven't been seen for 30 days (i.e. have been deleted from Pouet)
+        last_month = datetime.datetime.now() - datetime.timedelta(days=30)
+        Production.objects.filter(last_seen_at__lt=last_month).delete()
+        Group.objects.filter(last_seen_at__lt=last_month).delete()
+
+        # garbage-collect GroupMatchInfo stats for releasers with no corresponding Pouet cross-link
+        GroupMatchInfo.objects.exclude(releaser__external_links__link_class="PouetGroup").delete()
+
+        if verbose:
+            print("automatching prods...")
+        match_counts = automatch_all_productions()
+        if kwargs["verbosity"] >= 2:
+            for releaser_id, (matched, unmatched_demozoo, unmatched_pouet) in match_counts.items():
+                print(
+                    "releaser %d: %d matched, %d unmatched on Demozoo, %d unmatched on Pouet"
+                    % (releaser_id, matched, unmatched_demozoo, unmatched_pouet)
+                )
         if verbose:
-            print("importing groups...")
-        groups_url = "https://data.pouet.net/dumps/%s/pouetdatadump-groups-%s.json.gz" % (monthstamp, datestamp)
-        r = requests.get(groups_url, stream=True)
-        groups_file = gzip.GzipFile(fileobj=r.raw)
+            print("done. %d releasers automatched" % len(match_counts))
 
+    def import_groups(self, verbose):
         groups_imported = 0
         groups_created = 0
 
-        group_db_ids = {}
-
-        def handle_group(group_data):
-            nonlocal groups_imported, groups_created
-            if "id" in group_data:
-                group, created = Group.objects.update_or_create(
-                    pouet_id=group_data["id"],
-                    defaults={
-                        "name": group_data["name"],
-                        "demozoo_id": group_data["demozoo"],
-                        "last_seen_at": datetime.datetime.now(),
-                    },
+        groups_file = self.fetch_dump("groups")
+        group_items = self.profiler.timed_iter("parse groups", iter_json_array(groups_file, "groups"))
+        for batch in iter_batches(group_items, self.batch_size):
+            batch = list({group_data["id"]: group_data for group_data in batch if "id" in group_data}.values())
+            groups = [
+                Group(
+                    pouet_id=int(group_data["id"]),
+                    name=group_data["name"],
+                    demozoo_id=group_data["demozoo"],
+                    last_seen_at=self.now,
+                )
+                for group_data in batch
+            ]
+            with self.profiler.stage("upsert groups", len(groups)), transaction.atomic():
+                existing_count = Group.objects.filter(pouet_id__in=[group.pouet_id for group in groups]).count()
+                Group.objects.bulk_create(
+                    groups,
+                    update_conflicts=True,
+                    unique_fields=["pouet_id"],
+                    update_fields=["name", "demozoo_id", "last_seen_at"],
                 )
-                group_db_ids[group_data["id"]] = group.id
-                groups_imported += 1
-                if groups_imported % 1000 == 0 and verbose:  # pragma: no cover
-                    print("%d groups imported" % groups_imported)
 
-                if created:
-                    groups_created += 1
+            groups_imported += len(groups)
+            groups_created += len(groups) - existing_count
+            if verbose:
+                print("%d groups imported" % groups_imported)
 
-        json.load(groups_file, object_hook=handle_group)
         groups_file.close()
-        if verbose:
-            print("done. %d groups imported, of which %d newly created" % (groups_imported, groups_created))
-
-        if verbose:
-            print("importing prods...")
-        prods_url = "https://data.pouet.net/dumps/%s/pouetdatadump-prods-%s.json.gz" % (monthstamp, datestamp)
-        r = requests.get(prods_url, stream=True)
-        prods_file = gzip.GzipFile(fileobj=r.raw)
+        return groups_imported, groups_created
 
+    def import_prods(self, verbose):
         prods_imported = 0
         prods_created = 0
 
-        platforms_by_id = {}
-        prod_types_by_name = {}
-        parties_by_id = {}
-        competition_types_by_id = {}
+        # lookup tables are small, so keep a key => database ID mapping for the whole run
+        self.platform_ids = {}
+        self.prod_type_ids = {}
+        self.party_ids = {}
+        self.competition_type_ids = {}
 
-        def handle_prod(prod_data):
-            nonlocal prods_imported, prods_created, group_db_ids
+        prods_file = self.fetch_dump("prods")
+        prod_items = self.profiler.timed_iter("parse prods", iter_json_array(prods_file, "prods"))
+        for batch in iter_batches(prod_items, self.batch_size):
             # prods JSON contains various nested objects, but only prod entries have a 'download' field
-            if "download" in prod_data:
-                if prod_data["releaseDate"]:
-                    y, m, d = prod_data["releaseDate"].split("-")
-                    if m == "00":
-                        release_date_date = datetime.date(int(y), 1, 1)
-                        release_date_precision = "y"
-                    else:
-                        release_date_date = datetime.date(int(y), int(m), 1)
-                        release_date_precision = "m"
-                else:
-                    release_date_date = None
-                    release_date_precision = ""
-
-                prod, prod_created = Production.objects.update_or_create(
-                    pouet_id=prod_data["id"],
-                    defaults={
-                        "name": prod_data["name"],
-                        "download_url": prod_data["download"],
-                        "vote_up_count": prod_data["voteup"],
-                        "vote_pig_count": prod_data["votepig"],
-                        "vote_down_count": prod_data["votedown"],
-                        "cdc_count": prod_data["cdc"],
-                        "popularity": prod_data["popularity"],
-                        "release_date_date": release_date_date,
-                        "release_date_precision": release_date_precision,
-                        "last_seen_at": datetime.datetime.now(),
-                    },
-                )
-                prod.groups.set([group_db_ids[group["id"]] for group in prod_data["groups"]])
-                if prod_created:
-                    unseen_download_link_ids = set()
-                    unseen_placings = set()
-                else:
-                    unseen_download_link_ids = set(prod.download_links.values_list("id", flat=True))
-                    unseen_placings = {
-                        (placing.party_id, placing.year, placing.competition_type_id, placing.ranking): placing.id
-                        for placing in prod.competition_placings.all()
-                    }
-
-                for link_data in prod_data["downloadLinks"]:
-                    link, created = prod.download_links.get_or_create(
-                        url=link_data["link"], link_type=link_data["type"]
+            # (a prod appearing twice in one batch would make the upsert fail, so keep only the last)
+            batch = list({prod_data["id"]: prod_data for prod_data in batch if "download" in prod_data}.values())
+            with transaction.atomic():
+                prods_created += self.import_prods_batch(batch)
+            prods_imported += len(batch)
+            if verbose:
+                print("%d prods imported" % prods_imported)
+
+        prods_file.close()
+        return prods_imported, prods_created
+
+    def import_prods_batch(self, batch):
+        """
+        Write a batch of prod records to the database, along with their relations.
+        Returns the number of newly-created prods
+        """
+        with self.profiler.stage("upsert prods", len(batch)):
+            prods = []
+            for prod_data in batch:
+                release_date_date, release_date_precision = parse_release_date(prod_data["releaseDate"])
+                prods.append(
+                    Production(
+                        pouet_id=int(prod_data["id"]),
+                        name=prod_data["name"],
+                        download_url=prod_data["download"],
+                        vote_up_count=prod_data["voteup"],
+                        vote_pig_count=prod_data["votepig"],
+                        vote_down_count=prod_data["votedown"],
+                        cdc_count=prod_data["cdc"],
+                        popularity=prod_data["popularity"],
+                        release_date_date=release_date_date,
+                        release_date_precision=release_date_precision,
+                        last_seen_at=self.now,
                     )
-                    if not created:
-                        unseen_download_link_ids.discard(link.id)
-
-                if unseen_download_link_ids:
-                    prod.download_links.filter(id__in=unseen_download_link_ids).delete()
-
-                platform_ids = []
-                for platform_id, platform_data in prod_data["platforms"].items():
-                    try:
-                        platform = platforms_by_id[platform_id]
-                    except KeyError:
-                        platform, created = Platform.objects.get_or_create(
-                            pouet_id=platform_id, defaults={"name": platform_data["name"]}
-                        )
-                        platforms_by_id[platform_id] = platform
-                    platform_ids.append(platform.id)
-                prod.platforms.set(platform_ids)
-
-                prod_type_ids = []
-                for type_name in prod_data["types"]:
-                    try:
-                        prod_type = prod_types_by_name[type_name]
-                    except KeyError:
-                        prod_type, created = ProductionType.objects.get_or_create(name=type_name)
-                        prod_types_by_name[type_name] = prod_type
-                    prod_type_ids.append(prod_type.id)
-                prod.types.set(prod_type_ids)
-
-                for placing_data in prod_data["placings"]:
-                    if placing_data["year"] is None:
-                        # bad data
-                        continue
-
-                    party_data = placing_data["party"]
-                    try:
-                        party = parties_by_id[party_data["id"]]
-                    except KeyError:
-                        party, created = Party.objects.get_or_create(
-                            pouet_id=party_data["id"], defaults={"name": party_data["name"]}
-                        )
-                        parties_by_id[party_data["id"]] = party
-
-                    if placing_data["compo"] is None:
-                        compo_type_id = None
-                    else:
-                        try:
-                            compo_type = competition_types_by_id[placing_data["compo"]]
-                        except KeyError:
-                            compo_type, created = CompetitionType.objects.get_or_create(
-                                pouet_id=placing_data["compo"], defaults={"name": placing_data["compo_name"]}
-                            )
-                            competition_types_by_id[placing_data["compo"]] = compo_type
-                        compo_type_id = compo_type.id
-
-                    placing, created = prod.competition_placings.get_or_create(
-                        party=party,
-                        year=placing_data["year"],
-                        competition_type_id=compo_type_id,
-                        ranking=placing_data["ranking"],
+                )
+            existing_count = Production.objects.filter(pouet_id__in=[prod.pouet_id for prod in prods]).count()
+            Production.objects.bulk_create(
+                prods, update_conflicts=True, unique_fields=["pouet_id"], update_fields=PRODUCTION_UPDATE_FIELDS
+            )
+            prod_ids = [prod.id for prod in prods]
+
+        with self.profiler.stage("resolve lookups", len(batch)):
+            group_pouet_ids = {int(group["id"]) for prod_data in batch for group in prod_data["groups"]}
+            group_ids = dict(Group.objects.filter(pouet_id__in=group_pouet_ids).values_list("pouet_id", "id"))
+
+            resolve_lookups(
+                Platform,
+                "pouet_id",
+                self.platform_ids,
+                {
+                    int(platform_id): {"name": platform_data["name"]}
+                    for prod_data in batch
+                    for platform_id, platform_data in prod_data["platforms"].items()
+                },
+            )
+            resolve_lookups(
+                ProductionType,
+                "name",
+                self.prod_type_ids,
+                {type_name: {} for prod_data in batch for type_name in prod_data["types"]},
+            )
+            placings = [
+                (prod, placing_data)
+                for prod, prod_data in zip(prods, batch)
+                for placing_data in prod_data["placings"]
+                # skip bad data
+                if placing_data["year"] is not None
+            ]
+            resolve_lookups(
+                Party,
+                "pouet_id",
+                self.party_ids,
+                {
+                    int(placing_data["party"]["id"]): {"name": placing_data["party"]["name"]}
+                    for prod, placing_data in placings
+                },
+            )
+            resolve_lookups(
+                CompetitionType,
+                "pouet_id",
+                self.competition_type_ids,
+                {
+                    int(placing_data["compo"]): {"name": placing_data["compo_name"]}
+                    for prod, placing_data in placings
+                    if placing_data["compo"] is not None
+                },
+            )
+
+        with self.profiler.stage("sync groups/platforms/types", len(batch)):
+            sync_relations(
+                Production.groups.through,
+                prod_ids,
+                ["group_id"],
+                {
+                    (prod.id, group_ids[int(group["id"])])
+                    for prod, prod_data in zip(prods, batch)
+                    for group in prod_data["groups"]
+                    if int(group["id"]) in group_ids
+                },
+            )
+            sync_relations(
+                Production.platforms.through,
+                prod_ids,
+                ["platform_id"],
+                {
+                    (prod.id, self.platform_ids[int(platform_id)])
+                    for prod, prod_data in zip(prods, batch)
+                    for platform_id in prod_data["platforms"]
+                },
+            )
+            sync_relations(
+                Production.types.through,
+                prod_ids,
+                ["productiontype_id"],
+                {
+                    (prod.id, self.prod_type_ids[type_name])
+                    for prod, prod_data in zip(prods, batch)
+                    for type_name in prod_data["types"]
+                },
+            )
+
+        with self.profiler.stage("sync download links", len(batch)):
+            sync_relations(
+                DownloadLink,
+                prod_ids,
+                ["url", "link_type"],
+                {
+                    (prod.id, link_data["link"], link_data["type"])
+                    for prod, prod_data in zip(prods, batch)
+                    for link_data in prod_data["downloadLinks"]
+                },
+            )
+
+        with self.profiler.stage("sync competition placings", len(batch)):
+            sync_relations(
+                CompetitionPlacing,
+                prod_ids,
+                ["party_id", "year", "competition_type_id", "ranking"],
+                {
+                    (
+                        prod.id,
+                        self.party_ids[int(placing_data["party"]["id"])],
+                        int(placing_data["year"]),
+                        (
+                            None
+                            if placing_data["compo"] is None
+                            else self.competition_type_ids[int(placing_data["compo"])]
+                        ),
+                        parse_ranking(placing_data["ranking"]),
                     )
-                    if not created:
-                        try:
-                            ranking = int(placing_data["ranking"])
-                        except TypeError:
-                            ranking = None
-                        record = (party.id, int(placing_data["year"]), compo_type_id, ranking)
-                        del unseen_placings[record]
-                    if unseen_placings:
-                        prod.competition_placings.filter(id__in=unseen_placings.values()).delete()
-
-                prods_imported += 1
-                if prods_imported % 1000 == 0 and verbose:  # pragma: no cover
-                    print("%d prods imported" % prods_imported)
-
-                if prod_created:
-                    prods_created += 1
-
-            return prod_data
-
-        json.load(prods_file, object_hook=handle_prod)
-        prods_file.close()
-        if verbose:
-            print("done. %d prods imported, of which %d newly created" % (prods_imported, prods_created))
-
-        # garbage-collect productions / groups that haven't been seen for 30 days (i.e. have been deleted from Pouet)
-        last_month = datetime.datetime.now() - datetime.timedelta(days=30)
-        Production.objects.filter(last_seen_at__lt=last_month).delete()
-        Group.objects.filter(last_seen_at__lt=last_month).delete()
-
-        # garbage-collect GroupMatchInfo stats for releasers with no corresponding Pouet cross-link
-        GroupMatchInfo.objects.exclude(releaser__external_links__link_class="PouetGroup").delete()
+                    for prod, placing_data in placings
+                },
+            )
 
-        if verbose:
-            print("automatching prods...")
-        pouetable_prod_types = get_pouetable_prod_types()
-        for i, releaser in enumerate(Releaser.objects.filter(external_links__link_class="PouetGroup").only("id")):
-            automatch_productions(releaser, pouetable_prod_types=pouetable_prod_types)
-            if i % 10 == 0 and i != 0:  # pragma: no cover
-                if verbose:
-                    print("%d releasers automatched" % i)
-                time.sleep(2)
+        return len(prods) - existing_count
@@ -3,9 +3,12 @@ from collections import defaultdict
 from django.db.models import Q
 from django.db.models.functions import Lower
 
+from common.utils.text import generate_search_title
+from demoscene.models import ReleaserExternalLink
 from pouet.models import GroupMatchInfo
 from pouet.models import Production as PouetProduction
-from productions.models import Production, ProductionLink, ProductionType
+from productions.links import create_production_links
+from productions.models import Production, ProductionLink, ProductionType, ReleaserProduction
 
 
 def get_pouetable_prod_types():
@@ -130,43 +133,177 @@ def get_match_data(releaser, pouetable_prod_types=None):
     return unmatched_demozoo_prods, unmatched_pouet_prods, matched_prods
 
 
+def match_by_title(demozoo_prods, pouet_prods):
+    """
+    Given lists of (id, normalised title) for unmatched Demozoo and Pouet prods, return a list of
+    (demozoo ID, pouet ID) pairs for the titles that occur exactly once on each side
+    """
+    # mapping of normalised prod title to a pair of lists of demozoo IDs and pouet IDs of
+    # prods with that name
+    prods_by_name = defaultdict(lambda: ([], []))
+
+    for id, title in demozoo_prods:
+        prods_by_name[title][0].append(id)
+
+    for id, title in pouet_prods:
+        prods_by_name[title][1].append(id)
+
+    return [
+        (demozoo_ids[0], pouet_ids[0])
+        for demozoo_ids, pouet_ids in prods_by_name.values()
+        if len(demozoo_ids) == 1 and len(pouet_ids) == 1
+    ]
+
+
 def automatch_productions(releaser, pouetable_prod_types=None):
     unmatched_demozoo_prods, unmatched_pouet_prods, matched_prods = get_match_data(
         releaser, pouetable_prod_types=pouetable_prod_types
     )
 
-    matched_production_count = len(matched_prods)
-    unmatched_demozoo_production_count = len(unmatched_demozoo_prods)
-    unmatched_pouet_production_count = len(unmatched_pouet_prods)
+    matches = match_by_title(
+        [(id, generate_search_title(title)) for id, title, url in unmatched_demozoo_prods],
+        [(id, generate_search_title(title)) for id, title, url in unmatched_pouet_prods],
+    )
+    for demozoo_id, pouet_id in matches:
+        ProductionLink.objects.create(
+            production_id=demozoo_id,
+            link_class="PouetProduction",
+            parameter=pouet_id,
+            is_download_link=False,
+            source="auto",
+        )
+
+    GroupMatchInfo.objects.update_or_create(
+        releaser_id=releaser.id,
+        defaults={
+            "matched_production_count": len(matched_prods) + len(matches),
+            "unmatched_demozoo_production_count": len(unmatched_demozoo_prods) - len(matches),
+            "unmatched_pouet_production_count": len(unmatched_pouet_prods) - len(matches),
+        },
+    )
+
 
-    # mapping of lowercased prod title to a pair of lists of demozoo IDs and pouet IDs of
-    # prods with that name
-    prods_by_name = defaultdict(lambda: ([], []))
+def automatch_all_productions(pouetable_prod_types=None):
+    """
+    Run automatch_productions for every releaser with a Pouet group link, in a single pass.
+
+    Rather than querying each releaser's prods in turn, the candidate prods for all releasers are loaded
+    up front into in-memory maps - Demozoo prods by releaser (from ReleaserProduction), Pouet prods by
+    group, and existing Pouet links by Demozoo ID and Pouet ID - and the new links are written with one
+    bulk_create. Releasers are processed in ID order, and links made for one releaser are counted as
+    existing ones for the next, so the outcome is the same as running automatch_productions on each.
 
-    for id, title, url in unmatched_demozoo_prods:
-        prods_by_name[title.lower()][0].append(id)
+    Returns a dict mapping releaser ID to a (matched, unmatched Demozoo, unmatched Pouet) tuple of
+    production counts, which are also saved as GroupMatchInfo records.
+    """
+    if pouetable_prod_types is None:
+        pouetable_prod_types = get_pouetable_prod_types()
+
+    pouet_group_links = ReleaserExternalLink.objects.filter(link_class="PouetGroup")
+    pouet_group_ids_by_releaser_id = defaultdict(set)
+    for releaser_id, parameter in pouet_group_links.values_list("releaser_id", "parameter"):
+        pouet_group_ids_by_releaser_id[releaser_id].add(int(parameter))
+
+    # Demozoo prods as a mapping of ID to normalised title, by releaser ID
+    demozoo_prods_by_releaser_id = defaultdict(dict)
+    for releaser_id, production_id, search_title in (
+        ReleaserProduction.objects.filter(
+            releaser_id__in=pouet_group_links.values("releaser_id"),
+            role__in=["author", "affiliation"],
+            production__types__in=pouetable_prod_types,
+        )
+        .values_list("releaser_id", "production_id", "production__search_title")
+        .distinct()
+    ):
+        demozoo_prods_by_releaser_id[releaser_id][production_id] = search_title
+
+    # normalised titles of Pouet prods by ID, and Pouet prod IDs by Pouet group ID
+    pouet_titles = {
+        pouet_id: generate_search_title(name)
+        for pouet_id, name in PouetProduction.objects.values_list("pouet_id", "name")
+    }
+    pouet_prod_ids_by_group_id = defaultdict(set)
+    for group_id, pouet_id in PouetProduction.groups.through.objects.values_list(
+        "group__pouet_id", "production__pouet_id"
+    ):
+        pouet_prod_ids_by_group_id[group_id].add(pouet_id)
+
+    # existing links, as sets of link IDs by Demozoo ID and Pouet ID
+    link_ids_by_production_id = defaultdict(set)
+    link_ids_by_pouet_id = defaultdict(set)
+    for link_id, production_id, parameter in ProductionLink.objects.filter(link_class="PouetProduction").values_list(
+        "id", "production_id", "parameter"
+    ):
+        link_ids_by_production_id[production_id].add(link_id)
+        link_ids_by_pouet_id[parameter].add(link_id)
+
+    new_links = []
+    match_counts = {}
+    for releaser_id in sorted(pouet_group_ids_by_releaser_id):
+        demozoo_prods = demozoo_prods_by_releaser_id[releaser_id]
+        pouet_prod_ids = set()
+        for group_id in pouet_group_ids_by_releaser_id[releaser_id]:
+            pouet_prod_ids.update(pouet_prod_ids_by_group_id.get(group_id, ()))
+
+        matched_link_ids = set()
+        for production_id in demozoo_prods:
+            matched_link_ids.update(link_ids_by_production_id.get(production_id, ()))
+        for pouet_id in pouet_prod_ids:
+            matched_link_ids.update(link_ids_by_pouet_id.get(str(pouet_id), ()))
 
-    for id, title, url in unmatched_pouet_prods:
-        prods_by_name[title.lower()][1].append(id)
+        unmatched_demozoo_prods = [
+            (production_id, title)
+            for production_id, title in demozoo_prods.items()
+            if not link_ids_by_production_id.get(production_id)
+        ]
+        unmatched_pouet_prods = [
+            (pouet_id, pouet_titles[pouet_id])
+            for pouet_id in pouet_prod_ids
+            if not link_ids_by_pouet_id.get(str(pouet_id))
+        ]
 
-    for title, (demozoo_ids, pouet_ids) in prods_by_name.items():
-        if len(demozoo_ids) == 1 and len(pouet_ids) == 1:
-            ProductionLink.objects.create(
-                production_id=demozoo_ids[0],
-                link_class="PouetProduction",
-                parameter=pouet_ids[0],
-                is_download_link=False,
-                source="auto",
+        matches = match_by_title(unmatched_demozoo_prods, unmatched_pouet_prods)
+        for demozoo_id, pouet_id in matches:
+            new_links.append(
+                ProductionLink(
+                    production_id=demozoo_id,
+                    link_class="PouetProduction",
+                    parameter=str(pouet_id),
+                    is_download_link=False,
+                    source="auto",
+                )
             )
-            matched_production_count += 1
-            unmatched_demozoo_production_count -= 1
-            unmatched_pouet_production_count -= 1
+            # new links have no ID yet, so are identified by the IDs they link
+            link_id = ("new", demozoo_id, pouet_id)
+            link_ids_by_production_id[demozoo_id].add(link_id)
+            link_ids_by_pouet_id[str(pouet_id)].add(link_id)
 
-    GroupMatchInfo.objects.update_or_create(
-        releaser_id=releaser.id,
-        defaults={
-            "matched_production_count": matched_production_count,
-            "unmatched_demozoo_production_count": unmatched_demozoo_production_count,
-            "unmatched_pouet_production_count": unmatched_pouet_production_count,
-        },
+        match_counts[releaser_id] = (
+            len(matched_link_ids) + len(matches),
+            len(unmatched_demozoo_prods) - len(matches),
+            len(unmatched_pouet_prods) - len(matches),
+        )
+
+    create_production_links(new_links)
+
+    GroupMatchInfo.objects.bulk_create(
+        [
+            GroupMatchInfo(
+                releaser_id=releaser_id,
+                matched_production_count=matched,
+                unmatched_demozoo_production_count=unmatched_demozoo,
+                unmatched_pouet_production_count=unmatched_pouet,
+            )
+            for releaser_id, (matched, unmatched_demozoo, unmatched_pouet) in match_counts.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["releaser"],
+        update_fields=[
+            "matched_production_count",
+            "unmatched_demozoo_production_count",
+            "unmatched_pouet_production_count",
+        ],
     )
+
+    return match_counts
@@ -7,7 +7,7 @@ from celery import shared_task
 from django.conf import settings
 
 from demoscene.models import Releaser, ReleaserExternalLink
-from pouet.matching import automatch_productions
+from pouet.matching import automatch_all_productions, automatch_productions
 from pouet.models import Group, Production
 
 
@@ -90,10 +90,8 @@ def automatch_all_groups():
     Production.objects.filter(last_seen_at__lt=last_month).delete()
     Group.objects.filter(last_seen_at__lt=last_month).delete()
 
-    for releaser_id in ReleaserExternalLink.objects.filter(link_class="PouetGroup").values_list(
-        "releaser_id", flat=True
-    ):
-        automatch_group.delay(releaser_id)
+    match_counts = automatch_all_productions()
+    logger.info("automatched productions for %d groups" % len(match_counts))
 
 
 @shared_task(rate_limit="6/m", ignore_result=True)
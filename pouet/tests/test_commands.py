@@ -1,4 +1,5 @@
 import gzip
+import io
 import json
 
 import responses
@@ -8,6 +9,7 @@ from django.test.utils import captured_stdout
 from freezegun import freeze_time
 
 from demoscene.models import Releaser
+from pouet.management.commands.fetch_pouet_data import iter_json_array
 from pouet.models import CompetitionType, Group, GroupMatchInfo, Party
 from pouet.models import Production as PouetProduction
 from productions.models import Production, ProductionType
@@ -123,13 +125,11 @@ class TestFetchPouetData(TestCase):
             body=group_gzdata,
         )
 
-    def add_prods_response(self, prod):
+    def add_prods_response(self, *prods):
         prod_json = json.dumps(
             {
                 "dump_date": "2021-10-27 04:30:01",
-                "prods": [
-                    prod,
-                ],
+                "prods": list(prods),
             }
         )
         prod_gzdata = gzip.compress(prod_json.encode("utf-8"))
@@ -300,3 +300,49 @@ class TestFetchPouetData(TestCase):
         astral_blur_pouet.refresh_from_db()
         self.assertEqual(astral_blur_pouet.competition_placings.count(), 1)
         self.assertIsNone(astral_blur_pouet.competition_placings.first().ranking)
+
+    @responses.activate
+    def test_run_in_batches(self):
+        self.add_groups_response()
+        SECOND_REALITY = ASTRAL_BLUR.copy()
+        SECOND_REALITY.update(id="2", name="Second Reality", downloadLinks=[], placings=[])
+        self.add_prods_response(ASTRAL_BLUR, SECOND_REALITY)
+
+        with captured_stdout():
+            call_command("fetch_pouet_data", batch_size=1)
+
+        self.assertEqual(PouetProduction.objects.count(), 2)
+        second_reality = PouetProduction.objects.get(name="Second Reality")
+        self.assertEqual(second_reality.groups.get().name, "The Black Lotus")
+        self.assertEqual(second_reality.platforms.get().name, "MS-Dos")
+        self.assertEqual(second_reality.download_links.count(), 0)
+        astral_blur = PouetProduction.objects.get(name="Astral Blur")
+        self.assertEqual(astral_blur.competition_placings.get().party.name, "The Gathering")
+
+    @responses.activate
+    def test_dry_run(self):
+        self.add_groups_response()
+        self.add_prods_response(ASTRAL_BLUR)
+
+        with captured_stdout() as stdout:
+            call_command("fetch_pouet_data", dry_run=True, profile=True)
+
+        self.assertFalse(Group.objects.exists())
+        self.assertFalse(PouetProduction.objects.exists())
+        self.assertIn("upsert prods: 1 rows", stdout.getvalue())
+        self.assertIn("dry run - all changes rolled back", stdout.getvalue())
+
+
+class TestIterJsonArray(TestCase):
+    def test_iter_json_array(self):
+        data = {
+            "dump_date": "2021-10-27 04:30:01",
+            "prods": [{"id": str(i), "name": 'tricky ],{" name'} for i in range(20)],
+        }
+        text_file = io.StringIO(json.dumps(data, indent=2))
+        # read in tiny chunks to exercise items straddling chunk boundaries
+        self.assertEqual(list(iter_json_array(text_file, "prods", read_size=3)), data["prods"])
+
+    def test_missing_array(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO('{"groups": []}'), "prods"))
@@ -4,25 +4,61 @@ from django.test import TestCase
 from freezegun import freeze_time
 
 from demoscene.models import Releaser
+from pouet.matching import automatch_productions
 from pouet.models import Group as PouetGroup
+from pouet.models import GroupMatchInfo
 from pouet.models import Production as PouetProduction
 from pouet.tasks import automatch_all_groups, automatch_group, pull_group, pull_groups
-from productions.models import Production
+from productions.models import Production, ProductionLink
 
 
 @freeze_time("2020-01-15")
 class TestTasks(TestCase):
     fixtures = ["tests/gasman.json", "tests/pouet.json"]
 
-    @patch("pouet.tasks.automatch_group")
-    def test_automatch_all_groups(self, automatch_group):
+    def test_automatch_all_groups(self):
         hprg = Releaser.objects.get(name="Hooy-Program")
         hprg.external_links.create(link_class="PouetGroup", parameter="1218")
 
         automatch_all_groups()
-        self.assertEqual(automatch_group.delay.call_count, 1)
-        (releaser_id,) = automatch_group.delay.call_args.args
-        self.assertEqual(releaser_id, hprg.id)
+        pondlife = Production.objects.get(title="Pondlife")
+        link = pondlife.links.get(link_class="PouetProduction")
+        self.assertEqual(link.parameter, "2611")
+        self.assertEqual(link.source, "auto")
+        self.assertFalse(link.is_download_link)
+        self.assertEqual(GroupMatchInfo.objects.get(releaser=hprg).matched_production_count, 1)
+
+    def test_automatch_all_groups_matches_automatch_group(self):
+        def get_results():
+            return (
+                set(
+                    ProductionLink.objects.filter(link_class="PouetProduction").values_list(
+                        "production_id", "parameter"
+                    )
+                ),
+                set(
+                    GroupMatchInfo.objects.values_list(
+                        "releaser_id",
+                        "matched_production_count",
+                        "unmatched_demozoo_production_count",
+                        "unmatched_pouet_production_count",
+                    )
+                ),
+            )
+
+        hprg = Releaser.objects.get(name="Hooy-Program")
+        hprg.external_links.create(link_class="PouetGroup", parameter="1218")
+        gasman = Releaser.objects.get(name="Gasman")
+        gasman.external_links.create(link_class="PouetGroup", parameter="1218")
+
+        automatch_all_groups()
+        bulk_results = get_results()
+
+        ProductionLink.objects.filter(link_class="PouetProduction").delete()
+        GroupMatchInfo.objects.all().delete()
+        for releaser in sorted([hprg, gasman], key=lambda releaser: releaser.id):
+            automatch_productions(releaser)
+        self.assertEqual(get_results(), bulk_results)
 
     def test_automatch_group(self):
         hprg = Releaser.objects.get(name="Hooy-Program")
@@ -1,51 +1,119 @@
+import itertools
 import re
 
+from demoscene.autocomplete import NameIndex
 from demoscene.fields import NickSearch, NickSelection
 from demoscene.models import NickVariant
 
 
+def split_byline(byline):
+    """Split a byline string into lists of author names and affiliation names"""
+    parts = byline.split("/")
+    authors_string = parts[0]  # everything before first slash is an author
+    affiliations_string = "^".join(parts[1:])  # everything after first slash is an affiliation
+
+    # split on separators that have a trailing (and optionally leading) space
+    author_names = re.split(r"\s*[\,\+\^\&]\s+", authors_string)
+    author_names = [name.lstrip() for name in author_names if name.strip()]
+    affiliation_names = re.split(r"\s*[\,\+\^\&]\s+", affiliations_string)
+    affiliation_names = [name.lstrip() for name in affiliation_names if name.strip()]
+    return author_names, affiliation_names
+
+
+def split_compound_name(name):
+    return [subname.lstrip() for subname in re.split(r"[\,\+\^\&]", name) if subname.lstrip()]
+
+
+def vet_names(names, name_exists):
+    """
+    For any name with an internal separator character, check whether that name exists (as determined
+    by the name_exists function) and if not, split it
+    """
+    vetted_names = []
+    for name in names:
+        if re.search(r"[\,\+\^\&]", name) and not name_exists(name.strip()):
+            vetted_names.extend(split_compound_name(name))
+        else:
+            vetted_names.append(name)
+    return vetted_names
+
+
+def vet_byline_names(byline, name_exists):
+    """
+    Split a byline string into author names and affiliation names, splitting any compound names that
+    do not exist according to name_exists(name, groups_only)
+    """
+    author_names, affiliation_names = split_byline(byline)
+    author_names = [name.strip() for name in vet_names(author_names, name_exists)]
+    affiliation_names = [
+        name.strip() for name in vet_names(affiliation_names, lambda name: name_exists(name, groups_only=True))
+    ]
+    return author_names, affiliation_names
+
+
+def get_nick_index(bylines):
+    """
+    Return a NameIndex of the nick variants matching any of the names in the given byline strings, for
+    resolving them all (with resolve_bylines, or by passing it to BylineSearch) with a fixed number of queries
+    """
+    names = set()
+    for byline in bylines:
+        for name in itertools.chain(*split_byline(byline)):
+            names.add(name.strip())
+            names.update(subname.strip() for subname in split_compound_name(name))
+    return NameIndex(names)
+
+
+def resolve_bylines(bylines):
+    """
+    Resolve a batch of byline strings to nicks, selecting nicks as BylineSearch does. Returns a dict mapping
+    each byline to a tuple of (author nick ids, affiliation nick ids), or None if any of its names could not
+    be resolved to a single nick.
+    """
+    bylines = set(bylines)
+    nick_index = get_nick_index(bylines)
+
+    results = {}
+    for byline in bylines:
+        author_names, affiliation_names = vet_byline_names(byline, nick_index.has_name)
+        author_nick_ids = [nick_index.select(name, group_names=affiliation_names) for name in author_names]
+        affiliation_nick_ids = [
+            nick_index.select(name, groups_only=True, member_names=author_names) for name in affiliation_names
+        ]
+        if None in author_nick_ids or None in affiliation_nick_ids:
+            results[byline] = None
+        else:
+            results[byline] = (author_nick_ids, affiliation_nick_ids)
+    return results
+
+
+def name_exists(name, groups_only=False):
+    nick_variants = NickVariant.objects.filter(name__iexact=name)
+    if groups_only:
+        nick_variants = nick_variants.filter(nick__releaser__is_group=True)
+    return nick_variants.exists()
+
+
 class BylineSearch:
-    def __init__(self, search_term, author_nick_selections=[], affiliation_nick_selections=[], autocomplete=False):
+    def __init__(
+        self,
+        search_term,
+        author_nick_selections=[],
+        affiliation_nick_selections=[],
+        autocomplete=False,
+        nick_index=None,
+    ):
+        # nick_index, if given, is a NameIndex holding the names in the search term (see get_nick_index),
+        # to look them up in rather than querying the database for each one
         self.search_term = search_term
 
-        # parse the byline
-        parts = self.search_term.split("/")
-        authors_string = parts[0]  # everything before first slash is an author
-        affiliations_string = "^".join(parts[1:])  # everything after first slash is an affiliation
-
-        # split on separators that have a trailing (and optionally leading) space
-        author_names = re.split(r"\s*[\,\+\^\&]\s+", authors_string)
-        author_names = [name.lstrip() for name in author_names if name.strip()]
-        affiliation_names = re.split(r"\s*[\,\+\^\&]\s+", affiliations_string)
-        affiliation_names = [name.lstrip() for name in affiliation_names if name.strip()]
-
-        # Now, for any item in author_names or affiliation_names with an internal separator character,
-        # perform a pre-check for that name. If not present, split it and move on.
-        vetted_author_names = []
-        for name in author_names:
-            if re.search(r"[\,\+\^\&]", name) and not NickVariant.objects.filter(name__iexact=name.strip()).exists():
-                for subname in re.split(r"[\,\+\^\&]", name):
-                    subname = subname.lstrip()
-                    if subname:
-                        vetted_author_names.append(subname)
-            else:
-                vetted_author_names.append(name)
-
-        vetted_affiliation_names = []
-        for name in affiliation_names:
-            if (
-                re.search(r"[\,\+\^\&]", name)
-                and not NickVariant.objects.filter(name__iexact=name.strip(), nick__releaser__is_group=True).exists()
-            ):
-                for subname in re.split(r"[\,\+\^\&]", name):
-                    subname = subname.lstrip()
-                    if subname:
-                        vetted_affiliation_names.append(subname)
-            else:
-                vetted_affiliation_names.append(name)
-
-        author_names = vetted_author_names
-        affiliation_names = vetted_affiliation_names
+        author_names, affiliation_names = split_byline(self.search_term)
+        if nick_index is None:
+            author_names = vet_names(author_names, name_exists)
+            affiliation_names = vet_names(affiliation_names, lambda name: name_exists(name, groups_only=True))
+        else:
+            author_names = vet_names(author_names, nick_index.has_name)
+            affiliation_names = vet_names(affiliation_names, lambda name: nick_index.has_name(name, groups_only=True))
 
         # attempt to autocomplete the last element of the name,
         # if autocomplete flag is True and search term has no trailing ,+^/& separator
@@ -71,7 +139,9 @@ class BylineSearch:
                 selection = author_nick_selections[i]
             except IndexError:
                 selection = None
-            self.author_nick_searches.append(NickSearch(author_name, selection, group_names=affiliation_names))
+            self.author_nick_searches.append(
+                NickSearch(author_name, selection, group_names=affiliation_names, nick_index=nick_index)
+            )
 
         self.affiliation_nick_searches = []
         for i, affiliation_name in enumerate(affiliation_names):
@@ -80,7 +150,9 @@ class BylineSearch:
             except IndexError:
                 selection = None
             self.affiliation_nick_searches.append(
-                NickSearch(affiliation_name, selection, groups_only=True, member_names=author_names)
+                NickSearch(
+                    affiliation_name, selection, groups_only=True, member_names=author_names, nick_index=nick_index
+                )
             )
 
         self.author_nick_selections = [nick_search.selection for nick_search in self.author_nick_searches]
@@ -95,9 +167,10 @@ class BylineSearch:
         return [nick_search.match_data for nick_search in self.affiliation_nick_searches]
 
     @staticmethod
-    def from_byline(byline):
+    def from_byline(byline, nick_index=None):
         return BylineSearch(
             search_term=str(byline),
             author_nick_selections=[NickSelection(nick.id, nick.name) for nick in byline.author_nicks],
             affiliation_nick_selections=[NickSelection(nick.id, nick.name) for nick in byline.affiliation_nicks],
+            nick_index=nick_index,
         )
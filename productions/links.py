@@ -0,0 +1,15 @@
+from common.signals import bulk_saved
+from productions.models import ProductionLink
+
+
+def create_production_links(links):
+    """
+    Save a batch of new ProductionLink records with bulk_create, skipping any that already exist, and
+    announce them with common.signals.bulk_saved in place of the model signals. Links are created as
+    given, so is_download_link must already be set to suit the link class (as ProductionLink.save would do).
+    """
+    if not links:
+        return
+
+    ProductionLink.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+    bulk_saved.send(sender=ProductionLink, objects=links)
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from common.utils import groklinks
+from productions.models import ProductionLink
+
+
+class Command(BaseCommand):
+    """
+    Grok the URL of every production link using both the indexed and linear link recognition,
+    and report the time taken by each along with any links where the two disagree
+    """
+
+    def handle(self, *args, **kwargs):
+        link_types = ProductionLink.link_types
+
+        urls = [
+            str(groklinks.__dict__[link_class](parameter))
+            for link_class, parameter in ProductionLink.objects.values_list("link_class", "parameter").iterator()
+        ]
+
+        start_time = time.perf_counter()
+        linear_results = [groklinks.grok_link_by_types_linear(url, link_types) for url in urls]
+        linear_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        indexed_results = [groklinks.grok_link_by_types(url, link_types) for url in urls]
+        indexed_time = time.perf_counter() - start_time
+
+        mismatch_count = 0
+        for url, linear_link, indexed_link in zip(urls, linear_results, indexed_results):
+            linear_key = (linear_link.__class__.__name__, linear_link.param) if linear_link else None
+            indexed_key = (indexed_link.__class__.__name__, indexed_link.param) if indexed_link else None
+            if linear_key != indexed_key:
+                mismatch_count += 1
+                print("Mismatch for %s: linear gave %r, indexed gave %r" % (url, linear_key, indexed_key))
+
+        print("Grokked %d links" % len(urls))
+        print("Linear scan: %.3fs" % linear_time)
+        print("Indexed: %.3fs" % indexed_time)
+        print("Mismatches: %d" % mismatch_count)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from demoscene.models import Releaser
+from productions.models import ReleaserProduction
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the ReleaserProduction table from author nicks, affiliation nicks, credits and memberships.
+    Releasers are processed in batches, and only the rows that differ are written, so this is safe to
+    run on a live database.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Number of releasers to process in each transaction"
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs["batch_size"]
+        releaser_ids = list(Releaser.objects.order_by("id").values_list("id", flat=True))
+        row_count_before = ReleaserProduction.objects.count()
+
+        for i in range(0, len(releaser_ids), batch_size):
+            with transaction.atomic():
+                ReleaserProduction.refresh_for_releasers(releaser_ids[i : i + batch_size])
+            print("processed %d of %d releasers" % (min(i + batch_size, len(releaser_ids)), len(releaser_ids)))
+
+        print("%d rows before, %d rows after" % (row_count_before, ReleaserProduction.objects.count()))
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# initial population; subsequently maintained by signals, and rebuildable with
+# ./manage.py rebuild_releaser_productions
+POPULATE_SQL = [
+    """
+        INSERT INTO productions_releaserproduction (releaser_id, production_id, role)
+        SELECT DISTINCT demoscene_nick.releaser_id, author_nick.production_id, 'author'
+        FROM productions_production_author_nicks AS author_nick
+        INNER JOIN demoscene_nick ON (author_nick.nick_id = demoscene_nick.id)
+    """,
+    """
+        INSERT INTO productions_releaserproduction (releaser_id, production_id, role)
+        SELECT DISTINCT demoscene_nick.releaser_id, affiliation_nick.production_id, 'affiliation'
+        FROM productions_production_author_affiliation_nicks AS affiliation_nick
+        INNER JOIN demoscene_nick ON (affiliation_nick.nick_id = demoscene_nick.id)
+    """,
+    """
+        INSERT INTO productions_releaserproduction (releaser_id, production_id, role)
+        SELECT DISTINCT demoscene_nick.releaser_id, productions_credit.production_id, 'credit'
+        FROM productions_credit
+        INNER JOIN demoscene_nick ON (productions_credit.nick_id = demoscene_nick.id)
+    """,
+    """
+        INSERT INTO productions_releaserproduction (releaser_id, production_id, role)
+        SELECT releaser_id, production_id, 'member' FROM (
+            SELECT demoscene_nick.releaser_id AS releaser_id, affiliation_nick.production_id AS production_id
+            FROM productions_production_author_affiliation_nicks AS affiliation_nick
+            INNER JOIN demoscene_nick ON (affiliation_nick.nick_id = demoscene_nick.id)
+            UNION
+            SELECT demoscene_membership.group_id AS releaser_id, author_nick.production_id AS production_id
+            FROM demoscene_membership
+            INNER JOIN demoscene_releaser AS subgroup ON (
+                demoscene_membership.member_id = subgroup.id AND subgroup.is_group
+            )
+            INNER JOIN demoscene_nick ON (demoscene_nick.releaser_id = subgroup.id)
+            INNER JOIN productions_production_author_nicks AS author_nick ON (author_nick.nick_id = demoscene_nick.id)
+        ) AS member_productions
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demoscene', '0001_squashed_0021_edit_index_together'),
+        ('productions', '0001_squashed_0025_production_productionlink_index_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReleaserProduction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('author', 'Author'), ('affiliation', 'Affiliation'), ('credit', 'Credit'), ('member', 'Member production')], max_length=16)),
+                ('production', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='releaser_roles', to='productions.production')),
+                ('releaser', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='production_roles', to='demoscene.releaser')),
+            ],
+            options={
+                'unique_together': {('releaser', 'role', 'production')},
+            },
+        ),
+        migrations.RunSQL(POPULATE_SQL, migrations.RunSQL.noop),
+    ]
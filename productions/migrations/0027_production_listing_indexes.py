@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:07
+
+import datetime
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('platforms', '0001_squashed_0005_platforms_set_case_insensitive_ordering'),
+        ('productions', '0026_releaserproduction'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='production',
+            index=models.Index(fields=['supertype', 'sortable_title', 'id'], name='production_supertype_title'),
+        ),
+        migrations.AddIndex(
+            model_name='production',
+            index=models.Index(fields=['supertype', 'release_date_date', 'title', 'id'], name='production_supertype_date'),
+        ),
+        migrations.AddIndex(
+            model_name='production',
+            index=models.Index(models.F('supertype'), models.OrderBy(django.db.models.functions.comparison.Coalesce('release_date_date', models.Value(datetime.date(1970, 1, 1))), descending=True), models.OrderBy(models.F('title'), descending=True), models.OrderBy(models.F('id'), descending=True), name='production_supertype_date_desc'),
+        ),
+        migrations.AddIndex(
+            model_name='production',
+            index=models.Index(fields=['supertype', 'created_at', 'id'], name='production_supertype_added'),
+        ),
+        migrations.AddIndex(
+            model_name='production',
+            index=models.Index(fields=['sortable_title', 'id'], name='production_title'),
+        ),
+        migrations.AddIndex(
+            model_name='production',
+            index=models.Index(fields=['release_date_date', 'id'], name='production_date'),
+        ),
+    ]
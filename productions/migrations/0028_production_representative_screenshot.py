@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# initial population; subsequently maintained by Screenshot.save and update_prod_screenshot_data_on_delete
+POPULATE_SQL = """
+    UPDATE productions_production SET representative_screenshot_id = (
+        SELECT productions_screenshot.id FROM productions_screenshot
+        WHERE productions_screenshot.production_id = productions_production.id
+        AND productions_screenshot.thumbnail_url <> ''
+        ORDER BY random() LIMIT 1
+    )
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productions', '0027_production_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='production',
+            name='representative_screenshot',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='productions.screenshot'),
+        ),
+        migrations.RunSQL(POPULATE_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+# initial population from the screenshots chosen in 0028; subsequently maintained along with
+# representative_screenshot by Production.choose_representative_screenshot
+POPULATE_SQL = """
+    UPDATE productions_production SET
+        representative_thumbnail_url = productions_screenshot.thumbnail_url,
+        representative_thumbnail_width = productions_screenshot.thumbnail_width,
+        representative_thumbnail_height = productions_screenshot.thumbnail_height
+    FROM productions_screenshot
+    WHERE productions_screenshot.id = productions_production.representative_screenshot_id
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productions', '0028_production_representative_screenshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='production',
+            name='representative_thumbnail_height',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='production',
+            name='representative_thumbnail_url',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='production',
+            name='representative_thumbnail_width',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(POPULATE_SQL, migrations.RunSQL.noop),
+    ]
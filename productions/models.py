@@ -1,13 +1,16 @@
 import datetime
 import random
+import time
 from collections import defaultdict
 from functools import lru_cache
 
+from django.conf import settings
 from django.contrib.postgres.indexes import GinIndex
 from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from django.db.models.functions import Lower
-from django.db.models.signals import post_delete
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, Lower
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.forms import Media
 from django.urls import reverse
@@ -18,10 +21,19 @@ from unidecode import unidecode
 
 from comments.models import Commentable
 from common.models import Lockable, PrefetchSnoopingMixin, URLMixin
+from common.signals import bulk_saved
 from common.utils import groklinks
 from common.utils.fuzzy_date import FuzzyDate
 from common.utils.text import generate_search_title, generate_sort_key, strip_markup
-from demoscene.models import DATE_PRECISION_CHOICES, ExternalLink, Nick, Releaser, ReleaserExternalLink, TextFile
+from demoscene.models import (
+    DATE_PRECISION_CHOICES,
+    ExternalLink,
+    Membership,
+    Nick,
+    Releaser,
+    ReleaserExternalLink,
+    TextFile,
+)
 from mirror.models import ArchiveMember, Download
 from screenshots.models import ThumbnailMixin
 
@@ -138,6 +150,14 @@ class Production(URLMixin, PrefetchSnoopingMixin, Commentable, Lockable):
     has_screenshot = models.BooleanField(
         default=False, editable=False, help_text="True if this prod has at least one (processed) screenshot"
     )
+    # a screenshot picked (by choose_representative_screenshot) to show as the thumbnail for this prod in listings
+    representative_screenshot = models.ForeignKey(
+        "Screenshot", null=True, blank=True, editable=False, related_name="+", on_delete=models.SET_NULL
+    )
+    # copied from representative_screenshot, so that listings can show it without fetching the screenshot
+    representative_thumbnail_url = models.CharField(max_length=255, blank=True, editable=False)
+    representative_thumbnail_width = models.IntegerField(null=True, blank=True, editable=False)
+    representative_thumbnail_height = models.IntegerField(null=True, blank=True, editable=False)
     include_notes_in_search = models.BooleanField(
         default=True,
         help_text=(
@@ -241,16 +261,51 @@ class Production(URLMixin, PrefetchSnoopingMixin, Commentable, Lockable):
     def __str__(self):
         return self.title
 
+    def choose_representative_screenshot(self):
+        """
+        Set representative_screenshot (and its thumbnail details) to a screenshot of this production
+        that has a thumbnail, as picked by pick_representative_screenshot. Does not save the production.
+        """
+        screenshots = self.screenshots.exclude(thumbnail_url="").order_by("id")
+        screenshot = pick_representative_screenshot(
+            self.id, [screenshot.id for screenshot in screenshots], self.representative_screenshot_id
+        )
+        self.set_representative_screenshot(
+            next((candidate for candidate in screenshots if candidate.id == screenshot), None)
+        )
+
+    def set_representative_screenshot(self, screenshot):
+        self.representative_screenshot = screenshot
+        self.representative_thumbnail_url = screenshot.thumbnail_url if screenshot else ""
+        self.representative_thumbnail_width = screenshot.thumbnail_width if screenshot else None
+        self.representative_thumbnail_height = screenshot.thumbnail_height if screenshot else None
+
+    @property
+    def representative_thumbnail(self):
+        """
+        The representative screenshot, built from the fields held on the production. Only the thumbnail
+        fields are populated, so this is suitable for passing to the thumbnail template tags but nothing else.
+        """
+        if not self.representative_screenshot_id:
+            return None
+        return Screenshot(
+            id=self.representative_screenshot_id,
+            production_id=self.id,
+            thumbnail_url=self.representative_thumbnail_url,
+            thumbnail_width=self.representative_thumbnail_width,
+            thumbnail_height=self.representative_thumbnail_height,
+        )
+
     def byline(self):
         return Byline(self.author_nicks.all(), self.author_affiliation_nicks.all())
 
-    def byline_search(self):
+    def byline_search(self, nick_index=None):
         from productions.fields.byline_search import BylineSearch
 
         if self.unparsed_byline:
-            return BylineSearch(self.unparsed_byline)
+            return BylineSearch(self.unparsed_byline, nick_index=nick_index)
         else:
-            return BylineSearch.from_byline(self.byline())
+            return BylineSearch.from_byline(self.byline(), nick_index=nick_index)
 
     def _get_byline_string(self):
         return self.unparsed_byline or str(self.byline())
@@ -441,15 +496,115 @@ class Production(URLMixin, PrefetchSnoopingMixin, Commentable, Lockable):
             "D": self.byline_string,
         }
 
+    def fragment_cache_dependents(self):
+        return production_fragment_dependents([self.id])
+
+    @staticmethod
+    def bulk_fragment_cache_dependents(productions):
+        return production_fragment_dependents([production.id for production in productions])
+
     class Meta:
         ordering = ["sortable_title"]
         indexes = [
             GinIndex(fields=["search_document"]),
             models.Index(fields=["release_date_date", "created_at"]),
+            # keyset pagination of listings (see productions.views.generic.apply_order) and the API
+            models.Index(fields=["supertype", "sortable_title", "id"], name="production_supertype_title"),
+            models.Index(fields=["supertype", "release_date_date", "title", "id"], name="production_supertype_date"),
+            models.Index(
+                F("supertype"),
+                Coalesce("release_date_date", Value(datetime.date(1970, 1, 1))).desc(),
+                F("title").desc(),
+                F("id").desc(),
+                name="production_supertype_date_desc",
+            ),
+            models.Index(fields=["supertype", "created_at", "id"], name="production_supertype_added"),
+            models.Index(fields=["sortable_title", "id"], name="production_title"),
+            models.Index(fields=["release_date_date", "id"], name="production_date"),
         ]
 
 
+def production_fragment_dependents(production_ids):
+    """
+    Return (model label, ids) pairs for the cached page fragments (see common.utils.fragment_cache)
+    that display any of the given productions: the productions themselves and the ones they are
+    packed with or soundtracks of, their authors and credited sceners, the groups those are members
+    of, and the parties where the productions were released, invited to or competed at
+    """
+    from parties.models import Party
+
+    releaser_ids = set(
+        Nick.objects.filter(
+            Q(productions__id__in=production_ids)
+            | Q(member_productions__id__in=production_ids)
+            | Q(credits__production_id__in=production_ids)
+        ).values_list("releaser_id", flat=True)
+    )
+    return [
+        ("productions.production", production_ids),
+        (
+            "productions.production",
+            Production.objects.filter(
+                Q(pack_members__member_id__in=production_ids)
+                | Q(packed_in__pack_id__in=production_ids)
+                | Q(soundtrack_links__soundtrack_id__in=production_ids)
+                | Q(appearances_as_soundtrack__production_id__in=production_ids)
+            )
+            .values_list("id", flat=True)
+            .distinct(),
+        ),
+        ("demoscene.releaser", releaser_ids),
+        (
+            "demoscene.releaser",
+            Releaser.objects.filter(member_memberships__member_id__in=releaser_ids)
+            .values_list("id", flat=True)
+            .distinct(),
+        ),
+        (
+            "parties.party",
+            Party.objects.filter(
+                Q(releases__id__in=production_ids)
+                | Q(invitations__id__in=production_ids)
+                | Q(competitions__placings__production_id__in=production_ids)
+            )
+            .values_list("id", flat=True)
+            .distinct(),
+        ),
+    ]
+
+
 # encapsulates list of authors and affiliations
+REPRESENTATIVE_SCREENSHOT_FIELDS = [
+    "representative_screenshot",
+    "representative_thumbnail_url",
+    "representative_thumbnail_width",
+    "representative_thumbnail_height",
+]
+
+
+def pick_representative_screenshot(production_id, screenshot_ids, current_id=None, now=None):
+    """
+    Choose the screenshot to show for a production in listings, out of screenshot_ids (in id order).
+
+    If settings.SCREENSHOT_ROTATION_PERIOD is set, the choice steps through the screenshots once per
+    period, starting from a different point for each production; the result depends only on the time,
+    so it can be recalculated in bulk (see productions.tasks.rotate_representative_screenshots).
+    Otherwise, current_id is kept while it is still eligible, and a random screenshot picked when not.
+    """
+    if not screenshot_ids:
+        return None
+
+    if settings.SCREENSHOT_ROTATION_PERIOD:
+        if now is None:
+            now = time.time()
+        bucket = int(now // settings.SCREENSHOT_ROTATION_PERIOD.total_seconds())
+        return screenshot_ids[(bucket + production_id) % len(screenshot_ids)]
+
+    if current_id in screenshot_ids:
+        return current_id
+    return random.choice(screenshot_ids)
+
+
 class Byline(object):
     def __init__(self, authors=[], affiliations=[]):
         self.author_nicks = authors
@@ -534,6 +689,12 @@ class Credit(models.Model):
                 self.category,
             )
 
+    def fragment_cache_dependents(self):
+        return [
+            ("productions.production", [self.production_id]),
+            ("demoscene.releaser", [self.nick.releaser_id]),
+        ]
+
     class Meta:
         ordering = ["production__title"]
 
@@ -558,10 +719,16 @@ class Screenshot(ThumbnailMixin, models.Model):
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
 
-        # Mark the corresponding production as having a screenshot
+        # Mark the corresponding production as having a screenshot, and pick one to show in listings
+        production = self.production
+        previous = [getattr(production, field) for field in REPRESENTATIVE_SCREENSHOT_FIELDS]
+        production.choose_representative_screenshot()
+        changed = [getattr(production, field) for field in REPRESENTATIVE_SCREENSHOT_FIELDS] != previous
         if self.thumbnail_url:
-            self.production.has_screenshot = True
-            self.production.save(update_fields=["has_screenshot"])
+            production.has_screenshot = True
+            production.save(update_fields=["has_screenshot"] + REPRESENTATIVE_SCREENSHOT_FIELDS)
+        elif changed:
+            production.save(update_fields=REPRESENTATIVE_SCREENSHOT_FIELDS)
 
         # if any production links for this production have is_unresolved_for_screenshotting=True,
         # reset that flag since we no longer need a screenshot
@@ -572,30 +739,23 @@ class Screenshot(ThumbnailMixin, models.Model):
     def __str__(self):
         return "%s - %s" % (self.production.title, self.original_url)
 
+    def fragment_cache_dependents(self):
+        # screenshots also appear in party results listings
+        return production_fragment_dependents([self.production_id])
+
     @staticmethod
     def select_for_production_ids(production_ids):
         """
-        Given a list of production ids, return a dict mapping production id to a random
-        screenshot for each production in the list that has screenshots
+        Given a list of production ids, return a dict mapping production id to the representative
+        screenshot for each production in the list that has screenshots. Where the production records
+        are already to hand, use their representative_thumbnail property instead, to avoid the query.
         """
-        prod_and_screenshot_ids = (
-            Screenshot.objects.filter(production_id__in=production_ids)
-            .exclude(thumbnail_url="")
-            .values_list("production_id", "id")
+        productions = (
+            Production.objects.filter(id__in=production_ids)
+            .exclude(representative_screenshot=None)
+            .only("id", *REPRESENTATIVE_SCREENSHOT_FIELDS)
         )
-
-        screenshots_by_prod_id = defaultdict(list)
-        for prod_id, screenshot_id in prod_and_screenshot_ids:
-            screenshots_by_prod_id[prod_id].append(screenshot_id)
-
-        chosen_screenshot_ids = [
-            random.choice(screenshot_id_set) for screenshot_id_set in screenshots_by_prod_id.values()
-        ]
-
-        return {
-            screenshot.production_id: screenshot
-            for screenshot in Screenshot.objects.filter(id__in=chosen_screenshot_ids)
-        }
+        return {production.id: production.representative_thumbnail for production in productions}
 
 
 @receiver(post_delete, sender=Screenshot)
@@ -605,7 +765,8 @@ def update_prod_screenshot_data_on_delete(sender, **kwargs):
     screenshots = production.screenshots.exclude(original_url="")
 
     production.has_screenshot = bool(screenshots)
-    production.save(update_fields=["has_screenshot"])
+    production.choose_representative_screenshot()
+    production.save(update_fields=["has_screenshot"] + REPRESENTATIVE_SCREENSHOT_FIELDS)
 
 
 class SoundtrackLink(models.Model):
@@ -622,6 +783,9 @@ class SoundtrackLink(models.Model):
     def __str__(self):
         return "%s on %s" % (self.soundtrack, self.production)
 
+    def fragment_cache_dependents(self):
+        return [("productions.production", [self.production_id, self.soundtrack_id])]
+
     class Meta:
         ordering = ["position"]
 
@@ -635,10 +799,193 @@ class PackMember(models.Model):
     def __str__(self):
         return "%s packed in %s" % (self.member, self.pack)
 
+    def fragment_cache_dependents(self):
+        return [("productions.production", [self.pack_id, self.member_id])]
+
     class Meta:
         ordering = ["position"]
 
 
+class ReleaserProduction(models.Model):
+    """
+    Denormalised record of a releaser's involvement in a production, as derived from author nicks,
+    affiliation nicks, credits and subgroup memberships - so that a releaser's productions can be
+    looked up without going through nicks. Kept up to date by the signal handlers below; rebuild
+    in bulk with the rebuild_releaser_productions management command.
+    """
+
+    ROLE_CHOICES = [
+        ("author", "Author"),
+        ("affiliation", "Affiliation"),
+        ("credit", "Credit"),
+        # affiliation, or authored by a subgroup - see Releaser.member_productions
+        ("member", "Member production"),
+    ]
+
+    releaser = models.ForeignKey(Releaser, related_name="production_roles", on_delete=models.CASCADE)
+    production = models.ForeignKey(Production, related_name="releaser_roles", on_delete=models.CASCADE)
+    role = models.CharField(max_length=16, choices=ROLE_CHOICES)
+
+    def __str__(self):
+        return "%s: %s of %s" % (self.releaser_id, self.role, self.production_id)
+
+    @classmethod
+    def refresh_for_releasers(cls, releaser_ids):
+        """
+        Bring the records for the given releasers, and any groups that they are subgroups of, into
+        line with the current author nicks, affiliation nicks, credits and memberships
+        """
+        releaser_ids = set(releaser_ids)
+        releaser_ids.update(
+            Membership.objects.filter(member_id__in=releaser_ids, member__is_group=True).values_list(
+                "group_id", flat=True
+            )
+        )
+        if not releaser_ids:
+            return
+
+        AuthorNick = Production.author_nicks.through
+        AffiliationNick = Production.author_affiliation_nicks.through
+
+        wanted = set()
+        for releaser_id, production_id in AuthorNick.objects.filter(nick__releaser_id__in=releaser_ids).values_list(
+            "nick__releaser_id", "production_id"
+        ):
+            wanted.add((releaser_id, production_id, "author"))
+        for releaser_id, production_id in AffiliationNick.objects.filter(
+            nick__releaser_id__in=releaser_ids
+        ).values_list("nick__releaser_id", "production_id"):
+            wanted.add((releaser_id, production_id, "affiliation"))
+            wanted.add((releaser_id, production_id, "member"))
+        for releaser_id, production_id in Credit.objects.filter(nick__releaser_id__in=releaser_ids).values_list(
+            "nick__releaser_id", "production_id"
+        ):
+            wanted.add((releaser_id, production_id, "credit"))
+
+        group_ids_by_subgroup_id = defaultdict(list)
+        for group_id, subgroup_id in Membership.objects.filter(
+            group_id__in=releaser_ids, member__is_group=True
+        ).values_list("group_id", "member_id"):
+            group_ids_by_subgroup_id[subgroup_id].append(group_id)
+        if group_ids_by_subgroup_id:
+            for subgroup_id, production_id in AuthorNick.objects.filter(
+                nick__releaser_id__in=list(group_ids_by_subgroup_id)
+            ).values_list("nick__releaser_id", "production_id"):
+                for group_id in group_ids_by_subgroup_id[subgroup_id]:
+                    wanted.add((group_id, production_id, "member"))
+
+        existing = {
+            (releaser_id, production_id, role): id
+            for id, releaser_id, production_id, role in cls.objects.filter(releaser_id__in=releaser_ids).values_list(
+                "id", "releaser_id", "production_id", "role"
+            )
+        }
+        stale_ids = [id for key, id in existing.items() if key not in wanted]
+        if stale_ids:
+            cls.objects.filter(id__in=stale_ids).delete()
+        cls.objects.bulk_create(
+            [
+                cls(releaser_id=releaser_id, production_id=production_id, role=role)
+                for releaser_id, production_id, role in wanted - existing.keys()
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+    class Meta:
+        unique_together = [("releaser", "role", "production")]
+
+
+@receiver(m2m_changed, sender=Production.author_nicks.through)
+@receiver(m2m_changed, sender=Production.author_affiliation_nicks.through)
+def update_releaser_productions_on_byline_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # instance is a nick
+        if action in ("post_add", "post_remove", "post_clear"):
+            ReleaserProduction.refresh_for_releasers([instance.releaser_id])
+    elif action in ("post_add", "post_remove"):
+        ReleaserProduction.refresh_for_releasers(
+            Nick.objects.filter(id__in=pk_set).values_list("releaser_id", flat=True)
+        )
+    elif action == "pre_clear":
+        instance._releaser_ids_before_clear = list(
+            sender.objects.filter(production=instance).values_list("nick__releaser_id", flat=True)
+        )
+    elif action == "post_clear":
+        ReleaserProduction.refresh_for_releasers(getattr(instance, "_releaser_ids_before_clear", []))
+
+
+@receiver(bulk_saved, sender=Production.author_nicks.through)
+@receiver(bulk_saved, sender=Production.author_affiliation_nicks.through)
+def update_releaser_productions_on_bulk_byline_save(sender, objects, **kwargs):
+    ReleaserProduction.refresh_for_releasers(
+        Nick.objects.filter(id__in={obj.nick_id for obj in objects}).values_list("releaser_id", flat=True)
+    )
+
+
+@receiver(pre_save, sender=Credit)
+@receiver(pre_save, sender=Membership)
+@receiver(pre_save, sender=Nick)
+@receiver(pre_save, sender=Releaser)
+def remember_previous_releaser_links(sender, instance, raw=False, **kwargs):
+    # record the releasers that the existing record points to, so that they can be refreshed if they change
+    instance._previous_releaser_ids = []
+    if raw or instance.pk is None:
+        return
+    if sender is Credit:
+        instance._previous_releaser_ids = list(
+            Nick.objects.filter(credits__id=instance.pk).values_list("releaser_id", flat=True)
+        )
+    elif sender is Membership:
+        instance._previous_releaser_ids = list(
+            Membership.objects.filter(id=instance.pk).values_list("group_id", flat=True)
+        )
+    elif sender is Nick:
+        instance._previous_releaser_ids = list(
+            Nick.objects.filter(id=instance.pk).values_list("releaser_id", flat=True)
+        )
+    elif sender is Releaser:
+        # a change to is_group affects the member productions of the releaser's groups
+        if Releaser.objects.filter(id=instance.pk).exclude(is_group=instance.is_group).exists():
+            instance._previous_releaser_ids = list(instance.group_memberships.values_list("group_id", flat=True))
+
+
+@receiver(post_save, sender=Credit)
+@receiver(post_delete, sender=Credit)
+def update_releaser_productions_on_credit_change(sender, instance, **kwargs):
+    ReleaserProduction.refresh_for_releasers(
+        list(Nick.objects.filter(id=instance.nick_id).values_list("releaser_id", flat=True))
+        + getattr(instance, "_previous_releaser_ids", [])
+    )
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def update_releaser_productions_on_membership_change(sender, instance, **kwargs):
+    # only subgroup memberships contribute to member productions
+    if Releaser.objects.filter(id=instance.member_id, is_group=True).exists():
+        ReleaserProduction.refresh_for_releasers([instance.group_id] + getattr(instance, "_previous_releaser_ids", []))
+
+
+@receiver(post_save, sender=Nick)
+def update_releaser_productions_on_nick_save(sender, instance, created, raw=False, **kwargs):
+    # a nick's productions only change hands if the nick is moved to another releaser (or arrives
+    # from a fixture, possibly after the productions that reference it)
+    if raw or (not created and instance._previous_releaser_ids != [instance.releaser_id]):
+        ReleaserProduction.refresh_for_releasers([instance.releaser_id] + instance._previous_releaser_ids)
+
+
+@receiver(post_delete, sender=Nick)
+def update_releaser_productions_on_nick_delete(sender, instance, **kwargs):
+    ReleaserProduction.refresh_for_releasers([instance.releaser_id])
+
+
+@receiver(post_save, sender=Releaser)
+def update_releaser_productions_on_releaser_change(sender, instance, **kwargs):
+    if getattr(instance, "_previous_releaser_ids", []):
+        ReleaserProduction.refresh_for_releasers(instance._previous_releaser_ids)
+
+
 class ProductionLink(ExternalLink):
     production = models.ForeignKey(Production, related_name="links", on_delete=models.CASCADE)
     is_download_link = models.BooleanField()
@@ -808,6 +1155,9 @@ class ProductionLink(ExternalLink):
 
         return True
 
+    def fragment_cache_dependents(self):
+        return [("productions.production", [self.production_id])]
+
     class Meta:
         unique_together = (("link_class", "parameter", "production", "is_download_link"),)
         ordering = ["link_class"]
@@ -820,6 +1170,9 @@ class InfoFile(TextFile):
     production = models.ForeignKey(Production, related_name="info_files", on_delete=models.CASCADE)
     file = models.FileField(upload_to="nfo", blank=True)
 
+    def fragment_cache_dependents(self):
+        return [("productions.production", [self.production_id])]
+
     class Meta:
         verbose_name = "info file"
         verbose_name_plural = "info files"
@@ -839,6 +1192,9 @@ class EmulatorConfig(models.Model):
     def __str__(self):
         return "%s on %s" % (self.production.title, self.emulator)
 
+    def fragment_cache_dependents(self):
+        return [("productions.production", [self.production_id])]
+
     @property
     def media(self):
         if self.emulator == "jsspeccy":
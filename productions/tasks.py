@@ -1,9 +1,20 @@
 import datetime
+import time
 import urllib
+from collections import defaultdict
 
 from celery import shared_task
+from django.conf import settings
+from django.db.models import Count
 
-from productions.models import ProductionLink
+from productions.models import (
+    REPRESENTATIVE_SCREENSHOT_FIELDS,
+    Production,
+    ProductionLink,
+    Screenshot,
+    pick_representative_screenshot,
+)
+from search.signals import refresh_search_prefixes_on_commit
 
 
 @shared_task(rate_limit="1/s", ignore_result=True)
@@ -42,3 +53,47 @@ def clean_dead_youtube_link(productionlink_id):
         if e.code == 404:
             print("404 on %s - deleting" % production_link.link)
             production_link.delete()
+
+
+@shared_task(ignore_result=True)
+def rotate_representative_screenshots():
+    """
+    When SCREENSHOT_ROTATION_PERIOD is set, move each production with more than one screenshot on to
+    the representative screenshot for the current period. The productions are updated in bulk without
+    sending signals, so cached page fragments will show the new choice once they next expire; the
+    thumbnails in live search results are refreshed explicitly.
+    """
+    if not settings.SCREENSHOT_ROTATION_PERIOD:
+        return
+
+    now = time.time()
+    screenshots = Screenshot.objects.exclude(thumbnail_url="")
+    rotating_production_ids = (
+        screenshots.values("production_id").annotate(count=Count("id")).filter(count__gt=1).values("production_id")
+    )
+    screenshots_by_production_id = defaultdict(list)
+    for screenshot in (
+        screenshots.filter(production_id__in=rotating_production_ids)
+        .only("id", "production_id", "thumbnail_url", "thumbnail_width", "thumbnail_height")
+        .order_by("production_id", "id")
+    ):
+        screenshots_by_production_id[screenshot.production_id].append(screenshot)
+
+    current_screenshot_ids = dict(
+        Production.objects.filter(id__in=rotating_production_ids).values_list("id", "representative_screenshot_id")
+    )
+
+    productions = []
+    for production_id, candidates in screenshots_by_production_id.items():
+        screenshot_id = pick_representative_screenshot(
+            production_id, [screenshot.id for screenshot in candidates], now=now
+        )
+        if screenshot_id != current_screenshot_ids.get(production_id):
+            production = Production(id=production_id)
+            production.set_representative_screenshot(
+                next(screenshot for screenshot in candidates if screenshot.id == screenshot_id)
+            )
+            productions.append(production)
+
+    Production.objects.bulk_update(productions, REPRESENTATIVE_SCREENSHOT_FIELDS, batch_size=1000)
+    refresh_search_prefixes_on_commit(Production, [production.id for production in productions])
@@ -1,8 +1,6 @@
 from django import template
 from django.conf import settings
 
-from productions.models import Screenshot
-
 
 register = template.Library()
 
@@ -51,12 +49,9 @@ def production_core_details(context, production, subpage=False):
 
 @register.inclusion_tag("productions/tags/production_listing.html")
 def production_listing(productions, show_screenshots=False, show_prod_types=False, mark_excludable=False):
-    if show_screenshots:
-        screenshots = Screenshot.select_for_production_ids([prod.id for prod in productions])
-    else:
-        screenshots = {}
-
-    productions_and_screenshots = [(production, screenshots.get(production.id)) for production in productions]
+    productions_and_screenshots = [
+        (production, production.representative_thumbnail if show_screenshots else None) for production in productions
+    ]
     return {
         "productions_and_screenshots": productions_and_screenshots,
         "show_screenshots": show_screenshots,
@@ -7,7 +7,7 @@ from django.core.management import call_command
 from django.test import TestCase
 from django.test.utils import captured_stdout
 
-from productions.models import Production, ProductionLink
+from productions.models import Production, ProductionLink, ReleaserProduction
 
 
 class TestFetchEmbedData(TestCase):
@@ -44,6 +44,20 @@ class TestRefetchEmbedData(TestCase):
         fetch_production_link_embed_data.delay.assert_called_once_with(link.id)
 
 
+class TestBenchmarkGroklinks(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def test_run(self):
+        pondlife = Production.objects.get(title="Pondlife")
+        pondlife.links.create(link_class="PouetProduction", parameter="2611", is_download_link=False)
+        pondlife.links.create(link_class="BaseUrl", parameter="http://example.com/pondlife.tap", is_download_link=True)
+
+        with captured_stdout() as stdout:
+            call_command("benchmark_groklinks")
+
+        self.assertIn("Mismatches: 0", stdout.getvalue())
+
+
 class TestMirrorMusicFiles(TestCase):
     fixtures = ["tests/gasman.json"]
 
@@ -234,3 +248,17 @@ class TestFindEmulatableNonZxdemoProds(TestCase):
         with captured_stdout():
             call_command("find_emulatable_nonzxdemo_prods")
         self.assertEqual(pondlife.emulator_configs.count(), 1)
+
+
+class TestRebuildReleaserProductions(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def test_run(self):
+        expected = set(ReleaserProduction.objects.values_list("releaser_id", "production_id", "role"))
+        self.assertTrue(expected)
+        ReleaserProduction.objects.filter(role="author").delete()
+
+        with captured_stdout():
+            call_command("rebuild_releaser_productions", batch_size=2)
+
+        self.assertEqual(set(ReleaserProduction.objects.values_list("releaser_id", "production_id", "role")), expected)
@@ -1,13 +1,21 @@
 import datetime
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from freezegun import freeze_time
 
-from demoscene.models import Nick
+from demoscene.models import Membership, Nick, Releaser
 from mirror.models import Download
 from platforms.models import Platform
-from productions.models import Byline, PackMember, Production, ProductionLink, ProductionType, Screenshot
+from productions.models import (
+    Byline,
+    PackMember,
+    Production,
+    ProductionLink,
+    ProductionType,
+    ReleaserProduction,
+    Screenshot,
+)
 
 
 class TestProductionType(TestCase):
@@ -160,6 +168,66 @@ class TestScreenshot(TestCase):
         screenshot = Screenshot(production=pondlife, original_url="http://example.com/pondlife.png")
         self.assertEqual(str(screenshot), "Pondlife - http://example.com/pondlife.png")
 
+    def test_representative_screenshot(self):
+        pondlife = Production.objects.get(title="Pondlife")
+        # screenshots without thumbnails are not eligible
+        unprocessed = pondlife.screenshots.create(original_url="http://example.com/pondlife.png")
+        pondlife.refresh_from_db()
+        self.assertIsNone(pondlife.representative_screenshot)
+
+        first = pondlife.screenshots.create(
+            original_url="http://example.com/pondlife1.png",
+            thumbnail_url="http://example.com/pondlife1.thumb.png",
+            thumbnail_width=133,
+            thumbnail_height=100,
+        )
+        pondlife.refresh_from_db()
+        self.assertEqual(pondlife.representative_screenshot, first)
+        self.assertEqual(pondlife.representative_thumbnail.thumbnail_url, "http://example.com/pondlife1.thumb.png")
+        self.assertEqual(pondlife.representative_thumbnail.thumb_dimensions_to_fit(48, 36), (48, 36))
+        self.assertEqual(Screenshot.select_for_production_ids([pondlife.id])[pondlife.id].id, first.id)
+
+        # the choice is kept when more screenshots are added
+        second = pondlife.screenshots.create(
+            original_url="http://example.com/pondlife2.png", thumbnail_url="http://example.com/pondlife2.thumb.png"
+        )
+        unprocessed.delete()
+        pondlife.refresh_from_db()
+        self.assertEqual(pondlife.representative_screenshot, first)
+
+        Screenshot.objects.get(id=first.id).delete()
+        pondlife.refresh_from_db()
+        self.assertEqual(pondlife.representative_screenshot, second)
+
+        Screenshot.objects.get(id=second.id).delete()
+        pondlife.refresh_from_db()
+        self.assertIsNone(pondlife.representative_screenshot)
+        self.assertIsNone(pondlife.representative_thumbnail)
+        self.assertEqual(pondlife.representative_thumbnail_url, "")
+        self.assertFalse(pondlife.has_screenshot)
+
+    @override_settings(SCREENSHOT_ROTATION_PERIOD=datetime.timedelta(hours=1))
+    def test_representative_screenshot_rotation(self):
+        pondlife = Production.objects.get(title="Pondlife")
+        screenshots = [
+            pondlife.screenshots.create(
+                original_url="http://example.com/pondlife%d.png" % i,
+                thumbnail_url="http://example.com/pondlife%d.thumb.png" % i,
+            )
+            for i in range(3)
+        ]
+
+        with freeze_time("2020-10-01 12:30"):
+            pondlife.choose_representative_screenshot()
+            chosen = pondlife.representative_screenshot
+            # the choice is the same throughout the period
+            pondlife.choose_representative_screenshot()
+            self.assertEqual(pondlife.representative_screenshot, chosen)
+
+        with freeze_time("2020-10-01 13:30"):
+            pondlife.choose_representative_screenshot()
+            self.assertEqual(screenshots.index(pondlife.representative_screenshot), (screenshots.index(chosen) + 1) % 3)
+
 
 class TestSoundtrackLink(TestCase):
     fixtures = ["tests/gasman.json"]
@@ -190,3 +258,55 @@ class TestEmulatorConfig(TestCase):
             emulator="jsspeccy", launch_url="https://files.zxdemo.org/pondlife.zip"
         )
         self.assertEqual(str(emu_config), "Pondlife on jsspeccy")
+
+
+class TestReleaserProduction(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def setUp(self):
+        self.gasman = Releaser.objects.get(name="Gasman")
+        self.hooy_program = Releaser.objects.get(name="Hooy-Program")
+        self.pondlife = Production.objects.get(title="Pondlife")
+
+    def roles(self, releaser, production):
+        return set(
+            ReleaserProduction.objects.filter(releaser=releaser, production=production).values_list("role", flat=True)
+        )
+
+    def test_byline_change(self):
+        self.assertEqual(self.roles(self.hooy_program, self.pondlife), {"author"})
+        self.pondlife.author_nicks.clear()
+        self.assertEqual(self.roles(self.hooy_program, self.pondlife), set())
+        self.pondlife.author_affiliation_nicks.add(self.hooy_program.primary_nick)
+        self.assertEqual(self.roles(self.hooy_program, self.pondlife), {"affiliation", "member"})
+
+    def test_credit_change(self):
+        yerzmyey = Releaser.objects.get(name="Yerzmyey")
+        laesq = Releaser.objects.get(name="LaesQ")
+        credit = self.pondlife.credits.create(nick=yerzmyey.primary_nick, category="Music")
+        self.assertEqual(self.roles(yerzmyey, self.pondlife), {"credit"})
+        credit.nick = laesq.primary_nick
+        credit.save()
+        self.assertEqual(self.roles(yerzmyey, self.pondlife), set())
+        self.assertEqual(self.roles(laesq, self.pondlife), {"credit"})
+        credit.delete()
+        self.assertEqual(self.roles(laesq, self.pondlife), set())
+
+    def test_subgroup_membership(self):
+        subgroup = Releaser.objects.create(name="Subgroup", is_group=True)
+        raww_arse = Releaser.objects.get(name="Raww Arse")
+        self.pondlife.author_nicks.set([subgroup.primary_nick])
+        membership = Membership.objects.create(member=subgroup, group=raww_arse)
+        self.assertEqual(self.roles(raww_arse, self.pondlife), {"member"})
+        self.assertIn(self.pondlife, raww_arse.member_productions())
+        membership.delete()
+        self.assertEqual(self.roles(raww_arse, self.pondlife), set())
+
+    def test_nick_moved(self):
+        nick = Nick.objects.get(name="Shingebis")
+        self.pondlife.author_nicks.set([nick])
+        yerzmyey = Releaser.objects.get(name="Yerzmyey")
+        nick.releaser = yerzmyey
+        nick.save()
+        self.assertNotIn(self.pondlife, self.gasman.productions())
+        self.assertIn(self.pondlife, yerzmyey.productions())
@@ -52,6 +52,21 @@ class TestIndex(TestCase):
         response = self.client.get("/productions/?order=added&dir=desc")
         self.assertEqual(response.status_code, 200)
 
+    def test_follow_cursor(self):
+        for i in range(60):
+            Production.objects.create(title="Production %d" % i, supertype="production")
+        response = self.client.get("/productions/", {"order": "title", "dir": "asc"})
+        first_page = response.context["production_page"]
+        self.assertContains(response, "cursor=%s" % first_page.next_cursor)
+
+        response = self.client.get("/productions/", {"order": "title", "dir": "asc", "page": "2"})
+        offset_page = response.context["production_page"]
+        response = self.client.get(
+            "/productions/", {"order": "title", "dir": "asc", "page": "2", "cursor": first_page.next_cursor}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["production_page"]), list(offset_page))
+
 
 class TestTagIndex(TestCase):
     fixtures = ["tests/gasman.json"]
@@ -1,11 +1,16 @@
 import datetime
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.test.utils import captured_stdout
 from freezegun import freeze_time
 
 from productions.models import Production, ProductionLink
-from productions.tasks import clean_dead_youtube_link, fetch_production_link_embed_data
+from productions.tasks import (
+    clean_dead_youtube_link,
+    fetch_production_link_embed_data,
+    rotate_representative_screenshots,
+)
+from search.models import SearchPrefix
 
 
 class TestTasks(TestCase):
@@ -75,3 +80,39 @@ class TestTasks(TestCase):
         ProductionLink.objects.filter(id=link.id).update(link_class="YoutubeVideo")
         clean_dead_youtube_link(link.id)
         self.assertEqual(pondlife.links.filter(link_class="YoutubeVideo").count(), 1)
+
+    def test_rotate_representative_screenshots(self):
+        pondlife = Production.objects.get(title="Pondlife")
+        with freeze_time("2020-10-01 12:30"):
+            for i in range(2):
+                pondlife.screenshots.create(
+                    original_url="http://example.com/pondlife%d.png" % i,
+                    thumbnail_url="http://example.com/pondlife%d.thumb.png" % i,
+                    thumbnail_width=200 + i,
+                    thumbnail_height=150,
+                )
+        pondlife.refresh_from_db()
+        chosen_id = pondlife.representative_screenshot_id
+
+        # no rotation unless SCREENSHOT_ROTATION_PERIOD is set
+        with freeze_time("2020-10-01 13:30"):
+            rotate_representative_screenshots()
+        pondlife.refresh_from_db()
+        self.assertEqual(pondlife.representative_screenshot_id, chosen_id)
+
+        with override_settings(SCREENSHOT_ROTATION_PERIOD=datetime.timedelta(hours=1)):
+            with freeze_time("2020-10-01 12:30"):
+                rotate_representative_screenshots()
+            pondlife.refresh_from_db()
+            first_id = pondlife.representative_screenshot_id
+
+            with freeze_time("2020-10-01 13:30"), self.captureOnCommitCallbacks(execute=True):
+                rotate_representative_screenshots()
+            pondlife.refresh_from_db()
+            self.assertNotEqual(pondlife.representative_screenshot_id, first_id)
+            screenshot = pondlife.screenshots.get(id=pondlife.representative_screenshot_id)
+            self.assertEqual(pondlife.representative_thumbnail_url, screenshot.thumbnail_url)
+            # the live search result shows the new thumbnail too
+            search_prefix = SearchPrefix.objects.filter(object_type="production", object_id=pondlife.id).first()
+            self.assertEqual(search_prefix.thumbnail["url"], screenshot.thumbnail_url)
+            self.assertEqual(pondlife.representative_thumbnail_width, screenshot.thumbnail_width)
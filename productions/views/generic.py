@@ -3,10 +3,13 @@ import random
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
 from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 from django.views import View
 
 from awards.models import Event
@@ -15,7 +18,7 @@ from comments.models import Comment
 from common.utils.pagination import PaginationControls, extract_query_params
 from common.views import writeable_site_required
 from demoscene.models import Edit
-from demoscene.shortcuts import get_page
+from demoscene.shortcuts import get_keyset_page
 from productions.carousel import Carousel
 from productions.forms import ProductionDownloadLinkFormSet
 from productions.models import Byline, Production, ProductionType
@@ -57,7 +60,7 @@ class IndexView(View):
             "author_nicks__releaser", "author_affiliation_nicks__releaser", "platforms", "types"
         )
 
-        production_page = get_page(queryset, request.GET.get("page", "1"))
+        production_page = get_keyset_page(queryset, request.GET.get("page", "1"), request.GET.get("cursor"))
 
         return render(
             request,
@@ -87,8 +90,8 @@ def apply_order(queryset, order, asc):
             return queryset.order_by("release_date_date", "title")
         else:
             # fiddle order so that empty release dates end up at the end
-            return queryset.extra(
-                select={"order_date": "coalesce(productions_production.release_date_date, '1970-01-01')"}
+            return queryset.annotate(
+                order_date=Coalesce("release_date_date", Value(datetime.date(1970, 1, 1)))
             ).order_by("-order_date", "-title")
 
 
@@ -152,7 +155,10 @@ class ShowView(View):
             soundtracks_panel,
         ]
 
-        show_secondary_panels = any(panel.is_shown for panel in secondary_panels)
+        # panels and carousel are evaluated lazily, so that they cost nothing when the template
+        # serves them from the fragment cache
+        def show_secondary_panels():
+            return any(panel.is_shown for panel in secondary_panels)
 
         return {
             "production": self.production,
@@ -160,7 +166,7 @@ class ShowView(View):
             "can_edit": can_edit,
             "primary_panels": primary_panels,
             "secondary_panels": secondary_panels,
-            "carousel": Carousel(self.production, self.request.user),
+            "carousel": SimpleLazyObject(lambda: Carousel(self.production, self.request.user)),
             "blurbs": self.production.blurbs.all() if self.request.user.is_staff else None,
             "comment_form": comment_form,
             "meta_screenshot": meta_screenshot,
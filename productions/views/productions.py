@@ -28,7 +28,7 @@ from common.views import (
 )
 from demoscene.forms.common import CreditFormSet
 from demoscene.models import Edit, Nick
-from demoscene.shortcuts import get_page
+from demoscene.shortcuts import get_keyset_page
 from productions.carousel import Carousel
 from productions.forms import (
     CreateProductionForm,
@@ -47,7 +47,7 @@ from productions.forms import (
     ProductionSoundtrackLinkFormset,
     ProductionTagsForm,
 )
-from productions.models import Credit, InfoFile, Production, ProductionBlurb, Screenshot
+from productions.models import Credit, InfoFile, Production, ProductionBlurb, ReleaserProduction, Screenshot
 from productions.panels import CreditsPanel, PackContentsPanel, SoundtracksPanel
 from productions.views.generic import CreateView, HistoryView, IndexView, ShowView, apply_order
 from screenshots.tasks import capture_upload_for_processing
@@ -74,7 +74,7 @@ def tagged(request, tag_name):
 
     queryset = apply_order(queryset, order, asc)
 
-    production_page = get_page(queryset, request.GET.get("page", "1"))
+    production_page = get_keyset_page(queryset, request.GET.get("page", "1"), request.GET.get("cursor"))
 
     return render(
         request,
@@ -717,8 +717,11 @@ class EditCreditView(EditingView):
             if "nick" in self.nick_form.changed_data:
                 # need to update the nick field of all credits in the set
                 # (not just the ones that have been updated by self.credit_formset.save)
+                previous_releaser_id = self.nick.releaser_id
                 self.nick = self.nick_form.cleaned_data["nick"].commit()
                 self.credits.update(nick=self.nick)
+                # queryset updates bypass the signal handlers that maintain ReleaserProduction
+                ReleaserProduction.refresh_for_releasers([previous_releaser_id, self.nick.releaser_id])
 
             # since we're using commit=False we must manually delete the
             # deleted credits
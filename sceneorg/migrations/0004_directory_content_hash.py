@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sceneorg', '0003_alter_file_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='directory',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+    ]
@@ -10,6 +10,8 @@ class Directory(models.Model):
     first_seen_at = models.DateTimeField(null=True, auto_now_add=True)
     last_seen_at = models.DateTimeField()
     last_spidered_at = models.DateTimeField(null=True, blank=True)
+    # hash of the directory's entries as of the last ls-lR scan, used to skip unchanged directories
+    content_hash = models.CharField(max_length=40, blank=True, default="", editable=False)
     parent = models.ForeignKey(
         "Directory", related_name="subdirectories", null=True, blank=True, on_delete=models.CASCADE
     )
@@ -0,0 +1,193 @@
+import datetime
+import hashlib
+
+from django.db import transaction
+
+from sceneorg.models import Directory, File
+
+
+# number of listed directories to process in each transaction
+BATCH_SIZE = 500
+
+
+def listing_hash(entries):
+    """
+    Return a hash of a directory's entries (as returned by dirparser.get_dir_listing), independent of
+    the order they are listed in
+    """
+    lines = sorted(
+        "%s\t%s\t%s" % (filename, "d" if is_dir else "f", "" if file_size is None else file_size)
+        for filename, is_dir, file_size in entries
+    )
+    return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def parent_path(path):
+    """Return the path of the parent of the directory with the given path, or None for the root"""
+    if path == "/":
+        return None
+    return path[: path.rstrip("/").rfind("/") + 1]
+
+
+class DirListingSync:
+    """
+    Brings the Directory and File tables into line with a full ls-lR listing of scene.org, as a
+    sequence of (path, entries) pairs from dirparser.parse_all_dirs.
+
+    The path => (id, is_deleted, content_hash) mapping of all directories is loaded up front; listed
+    directories are then processed in batches, with the existing records for the batch fetched in a
+    single query per table and compared in memory so that only the inserts, updates and deletion
+    marks that are actually required are sent to the database as bulk operations. Directories whose
+    listing hash matches the one stored on the record are not diffed at all.
+    """
+
+    def __init__(self):
+        self.now = datetime.datetime.now()
+        self.new_file_count = 0
+        self.dirs = {
+            path: [id, is_deleted, content_hash]
+            for id, path, is_deleted, content_hash in Directory.objects.values_list(
+                "id", "path", "is_deleted", "content_hash"
+            ).iterator()
+        }
+
+    def run(self, listing):
+        """Process the listing; returns the number of newly-created File records"""
+        batch = []
+        for path, entries in listing:
+            batch.append((path, entries))
+            if len(batch) >= BATCH_SIZE:
+                self.sync_batch(batch)
+                batch = []
+        if batch:
+            self.sync_batch(batch)
+
+        return self.new_file_count
+
+    def sync_batch(self, batch):
+        unchanged_dir_ids = []
+        changed_dirs = []
+        for path, entries in batch:
+            content_hash = listing_hash(entries)
+            existing = self.dirs.get(path)
+            if existing and not existing[1] and existing[2] == content_hash:
+                unchanged_dir_ids.append(existing[0])
+            else:
+                changed_dirs.append((path, entries, content_hash))
+
+        with transaction.atomic():
+            if unchanged_dir_ids:
+                Directory.objects.filter(id__in=unchanged_dir_ids).update(
+                    last_seen_at=self.now, last_spidered_at=self.now
+                )
+            if changed_dirs:
+                self.sync_changed_dirs(changed_dirs)
+
+    def create_dirs(self, paths):
+        """
+        Create Directory records for the given paths, and add them to the in-memory mapping.
+        Parents are created before their children, so that the parent ID is always known
+        if the parent exists
+        """
+        by_depth = {}
+        for path in paths:
+            by_depth.setdefault(path.count("/"), []).append(path)
+
+        for depth in sorted(by_depth):
+            new_dirs = []
+            for path in by_depth[depth]:
+                parent = self.dirs.get(parent_path(path))
+                new_dirs.append(Directory(path=path, last_seen_at=self.now, parent_id=(parent[0] if parent else None)))
+            Directory.objects.bulk_create(new_dirs)
+            for dir in new_dirs:
+                self.dirs[dir.path] = [dir.id, False, ""]
+
+    def mark_subtree_deleted(self, path):
+        Directory.objects.filter(path__startswith=path).update(is_deleted=True, content_hash="")
+        File.objects.filter(path__startswith=path).update(is_deleted=True)
+        for dir_path, record in self.dirs.items():
+            if dir_path.startswith(path):
+                record[1] = True
+                record[2] = ""
+
+    def sync_changed_dirs(self, changed_dirs):
+        listed_subdir_paths = set()
+        for path, entries, _ in changed_dirs:
+            for filename, is_dir, file_size in entries:
+                if is_dir:
+                    listed_subdir_paths.add(path + filename + "/")
+
+        # create records for listed directories and subdirectories that we don't know about yet
+        self.create_dirs(
+            {path for path, _, _ in changed_dirs if path not in self.dirs}
+            | {path for path in listed_subdir_paths if path not in self.dirs}
+        )
+        dir_ids = [self.dirs[path][0] for path, _, _ in changed_dirs]
+
+        # mark unlisted subdirectories (and everything below them) as deleted
+        for subpath in (
+            Directory.objects.filter(parent_id__in=dir_ids, is_deleted=False)
+            .exclude(path__in=listed_subdir_paths)
+            .values_list("path", flat=True)
+        ):
+            self.mark_subtree_deleted(subpath)
+
+        # mark listed subdirectories as seen, along with the listed directories themselves
+        Directory.objects.filter(id__in=[self.dirs[path][0] for path in listed_subdir_paths]).update(
+            last_seen_at=self.now, is_deleted=False
+        )
+        for path in listed_subdir_paths:
+            self.dirs[path][1] = False
+        Directory.objects.bulk_update(
+            [
+                Directory(
+                    id=self.dirs[path][0],
+                    content_hash=content_hash,
+                    is_deleted=False,
+                    last_seen_at=self.now,
+                    last_spidered_at=self.now,
+                )
+                for path, _, content_hash in changed_dirs
+            ],
+            ["content_hash", "is_deleted", "last_seen_at", "last_spidered_at"],
+        )
+        for path, _, content_hash in changed_dirs:
+            self.dirs[path][1:] = [False, content_hash]
+
+        # diff files against the existing records
+        existing_files = {
+            path: (id, size, is_deleted)
+            for id, path, size, is_deleted in File.objects.filter(directory_id__in=dir_ids).values_list(
+                "id", "path", "size", "is_deleted"
+            )
+        }
+        new_files = []
+        resized_files = []
+        seen_file_ids = []
+        for path, entries, _ in changed_dirs:
+            dir_id = self.dirs[path][0]
+            for filename, is_dir, file_size in entries:
+                if is_dir:
+                    continue
+                subpath = path + filename
+                file_size = None if file_size is None else int(file_size)
+                try:
+                    file_id, size, is_deleted = existing_files.pop(subpath)
+                except KeyError:
+                    new_files.append(File(path=subpath, last_seen_at=self.now, directory_id=dir_id, size=file_size))
+                    continue
+
+                seen_file_ids.append(file_id)
+                if file_size is not None and file_size != size:
+                    resized_files.append(File(id=file_id, size=file_size))
+
+        # anything left in existing_files was not listed
+        deleted_file_ids = [id for id, size, is_deleted in existing_files.values() if not is_deleted]
+
+        File.objects.bulk_create(new_files, ignore_conflicts=True, batch_size=1000)
+        File.objects.bulk_update(resized_files, ["size"], batch_size=1000)
+        File.objects.filter(id__in=seen_file_ids).update(last_seen_at=self.now, is_deleted=False)
+        if deleted_file_ids:
+            File.objects.filter(id__in=deleted_file_ids).update(is_deleted=True)
+
+        self.new_file_count += len(new_files)
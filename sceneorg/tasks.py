@@ -10,6 +10,7 @@ from django.conf import settings
 from demoscene.tasks import find_sceneorg_results_files
 from sceneorg.dirparser import parse_all_dirs
 from sceneorg.models import Directory, File
+from sceneorg.sync import DirListingSync
 
 
 # Get an instance of a logger
@@ -95,66 +96,7 @@ def pointless_call_to_make_coverage_notice_this_line():
 
 @shared_task(time_limit=7200, ignore_result=True)
 def scan_dir_listing():
-    new_file_count = 0
-    for path, entries in parse_all_dirs():
-        # print path
-        try:
-            dir = Directory.objects.get(path=path)
-        except Directory.DoesNotExist:
-            dir = Directory.objects.create(path=path, last_seen_at=datetime.datetime.now())
-
-        new_file_count += update_dir_records(dir, entries)
+    new_file_count = DirListingSync().run(parse_all_dirs())
 
     if new_file_count > 0:
         find_sceneorg_results_files()
-
-
-def update_dir_records(dir, files, mark_deletions=True):
-    seen_dirs = []
-    seen_files = []
-
-    new_file_count = 0
-
-    for filename, is_dir, file_size in files:
-        if is_dir:
-            subpath = dir.path + filename + "/"
-            try:
-                subdir = Directory.objects.get(path=subpath)
-                subdir.last_seen_at = datetime.datetime.now()
-                subdir.is_deleted = False
-                subdir.save()
-            except Directory.DoesNotExist:
-                subdir = Directory.objects.create(path=subpath, last_seen_at=datetime.datetime.now(), parent=dir)
-            seen_dirs.append(subdir)
-        else:
-            subpath = dir.path + filename
-            try:
-                file = File.objects.get(path=subpath)
-                file.last_seen_at = datetime.datetime.now()
-                file.is_deleted = False
-                if file_size is not None:
-                    file.size = file_size
-                file.save()
-            except File.DoesNotExist:
-                file = File.objects.create(
-                    path=subpath, last_seen_at=datetime.datetime.now(), directory=dir, size=file_size
-                )
-                new_file_count += 1
-            seen_files.append(file)
-
-    # Mark previously-seen-but-now-absent files as deleted
-    if mark_deletions:
-        for subdir in dir.subdirectories.filter(is_deleted=False):
-            if subdir not in seen_dirs:
-                subdir.mark_deleted()
-        for file in dir.files.filter(is_deleted=False):
-            if file not in seen_files:
-                file.is_deleted = True
-                file.save()
-        dir.last_spidered_at = datetime.datetime.now()
-
-    dir.last_seen_at = datetime.datetime.now()
-    dir.is_deleted = False
-    dir.save()
-
-    return new_file_count
@@ -65,3 +65,34 @@ class TestTasks(TestCase):
         self.assertTrue(Directory.objects.get(path="/warez/").is_deleted)
         self.assertTrue(Directory.objects.get(path="/warez/games/").is_deleted)
         self.assertTrue(File.objects.get(path="/world-domination-plans.txt").is_deleted)
+
+    @patch("sceneorg.tasks.parse_all_dirs")
+    def test_scan_dir_listing_skips_unchanged_dirs(self, parse_all_dirs):
+        parse_all_dirs.return_value = [
+            ("/", [("music", True, None)]),
+            ("/music/", [("mods", True, None), ("cocio.xm", False, "440607")]),
+            ("/music/mods/", [("4mat.mod", False, "1234")]),
+        ]
+        with freeze_time("2020-02-02"):
+            scan_dir_listing()
+
+        music_dir = Directory.objects.get(path="/music/")
+        self.assertEqual(music_dir.parent.path, "/")
+        self.assertEqual(Directory.objects.get(path="/music/mods/").parent, music_dir)
+        self.assertEqual(File.objects.get(path="/music/mods/4mat.mod").size, 1234)
+
+        parse_all_dirs.return_value = [
+            ("/", [("music", True, None)]),
+            ("/music/", [("mods", True, None), ("cocio.xm", False, "440607")]),
+            ("/music/mods/", [("4mat.mod", False, "1234"), ("purple-motion.s3m", False, "5678")]),
+        ]
+        with freeze_time("2020-03-03"):
+            scan_dir_listing()
+
+        # /music/ is unchanged, so its files are not revisited
+        music_dir.refresh_from_db()
+        self.assertEqual(music_dir.last_spidered_at, datetime.datetime(2020, 3, 3))
+        self.assertEqual(File.objects.get(path="/music/cocio.xm").last_seen_at, datetime.datetime(2020, 2, 2))
+        # /music/mods/ has changed
+        self.assertEqual(File.objects.get(path="/music/mods/4mat.mod").last_seen_at, datetime.datetime(2020, 3, 3))
+        self.assertTrue(File.objects.filter(path="/music/mods/purple-motion.s3m").exists())
@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import time
+import urllib
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from productions.models import Screenshot
+from screenshots.tasks import rebuild_screenshot
+
+
+# print a progress report after this many screenshots
+REPORT_INTERVAL = 100
+
+
+def rebuild(screenshot_id):
+    """
+    Rebuild the given screenshot in the current process. Returns a tuple of
+    (process ID, screenshot ID, seconds taken, error)
+    """
+    start_time = time.monotonic()
+    error = None
+    try:
+        # calling the task directly runs it synchronously, bypassing its rate limit
+        rebuild_screenshot(screenshot_id)
+    except (IOError, urllib.error.URLError) as ex:
+        error = ex
+    return os.getpid(), screenshot_id, time.monotonic() - start_time, error
+
+
+class Command(BaseCommand):
+    help = "Regenerate the original, standard and thumbnail versions of all screenshots"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Number of worker processes to split the rebuilding across"
+        )
+        parser.add_argument("--start-id", type=int, default=0, help="Only rebuild screenshots with ID >= this")
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        screenshot_ids = list(
+            Screenshot.objects.exclude(original_url="")
+            .filter(id__gte=options["start_id"])
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+        if workers <= 1:
+            results = map(rebuild, screenshot_ids)
+        else:
+            # worker processes must not share the parent's database connection
+            connections.close_all()
+            pool = multiprocessing.Pool(workers)
+            results = pool.imap_unordered(rebuild, screenshot_ids)
+
+        # per-worker count of screenshots and total time spent on them
+        worker_counts = {}
+        worker_times = {}
+        start_time = time.monotonic()
+        for i, (pid, screenshot_id, duration, error) in enumerate(results, 1):
+            worker_counts[pid] = worker_counts.get(pid, 0) + 1
+            worker_times[pid] = worker_times.get(pid, 0) + duration
+            if error:
+                print("screenshot %d: failed: %s" % (screenshot_id, error))
+
+            if i % REPORT_INTERVAL == 0:
+                self.report(i, len(screenshot_ids), start_time, worker_counts, worker_times)
+
+        if workers > 1:
+            pool.close()
+            pool.join()
+
+        self.report(len(screenshot_ids), len(screenshot_ids), start_time, worker_counts, worker_times)
+
+    def report(self, done_count, total_count, start_time, worker_counts, worker_times):
+        elapsed = time.monotonic() - start_time
+        print(
+            "%d/%d screenshots rebuilt in %.1fs (%.2f/s)"
+            % (done_count, total_count, elapsed, (done_count / elapsed) if elapsed else 0)
+        )
+        for pid in sorted(worker_counts):
+            count = worker_counts[pid]
+            busy_time = worker_times[pid]
+            print("  worker %d: %d screenshots, %.2f/s" % (pid, count, (count / busy_time) if busy_time else 0))
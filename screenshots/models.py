@@ -1,6 +1,7 @@
 import io
 
 from django.db import models
+from django.utils.functional import cached_property
 from PIL import Image, ImageOps
 from recoil import RecoilImage
 
@@ -149,6 +150,27 @@ class PILConvertibleImage(object):
         if opened_with_pil and self.image.format not in PIL_READABLE_FORMATS:
             raise IOError("Image format is not supported")
 
+        # record the size before any draft() call reduces it
+        self.original_size = self.image.size
+
+    def prepare_for_thumbnails(self, max_target_size):
+        """
+        Indicate that only thumbnails no larger than max_target_size will be rendered from the
+        decoded bitmap. For JPEGs (whose original rendition is the source file, passed through as-is)
+        this allows the image to be decoded at a reduced scale, which is much cheaper than decoding
+        at full size and resizing. Must be called before any version is created.
+        """
+        if self.file is not None and self.image.format == "JPEG":
+            # keep at least twice the target resolution so that the final resize is high quality
+            target_width, target_height = max_target_size
+            self.image.draft(self.image.mode, (target_width * 2, target_height * 2))
+
+    @cached_property
+    def transposed_image(self):
+        # decode the image (once only) and apply any EXIF orientation. exif_transpose must come before
+        # anything else that loads the pixel data, as that can discard the file handle needed to read EXIF
+        return ImageOps.exif_transpose(self.image)
+
     def create_original(self):
         """
         return a file object for an image of the same dimensions as the original, in a
@@ -156,14 +178,13 @@ class PILConvertibleImage(object):
         """
         if self.image.format in WEB_USABLE_FORMATS and self.file is not None:
             # just return the original file object, since it's already usable in that format
-            return self.file, self.image.size, EXTENSIONS_BY_FORMAT[self.image.format]
+            return self.file, self.original_size, EXTENSIONS_BY_FORMAT[self.image.format]
         else:
             # convert to PNG (a sensible choice for all non-web-native images, as it's reasonable
             # to assume that those formats are lossless - and even if they weren't, converting to
             # JPG and potentially losing more fidelity may not me ideal.)
             output = io.BytesIO()
-            img = self.image
-            img = ImageOps.exif_transpose(img)
+            img = self.transposed_image
             if img.mode == "RGBX":  # pragma: no cover
                 # image is padded RGB (as seen in certain .tif files) which can't be written as PNG.
                 # Possibly doesn't happen any more as of Pillow 10.4.0...
@@ -172,8 +193,7 @@ class PILConvertibleImage(object):
             return output, img.size, "png"
 
     def create_thumbnail(self, target_size):
-        img = self.image
-        img = ImageOps.exif_transpose(img)
+        img = self.transposed_image
 
         crop_params, resize_params = get_thumbnail_sizing_params(img.size, target_size)
         if crop_params:
@@ -188,7 +208,9 @@ class PILConvertibleImage(object):
             # must ensure image is non-paletted for a high-quality resize
             if img.mode in ["1", "P"]:
                 img = img.convert("RGB")
-            img = img.resize(resize_params, Image.Resampling.LANCZOS)
+            # reducing_gap makes PIL shrink the image by an integer factor with reduce() first (which is
+            # cheap) and only apply the expensive Lanczos filter for the final step
+            img = img.resize(resize_params, Image.Resampling.LANCZOS, reducing_gap=3.0)
 
         output = io.BytesIO()
         if has_limited_palette:
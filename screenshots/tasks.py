@@ -5,6 +5,7 @@ import re
 import urllib
 import uuid
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
 from celery import shared_task
 from django.conf import settings
@@ -29,22 +30,33 @@ def create_basename(screenshot_id):
     return u[0:2] + "/" + u[2:4] + "/" + u[4:8] + "." + str(screenshot_id) + "."
 
 
-def upload_original(img, screenshot, basename):
-    orig, orig_size, orig_format = img.create_original()
-    screenshot.original_url = upload_to_s3(orig, "screens/o/" + basename + orig_format)
-    screenshot.original_width, screenshot.original_height = orig_size
+# thread pool for uploading the versions of a screenshot concurrently. Threads (and hence the per-thread
+# S3 connections of the storage backend) persist between tasks
+upload_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="screenshot-upload")
 
 
-def upload_standard(img, screenshot, basename):
+def upload_screenshot_versions(img, screenshot, basename):
+    """
+    Render the standard, thumbnail and original versions of the PILConvertibleImage img from a single
+    decoded bitmap, upload them concurrently, and populate the URL and dimension fields of screenshot
+    """
+    img.prepare_for_thumbnails((400, 300))
     standard, standard_size, standard_format = img.create_thumbnail((400, 300))
-    screenshot.standard_url = upload_to_s3(standard, "screens/s/" + basename + standard_format)
-    screenshot.standard_width, screenshot.standard_height = standard_size
+    thumb, thumb_size, thumb_format = img.create_thumbnail((200, 150))
+    # create the original version last, because if it's already a websafe format it'll just return
+    # the original file handle, and the storage backend might close the file after uploading
+    orig, orig_size, orig_format = img.create_original()
 
+    standard_upload = upload_executor.submit(upload_to_s3, standard, "screens/s/" + basename + standard_format)
+    thumb_upload = upload_executor.submit(upload_to_s3, thumb, "screens/t/" + basename + thumb_format)
+    orig_upload = upload_executor.submit(upload_to_s3, orig, "screens/o/" + basename + orig_format)
 
-def upload_thumb(img, screenshot, basename):
-    thumb, thumb_size, thumb_format = img.create_thumbnail((200, 150))
-    screenshot.thumbnail_url = upload_to_s3(thumb, "screens/t/" + basename + thumb_format)
+    screenshot.standard_url = standard_upload.result()
+    screenshot.standard_width, screenshot.standard_height = standard_size
+    screenshot.thumbnail_url = thumb_upload.result()
     screenshot.thumbnail_width, screenshot.thumbnail_height = thumb_size
+    screenshot.original_url = orig_upload.result()
+    screenshot.original_width, screenshot.original_height = orig_size
 
 
 @shared_task(ignore_result=True)
@@ -55,12 +67,7 @@ def create_screenshot_versions_from_local_file(screenshot_id, filename):
         img = PILConvertibleImage(f, name_hint=filename)
 
         basename = create_basename(screenshot_id)
-        upload_standard(img, screenshot, basename)
-        upload_thumb(img, screenshot, basename)
-        # leave original until last, because if it's already a websafe format it'll just return
-        # the original file handle, and the storage backend might close the file after uploading
-        # which screws with PIL's ability to create resized versions...
-        upload_original(img, screenshot, basename)
+        upload_screenshot_versions(img, screenshot, basename)
         screenshot.save()
 
         f.close()
@@ -84,12 +91,7 @@ def rebuild_screenshot(screenshot_id):
         img = PILConvertibleImage(buf, screenshot.original_url.split("/")[-1])
 
         basename = create_basename(screenshot_id)
-        upload_standard(img, screenshot, basename)
-        upload_thumb(img, screenshot, basename)
-        # leave original until last, because if it's already a websafe format it'll just return
-        # the original file handle, and the storage backend might close the file after uploading
-        # which screws with PIL's ability to create resized versions...
-        upload_original(img, screenshot, basename)
+        upload_screenshot_versions(img, screenshot, basename)
         screenshot.save()
 
         f.close()
@@ -171,12 +173,7 @@ def create_screenshot_from_production_link(production_link_id):
     screenshot = Screenshot(production_id=production_id)
     basename = sha1[0:2] + "/" + sha1[2:4] + "/" + sha1[4:8] + ".pl" + str(production_link_id) + "."
     try:
-        upload_standard(img, screenshot, basename)
-        upload_thumb(img, screenshot, basename)
-        # leave original until last, because if it's already a websafe format it'll just return
-        # the original file handle, and the storage backend might close the file after uploading
-        # which screws with PIL's ability to create resized versions...
-        upload_original(img, screenshot, basename)
+        upload_screenshot_versions(img, screenshot, basename)
     except IOError:  # pragma: no cover
         prod_link.has_bad_image = True
         prod_link.save()
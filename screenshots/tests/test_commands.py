@@ -6,7 +6,7 @@ from django.test import TestCase
 from django.test.utils import captured_stdout
 
 from mirror.models import ArchiveMember, Download
-from productions.models import Production, ProductionType
+from productions.models import Production, ProductionType, Screenshot
 
 
 class TestFetchRemoteScreenshots(TestCase):
@@ -170,3 +170,27 @@ class TestFetchRemoteZippedScreenshots(TestCase):
 
         link.refresh_from_db()
         self.assertTrue(link.is_unresolved_for_screenshotting)
+
+
+class TestRebuildScreenshots(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    @patch("screenshots.tasks.upload_to_s3")
+    def test_run(self, upload_to_s3):
+        skyrider = Production.objects.get(title="Skyrider")
+        screenshot = Screenshot.objects.create(
+            production=skyrider,
+            original_url="http://kestra.exotica.org.uk/files/screenies/28000/154a.png",
+            original_width=400,
+            original_height=300,
+        )
+        upload_to_s3.return_value = "http://example.com/screens/skyrider.png"
+
+        with captured_stdout() as stdout:
+            call_command("rebuild_screenshots")
+
+        screenshot.refresh_from_db()
+        self.assertEqual(screenshot.original_url, "http://example.com/screens/skyrider.png")
+        self.assertEqual(screenshot.original_width, 640)
+        self.assertIn("1/1 screenshots rebuilt", stdout.getvalue())
+        self.assertIn("1 screenshots", stdout.getvalue())
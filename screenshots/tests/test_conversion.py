@@ -1,3 +1,4 @@
+import io
 import math
 import os.path
 
@@ -109,3 +110,23 @@ class TestConversion(TestCase):
         self.assertEqual(thumb_size, (200, 150))
         self.assertEqual(thumb_format, "jpg")
         self.assertImagesSimilar(thumb_output, os.path.join(TEST_IMAGES_DIR, "bfield-thumb.out.jpg"))
+
+    def test_draft_jpeg(self):
+        source = io.BytesIO()
+        Image.new("RGB", (3200, 2400), (255, 128, 0)).save(source, format="JPEG")
+        source.seek(0)
+
+        img = PILConvertibleImage(source, name_hint="big.jpg")
+        img.prepare_for_thumbnails((400, 300))
+        std_output, std_size, std_format = img.create_thumbnail((400, 300))
+        thumb_output, thumb_size, thumb_format = img.create_thumbnail((200, 150))
+        orig_output, orig_size, orig_format = img.create_original()
+
+        # the image should have been decoded at reduced scale, but not below twice the target size
+        self.assertEqual(img.image.size, (800, 600))
+        self.assertEqual(std_size, (400, 300))
+        self.assertEqual(thumb_size, (200, 150))
+        # the original is passed through unchanged
+        self.assertIs(orig_output, source)
+        self.assertEqual(orig_size, (3200, 2400))
+        self.assertEqual(orig_format, "jpg")
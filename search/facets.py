@@ -0,0 +1,94 @@
+"""
+Cached resolution of the names given in search filter expressions (platform:, type:, by:, group:, of:,
+tagged:) to record ids, so that SearchForm.search can filter on integer ids instead of joining through
+the name tables on every search.
+
+Each kind of facet has a generation token in the cache, which is discarded by the signal handlers in
+search.signals whenever the underlying names change; the cached lookups are keyed on the current token,
+so that discarding it makes them all unreachable at once.
+"""
+
+import uuid
+from urllib.parse import quote
+
+from django.core.cache import cache
+
+
+FACET_CACHE_TIMEOUT = 3600
+
+
+def get_generation(facet):
+    key = "search-facets:%s:generation" % facet
+    generation = cache.get(key)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add(key, generation, timeout=None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def expire_facet(facet):
+    cache.delete("search-facets:%s:generation" % facet)
+
+
+def cached_lookup(facet, name, lookup):
+    """Return the cached result of lookup() for the given facet and name, calling it if necessary"""
+    key = "search-facets:%s:%s:%s" % (facet, get_generation(facet), quote(name))
+    result = cache.get(key)
+    if result is None:
+        result = lookup()
+        cache.set(key, result, FACET_CACHE_TIMEOUT)
+    return result
+
+
+def get_platform_ids(names):
+    """Return the ids of platforms with any of the given names or aliases (case-insensitive)"""
+    from platforms.models import Platform, PlatformAlias
+
+    def lookup():
+        ids_by_name = {}
+        for platform_id, name in Platform.objects.values_list("id", "name"):
+            ids_by_name.setdefault(name.lower(), []).append(platform_id)
+        for platform_id, name in PlatformAlias.objects.values_list("platform_id", "name"):
+            ids_by_name.setdefault(name.lower(), []).append(platform_id)
+        return ids_by_name
+
+    ids_by_name = cached_lookup("platform", "all", lookup)
+    return sorted({platform_id for name in names for platform_id in ids_by_name.get(name.lower(), [])})
+
+
+def get_production_type_ids(names):
+    """Return the ids of production types with any of the given names (case-insensitive)"""
+    from productions.models import ProductionType
+
+    def lookup():
+        ids_by_name = {}
+        for type_id, name in ProductionType.objects.values_list("id", "name"):
+            ids_by_name.setdefault(name.lower(), []).append(type_id)
+        return ids_by_name
+
+    ids_by_name = cached_lookup("production_type", "all", lookup)
+    return sorted({type_id for name in names for type_id in ids_by_name.get(name.lower(), [])})
+
+
+def get_tag_ids(name):
+    """Return the ids of tags with the given name (a list of zero or one ids)"""
+    from taggit.models import Tag
+
+    return cached_lookup("tag", name, lambda: list(Tag.objects.filter(name=name).values_list("id", flat=True)))
+
+
+def get_releasers_by_name(clean_name):
+    """
+    Return a list of (id, is_group) tuples for the releasers that have ever used a nick variant
+    with the given search title
+    """
+    from demoscene.models import Releaser
+
+    return cached_lookup(
+        "releaser",
+        clean_name,
+        lambda: list(
+            Releaser.objects.filter(nicks__variants__search_title=clean_name).distinct().values_list("id", "is_group")
+        ),
+    )
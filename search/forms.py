@@ -13,8 +13,8 @@ from common.utils.fuzzy_date import FuzzyDate
 from common.utils.text import generate_search_title
 from demoscene.models import Releaser
 from parties.models import Party
-from platforms.models import Platform
-from productions.models import Production, ProductionType, Screenshot
+from productions.models import Production, ReleaserProduction
+from search.facets import get_platform_ids, get_production_type_ids, get_releasers_by_name, get_tag_ids
 
 
 class TSHeadline(Func):
@@ -116,13 +116,7 @@ class SearchForm(forms.Form):
             subqueries_to_perform &= set(["production"])
             platforms = filter_expressions["platform"] | filter_expressions["on"]
 
-            platform_ids = Platform.objects.none().values_list("id", flat=True)
-            for platform_name in platforms:
-                platform_ids |= Platform.objects.filter(
-                    Q(name__iexact=platform_name) | Q(aliases__name__iexact=platform_name)
-                ).values_list("id", flat=True)
-
-            production_filter_q &= Q(platforms__id__in=list(platform_ids))
+            production_filter_q &= Q(platforms__id__in=get_platform_ids(platforms))
 
         if "screenshot" in filter_expressions or "screenshots" in filter_expressions:
             subqueries_to_perform &= set(["production"])
@@ -136,46 +130,47 @@ class SearchForm(forms.Form):
         if "by" in filter_expressions or "author" in filter_expressions:
             subqueries_to_perform &= set(["production"])
             for name in filter_expressions["by"] | filter_expressions["author"]:
-                clean_name = generate_search_title(name)
-                production_filter_q &= (
-                    # join back through releaser so that we match any nick variant ever used by the author,
-                    # not just the nick used on the prod. Better to err on the side of being too liberal
-                    Q(author_nicks__releaser__nicks__variants__search_title=clean_name)
-                    | Q(author_affiliation_nicks__releaser__nicks__variants__search_title=clean_name)
+                # match any nick variant ever used by the author, not just the nick used on the prod.
+                # Better to err on the side of being too liberal
+                releaser_ids = [
+                    releaser_id for releaser_id, is_group in get_releasers_by_name(generate_search_title(name))
+                ]
+                production_filter_q &= Q(
+                    id__in=ReleaserProduction.objects.filter(
+                        releaser_id__in=releaser_ids, role__in=["author", "affiliation"]
+                    ).values("production_id")
                 )
 
         if "of" in filter_expressions:
             subqueries_to_perform &= set(["releaser"])
             for name in filter_expressions["of"]:
-                clean_name = generate_search_title(name)
-                releaser_filter_q &= Q(
-                    is_group=False, group_memberships__group__nicks__variants__search_title=clean_name
-                )
+                releaser_ids = [
+                    releaser_id for releaser_id, is_group in get_releasers_by_name(generate_search_title(name))
+                ]
+                releaser_filter_q &= Q(is_group=False, group_memberships__group_id__in=releaser_ids)
 
         if "group" in filter_expressions:
             subqueries_to_perform &= set(["production", "releaser"])
             for name in filter_expressions["group"]:
-                clean_name = generate_search_title(name)
-                releaser_filter_q &= Q(
-                    is_group=False, group_memberships__group__nicks__variants__search_title=clean_name
-                )
-                production_filter_q &= (
-                    # join back through releaser so that we match any nick variant ever used by the author,
-                    # not just the nick used on the prod. Better to err on the side of being too liberal
-                    Q(
-                        author_nicks__releaser__is_group=True,
-                        author_nicks__releaser__nicks__variants__search_title=clean_name,
-                    )
-                    | Q(author_affiliation_nicks__releaser__nicks__variants__search_title=clean_name)
+                releasers = get_releasers_by_name(generate_search_title(name))
+                releaser_ids = [releaser_id for releaser_id, is_group in releasers]
+                group_ids = [releaser_id for releaser_id, is_group in releasers if is_group]
+                releaser_filter_q &= Q(is_group=False, group_memberships__group_id__in=releaser_ids)
+                # match any nick variant ever used by the group, not just the nick used on the prod.
+                # Better to err on the side of being too liberal
+                production_filter_q &= Q(
+                    id__in=ReleaserProduction.objects.filter(
+                        Q(releaser_id__in=group_ids, role="author")
+                        | Q(releaser_id__in=releaser_ids, role="affiliation")
+                    ).values("production_id")
                 )
 
         if tag_names or ("tagged" in filter_expressions):
             subqueries_to_perform &= set(["production", "bbs"])
             for tag_name in filter_expressions["tagged"] | tag_names:
-                production_filter_q &= Q(
-                    id__in=Production.objects.filter(tags__name=tag_name).values_list("id", flat=True)
-                )
-                bbs_filter_q &= Q(id__in=BBS.objects.filter(tags__name=tag_name).values_list("id", flat=True))
+                tag_ids = get_tag_ids(tag_name)
+                production_filter_q &= Q(id__in=Production.objects.filter(tags__id__in=tag_ids).values("id"))
+                bbs_filter_q &= Q(id__in=BBS.objects.filter(tags__id__in=tag_ids).values("id"))
 
         if "year" in filter_expressions or "date" in filter_expressions:
             subqueries_to_perform &= set(["production", "party"])
@@ -274,13 +269,8 @@ class SearchForm(forms.Form):
                     production_types.add(val)
 
             if production_types:
-                prod_type_names_q = Q()
-                for name in production_types:
-                    prod_type_names_q |= Q(name__iexact=name)
-                prod_type_ids = ProductionType.objects.filter(prod_type_names_q).values_list("id", flat=True)
-
                 subqueries_from_type.add("production")
-                production_filter_q &= Q(types__in=prod_type_ids)
+                production_filter_q &= Q(types__in=get_production_type_ids(production_types))
 
             subqueries_to_perform &= subqueries_from_type
 
@@ -433,7 +423,8 @@ class SearchForm(forms.Form):
         else:
             qs = qs.order_by("-exactness", "rank", "pk")
 
-        # Apply pagination to the query before performing the (expensive) real data fetches.
+        # Apply pagination to the query before performing the (expensive) real data fetches,
+        # including the TSHeadline snippets, which are only computed for the rows on this page.
 
         paginator = Paginator(qs, count)
         # If page request (9999) is out of range, deliver last page of results.
@@ -458,10 +449,8 @@ class SearchForm(forms.Form):
             )
             if has_search_term:
                 productions = productions.annotate(search_snippet=TSHeadline("notes", psql_query))
-            screenshots = Screenshot.select_for_production_ids(production_ids)
-
             for prod in productions:
-                prod.selected_screenshot = screenshots.get(prod.pk)
+                prod.selected_screenshot = prod.representative_thumbnail
                 # Ignore any search snippets that don't actually contain a highlighted term
                 prod.has_search_snippet = has_search_term and "<b>" in prod.search_snippet
                 fetched[("production", prod.pk)] = prod
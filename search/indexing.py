@@ -1,8 +1,150 @@
 import operator
+import time
 from functools import reduce
 
+import redis
+from django.apps import apps
+from django.conf import settings
 from django.contrib.postgres.search import SearchVector
-from django.db.models import TextField, Value
+from django.db import connection, transaction
+from django.db.models import TextField, Value, prefetch_related_objects
+
+
+INDEXED_MODELS = ["bbs.BBS", "parties.Party", "demoscene.Releaser", "productions.Production"]
+
+# the object_type recorded against each indexed model in the SearchPrefix table
+SEARCH_PREFIX_OBJECT_TYPES = {
+    "bbs.BBS": "bbs",
+    "parties.Party": "party",
+    "demoscene.Releaser": "releaser",
+    "productions.Production": "production",
+}
+
+
+def get_indexing_queryset(model_label, since=None):
+    """
+    Return the queryset of objects to be indexed for the given model, with the relations
+    needed by index_components prefetched. If 'since' is given, only return objects with an
+    updated_at later than that (for models that have an updated_at field)
+    """
+    model = apps.get_model(model_label)
+    qs = model.objects.order_by("pk").defer("search_document")
+
+    if model_label == "bbs.BBS":
+        qs = qs.prefetch_related("names", "tags")
+    elif model_label == "demoscene.Releaser":
+        qs = qs.prefetch_related("nicks__variants")
+    elif model_label == "productions.Production":
+        qs = qs.prefetch_related("tags", "author_nicks", "author_affiliation_nicks")
+
+    if since is not None and any(field.name == "updated_at" for field in model._meta.get_fields()):
+        qs = qs.filter(updated_at__gt=since)
+
+    return qs
+
+
+def build_search_prefixes(instances):
+    """
+    Return a list of unsaved SearchPrefix records for a list of instances of the same indexed model,
+    with the result data for live search rendered in advance. Related objects are prefetched onto
+    the instances, so they should not be ones that are still in use elsewhere
+    """
+    from search.models import SearchPrefix
+
+    object_type = SEARCH_PREFIX_OBJECT_TYPES[instances[0]._meta.label]
+    prefixes = []
+
+    if object_type == "production":
+        prefetch_related_objects(instances, "author_nicks__releaser", "author_affiliation_nicks__releaser")
+        for production in instances:
+            screenshot = production.representative_thumbnail
+            if screenshot:
+                width, height = screenshot.thumb_dimensions_to_fit(48, 36)
+                thumbnail = {
+                    "url": screenshot.thumbnail_url,
+                    "width": width,
+                    "height": height,
+                    "natural_width": screenshot.thumbnail_width,
+                    "natural_height": screenshot.thumbnail_height,
+                }
+            else:
+                thumbnail = None
+
+            prefixes.append(
+                SearchPrefix(
+                    search_title=production.search_title,
+                    kind=production.supertype,
+                    object_type=object_type,
+                    object_id=production.pk,
+                    url=production.get_absolute_url(),
+                    value=production.title_with_byline,
+                    thumbnail=thumbnail,
+                )
+            )
+
+    elif object_type == "releaser":
+        prefetch_related_objects(instances, "nicks__variants", "group_memberships__group__nicks")
+
+        for releaser in instances:
+            nicks = releaser.nicks.all()
+            # look for the primary nick in the prefetched list; it may not exist yet if the releaser
+            # is still being created
+            primary_nicks = [nick for nick in nicks if nick.name == releaser.name]
+            if primary_nicks and primary_nicks[0].differentiator:
+                differentiator = " (%s)" % primary_nicks[0].differentiator
+            else:
+                differentiator = ""
+
+            value = releaser.name_with_affiliations() + differentiator
+            search_titles = {variant.search_title for nick in nicks for variant in nick.variants.all()}
+            for search_title in search_titles:
+                prefixes.append(
+                    SearchPrefix(
+                        search_title=search_title,
+                        kind="group" if releaser.is_group else "scener",
+                        object_type=object_type,
+                        object_id=releaser.pk,
+                        url=releaser.get_absolute_url(),
+                        value=value,
+                    )
+                )
+
+    else:
+        for instance in instances:
+            prefixes.append(
+                SearchPrefix(
+                    search_title=instance.search_title,
+                    kind=object_type,
+                    object_type=object_type,
+                    object_id=instance.pk,
+                    url=instance.get_absolute_url(),
+                    value=instance.name,
+                )
+            )
+
+    return [prefix for prefix in prefixes if prefix.search_title]
+
+
+def update_search_prefixes(instances):
+    """
+    Replace the SearchPrefix records for a list of instances of the same indexed model
+    """
+    from search.models import SearchPrefix
+
+    if not instances:
+        return
+
+    object_type = SEARCH_PREFIX_OBJECT_TYPES[instances[0]._meta.label]
+    SearchPrefix.objects.filter(object_type=object_type, object_id__in=[instance.pk for instance in instances]).delete()
+    SearchPrefix.objects.bulk_create(build_search_prefixes(instances))
+
+
+def delete_search_prefixes(instance):
+    from search.models import SearchPrefix
+
+    SearchPrefix.objects.filter(
+        object_type=SEARCH_PREFIX_OBJECT_TYPES[instance._meta.label], object_id=instance.pk
+    ).delete()
 
 
 def index(instance):
@@ -13,3 +155,138 @@ def index(instance):
     for weight, text in components.items():
         search_vectors.append(SearchVector(Value(text, output_field=TextField()), weight=weight))
     instance.__class__.objects.filter(pk=pk).update(search_document=reduce(operator.add, search_vectors))
+
+
+def index_batch(instances):
+    """
+    Recompute the search documents for a list of instances of the same model, and write them
+    all back in a single UPDATE statement. Produces the same search_document as calling index()
+    on each instance in turn.
+    """
+    if not instances:
+        return
+
+    model = instances[0].__class__
+    rows = [(instance.pk, instance.index_components()) for instance in instances]
+    weights = list(rows[0][1].keys())
+
+    quote_name = connection.ops.quote_name
+    table = quote_name(model._meta.db_table)
+    pk_column = quote_name(model._meta.pk.column)
+
+    value_columns = ["weight_%s" % weight.lower() for weight in weights]
+    row_placeholder = "(%s)" % ", ".join(["%s::integer"] + ["%s::text"] * len(weights))
+    search_document = " || ".join(
+        "setweight(to_tsvector(COALESCE(v.%s, '')), '%s')" % (column, weight)
+        for column, weight in zip(value_columns, weights)
+    )
+
+    sql = "UPDATE %s SET search_document = %s FROM (VALUES %s) AS v(id, %s) WHERE %s.%s = v.id" % (
+        table,
+        search_document,
+        ", ".join([row_placeholder] * len(rows)),
+        ", ".join(value_columns),
+        table,
+        pk_column,
+    )
+    params = []
+    for pk, components in rows:
+        params.append(pk)
+        params.extend(components[weight] for weight in weights)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def get_queue_key(model_label):
+    return "demozoo:search:index_queue:%s" % model_label
+
+
+def get_prefix_queue_key(model_label):
+    return "demozoo:search:prefix_queue:%s" % model_label
+
+
+def enqueue(instance):
+    """
+    Mark the given instance as needing to be reindexed by the next run of process_index_queue.
+    The queue for each model is a Redis sorted set of primary keys, scored by the time they were
+    first queued; repeated saves of the same object before it is processed are coalesced into a
+    single entry.
+    """
+    r = redis.StrictRedis.from_url(settings.REDIS_URL)
+    r.zadd(get_queue_key(instance._meta.label), {instance.pk: time.time()}, nx=True)
+
+
+def enqueue_search_prefixes(model, pks):
+    """
+    Mark the SearchPrefix records for the given objects as needing to be rebuilt by the next run of
+    process_index_queue, coalescing repeated requests in the same way as enqueue
+    """
+    r = redis.StrictRedis.from_url(settings.REDIS_URL)
+    now = time.time()
+    r.zadd(get_prefix_queue_key(model._meta.label), {pk: now for pk in pks}, nx=True)
+
+
+def process_index_queue(batch_size=1000):
+    """
+    Reindex all objects currently in the index queue, and rebuild the SearchPrefix records for those in
+    the prefix queue, in batches of up to batch_size. Returns the number of objects processed
+    """
+    r = redis.StrictRedis.from_url(settings.REDIS_URL)
+    count = 0
+
+    for model_label in INDEXED_MODELS:
+        key = get_queue_key(model_label)
+        while True:
+            # popping the entries before indexing means that any saves that happen while we're
+            # indexing will put the object back on the queue, rather than being lost
+            entries = r.zpopmin(key, batch_size)
+            if not entries:
+                break
+
+            pks = [int(pk) for pk, score in entries]
+            try:
+                with transaction.atomic():
+                    index_batch(list(get_indexing_queryset(model_label).filter(pk__in=pks)))
+            except Exception:
+                # return the entries to the queue to be retried on the next run
+                r.zadd(key, dict(entries), nx=True)
+                raise
+
+            count += len(entries)
+
+        key = get_prefix_queue_key(model_label)
+        model = apps.get_model(model_label)
+        while True:
+            entries = r.zpopmin(key, batch_size)
+            if not entries:
+                break
+
+            pks = [int(pk) for pk, score in entries]
+            try:
+                with transaction.atomic():
+                    update_search_prefixes(list(model.objects.filter(pk__in=pks)))
+            except Exception:
+                r.zadd(key, dict(entries), nx=True)
+                raise
+
+            count += len(entries)
+
+    return count
+
+
+def get_index_queue_lag():
+    """
+    Return a dict of (queue length, seconds since the oldest entry was queued) for each indexed model
+    """
+    r = redis.StrictRedis.from_url(settings.REDIS_URL)
+    now = time.time()
+    lag = {}
+
+    for model_label in INDEXED_MODELS:
+        key = get_queue_key(model_label)
+        length = r.zcard(key)
+        oldest = r.zrange(key, 0, 0, withscores=True)
+        lag[model_label] = (length, (now - oldest[0][1]) if oldest else 0)
+
+    return lag
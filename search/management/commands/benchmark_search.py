@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from search.forms import SearchForm
+
+
+# a spread of plain and filtered searches, in the forms that appear in the site logs
+REPRESENTATIVE_SEARCHES = [
+    "second reality",
+    "farbrausch",
+    "pondlife",
+    "state of the art",
+    "platform:amiga",
+    "on:zx-spectrum type:demo",
+    "by:gasman",
+    'by:"future crew" type:music',
+    "group:hooy-program",
+    'of:"raww arse"',
+    "tagged:fish",
+    "[fish] on:zx-spectrum",
+    "demo year:1995",
+    "after:2000 before:2010 type:intro",
+    "party type:party",
+    "bbs type:bbs",
+    "screenshot:no on:c64",
+]
+
+
+class Command(BaseCommand):
+    """
+    Run a corpus of representative searches through SearchForm.search, and report the number of
+    queries and time taken for each, with the filter name lookups uncached and then cached
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="*", help="Searches to run, in place of the built-in corpus")
+        parser.add_argument("--repeat", type=int, default=3, help="Number of cached runs to time for each search")
+
+    def handle(self, *args, **kwargs):
+        queries = kwargs["queries"] or REPRESENTATIVE_SEARCHES
+        repeat = kwargs["repeat"]
+
+        total_first_time = total_cached_time = 0
+        for query in queries:
+            form = SearchForm({"q": query})
+            if not form.is_valid():
+                print("%s: invalid search" % query)
+                continue
+
+            # the first run populates the name lookup cache
+            with CaptureQueriesContext(connection) as first_queries:
+                start_time = time.perf_counter()
+                results, page = form.search()
+                first_time = time.perf_counter() - start_time
+
+            with CaptureQueriesContext(connection) as cached_queries:
+                start_time = time.perf_counter()
+                for i in range(repeat):
+                    form.search()
+                cached_time = (time.perf_counter() - start_time) / repeat
+
+            total_first_time += first_time
+            total_cached_time += cached_time
+            print(
+                "%s: %d results, %d queries / %.1fms first run, %d queries / %.1fms cached"
+                % (
+                    query,
+                    page.paginator.count,
+                    len(first_queries),
+                    first_time * 1000,
+                    len(cached_queries) // repeat,
+                    cached_time * 1000,
+                )
+            )
+
+        print("Total: %.1fms first run, %.1fms cached" % (total_first_time * 1000, total_cached_time * 1000))
@@ -1,35 +1,90 @@
+import datetime
+import multiprocessing
+
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import connections, transaction
+from django.db.models import Max, Min
+
+from search.indexing import INDEXED_MODELS, get_indexing_queryset, index_batch, update_search_prefixes
+
+
+BATCH_SIZE = 1000
+
+# number of primary keys covered by each unit of work handed to a worker process
+CHUNK_SIZE = BATCH_SIZE * 10
+
+
+def reindex_range(model_label, start_pk=None, end_pk=None, since=None):
+    """
+    Reindex all objects of the given model with start_pk <= pk < end_pk, in batches of
+    BATCH_SIZE. Returns the number of objects indexed
+    """
+    qs = get_indexing_queryset(model_label, since=since)
+    if start_pk is not None:
+        qs = qs.filter(pk__gte=start_pk)
+    if end_pk is not None:
+        qs = qs.filter(pk__lt=end_pk)
+
+    count = 0
+    last_pk = None
+    while True:
+        with transaction.atomic():
+            batch_qs = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+            batch = list(batch_qs[:BATCH_SIZE])
+            index_batch(batch)
+            update_search_prefixes(batch)
 
-from bbs.models import BBS
-from demoscene.models import Releaser
-from parties.models import Party
-from productions.models import Production
-from search.indexing import index
+        count += len(batch)
+        if len(batch) < BATCH_SIZE:
+            return count
+        last_pk = batch[-1].pk
+
+
+def reindex_chunk(args):
+    model_label, start_pk, end_pk, since = args
+    return model_label, reindex_range(model_label, start_pk, end_pk, since=since)
 
 
 class Command(BaseCommand):
     help = "Re-indexes all searchable models"
 
-    def handle(self, *args, **kwargs):
-        BATCH_SIZE = 1000
-
-        for klass, qs in [
-            (BBS, BBS.objects.order_by("pk").defer("search_document")),
-            (Party, Party.objects.order_by("pk").defer("search_document")),
-            (Releaser, Releaser.objects.order_by("pk").prefetch_related("nicks__variants").defer("search_document")),
-            (Production, Production.objects.order_by("pk").prefetch_related("tags").defer("search_document")),
-        ]:
-            i = 0
-            while True:
-                with transaction.atomic():
-                    batch = qs[i : (i + BATCH_SIZE)]
-
-                    for obj in batch:
-                        index(obj)
-                        i += 1
-                        if i % 100 == 0:  # pragma: no cover
-                            print(klass, i)
-
-                if len(batch) < BATCH_SIZE:
-                    break
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Number of worker processes to split the reindexing across"
+        )
+        parser.add_argument(
+            "--since",
+            type=datetime.datetime.fromisoformat,
+            help=(
+                "Only reindex records updated after this date/time (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS). "
+                "Models without an updated_at field are always reindexed in full"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        since = options["since"]
+
+        if workers <= 1:
+            for model_label in INDEXED_MODELS:
+                count = reindex_range(model_label, since=since)
+                print("%s: indexed %d records" % (model_label, count))
+            return
+
+        # split the pk range of each model into chunks to be distributed across workers
+        chunks = []
+        for model_label in INDEXED_MODELS:
+            pk_range = get_indexing_queryset(model_label, since=since).aggregate(first_pk=Min("pk"), last_pk=Max("pk"))
+            if pk_range["first_pk"] is None:
+                continue
+            for start_pk in range(pk_range["first_pk"], pk_range["last_pk"] + 1, CHUNK_SIZE):
+                chunks.append((model_label, start_pk, start_pk + CHUNK_SIZE, since))
+
+        # worker processes must not share the parent's database connection
+        connections.close_all()
+
+        counts = {model_label: 0 for model_label in INDEXED_MODELS}
+        with multiprocessing.Pool(workers) as pool:
+            for model_label, count in pool.imap_unordered(reindex_chunk, chunks):
+                counts[model_label] += count
+                print("%s: indexed %d records" % (model_label, counts[model_label]))
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPrefix',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('search_title', models.CharField(max_length=255)),
+                ('kind', models.CharField(max_length=16)),
+                ('object_type', models.CharField(max_length=16)),
+                ('object_id', models.IntegerField()),
+                ('url', models.CharField(max_length=255)),
+                ('value', models.TextField()),
+                ('thumbnail', models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['search_title'], name='search_prefix_title', opclasses=['text_pattern_ops']), models.Index(fields=['object_type', 'object_id'], name='search_prefix_object')],
+            },
+        ),
+    ]
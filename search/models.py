@@ -1 +1,29 @@
-# Create your models here.
+from django.db import models
+
+
+class SearchPrefix(models.Model):
+    """
+    A searchable name of a production, releaser, party or BBS, along with everything needed to
+    display it as a live search result. Maintained by search.indexing.update_search_prefixes
+    """
+
+    search_title = models.CharField(max_length=255)
+    # production supertype, 'scener', 'group', 'party' or 'bbs' - as used for the live search categories
+    kind = models.CharField(max_length=16)
+    # 'production', 'releaser', 'party' or 'bbs'
+    object_type = models.CharField(max_length=16)
+    object_id = models.IntegerField()
+
+    url = models.CharField(max_length=255)
+    value = models.TextField()
+    thumbnail = models.JSONField(null=True, blank=True)
+
+    def __str__(self):
+        return self.search_title
+
+    class Meta:
+        indexes = [
+            # supports search_title LIKE 'prefix%' queries regardless of the database collation
+            models.Index(fields=["search_title"], name="search_prefix_title", opclasses=["text_pattern_ops"]),
+            models.Index(fields=["object_type", "object_id"], name="search_prefix_object"),
+        ]
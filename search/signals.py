@@ -1,9 +1,23 @@
+from django.conf import settings
 from django.db import transaction
-from django.db.models.signals import m2m_changed, post_save
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from taggit.models import Tag
 
-from search.indexing import index
+from common.signals import bulk_saved
+from demoscene.models import Membership, Nick, NickVariant, Releaser
+from platforms.models import Platform, PlatformAlias
+from productions.models import Production, ProductionType
+from search.facets import expire_facet
+from search.indexing import (
+    SEARCH_PREFIX_OBJECT_TYPES,
+    delete_search_prefixes,
+    enqueue,
+    enqueue_search_prefixes,
+    index,
+    update_search_prefixes,
+)
 
 
 @receiver(post_save)
@@ -13,6 +27,14 @@ def on_save(sender, **kwargs):
     transaction.on_commit(make_updater(kwargs["instance"]))
 
 
+@receiver(bulk_saved)
+def on_bulk_saved(sender, objects, **kwargs):
+    if not hasattr(sender, "index_components"):
+        return
+    for instance in objects:
+        transaction.on_commit(make_updater(instance))
+
+
 @receiver(m2m_changed)
 def on_m2m_changed(sender, **kwargs):
     instance = kwargs["instance"]
@@ -27,7 +49,144 @@ def on_m2m_changed(sender, **kwargs):
 
 
 def make_updater(instance):
-    def on_commit():
-        index(instance)
+    if settings.SEARCH_INDEX_SYNCHRONOUS:
+
+        def on_commit():
+            index(instance)
+
+    else:
+        # add to the queue to be picked up by search.tasks.process_search_index_queue
+        def on_commit():
+            enqueue(instance)
 
     return on_commit
+
+
+# The live search table (search.models.SearchPrefix) is updated immediately within the transaction for
+# the object being saved, so that new names can be found straight away. Other objects whose results
+# display it are refreshed after commit, through the search index queue when that is enabled.
+
+
+def is_search_prefix_model(model):
+    return model._meta.label in SEARCH_PREFIX_OBJECT_TYPES
+
+
+def refresh_search_prefixes_on_commit(model, pks):
+    pks = set(pks)
+    if not pks:
+        return
+
+    if settings.SEARCH_INDEX_SYNCHRONOUS:
+
+        def on_commit():
+            update_search_prefixes(list(model.objects.filter(pk__in=pks)))
+
+    else:
+        # add to the queue to be picked up by search.tasks.process_search_index_queue
+        def on_commit():
+            enqueue_search_prefixes(model, pks)
+
+    transaction.on_commit(on_commit)
+
+
+@receiver(post_save)
+def update_search_prefixes_on_save(sender, instance, raw=False, **kwargs):
+    if not raw and is_search_prefix_model(sender):
+        update_search_prefixes(list(sender.objects.filter(pk=instance.pk)))
+
+
+@receiver(bulk_saved)
+def update_search_prefixes_on_bulk_save(sender, objects, **kwargs):
+    if is_search_prefix_model(sender):
+        update_search_prefixes(list(sender.objects.filter(pk__in=[obj.pk for obj in objects])))
+
+
+@receiver(post_delete)
+def delete_search_prefixes_on_delete(sender, instance, **kwargs):
+    if is_search_prefix_model(sender):
+        delete_search_prefixes(instance)
+
+
+@receiver(m2m_changed, sender=Production.author_nicks.through)
+@receiver(m2m_changed, sender=Production.author_affiliation_nicks.through)
+def update_search_prefixes_on_byline_change(sender, instance, action, reverse, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and not reverse:
+        update_search_prefixes(list(Production.objects.filter(pk=instance.pk)))
+
+
+def refresh_group_member_search_prefixes(group_id):
+    # members are shown with the names of their groups
+    refresh_search_prefixes_on_commit(
+        Releaser, Membership.objects.filter(group_id=group_id).values_list("member_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Releaser)
+def update_search_prefixes_on_group_change(sender, instance, raw=False, **kwargs):
+    if not raw and instance.is_group:
+        refresh_group_member_search_prefixes(instance.id)
+
+
+@receiver(post_save, sender=Nick)
+@receiver(post_delete, sender=Nick)
+def update_search_prefixes_on_nick_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    update_search_prefixes(list(Releaser.objects.filter(id=instance.releaser_id)))
+    # productions show the nick in their byline
+    refresh_search_prefixes_on_commit(
+        Production,
+        Production.objects.filter(
+            Q(author_nicks__id=instance.id) | Q(author_affiliation_nicks__id=instance.id)
+        ).values_list("id", flat=True),
+    )
+    if Releaser.objects.filter(id=instance.releaser_id, is_group=True).exists():
+        refresh_group_member_search_prefixes(instance.releaser_id)
+
+
+@receiver(post_save, sender=NickVariant)
+@receiver(post_delete, sender=NickVariant)
+def update_search_prefixes_on_nick_variant_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_prefixes(list(Releaser.objects.filter(nicks__id=instance.nick_id)))
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def update_search_prefixes_on_membership_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # the member's name is shown with its affiliations
+        update_search_prefixes(list(Releaser.objects.filter(id=instance.member_id)))
+
+
+# Discard the cached name lookups for search filter expressions (see search.facets) when names change
+
+
+@receiver(post_save, sender=Platform)
+@receiver(post_delete, sender=Platform)
+@receiver(post_save, sender=PlatformAlias)
+@receiver(post_delete, sender=PlatformAlias)
+def expire_platform_facet(sender, **kwargs):
+    expire_facet("platform")
+
+
+@receiver(post_save, sender=ProductionType)
+@receiver(post_delete, sender=ProductionType)
+def expire_production_type_facet(sender, **kwargs):
+    expire_facet("production_type")
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def expire_tag_facet(sender, **kwargs):
+    expire_facet("tag")
+
+
+@receiver(post_save, sender=Releaser)
+@receiver(post_delete, sender=Releaser)
+@receiver(post_save, sender=Nick)
+@receiver(post_delete, sender=Nick)
+@receiver(post_save, sender=NickVariant)
+@receiver(post_delete, sender=NickVariant)
+def expire_releaser_facet(sender, **kwargs):
+    expire_facet("releaser")
@@ -0,0 +1,19 @@
+import logging
+
+from celery import shared_task
+
+from search.indexing import get_index_queue_lag, process_index_queue
+
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def process_search_index_queue():
+    for model_label, (length, lag) in get_index_queue_lag().items():
+        if length:
+            logger.info("Search index queue for %s: %d items, oldest queued %.1fs ago" % (model_label, length, lag))
+
+    count = process_index_queue()
+    logger.info("Reindexed %d items from the search index queue" % count)
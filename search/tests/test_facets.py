@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import captured_stdout
+
+from demoscene.models import Nick
+from platforms.models import Platform
+from productions.models import Production
+from search.facets import get_platform_ids, get_production_type_ids, get_releasers_by_name, get_tag_ids
+from search.forms import SearchForm
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class TestFacets(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_platform_ids(self):
+        zx = Platform.objects.get(name="ZX Spectrum")
+        zx.aliases.create(name="Speccy")
+        self.assertEqual(get_platform_ids(["zx spectrum", "SPECCY"]), [zx.id])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_platform_ids(["speccy", "commodore 64"]), sorted([zx.id, 3]))
+        self.assertEqual(get_platform_ids(["nothing"]), [])
+
+    def test_production_type_ids(self):
+        self.assertEqual(get_production_type_ids(["demo", "Game"]), [1, 33])
+
+    def test_tag_ids(self):
+        self.assertEqual(get_tag_ids("fish"), [])
+        Production.objects.get(title="Pondlife").tags.add("fish")
+        self.assertEqual(len(get_tag_ids("fish")), 1)
+
+    def test_releasers_by_name(self):
+        self.assertEqual(sorted(get_releasers_by_name("ra")), [(2, True), (7, False)])
+        self.assertEqual(get_releasers_by_name("raa"), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_releasers_by_name("raa"), [])
+
+        nick = Nick.objects.get(name="Ra")
+        nick.variants.create(name="Raa")
+        self.assertEqual(get_releasers_by_name("raa"), [(nick.releaser_id, False)])
+
+    def test_filter_only_search(self):
+        form = SearchForm({"q": "by:gasman"})
+        self.assertTrue(form.is_valid())
+        results, page = form.search()
+        self.assertIn("Madrielle", [production.title for production in results])
+        self.assertNotIn("Pondlife", [production.title for production in results])
+
+
+class TestBenchmarkSearch(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def test_run(self):
+        with captured_stdout() as stdout:
+            call_command("benchmark_search", "by:gasman", "group:hooy-program", "--repeat", "1")
+
+        self.assertIn("by:gasman: 4 results", stdout.getvalue())
@@ -1,14 +1,152 @@
+import datetime
+from unittest.mock import patch
+
+import redis
+from django.conf import settings
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import captured_stdout
 
+from bbs.models import BBS
 from demoscene.models import Releaser
+from parties.models import Party
+from productions.models import Production
+from search.indexing import (
+    get_index_queue_lag,
+    get_prefix_queue_key,
+    get_queue_key,
+    index,
+    index_batch,
+    process_index_queue,
+    update_search_prefixes,
+)
+from search.models import SearchPrefix
+from search.tasks import process_search_index_queue
 
 
 class TestIndexing(TestCase):
     fixtures = ["tests/gasman.json"]
 
     def test_index(self):
-        call_command("reindex")
+        with captured_stdout():
+            call_command("reindex")
 
         gasman = Releaser.objects.get(name="Gasman")
         self.assertTrue(gasman.search_document)
+
+    def test_index_batch_matches_index(self):
+        for model in (BBS, Party, Releaser, Production):
+            instances = list(model.objects.order_by("pk"))
+            for instance in instances:
+                index(instance)
+            expected = dict(model.objects.values_list("pk", "search_document"))
+
+            model.objects.update(search_document=None)
+            index_batch(instances)
+            self.assertEqual(dict(model.objects.values_list("pk", "search_document")), expected)
+
+    def test_index_batch_empty(self):
+        index_batch([])
+
+    def test_since(self):
+        Production.objects.update(search_document=None)
+        pondlife = Production.objects.get(title="Pondlife")
+        pondlife.updated_at = datetime.datetime(2030, 1, 1)
+        pondlife.save()
+        Production.objects.update(search_document=None)
+
+        with captured_stdout():
+            call_command("reindex", since="2029-01-01")
+
+        self.assertTrue(Production.objects.get(title="Pondlife").search_document)
+        self.assertFalse(Production.objects.get(title="Mooncheese").search_document)
+
+
+class InProcessPool:
+    # stand-in for multiprocessing.Pool, so that workers can see the test transaction
+    def __init__(self, processes):
+        self.processes = processes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def imap_unordered(self, func, iterable):
+        return map(func, iterable)
+
+
+class TestParallelIndexing(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    @patch("search.management.commands.reindex.connections")
+    @patch("search.management.commands.reindex.CHUNK_SIZE", 2)
+    @patch("search.management.commands.reindex.multiprocessing.Pool", InProcessPool)
+    def test_workers(self, connections):
+        Releaser.objects.update(search_document=None)
+
+        with captured_stdout() as stdout:
+            call_command("reindex", workers=2)
+
+        connections.close_all.assert_called_once()
+        self.assertIn("demoscene.Releaser: indexed 10 records", stdout.getvalue())
+        self.assertFalse(Releaser.objects.filter(search_document__isnull=True).exists())
+
+
+@override_settings(SEARCH_INDEX_SYNCHRONOUS=False)
+class TestIndexQueue(TestCase):
+    fixtures = ["tests/gasman.json"]
+
+    def setUp(self):
+        self.redis = redis.StrictRedis.from_url(settings.REDIS_URL)
+        self.redis.delete(
+            get_queue_key("productions.Production"),
+            get_queue_key("demoscene.Releaser"),
+            get_prefix_queue_key("productions.Production"),
+        )
+
+    def test_queue(self):
+        pondlife = Production.objects.get(title="Pondlife")
+        Production.objects.update(search_document=None)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pondlife.save()
+            pondlife.tags.add("fish")
+
+        # saves are not indexed immediately, and repeated saves are coalesced
+        self.assertFalse(Production.objects.get(title="Pondlife").search_document)
+        self.assertEqual(self.redis.zcard(get_queue_key("productions.Production")), 1)
+        length, lag = get_index_queue_lag()["productions.Production"]
+        self.assertEqual(length, 1)
+        self.assertGreaterEqual(lag, 0)
+
+        self.assertEqual(process_index_queue(), 1)
+        self.assertTrue(Production.objects.get(title="Pondlife").search_document)
+        self.assertEqual(get_index_queue_lag()["productions.Production"], (0, 0))
+
+    def test_task(self):
+        gasman = Releaser.objects.get(name="Gasman")
+        Releaser.objects.update(search_document=None)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            gasman.save()
+
+        process_search_index_queue()
+        self.assertTrue(Releaser.objects.get(name="Gasman").search_document)
+        self.assertEqual(self.redis.zcard(get_queue_key("demoscene.Releaser")), 0)
+
+    def test_prefix_queue(self):
+        update_search_prefixes(list(Production.objects.all()))
+        gasman_nick = Releaser.objects.get(name="Gasman").primary_nick
+        with self.captureOnCommitCallbacks(execute=True):
+            gasman_nick.name = "Gasperson"
+            gasman_nick.save()
+
+        # productions credited to the nick are refreshed by the queue, not within the request
+        self.assertTrue(SearchPrefix.objects.filter(value__contains="Gasman", object_type="production").exists())
+        self.assertTrue(self.redis.zcard(get_prefix_queue_key("productions.Production")))
+
+        process_index_queue()
+        self.assertFalse(SearchPrefix.objects.filter(value__contains="Gasman", object_type="production").exists())
+        self.assertEqual(self.redis.zcard(get_prefix_queue_key("productions.Production")), 0)
@@ -1,9 +1,13 @@
+from django.apps import apps
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import captured_stdout
 from taggit.models import Tag, TaggedItem
 
 from demoscene.models import Nick, Releaser
+from parties.models import Party
 from productions.models import Production
+from search.indexing import INDEXED_MODELS, update_search_prefixes
 
 
 class TestSearch(TestCase):
@@ -14,7 +18,8 @@ class TestSearch(TestCase):
         gasman.notes = "Gasman once made a demo called Pondlife."
         gasman.save()
 
-        call_command("reindex")
+        with captured_stdout():
+            call_command("reindex")
 
         pondlife = Production.objects.get(title="Pondlife")
         pondlife.tags.add("fish")
@@ -266,6 +271,11 @@ class TestSearch(TestCase):
 class TestLiveSearch(TestCase):
     fixtures = ["tests/gasman.json"]
 
+    def setUp(self):
+        # fixtures are loaded without building the live search records
+        for model_label in INDEXED_MODELS:
+            update_search_prefixes(list(apps.get_model(model_label).objects.all()))
+
     def test_get(self):
         pondlife = Production.objects.get(title="Pondlife")
         pondlife.screenshots.create(thumbnail_url="http://example.com/pondlife.thumb.png")
@@ -274,6 +284,68 @@ class TestLiveSearch(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Pondlife")
 
+    def test_result_data(self):
+        pondlife = Production.objects.get(title="Pondlife")
+        pondlife.screenshots.create(
+            thumbnail_url="http://example.com/pondlife.thumb.png", thumbnail_width=64, thumbnail_height=48
+        )
+
+        response = self.client.get("/search/live/?q=pondli")
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "type": "production",
+                    "url": "/productions/%d/" % pondlife.id,
+                    "value": "Pondlife - Hooy-Program + Raww Arse",
+                    "thumbnail": {
+                        "url": "http://example.com/pondlife.thumb.png",
+                        "width": 48,
+                        "height": 36,
+                        "natural_width": 64,
+                        "natural_height": 48,
+                    },
+                }
+            ],
+        )
+
+    def test_releaser_listed_once(self):
+        gasman = Releaser.objects.get(name="Gasman")
+        gasman.nicks.create(name="Gasmanic")
+        response = self.client.get("/search/live/?q=gasm&category=scener")
+        self.assertEqual([result["value"] for result in response.json()], ["Gasman / RA ^ H-Prg"])
+
+    def test_rename(self):
+        party = Party.objects.get(name="Forever 2e3")
+        party.name = "Forever 2000"
+        party.save()
+        response = self.client.get("/search/live/?q=forever+2")
+        self.assertEqual([result["value"] for result in response.json()], ["Forever 2000"])
+
+        party.delete()
+        response = self.client.get("/search/live/?q=forever+2")
+        self.assertEqual(response.json(), [])
+
+    def test_group_rename(self):
+        primary_nick = Releaser.objects.get(name="Hooy-Program").primary_nick
+        with self.captureOnCommitCallbacks(execute=True):
+            # renames the group too
+            primary_nick.name = "Hooy-Programme"
+            primary_nick.save()
+
+        response = self.client.get("/search/live/?q=yerzm&category=scener")
+        self.assertEqual([result["value"] for result in response.json()], ["Yerzmyey / Hooy-Programme"])
+        response = self.client.get("/search/live/?q=pondli")
+        self.assertEqual(response.json()[0]["value"], "Pondlife - Hooy-Programme + Raww Arse")
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_short_prefix_cached(self):
+        response = self.client.get("/search/live/?q=gas")
+        self.assertContains(response, "Gasman")
+        with self.assertNumQueries(0):
+            response = self.client.get("/search/live/?q=gas")
+        self.assertContains(response, "Gasman")
+
     def test_get_music(self):
         response = self.client.get("/search/live/?q=cybern&category=music")
         self.assertEqual(response.status_code, 200)
@@ -28,6 +28,9 @@ class Tournament(models.Model):
     def get_absolute_url(self):
         return self.party.get_absolute_url() + ("#tournament_%d" % self.id)
 
+    def fragment_cache_dependents(self):
+        return [("parties.party", [self.party_id])]
+
     @property
     def livecode_url(self):
         html_file_name = re.sub(r"\.json$", ".html", self.source_file_name)
@@ -42,6 +45,9 @@ class TournamentExternalLink(ExternalLink):
     def subject(self):
         return "%s %s" % (self.tournament.party.name, self.tournament.name)
 
+    def fragment_cache_dependents(self):
+        return [("parties.party", [self.tournament.party_id])]
+
     class Meta:
         unique_together = (("link_class", "parameter", "tournament"),)
         ordering = ["link_class"]
@@ -73,6 +79,9 @@ class Phase(models.Model):
         else:
             return "%s %s" % (self.tournament.party.name, self.tournament.name)
 
+    def fragment_cache_dependents(self):
+        return [("parties.party", [self.tournament.party_id])]
+
 
 class PhaseExternalLink(ExternalLink):
     phase = models.ForeignKey(Phase, related_name="external_links", on_delete=models.CASCADE)
@@ -82,6 +91,9 @@ class PhaseExternalLink(ExternalLink):
     def subject(self):
         return self.phase.party_scoped_name
 
+    def fragment_cache_dependents(self):
+        return [("parties.party", [self.phase.tournament.party_id])]
+
     class Meta:
         unique_together = (("link_class", "parameter", "phase"),)
         ordering = ["link_class"]
@@ -111,6 +123,9 @@ class Entry(ThumbnailMixin, models.Model):
     def __str__(self) -> str:
         return self.author_name
 
+    def fragment_cache_dependents(self):
+        return [("parties.party", [self.phase.tournament.party_id])]
+
     def set_screenshot(self, filename):
         f = open(filename, "rb")
         sha1 = hashlib.sha1(f.read()).hexdigest()
@@ -177,6 +192,9 @@ class EntryExternalLink(ExternalLink):
     def subject(self):
         return self.entry.party_scoped_name
 
+    def fragment_cache_dependents(self):
+        return [("parties.party", [self.entry.phase.tournament.party_id])]
+
     class Meta:
         unique_together = (("link_class", "parameter", "entry"),)
         ordering = ["link_class"]
@@ -198,3 +216,6 @@ class PhaseStaffMember(models.Model):
 
     class Meta:
         ordering = ["role"]
+
+    def fragment_cache_dependents(self):
+        return [("parties.party", [self.phase.tournament.party_id])]
@@ -279,7 +279,7 @@ def author(request, releaser_id):
         releaser.group_memberships.select_related("group"), releaser_table="T3"
     )
 
-    release_author_filter = Q(author_nicks__releaser=releaser) | Q(author_affiliation_nicks__releaser=releaser)
+    release_author_filter = Q(releaser_roles__releaser=releaser, releaser_roles__role__in=["author", "affiliation"])
     releases = (
         Production.objects.filter(release_author_filter, platforms__id__in=ZXDEMO_PLATFORM_IDS)
         .order_by("release_date_date")